@@ -1,15 +1,154 @@
 """Admin panel settings for the app_dogs."""
 
+from collections.abc import Callable
+
 from app_dogs.models import Breed, Dog
-from django.contrib import admin
+from app_dogs.utils.bulk import (
+    count_breed_dogs,
+    delete_dogs,
+    merge_breeds,
+    update_rows,
+)
+from app_dogs.utils.choises import GenderChioce
+from app_dogs.utils.profiling import profile_store
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.db.models.query import QuerySet
+from django.http import Http404, HttpRequest
+from django.template.response import TemplateResponse
+from django.urls import path
+
+BULK_APPLY = "apply"
+
+
+class ReassignBreedForm(forms.Form):
+    """Form of the new breed of dogs."""
+
+    breed = forms.ModelChoiceField(
+        queryset=Breed.objects.order_by("name"),
+        required=False,
+        empty_label="No breed",
+    )
+
+
+class SetGenderForm(forms.Form):
+    """Form of the new gender of dogs."""
+
+    gender = forms.ChoiceField(choices=GenderChioce.choices)
+
+
+class SetColorForm(forms.Form):
+    """Form of the new color of dogs."""
+
+    color = forms.CharField(max_length=255)
+
+
+class MergeBreedsForm(forms.Form):
+    """Form of the breed keeping the dogs of the merged breeds."""
+
+    target = forms.ModelChoiceField(
+        queryset=Breed.objects.none(),
+        widget=forms.RadioSelect,
+        empty_label=None,
+        label="Merge into",
+    )
+
+    def __init__(self, *args, breeds: QuerySet[Breed], **kwargs) -> None:
+        """
+        Initialize the form with the merged breeds as the choices.
+
+        Args:
+            args: Positional arguments of the form.
+            breeds (QuerySet[Breed]): Merged breeds.
+            kwargs: Keyword arguments of the form.
+        """
+        super().__init__(*args, **kwargs)
+        self.fields["target"].queryset = breeds.order_by("name")
+
+
+class BulkActionMixin:
+    """
+    Admin actions confirmed on an intermediate page with their form.
+
+    The page shows how many rows are affected and posts the selection
+    back with the form. The action is applied only after the form is
+    submitted and valid.
+    """
+
+    def run_bulk_action(
+        self,
+        request: HttpRequest,
+        form: forms.Form,
+        apply: Callable[[dict], str],
+        preview: Callable[[], dict],
+    ) -> TemplateResponse | None:
+        """
+        Show the intermediate page or apply the submitted action.
+
+        Args:
+            request (HttpRequest): Django request of the action.
+            form (forms.Form): Form of the action, bound to the POST
+                data if it was submitted.
+            apply (Callable[[dict], str]): Function applying the action
+                by the cleaned data of the form and returning a message.
+            preview (Callable[[], dict]): Function getting the context
+                of the affected rows, called only to show the page.
+
+        Returns:
+            TemplateResponse | None: Intermediate page or None to
+                return to the change list.
+        """
+        if form.is_bound and form.is_valid():
+            self.message_user(
+                request, apply(form.cleaned_data), messages.SUCCESS
+            )
+            return None
+
+        action: str = request.POST["action"]
+        _, _, description = self.get_actions(request)[action]
+        return TemplateResponse(
+            request,
+            "admin/app_dogs/bulk_action.html",
+            {
+                **self.admin_site.each_context(request),
+                "title": description,
+                "opts": self.opts,
+                "form": form,
+                "action": action,
+                "select_across": request.POST.get("select_across", "0"),
+                "selected": request.POST.getlist(ACTION_CHECKBOX_NAME),
+                "action_checkbox_name": ACTION_CHECKBOX_NAME,
+                "apply_name": BULK_APPLY,
+                **preview(),
+            },
+        )
+
+
+def get_form_data(request: HttpRequest) -> dict | None:
+    """
+    Get the data of the submitted form of the bulk action.
+
+    Args:
+        request (HttpRequest): Django request of the action.
+
+    Returns:
+        dict | None: POST data or None on the first request from
+            the change list.
+    """
+    return request.POST if BULK_APPLY in request.POST else None
 
 
 @admin.register(Dog)
-class DogAdmin(admin.ModelAdmin):
+class DogAdmin(BulkActionMixin, admin.ModelAdmin):
     """
     Dog Model representation in the admin panel of the site.
 
+    The default delete action is replaced by the bulk one: it loads
+    every dog to list them before deleting.
+
     Args:
+        BulkActionMixin: Bulk actions confirmed on a page.
         admin.ModelAdmin: Django model for the set up in the admin panel.
     """
 
@@ -24,14 +163,149 @@ class DogAdmin(admin.ModelAdmin):
         "name",
     )
     ordering = ("id",)
+    actions = ("reassign_breed", "set_gender", "set_color", "delete_dogs")
+
+    def get_actions(self, request: HttpRequest) -> dict:
+        """
+        Get the available actions without the default delete action.
+
+        Args:
+            request (HttpRequest): Django request.
+
+        Returns:
+            dict: Actions by names.
+        """
+        actions: dict = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
+
+    def run_dog_update(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet[Dog],
+        form: forms.Form,
+    ) -> TemplateResponse | None:
+        """
+        Set the fields of the form to the dogs by one UPDATE.
+
+        Args:
+            request (HttpRequest): Django request of the action.
+            queryset (QuerySet[Dog]): Selected dogs.
+            form (forms.Form): Form with the new values.
+
+        Returns:
+            TemplateResponse | None: Intermediate page or None.
+        """
+        return self.run_bulk_action(
+            request,
+            form,
+            lambda data: f"Changed {update_rows(queryset, **data)} dogs.",
+            lambda: {"count": queryset.count()},
+        )
+
+    @admin.action(
+        description="Reassign selected dogs to a breed",
+        permissions=["change"],
+    )
+    def reassign_breed(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet[Dog],
+    ) -> TemplateResponse | None:
+        """
+        Set the breed of the selected dogs.
+
+        Args:
+            request (HttpRequest): Django request of the action.
+            queryset (QuerySet[Dog]): Selected dogs.
+
+        Returns:
+            TemplateResponse | None: Intermediate page or None.
+        """
+        return self.run_dog_update(
+            request, queryset, ReassignBreedForm(get_form_data(request))
+        )
+
+    @admin.action(
+        description="Set the gender of selected dogs",
+        permissions=["change"],
+    )
+    def set_gender(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet[Dog],
+    ) -> TemplateResponse | None:
+        """
+        Set the gender of the selected dogs.
+
+        Args:
+            request (HttpRequest): Django request of the action.
+            queryset (QuerySet[Dog]): Selected dogs.
+
+        Returns:
+            TemplateResponse | None: Intermediate page or None.
+        """
+        return self.run_dog_update(
+            request, queryset, SetGenderForm(get_form_data(request))
+        )
+
+    @admin.action(
+        description="Set the color of selected dogs",
+        permissions=["change"],
+    )
+    def set_color(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet[Dog],
+    ) -> TemplateResponse | None:
+        """
+        Set the color of the selected dogs.
+
+        Args:
+            request (HttpRequest): Django request of the action.
+            queryset (QuerySet[Dog]): Selected dogs.
+
+        Returns:
+            TemplateResponse | None: Intermediate page or None.
+        """
+        return self.run_dog_update(
+            request, queryset, SetColorForm(get_form_data(request))
+        )
+
+    @admin.action(
+        description="Delete selected dogs",
+        permissions=["delete"],
+    )
+    def delete_dogs(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet[Dog],
+    ) -> TemplateResponse | None:
+        """
+        Delete the selected dogs by one DELETE.
+
+        Args:
+            request (HttpRequest): Django request of the action.
+            queryset (QuerySet[Dog]): Selected dogs.
+
+        Returns:
+            TemplateResponse | None: Intermediate page or None.
+        """
+        return self.run_bulk_action(
+            request,
+            forms.Form(get_form_data(request)),
+            lambda _: f"Deleted {delete_dogs(queryset)} dogs.",
+            lambda: {"count": queryset.count()},
+        )
 
 
 @admin.register(Breed)
-class BreedAdmin(admin.ModelAdmin):
+class BreedAdmin(BulkActionMixin, admin.ModelAdmin):
     """
     Breed Model representation in the admin panel of the site.
 
     Args:
+        BulkActionMixin: Bulk actions confirmed on a page.
         admin.ModelAdmin: Django model for the set up in the admin panel.
     """
 
@@ -45,3 +319,113 @@ class BreedAdmin(admin.ModelAdmin):
         "name",
     )
     ordering = ("id",)
+    actions = ("merge_breeds",)
+
+    @admin.action(
+        description="Merge selected breeds into one",
+        permissions=["change", "delete"],
+    )
+    def merge_breeds(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet[Breed],
+    ) -> TemplateResponse | None:
+        """
+        Move the dogs of the selected breeds to one of them.
+
+        Args:
+            request (HttpRequest): Django request of the action.
+            queryset (QuerySet[Breed]): Selected breeds.
+
+        Returns:
+            TemplateResponse | None: Intermediate page or None.
+        """
+
+        def apply(data: dict) -> str:
+            moved, deleted = merge_breeds(data["target"], queryset)
+            return (
+                f"Moved {moved} dogs to '{data['target'].name}', "
+                f"deleted {deleted} breeds."
+            )
+
+        def preview() -> dict:
+            counts: dict[int, int] = count_breed_dogs(queryset)
+            return {
+                "breeds": [
+                    (breed, counts.get(breed.id, 0))
+                    for breed in queryset.order_by("name")
+                ]
+            }
+
+        return self.run_bulk_action(
+            request,
+            MergeBreedsForm(get_form_data(request), breeds=queryset),
+            apply,
+            preview,
+        )
+
+
+def profile_list_view(request: HttpRequest) -> TemplateResponse:
+    """
+    Show the saved profiles of requests from the newest one.
+
+    Args:
+        request (HttpRequest): Django request.
+
+    Returns:
+        TemplateResponse: Page with the list of profiles.
+    """
+    return TemplateResponse(
+        request,
+        "admin/app_dogs/profile_list.html",
+        {
+            **admin.site.each_context(request),
+            "title": "Request profiles",
+            "records": profile_store.list(),
+        },
+    )
+
+
+def profile_detail_view(
+    request: HttpRequest,
+    record_id: str,
+) -> TemplateResponse:
+    """
+    Show the saved profile of a request.
+
+    Args:
+        request (HttpRequest): Django request.
+        record_id (str): Id of the profile.
+
+    Raises:
+        Http404: The profile doesn't exist or has been rotated out.
+
+    Returns:
+        TemplateResponse: Page with the profile.
+    """
+    record: dict | None = profile_store.get(record_id)
+    if record is None:
+        raise Http404("The profile doesn't exist.")
+    return TemplateResponse(
+        request,
+        "admin/app_dogs/profile_detail.html",
+        {
+            **admin.site.each_context(request),
+            "title": f"Profile of {record['method']} {record['path']}",
+            "record": record,
+        },
+    )
+
+
+profile_urlpatterns = [
+    path(
+        "",
+        admin.site.admin_view(profile_list_view),
+        name="profile-list",
+    ),
+    path(
+        "<str:record_id>/",
+        admin.site.admin_view(profile_detail_view),
+        name="profile-detail",
+    ),
+]
@@ -13,3 +13,7 @@ class AppDogsConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "app_dogs"
+
+    def ready(self) -> None:
+        """Connect the signal receivers of the app."""
+        from app_dogs import signals  # noqa: F401
@@ -0,0 +1,148 @@
+"""Management command to benchmark the access log of requests."""
+
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import TextIO
+
+from app_dogs.models import Dog
+from app_dogs.utils.accesslog import (
+    ACCESS_LOGGER,
+    AccessLogHandler,
+    JsonFormatter,
+)
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+
+class SlowStream:
+    """
+    File stream paying a delay for every write, as a slow disk or pipe.
+
+    Args:
+        stream (TextIO): Stream of the file.
+        delay (float): Delay of a write in seconds.
+    """
+
+    def __init__(self, stream: TextIO, delay: float) -> None:
+        """Initialize the stream."""
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, text: str) -> int:
+        """
+        Wait and write the text.
+
+        Args:
+            text (str): Text to write.
+
+        Returns:
+            int: Number of written characters.
+        """
+        time.sleep(self.delay)
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        """Flush the file."""
+        self.stream.flush()
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Measure the latency of a cheap API request without the access "
+        "log, with a synchronous handler writing in the request thread "
+        "and with the queued handler, to a file and to a slow sink. "
+        "The handlers take turns."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument(
+            "--sink-delay", type=float, default=1, help="Slow write in ms."
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        dog_id: int = Dog.objects.values_list("id", flat=True).first()
+        url: str = f"/api/dogs/{dog_id}/"
+        client = APIClient(SERVER_NAME="localhost")
+        logger: logging.Logger = logging.getLogger(ACCESS_LOGGER)
+        delay: float = options["sink_delay"] / 1000
+
+        with tempfile.TemporaryDirectory() as directory:
+            files: dict[str, TextIO] = {
+                name: open(Path(directory) / f"{name}.log", "a")
+                for name in ("sync", "sync slow", "queued", "queued slow")
+            }
+            # without the log and timed without handlers
+            handlers: dict[str, logging.Handler | None] = {
+                "off": None,
+                "none": None,
+                "sync": logging.StreamHandler(files["sync"]),
+                "sync slow": logging.StreamHandler(
+                    SlowStream(files["sync slow"], delay)
+                ),
+                "queued": AccessLogHandler(stream=files["queued"]),
+                "queued slow": AccessLogHandler(
+                    stream=SlowStream(files["queued slow"], delay)
+                ),
+            }
+            for handler in handlers.values():
+                if handler is not None:
+                    handler.setFormatter(JsonFormatter())
+
+            times: dict[str, list[float]] = {name: [] for name in handlers}
+            saved: list[logging.Handler] = logger.handlers
+            enabled: dict = {**settings.ACCESS_LOG, "ENABLED": True}
+            disabled: dict = {**settings.ACCESS_LOG, "ENABLED": False}
+            try:
+                with override_settings(ACCESS_LOG=enabled):
+                    for _ in range(options["requests"]):
+                        for name, handler in handlers.items():
+                            settings.ACCESS_LOG = (
+                                disabled if name == "off" else enabled
+                            )
+                            logger.handlers = (
+                                [] if handler is None else [handler]
+                            )
+                            started: float = time.perf_counter()
+                            client.get(url)
+                            times[name].append(time.perf_counter() - started)
+            finally:
+                logger.handlers = saved
+                for handler in handlers.values():
+                    if handler is not None:
+                        handler.close()
+                for file in files.values():
+                    file.close()
+
+        base: float = statistics.median(times["off"])
+        self.stdout.write(
+            f"{'handler':<13}{'median, us':>12}{'p99, us':>10}"
+            f"{'overhead, us':>14}{'dropped':>9}"
+        )
+        for name, handler_times in times.items():
+            handler_times.sort()
+            median: float = statistics.median(handler_times)
+            p99: float = handler_times[int(len(handler_times) * 0.99)]
+            handler = handlers[name]
+            dropped: str = (
+                str(handler.stats["dropped"])
+                if isinstance(handler, AccessLogHandler)
+                else "-"
+            )
+            self.stdout.write(
+                f"{name:<13}{median * 1e6:>12.1f}{p99 * 1e6:>10.1f}"
+                f"{(median - base) * 1e6:>14.1f}{dropped:>9}"
+            )
@@ -0,0 +1,180 @@
+"""Management command to load test the admission control of requests."""
+
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+
+from app_dogs.management.commands.benchclient import NetworkHandler
+from app_dogs.utils.admission import SHED_DETAIL, admission_control
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.core.servers.basehttp import ThreadedWSGIServer
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+from dogs_client import ApiError, DogsClient, RetryPolicy
+
+# clients give up on the first failure
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Load the dogs list served in this process by closed loops of "
+        "clients giving up after a timeout, without the admission "
+        "control, with the static limits and with the adaptive ones. "
+        "Goodput counts the pages received in time."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument(
+            "--clients", type=int, nargs="+", default=[1, 4, 16, 48]
+        )
+        parser.add_argument("--seconds", type=float, default=10)
+        parser.add_argument(
+            "--timeout", type=float, default=2, help="Client timeout in s."
+        )
+        parser.add_argument("--pages", type=int, default=1000)
+
+    def run_load(self, clients: int, options: dict) -> dict:
+        """
+        Run the clients for the given time.
+
+        Args:
+            clients (int): Number of clients.
+            options (dict): Command options.
+
+        Returns:
+            dict: Outcome counters and latencies of the pages.
+        """
+        outcomes: Counter = Counter()
+        latencies: list[float] = []
+        lock = threading.Lock()
+        stop_at: float = time.monotonic() + options["seconds"]
+
+        def run_client() -> None:
+            client = DogsClient(
+                self.base_url, timeout=options["timeout"], retry=NO_RETRY
+            )
+            with client:
+                while time.monotonic() < stop_at:
+                    page: int = random.randint(1, options["pages"])
+                    started: float = time.monotonic()
+                    try:
+                        client.request("GET", "dogs/", params={"page": page})
+                        outcome = "ok"
+                    except ApiError as error:
+                        outcome = (
+                            "shed"
+                            if error.body == {"detail": SHED_DETAIL}
+                            else f"error {error.status}"
+                        )
+                    except OSError:
+                        outcome = "timeout"
+                    elapsed: float = time.monotonic() - started
+                    with lock:
+                        outcomes[outcome] += 1
+                        if outcome == "ok":
+                            latencies.append(elapsed)
+                    if outcome == "shed":
+                        # a client backs off as 'Retry-After' asks
+                        time.sleep(0.1)
+
+        threads: list[threading.Thread] = [
+            threading.Thread(target=run_client) for _ in range(clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {"outcomes": outcomes, "latencies": latencies}
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        server = ThreadedWSGIServer(("localhost", 0), NetworkHandler)
+        server.set_app(get_wsgi_application())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.base_url = f"http://localhost:{server.server_port}"
+
+        base: dict = settings.ADMISSION_CONTROL
+        modes: dict[str, dict] = {
+            "off": {**base, "ENABLED": False},
+            "static": {
+                **base,
+                "ENABLED": True,
+                "ADAPTIVE": {**base["ADAPTIVE"], "ENABLED": False},
+            },
+            "adaptive": {
+                **base,
+                "ENABLED": True,
+                "ADAPTIVE": {**base["ADAPTIVE"], "ENABLED": True},
+            },
+        }
+        self.stdout.write(
+            f"{'mode':<10}{'clients':>8}{'goodput/s':>11}{'p50, ms':>9}"
+            f"{'p99, ms':>9}{'shed/s':>8}{'timeout/s':>11}{'error/s':>9}"
+            f"{'limit':>7}"
+        )
+        try:
+            for mode, mode_settings in modes.items():
+                for clients in options["clients"]:
+                    with override_settings(ADMISSION_CONTROL=mode_settings):
+                        result: dict = self.run_load(clients, options)
+                        metrics: dict = admission_control.get_metrics().get(
+                            "aggregate", {}
+                        )
+                    self.write_result(mode, clients, result, metrics, options)
+                    # let the server finish the requests given up on
+                    time.sleep(options["timeout"])
+        finally:
+            server.shutdown()
+
+    def write_result(
+        self,
+        mode: str,
+        clients: int,
+        result: dict,
+        metrics: dict,
+        options: dict,
+    ) -> None:
+        """
+        Print the rates of the run.
+
+        Args:
+            mode (str): Mode of the admission control.
+            clients (int): Number of clients.
+            result (dict): Outcome counters and latencies of the pages.
+            metrics (dict): Metrics of the 'aggregate' class.
+            options (dict): Command options.
+        """
+        seconds: float = options["seconds"]
+        outcomes: Counter = result["outcomes"]
+        latencies: list[float] = sorted(result["latencies"])
+        p50, p99 = (
+            (
+                statistics.median(latencies) * 1000,
+                latencies[int(len(latencies) * 0.99)] * 1000,
+            )
+            if latencies
+            else (0.0, 0.0)
+        )
+        errors: int = sum(
+            count
+            for outcome, count in outcomes.items()
+            if outcome.startswith("error")
+        )
+        limit: str = "-" if mode == "off" else str(metrics.get("limit", "-"))
+        self.stdout.write(
+            f"{mode:<10}{clients:>8}{outcomes['ok'] / seconds:>11.1f}"
+            f"{p50:>9.0f}{p99:>9.0f}{outcomes['shed'] / seconds:>8.1f}"
+            f"{outcomes['timeout'] / seconds:>11.1f}"
+            f"{errors / seconds:>9.1f}{limit:>7}"
+        )
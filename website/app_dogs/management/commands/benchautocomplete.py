@@ -0,0 +1,83 @@
+"""Management command to benchmark the autocomplete of breed names."""
+
+import statistics
+import time
+from collections.abc import Callable
+
+from app_dogs.models import Breed
+from app_dogs.utils.autocomplete import BreedNameIndex, breed_name_index_cache
+from app_dogs.views import BreedViewSet
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Count
+from rest_framework.test import APIRequestFactory
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Measure the autocomplete of breed names: the load of the index, "
+        "the search in it, the API request and the same search in SQL."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument("--repeat", type=int, default=200)
+        parser.add_argument("--queries", nargs="+", default=["b", "b12"])
+
+    def measure(self, run: Callable[[], object]) -> float:
+        """
+        Get the median time of the call.
+
+        Args:
+            run (Callable[[], object]): Measured call.
+
+        Returns:
+            float: Median time in milliseconds.
+        """
+        times: list[float] = []
+        for _ in range(self.repeat):
+            started: float = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - started)
+        return statistics.median(times) * 1000
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        self.repeat: int = options["repeat"]
+        started: float = time.perf_counter()
+        index: BreedNameIndex = BreedNameIndex.load()
+        load: float = (time.perf_counter() - started) * 1000
+        self.stdout.write(f"breeds: {len(index)}, load: {load:.1f} ms")
+
+        breed_name_index_cache.get()
+        view = BreedViewSet.as_view({"get": "autocomplete"})
+        factory = APIRequestFactory(SERVER_NAME="localhost")
+
+        self.stdout.write(
+            f"{'query':<8}{'index, ms':>11}{'request, ms':>13}{'SQL, ms':>10}"
+        )
+        for query in options["queries"]:
+            search: float = self.measure(
+                lambda query=query: index.search(query, 10)
+            )
+            request: float = self.measure(
+                lambda query=query: view(
+                    factory.get("/api/breeds/autocomplete/", {"q": query})
+                ).render()
+            )
+            sql: float = self.measure(
+                lambda query=query: list(
+                    Breed.objects.filter(name__istartswith=query)
+                    .annotate(dog_count=Count("dogs"))
+                    .order_by("-dog_count", "name")
+                    .values("id", "name", "dog_count")[:10]
+                )
+            )
+            self.stdout.write(
+                f"{query:<8}{search:>11.3f}{request:>13.3f}{sql:>10.1f}"
+            )
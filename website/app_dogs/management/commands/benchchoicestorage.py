@@ -0,0 +1,127 @@
+"""Management command to compare storage of choices as text and codes."""
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+
+# the same layout as app_dogs_dog, only the type of gender differs
+CREATE_TABLE_SQL = """
+CREATE TEMPORARY TABLE {table} (
+    id bigint PRIMARY KEY,
+    name varchar(255) NOT NULL,
+    age smallint NOT NULL,
+    breed_id bigint,
+    gender {gender_type} NOT NULL,
+    color varchar(255) NOT NULL,
+    favorite_food varchar(255),
+    favorite_toy varchar(255)
+)
+"""
+SEED_SQL = """
+INSERT INTO {table}
+SELECT
+    i,
+    'dog ' || i,
+    i % 20,
+    i % 500 + 1,
+    {gender_value},
+    (ARRAY['black', 'white', 'brown', 'red'])[i % 4 + 1],
+    NULL,
+    NULL
+FROM generate_series(1, {count}) AS i
+"""
+LAYOUTS: dict[str, tuple[str, str]] = {
+    "varchar": (
+        "varchar(6)",
+        "CASE WHEN i % 2 = 0 THEN 'male' ELSE 'female' END",
+    ),
+    "smallint": ("smallint", "i % 2"),
+}
+QUERIES: dict[str, str] = {
+    "filter scan": "SELECT count(*) FROM {table} WHERE gender = {value}",
+    "group by": "SELECT gender, count(*) FROM {table} GROUP BY gender",
+    "index scan": (
+        "SELECT count(*) FROM {table} "
+        "WHERE breed_id = 7 AND gender = {value}"
+    ),
+}
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Seed temporary tables shaped as app_dogs_dog with the gender "
+        "stored as varchar and as smallint. Report table and index sizes "
+        "and query times."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument("--dogs", type=int, default=1_000_000)
+        parser.add_argument("--repeat", type=int, default=7)
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        results: dict[str, dict[str, float]] = {}
+        with connection.cursor() as cursor:
+            for layout, (gender_type, gender_value) in LAYOUTS.items():
+                table = f"bench_dog_{layout}"
+                cursor.execute(
+                    CREATE_TABLE_SQL.format(
+                        table=table, gender_type=gender_type
+                    )
+                )
+                cursor.execute(
+                    SEED_SQL.format(
+                        table=table,
+                        gender_value=gender_value,
+                        count=int(options["dogs"]),
+                    )
+                )
+                cursor.execute(
+                    f"CREATE INDEX ON {table} (breed_id, gender)",
+                )
+                cursor.execute(f"VACUUM ANALYZE {table}")
+                cursor.execute(
+                    "SELECT pg_table_size(%s), pg_indexes_size(%s)",
+                    (table, table),
+                )
+                table_size, indexes_size = cursor.fetchone()
+                results[layout] = {
+                    "table MB": table_size / 2**20,
+                    "indexes MB": indexes_size / 2**20,
+                }
+
+                value = "'female'" if layout == "varchar" else "1"
+                for name, query in QUERIES.items():
+                    sql: str = query.format(table=table, value=value)
+                    elapsed: list[float] = []
+                    for _ in range(options["repeat"]):
+                        started: float = time.perf_counter()
+                        cursor.execute(sql)
+                        cursor.fetchall()
+                        elapsed.append(time.perf_counter() - started)
+                    results[layout][f"{name} ms"] = (
+                        statistics.median(elapsed) * 1000
+                    )
+
+                cursor.execute(f"DROP TABLE {table}")
+
+        self.stdout.write(f"dogs: {options['dogs']}")
+        self.stdout.write(
+            f"{'':<16}" + "".join(f"{layout:>10}" for layout in LAYOUTS)
+        )
+        for metric in results["varchar"]:
+            self.stdout.write(
+                f"{metric:<16}"
+                + "".join(
+                    f"{results[layout][metric]:>10.2f}" for layout in LAYOUTS
+                )
+            )
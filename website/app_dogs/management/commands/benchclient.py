@@ -0,0 +1,252 @@
+"""Management command to benchmark the Python client of the API."""
+
+import asyncio
+import json
+import threading
+import time
+import urllib.request
+from collections.abc import Callable, Iterable
+from itertools import islice
+
+from app_dogs.models import Breed, Dog
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandParser
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from dogs_client import AsyncDogsClient, DogsClient
+
+
+class NetworkHandler(WSGIRequestHandler):
+    """
+    Request handler paying a round trip for a new connection.
+
+    Args:
+        WSGIRequestHandler: Django request handler of the dev server.
+    """
+
+    # round trip of the TCP handshake in seconds
+    latency = 0.0
+
+    # the handler writes the headers and the body of a response apart,
+    # with Nagle's algorithm the body waits for the delayed ACK of
+    # the client on a kept alive connection, as production servers do
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        """Wait for the handshake and set up the connection."""
+        time.sleep(self.latency)
+        super().setup()
+
+    def log_message(self, *args) -> None:
+        """Skip the log of the request."""
+
+
+class DelayedApplication:
+    """
+    WSGI application answering after a round trip of the request.
+
+    Args:
+        application (WSGIHandler): Django application.
+        delay (float): Round trip of a request in seconds.
+    """
+
+    def __init__(self, application: WSGIHandler, delay: float) -> None:
+        """Initialize the application."""
+        self.application = application
+        self.delay = delay
+
+    def __call__(self, environ: dict, start_response: Callable) -> Iterable:
+        """
+        Wait and handle the request.
+
+        Args:
+            environ (dict): WSGI environment.
+            start_response (Callable): WSGI callback of the response.
+
+        Returns:
+            Iterable: Body of the response.
+        """
+        time.sleep(self.delay)
+        return self.application(environ, start_response)
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Measure requests to the API served in this process with round "
+        "trips of a network: a new connection per request against "
+        "the sync and asyncio clients with kept alive connections, "
+        "prefetched pages of dogs and parallel batches of creates."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument("--gets", type=int, default=500)
+        parser.add_argument("--pages", type=int, default=50)
+        parser.add_argument("--creates", type=int, default=500)
+        parser.add_argument("--prefetch", type=int, default=4)
+        parser.add_argument(
+            "--latency", type=float, default=20, help="Round trip in ms."
+        )
+
+    def measure(self, name: str, run: Callable[[], int]) -> None:
+        """
+        Print the time of the run.
+
+        Args:
+            name (str): Name of the run.
+            run (Callable[[], int]): Run returning the number of objects.
+        """
+        started: float = time.perf_counter()
+        count: int = run()
+        elapsed: float = time.perf_counter() - started
+        self.stdout.write(
+            f"{name:<28}{count:>8}{elapsed:>10.2f}{count / elapsed:>10.0f}"
+        )
+
+    def urlopen(self, path: str, data: dict | None = None) -> dict:
+        """
+        Send the request over a new connection.
+
+        Args:
+            path (str): Path of the request.
+            data (dict | None): JSON body of a POST request.
+
+        Returns:
+            dict: Decoded JSON body of the response.
+        """
+        request = urllib.request.Request(
+            f"{self.base_url}{path}",
+            data=None if data is None else json.dumps(data).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+
+    def read_sync(self, pages: int, prefetch: int) -> int:
+        """
+        Read the pages of dogs by the sync client.
+
+        Args:
+            pages (int): Number of pages.
+            prefetch (int): Number of pages requested ahead.
+
+        Returns:
+            int: Number of dogs read.
+        """
+        with DogsClient(self.base_url) as client:
+            return sum(
+                len(results)
+                for results in islice(
+                    client.iter_pages("dogs/", prefetch=prefetch), pages
+                )
+            )
+
+    def read_async(self, pages: int, prefetch: int) -> int:
+        """
+        Read the pages of dogs by the asyncio client.
+
+        Args:
+            pages (int): Number of pages.
+            prefetch (int): Number of pages requested ahead.
+
+        Returns:
+            int: Number of dogs read.
+        """
+
+        async def read() -> int:
+            async with AsyncDogsClient(self.base_url) as client:
+                read_pages = client.iter_pages("dogs/", prefetch=prefetch)
+                count = 0
+                number = 0
+                async for results in read_pages:
+                    count += len(results)
+                    number += 1
+                    if number == pages:
+                        break
+                await read_pages.aclose()
+            return count
+
+        return asyncio.run(read())
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        latency: float = options["latency"] / 1000
+        handler = type("Handler", (NetworkHandler,), {"latency": latency})
+        server = ThreadedWSGIServer(("localhost", 0), handler)
+        server.set_app(DelayedApplication(get_wsgi_application(), latency))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.base_url = f"http://localhost:{server.server_port}"
+
+        gets: int = options["gets"]
+        pages: int = options["pages"]
+        prefetch: int = options["prefetch"]
+        creates: int = options["creates"]
+        dog_id: int = Dog.objects.values_list("id", flat=True).first()
+        breed: Breed = Breed.objects.create(name="benchclient")
+        item: dict = {"name": "Bolt", "age": 2, "breed": breed.id}
+        try:
+            self.stdout.write(
+                f"{'run':<28}{'objects':>8}{'time, s':>10}{'per s':>10}"
+            )
+            self.measure(
+                "get: new connections",
+                lambda: sum(
+                    1
+                    for _ in range(gets)
+                    if self.urlopen(f"/api/dogs/{dog_id}/")
+                ),
+            )
+            with DogsClient(self.base_url) as client:
+                self.measure(
+                    "get: sync, kept alive",
+                    lambda: sum(
+                        1
+                        for _ in range(gets)
+                        if client.request("GET", f"dogs/{dog_id}/")
+                    ),
+                )
+
+            self.measure(
+                "pages: new connections",
+                lambda: sum(
+                    len(self.urlopen(f"/api/dogs/?page={number}")["results"])
+                    for number in range(1, pages + 1)
+                ),
+            )
+            self.measure(
+                "pages: sync, no prefetch", lambda: self.read_sync(pages, 0)
+            )
+            self.measure(
+                f"pages: sync, prefetch {prefetch}",
+                lambda: self.read_sync(pages, prefetch),
+            )
+            self.measure(
+                f"pages: async, prefetch {prefetch}",
+                lambda: self.read_async(pages, prefetch),
+            )
+
+            self.measure(
+                "create: new connections",
+                lambda: sum(
+                    1
+                    for _ in range(creates)
+                    if self.urlopen("/api/dogs/", item)
+                ),
+            )
+            with DogsClient(self.base_url) as client:
+                self.measure(
+                    "create: sync bulk",
+                    lambda: len(
+                        client.bulk_create_dogs([item] * creates).created
+                    ),
+                )
+        finally:
+            Dog.objects.filter(breed=breed).delete()
+            breed.delete()
+            server.shutdown()
@@ -0,0 +1,91 @@
+"""Management command to benchmark a thundering herd of identical reads."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app_dogs.utils.coalescing import single_flight
+from app_dogs.views import BreedViewSet, DogViewSet
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connections
+from django.http import HttpResponse
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Send waves of identical concurrent GET /api/breeds/ and "
+        "/api/dogs/?page=1 requests with and without the single-flight "
+        "coalescing. Report the time of a wave and the views run."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument("--clients", type=int, default=50)
+        parser.add_argument("--waves", type=int, default=3)
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        factory = APIRequestFactory(SERVER_NAME="localhost")
+        views = {
+            "/api/breeds/": BreedViewSet.as_view({"get": "list"}),
+            "/api/dogs/?page=1": DogViewSet.as_view({"get": "list"}),
+        }
+        clients: int = options["clients"]
+
+        self.stdout.write(
+            f"{'url':<19}{'coalescing':>11}{'wave, s':>9}{'views run':>11}"
+        )
+        for url, view in views.items():
+            for enabled in (False, True):
+                barrier = threading.Barrier(clients)
+
+                def send(
+                    _: int,
+                    url: str = url,
+                    view=view,
+                    barrier: threading.Barrier = barrier,
+                ) -> HttpResponse:
+                    barrier.wait()
+                    try:
+                        response: HttpResponse = view(factory.get(url))
+                        if hasattr(response, "render"):
+                            # followers get the rendered copy
+                            response.render()
+                        return response
+                    finally:
+                        # as the request_finished signal does
+                        connections.close_all()
+
+                leaders_before: int = single_flight.stats["leaders"]
+                started: float = time.perf_counter()
+                with (
+                    override_settings(
+                        SINGLE_FLIGHT={
+                            **settings.SINGLE_FLIGHT,
+                            "ENABLED": enabled,
+                        }
+                    ),
+                    ThreadPoolExecutor(clients) as executor,
+                ):
+                    for _ in range(options["waves"]):
+                        list(executor.map(send, range(clients)))
+                total: float = time.perf_counter() - started
+                views_run: int = (
+                    single_flight.stats["leaders"] - leaders_before
+                    if enabled
+                    else clients * options["waves"]
+                )
+
+                self.stdout.write(
+                    f"{url:<19}{'on' if enabled else 'off':>11}"
+                    f"{total / options['waves']:>9.2f}{views_run:>11}"
+                )
@@ -0,0 +1,98 @@
+"""Management command to benchmark the ranking of dogs."""
+
+import time
+
+import numpy as np
+from app_dogs.utils.ranking import DogColumns
+from app_dogs.utils.similarity import (
+    RATING_FIELDS,
+    SIZE_CODES,
+    TraitMatrix,
+    build_query,
+)
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+COLORS: tuple[str, ...] = ("black", "white", "brown", "red", "grey", "other")
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Measure the ranking time of synthetic dogs by the owner "
+        "preferences. The database is not used."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument("--dogs", type=int, default=1_000_000)
+        parser.add_argument("--breeds", type=int, default=500)
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--queries", type=int, default=20)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.DOG_RANKING["CHUNK_SIZE"],
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        rng = np.random.default_rng(options["seed"])
+        count: int = options["dogs"]
+        sizes: list[str] = list(SIZE_CODES)
+        matrix = TraitMatrix.from_rows(
+            (breed_id, *ratings, sizes[size_code])
+            for breed_id, ratings, size_code in zip(
+                range(1, options["breeds"] + 1),
+                rng.integers(1, 6, (options["breeds"], 4)).tolist(),
+                rng.integers(0, len(sizes), options["breeds"]).tolist(),
+            )
+        )
+        columns = DogColumns(
+            ids=np.arange(1, count + 1, dtype=np.int64),
+            ages=rng.integers(0, 20, count).astype(np.int16),
+            breed_ids=rng.integers(0, options["breeds"] + 1, count),
+            genders=rng.integers(0, 2, count).astype(np.int8),
+            colors=rng.integers(0, len(COLORS), count).astype(np.int32),
+            color_codes={color: code for code, color in enumerate(COLORS)},
+            cursor=(0, 0),
+        )
+
+        elapsed: list[float] = []
+        for _ in range(options["queries"]):
+            preferences = {
+                "age": int(rng.integers(0, 20)),
+                "gender": str(rng.choice(["male", "female"])),
+                "color": str(rng.choice(COLORS)),
+                **{name: int(rng.integers(1, 6)) for name in RATING_FIELDS},
+                "size": str(rng.choice(sizes)),
+            }
+            preferences.update(
+                (f"{name}_weight", float(rng.random()))
+                for name in list(preferences)
+            )
+            target, weights = build_query(preferences)
+
+            started: float = time.perf_counter()
+            columns.rank(
+                preferences=preferences,
+                matrix=matrix,
+                breed_target=target,
+                breed_weights=weights,
+                limit=options["limit"],
+                chunk_size=options["chunk_size"],
+            )
+            elapsed.append(time.perf_counter() - started)
+
+        self.stdout.write(
+            f"dogs: {len(columns)}, breeds: {len(matrix)}, "
+            f"limit: {options['limit']}"
+        )
+        self.stdout.write(f"rank, mean:  {np.mean(elapsed) * 1000:9.2f} ms")
+        self.stdout.write(f"rank, max:   {np.max(elapsed) * 1000:9.2f} ms")
@@ -0,0 +1,110 @@
+"""Management command to benchmark the coalescing of Dog inserts."""
+
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app_dogs.models import Dog
+from app_dogs.views import DogViewSet, dog_batcher
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connections
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+BENCH_DOG_NAME = "benchdogwrites"
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Send concurrent single POST /api/dogs/ requests with and without "
+        "the write batching. Report commits, throughput and latency."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--threads", type=int, default=32)
+        parser.add_argument(
+            "--max-rows",
+            type=int,
+            default=settings.DOG_WRITE_BATCHING["MAX_ROWS"],
+        )
+        parser.add_argument(
+            "--max-delay-ms",
+            type=int,
+            default=settings.DOG_WRITE_BATCHING["MAX_DELAY_MS"],
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        view = DogViewSet.as_view({"post": "create"})
+        factory = APIRequestFactory()
+        body: str = json.dumps({"name": BENCH_DOG_NAME, "age": 1})
+
+        def post(_: int) -> float:
+            request = factory.post(
+                "/api/dogs/",
+                body,
+                content_type="application/json",
+            )
+            started: float = time.perf_counter()
+            response = view(request)
+            elapsed: float = time.perf_counter() - started
+            # as the request_finished signal does with CONN_MAX_AGE=0
+            connections.close_all()
+            if response.status_code != 201:
+                raise RuntimeError(f"Unexpected response: {response.data}")
+            return elapsed
+
+        self.stdout.write(
+            f"{'mode':<8}{'commits':>9}{'req/s':>10}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        )
+        for enabled in (False, True):
+            batching = {
+                **settings.DOG_WRITE_BATCHING,
+                "ENABLED": enabled,
+                "MAX_ROWS": options["max_rows"],
+                "MAX_DELAY_MS": options["max_delay_ms"],
+            }
+            batches_before: int = dog_batcher.stats["batches"]
+            fallback_before: int = dog_batcher.stats["fallback_rows"]
+
+            with override_settings(DOG_WRITE_BATCHING=batching):
+                with ThreadPoolExecutor(options["threads"]) as executor:
+                    started: float = time.perf_counter()
+                    latencies: list[float] = list(
+                        executor.map(post, range(options["requests"]))
+                    )
+                    total: float = time.perf_counter() - started
+
+            commits: int = (
+                dog_batcher.stats["batches"]
+                - batches_before
+                + dog_batcher.stats["fallback_rows"]
+                - fallback_before
+                if enabled
+                else len(latencies)
+            )
+            percentiles: list[float] = statistics.quantiles(
+                latencies,
+                n=100,
+            )
+            self.stdout.write(
+                f"{'batched' if enabled else 'single':<8}{commits:>9}"
+                f"{len(latencies) / total:>10.0f}"
+                f"{percentiles[49] * 1000:>9.2f}"
+                f"{percentiles[94] * 1000:>9.2f}"
+                f"{percentiles[98] * 1000:>9.2f}"
+            )
+
+        deleted, _ = Dog.objects.filter(name=BENCH_DOG_NAME).delete()
+        self.stdout.write(self.style.SUCCESS(f"Removed {deleted} test dogs."))
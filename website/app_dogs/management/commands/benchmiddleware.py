@@ -0,0 +1,95 @@
+"""Management command to benchmark the middleware overhead of requests."""
+
+import statistics
+import time
+
+from app_dogs.middleware import MiddlewareChain
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory
+
+
+class ConstantViewChain(MiddlewareChain):
+    """
+    Chain of middlewares ending with a constant response.
+
+    The view hooks of the middlewares are run for the resolved view,
+    but the view itself is not, so only the middlewares are measured.
+
+    Args:
+        middleware (list[str]): Import paths of the middlewares.
+    """
+
+    def _get_response(self, request: HttpRequest) -> HttpResponse:
+        """
+        Run the view hooks and get the constant response.
+
+        Args:
+            request (HttpRequest): Django request.
+
+        Returns:
+            HttpResponse: Response of a hook or the constant one.
+        """
+        request.resolver_match = resolve(request.path_info)
+        for process_view in self._view_middleware:
+            response: HttpResponse | None = process_view(
+                request, request.resolver_match.func, (), {}
+            )
+            if response is not None:
+                return response
+        return JsonResponse({"id": 1})
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Measure the middleware overhead of an API request: the full "
+        "MIDDLEWARE, the chain of the '/api/' scope and no middlewares "
+        "around the same constant view, the chains take turns."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument("--requests", type=int, default=20_000)
+        parser.add_argument("--url", default="/api/dogs/1/")
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        chains: dict[str, ConstantViewChain] = {
+            "full": ConstantViewChain(
+                [
+                    path
+                    for path in settings.MIDDLEWARE
+                    if not path.endswith(".PathScopedMiddleware")
+                ]
+            ),
+            "scoped": ConstantViewChain(settings.SCOPED_MIDDLEWARE["/api/"]),
+            "none": ConstantViewChain([]),
+        }
+        factory = APIRequestFactory(SERVER_NAME="localhost")
+
+        times: dict[str, list[float]] = {name: [] for name in chains}
+        for _ in range(options["requests"]):
+            for name, chain in chains.items():
+                request: HttpRequest = factory.get(options["url"])
+                started: float = time.perf_counter()
+                chain(request)
+                times[name].append(time.perf_counter() - started)
+
+        base: float = statistics.median(times["none"])
+        self.stdout.write(
+            f"{'chain':<8}{'median, us':>12}{'overhead, us':>14}"
+        )
+        for name, chain_times in times.items():
+            median: float = statistics.median(chain_times)
+            self.stdout.write(
+                f"{name:<8}{median * 1e6:>12.1f}"
+                f"{(median - base) * 1e6:>14.1f}"
+            )
@@ -0,0 +1,338 @@
+"""Management command to benchmark the serializers of dogs and breeds."""
+
+import json
+import os
+import platform
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+import django
+import rest_framework
+from app_dogs.models import Breed, Dog
+from app_dogs.serializers import (
+    BreedDetailSerializer,
+    BreedListSerializer,
+    DogDetailSerializer,
+    DogListSerializer,
+)
+from app_dogs.utils.choises import GenderChioce, SizeChioce
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+from rest_framework.request import Request
+from rest_framework.serializers import Serializer
+from rest_framework.test import APIRequestFactory
+
+BREEDS_OF_DOGS = 500
+COLORS: tuple[str, ...] = ("black", "white", "brown", "red", "grey", "other")
+SERIALIZERS: tuple[type[Serializer], ...] = (
+    DogListSerializer,
+    DogDetailSerializer,
+    BreedListSerializer,
+    BreedDetailSerializer,
+)
+DEFAULT_BASELINE: Path = (
+    settings.BASE_DIR / "app_dogs" / "benchmarks" / "serializers.json"
+)
+
+
+def get_machine() -> dict[str, str | int | None]:
+    """
+    Get the host, CPU and Python version the results depend on.
+
+    Returns:
+        dict[str, str | int | None]: Machine description.
+    """
+    return {
+        "host": platform.node(),
+        "cpu": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+
+
+def make_breeds(count: int) -> list[Breed]:
+    """
+    Make unsaved breeds with the annotations of the list view.
+
+    Args:
+        count (int): Number of breeds.
+
+    Returns:
+        list[Breed]: Breeds with ids.
+    """
+    sizes: list[str] = SizeChioce.values
+    breeds: list[Breed] = []
+    for i in range(1, count + 1):
+        breed = Breed(
+            id=i,
+            name=f"breed {i}",
+            size=sizes[i % len(sizes)],
+            friendliness=i % 5 + 1,
+            trainability=(i + 1) % 5 + 1,
+            shedding_amount=(i + 2) % 5 + 1,
+            exercise_needs=(i + 3) % 5 + 1,
+        )
+        breed.dog_count = i % 2000
+        breeds.append(breed)
+    return breeds
+
+
+def make_dogs(count: int) -> list[Dog]:
+    """
+    Make unsaved dogs with breeds and the annotations of the views.
+
+    Args:
+        count (int): Number of dogs.
+
+    Returns:
+        list[Dog]: Dogs with ids.
+    """
+    breeds: list[Breed] = make_breeds(BREEDS_OF_DOGS)
+    genders: list[str] = GenderChioce.values
+    dogs: list[Dog] = []
+    for i in range(1, count + 1):
+        dog = Dog(
+            id=i,
+            name=f"dog {i}",
+            age=i % 20,
+            breed=breeds[i % BREEDS_OF_DOGS],
+            gender=genders[i % 2],
+            color=COLORS[i % len(COLORS)],
+            favorite_food="meat" if i % 3 else None,
+            favorite_toy="ball" if i % 4 else None,
+        )
+        dog.breed_avg_age = 9.5
+        dog.same_breed_count = 2000
+        dogs.append(dog)
+    return dogs
+
+
+def get_payloads(serializer_class: type[Serializer], data: list) -> list:
+    """
+    Get the request payloads from the serialized objects.
+
+    Read-only fields are dropped. The breed of a dog is dropped too:
+    checking it is a query per dog.
+
+    Args:
+        serializer_class (type[Serializer]): Serializer of the objects.
+        data (list): Serialized objects.
+
+    Returns:
+        list: Payloads to be validated.
+    """
+    writable: set[str] = {
+        name
+        for name, field in serializer_class().fields.items()
+        if not field.read_only and name != "breed"
+    }
+    return [
+        {name: value for name, value in item.items() if name in writable}
+        for item in data
+    ]
+
+
+def get_benchmarks(
+    serializer_class: type[Serializer],
+    instances: list,
+    context: dict,
+) -> dict[str, Callable[[], object]]:
+    """
+    Get the functions serializing the objects and validating them.
+
+    Args:
+        serializer_class (type[Serializer]): Serializer of the objects.
+        instances (list): Unsaved objects.
+        context (dict): Serializer context with the request.
+
+    Returns:
+        dict[str, Callable[[], object]]: Functions by the direction.
+    """
+    payloads: list = get_payloads(
+        serializer_class,
+        serializer_class(instances, many=True, context=context).data,
+    )
+    return {
+        "serialize": lambda: serializer_class(
+            instances, many=True, context=context
+        ).data,
+        "validate": lambda: serializer_class(
+            data=payloads, many=True, context=context
+        ).is_valid(raise_exception=True),
+    }
+
+
+def measure(
+    func: Callable[[], object],
+    repeat: int,
+) -> tuple[float, int]:
+    """
+    Measure the best time and the peak of allocated memory.
+
+    The first run warms up the cached fields of serializers and isn't
+    measured. The memory is traced in a separate run, tracing slows down
+    the code.
+
+    Args:
+        func (Callable[[], object]): Measured function.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        tuple[float, int]: Seconds of the fastest run and bytes.
+    """
+    func()
+    elapsed: list[float] = []
+    for _ in range(repeat):
+        started: float = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(elapsed), peak
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Measure the throughput and memory of serializing unsaved dogs and "
+        "breeds and of validating their payloads. The database is not "
+        "used. Compare the results with the baseline, regressions fail "
+        "the command only if the baseline is from the same machine."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument(
+            "--sizes",
+            type=lambda value: [int(size) for size in value.split(",")],
+            default=[100, 10_000, 100_000],
+            help="Comma separated numbers of objects.",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument(
+            "--output",
+            type=Path,
+            help="Write the results to this JSON file.",
+        )
+        parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed share of the throughput drop or memory growth.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        request = Request(
+            APIRequestFactory().get("/api/", HTTP_HOST="localhost")
+        )
+        machine: dict[str, str | int | None] = get_machine()
+        results: dict[str, dict[str, float]] = {}
+        for size in options["sizes"]:
+            dogs: list[Dog] = make_dogs(size)
+            breeds: list[Breed] = make_breeds(size)
+            for serializer_class in SERIALIZERS:
+                instances: list = (
+                    dogs if serializer_class.Meta.model is Dog else breeds
+                )
+                for direction, func in get_benchmarks(
+                    serializer_class, instances, {"request": request}
+                ).items():
+                    seconds, peak = measure(func, options["repeat"])
+                    name = f"{serializer_class.__name__}.{direction}.{size}"
+                    results[name] = {
+                        "objects_per_second": size / seconds,
+                        "peak_kb": peak / 1024,
+                    }
+
+        if options["output"]:
+            report: dict = {
+                "machine": machine,
+                "django": django.__version__,
+                "djangorestframework": rest_framework.__version__,
+                "results": results,
+            }
+            options["output"].write_text(json.dumps(report, indent=2) + "\n")
+
+        baseline: dict = {"results": {}}
+        if options["baseline"].is_file():
+            baseline = json.loads(options["baseline"].read_text())
+        regressions: list[str] = self.write_report(
+            results, baseline["results"], options["threshold"]
+        )
+        if not regressions:
+            return
+
+        message: str = f"Regressions: {', '.join(regressions)}"
+        if baseline.get("machine") == machine:
+            raise CommandError(message)
+        self.stderr.write(
+            self.style.WARNING(
+                f"{message}. The baseline is from another machine "
+                f"({baseline.get('machine')}, now {machine}), "
+                "so they are not errors."
+            )
+        )
+
+    def write_report(
+        self,
+        results: dict[str, dict[str, float]],
+        baseline: dict[str, dict[str, float]],
+        threshold: float,
+    ) -> list[str]:
+        """
+        Write the results compared with the baseline.
+
+        Args:
+            results (dict[str, dict[str, float]]): Measured results.
+            baseline (dict[str, dict[str, float]]): Baseline results,
+                empty if there is no baseline.
+            threshold (float): Allowed share of the throughput drop or
+                memory growth.
+
+        Returns:
+            list[str]: Names of the regressed results.
+        """
+        self.stdout.write(
+            f"{'benchmark':<40}{'obj/s':>11}{'change':>9}"
+            f"{'peak KiB':>11}{'change':>9}"
+        )
+        regressions: list[str] = []
+        for name, result in results.items():
+            speed_change, memory_change, mark = "", "", ""
+            if name in baseline:
+                speed: float = (
+                    result["objects_per_second"]
+                    / baseline[name]["objects_per_second"]
+                    - 1
+                )
+                memory: float = (
+                    result["peak_kb"] / baseline[name]["peak_kb"] - 1
+                )
+                speed_change, memory_change = f"{speed:+.0%}", f"{memory:+.0%}"
+                if speed < -threshold or memory > threshold:
+                    regressions.append(name)
+                    mark = "  REGRESSION"
+            self.stdout.write(
+                f"{name:<40}{result['objects_per_second']:>11.0f}"
+                f"{speed_change:>9}{result['peak_kb']:>11.1f}"
+                f"{memory_change:>9}{mark}"
+            )
+        return regressions
@@ -0,0 +1,97 @@
+"""Management command to benchmark the shared snapshot of breeds."""
+
+import statistics
+import tempfile
+import time
+
+from app_dogs.models import Dog
+from app_dogs.utils.sharedbreeds import get_base_path, shared_breeds
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, reset_queries
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Measure GET requests of breeds and dogs reading the database "
+        "against the shared snapshot of breeds, the modes take turns. "
+        "The snapshot is written to a temporary directory."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument("--requests", type=int, default=50)
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        dog: Dog = Dog.objects.filter(breed__isnull=False).first()
+        urls: dict[str, str] = {
+            "breeds list": "/api/breeds/?page=3",
+            "breeds list, filter": "/api/breeds/?size=small&friendliness=5",
+            "breed": f"/api/breeds/{dog.breed_id}/",
+            "dogs list": "/api/dogs/?page=3",
+            "dog": f"/api/dogs/{dog.id}/",
+        }
+        client = APIClient(SERVER_NAME="localhost")
+
+        with tempfile.TemporaryDirectory() as directory:
+            modes: dict[str, dict] = {
+                enabled: {
+                    **settings.SHARED_BREED_SNAPSHOT,
+                    "ENABLED": enabled == "snapshot",
+                    "DIRECTORY": directory,
+                    "MAX_AGE_SECONDS": 3600,
+                }
+                for enabled in ("database", "snapshot")
+            }
+            with override_settings(SHARED_BREED_SNAPSHOT=modes["snapshot"]):
+                started: float = time.perf_counter()
+                shared_breeds.build()
+                elapsed: float = time.perf_counter() - started
+                base = get_base_path()
+                size: int = sum(
+                    path.stat().st_size
+                    for path in base.parent.glob(f"{base.name}.[0-9]*")
+                )
+            self.stdout.write(
+                f"snapshot written in {elapsed:.2f} s, {size / 1024:.0f} KiB "
+                "shared by all workers"
+            )
+
+            times: dict[tuple[str, str], list[float]] = {}
+            queries: dict[tuple[str, str], int] = {}
+            debug, settings.DEBUG = settings.DEBUG, True
+            try:
+                for _ in range(options["requests"]):
+                    for name, url in urls.items():
+                        for mode, snapshot_options in modes.items():
+                            with override_settings(
+                                SHARED_BREED_SNAPSHOT=snapshot_options
+                            ):
+                                reset_queries()
+                                started = time.perf_counter()
+                                client.get(url)
+                                times.setdefault((name, mode), []).append(
+                                    time.perf_counter() - started
+                                )
+                                queries[name, mode] = len(connection.queries)
+            finally:
+                settings.DEBUG = debug
+
+        self.stdout.write(
+            f"{'request':<22}{'mode':<10}{'median, ms':>12}{'queries':>9}"
+        )
+        for (name, mode), request_times in times.items():
+            self.stdout.write(
+                f"{name:<22}{mode:<10}"
+                f"{statistics.median(request_times) * 1000:>12.2f}"
+                f"{queries[name, mode]:>9}"
+            )
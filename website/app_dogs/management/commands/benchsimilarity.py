@@ -0,0 +1,94 @@
+"""Management command to benchmark the search of similar breeds."""
+
+import time
+
+import numpy as np
+from app_dogs.utils.similarity import (
+    RATING_FIELDS,
+    SIZE_CODES,
+    TRAIT_FIELDS,
+    TraitMatrix,
+    scale_traits,
+)
+from django.core.management.base import BaseCommand, CommandParser
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Measure build and top-k search time of the breed trait matrix "
+        "on synthetic breeds. The database is not used."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument("--breeds", type=int, default=100_000)
+        parser.add_argument("--k", type=int, default=10)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        rng = np.random.default_rng(options["seed"])
+        count: int = options["breeds"]
+        sizes: list[str] = list(SIZE_CODES)
+        rows: list[tuple] = [
+            (breed_id, *ratings, sizes[size_code])
+            for breed_id, ratings, size_code in zip(
+                range(1, count + 1),
+                rng.integers(1, 6, (count, len(RATING_FIELDS))).tolist(),
+                rng.integers(0, len(sizes), count).tolist(),
+            )
+        ]
+
+        started: float = time.perf_counter()
+        matrix = TraitMatrix.from_rows(rows)
+        build: float = time.perf_counter() - started
+
+        weights = np.ones(len(TRAIT_FIELDS), dtype=np.float32)
+        breed_ids = rng.integers(1, count + 1, options["queries"])
+        started = time.perf_counter()
+        for breed_id in breed_ids:
+            matrix.nearest(
+                target=matrix.get_traits(int(breed_id)),
+                weights=weights,
+                k=options["k"],
+                exclude_id=int(breed_id),
+            )
+        similar: float = (time.perf_counter() - started) / len(breed_ids)
+
+        targets = scale_traits(
+            np.column_stack(
+                (
+                    rng.integers(1, 6, (len(breed_ids), len(RATING_FIELDS))),
+                    rng.integers(0, len(sizes), len(breed_ids)),
+                )
+            )
+        )
+        match_weights = rng.random((len(breed_ids), len(TRAIT_FIELDS)))
+        started = time.perf_counter()
+        for target, query_weights in zip(targets, match_weights):
+            matrix.nearest(target=target, weights=query_weights, k=10)
+        match: float = (time.perf_counter() - started) / len(breed_ids)
+
+        started = time.perf_counter()
+        target = matrix.traits[0]
+        sorted(
+            (
+                sum((a - b) ** 2 for a, b in zip(row, target)) ** 0.5,
+                breed_id,
+            )
+            for breed_id, row in zip(matrix.ids.tolist(), matrix.traits)
+        )[: options["k"]]
+        naive: float = time.perf_counter() - started
+
+        self.stdout.write(f"breeds: {len(matrix)}, k: {options['k']}")
+        self.stdout.write(f"matrix build:          {build * 1000:9.2f} ms")
+        self.stdout.write(f"similar, per query:    {similar * 1000:9.3f} ms")
+        self.stdout.write(f"match, per query:      {match * 1000:9.3f} ms")
+        self.stdout.write(f"pure Python, 1 query:  {naive * 1000:9.2f} ms")
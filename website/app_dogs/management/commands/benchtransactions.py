@@ -0,0 +1,123 @@
+"""Management command to benchmark transaction policies of reads."""
+
+import json
+import random
+import statistics
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from app_dogs.models import Dog
+from app_dogs.utils.transactions import TransactionPolicy
+from app_dogs.views import DogViewSet
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connections
+from rest_framework.test import APIRequestFactory
+
+BENCH_DOG_NAME = "benchtransactions"
+READ_POLICIES: tuple[TransactionPolicy, ...] = (
+    TransactionPolicy.AUTOCOMMIT,
+    TransactionPolicy.READ_COMMITTED,
+    TransactionPolicy.REPEATABLE_READ,
+)
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Send a mixed load of GET and PATCH /api/dogs/ requests with each "
+        "transaction policy of reads. Report throughput and latency."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--dogs", type=int, default=100)
+        parser.add_argument(
+            "--write-share",
+            type=float,
+            default=0.2,
+            help="Share of PATCH requests in the load.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        dog_ids: list[int] = [
+            dog.id
+            for dog in Dog.objects.bulk_create(
+                Dog(name=BENCH_DOG_NAME, age=1) for _ in range(options["dogs"])
+            )
+        ]
+        factory = APIRequestFactory()
+        write_view = DogViewSet.as_view({"patch": "partial_update"})
+
+        self.stdout.write(
+            f"{'read policy':<17}{'req/s':>8}"
+            f"{'GET p50':>9}{'GET p95':>9}{'PATCH p50':>11}{'PATCH p95':>11}"
+        )
+        for policy in READ_POLICIES:
+            policies = {
+                **DogViewSet.transaction_policies,
+                "list": policy,
+                "retrieve": policy,
+            }
+            read_view = DogViewSet.as_view(
+                {"get": "retrieve"},
+                transaction_policies=policies,
+            )
+
+            def send(
+                number: int, read_view: Callable = read_view
+            ) -> tuple[str, float]:
+                dog_id: int = random.choice(dog_ids)
+                is_write: bool = random.random() < options["write_share"]
+                if is_write:
+                    request = factory.patch(
+                        f"/api/dogs/{dog_id}/",
+                        json.dumps({"age": number % 20}),
+                        content_type="application/json",
+                    )
+                    view = write_view
+                else:
+                    request = factory.get(f"/api/dogs/{dog_id}/")
+                    view = read_view
+
+                started: float = time.perf_counter()
+                response = view(request, pk=dog_id)
+                elapsed: float = time.perf_counter() - started
+                # as the request_finished signal does with CONN_MAX_AGE=0
+                connections.close_all()
+                if response.status_code != 200:
+                    raise RuntimeError(f"Unexpected response: {response.data}")
+                return ("PATCH" if is_write else "GET", elapsed)
+
+            with ThreadPoolExecutor(options["threads"]) as executor:
+                started: float = time.perf_counter()
+                results: list[tuple[str, float]] = list(
+                    executor.map(send, range(options["requests"]))
+                )
+                total: float = time.perf_counter() - started
+
+            percentiles: dict[str, list[float]] = {
+                method: statistics.quantiles(
+                    [elapsed for name, elapsed in results if name == method],
+                    n=100,
+                )
+                for method in ("GET", "PATCH")
+            }
+            self.stdout.write(
+                f"{policy:<17}{len(results) / total:>8.0f}"
+                f"{percentiles['GET'][49] * 1000:>9.2f}"
+                f"{percentiles['GET'][94] * 1000:>9.2f}"
+                f"{percentiles['PATCH'][49] * 1000:>11.2f}"
+                f"{percentiles['PATCH'][94] * 1000:>11.2f}"
+            )
+
+        deleted, _ = Dog.objects.filter(id__in=dog_ids).delete()
+        self.stdout.write(self.style.SUCCESS(f"Removed {deleted} test dogs."))
@@ -0,0 +1,145 @@
+"""Management command to benchmark concurrent read-modify-write cycles."""
+
+import json
+import random
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from app_dogs.models import Dog
+from app_dogs.views import DogViewSet
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, connections, transaction
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+BENCH_DOG_NAME = "benchversionedwrites"
+STRATEGIES: tuple[str, ...] = (
+    "last-writer-wins",
+    "select-for-update",
+    "if-match",
+)
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Increment ages of a few hot dogs from concurrent threads by GET and "
+        "PATCH /api/dogs/<id>/: without a check, under a row lock and with "
+        "'If-Match'. Report throughput, retries and lost updates."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument("--increments", type=int, default=2000)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument(
+            "--dogs",
+            type=int,
+            default=10,
+            help="Number of rows written concurrently, fewer is hotter.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        factory = APIRequestFactory()
+        read_view = DogViewSet.as_view({"get": "retrieve"})
+        write_view = DogViewSet.as_view({"patch": "partial_update"})
+
+        def read(dog_id: int) -> Response:
+            response = read_view(
+                factory.get(f"/api/dogs/{dog_id}/"), pk=dog_id
+            )
+            response.render()
+            return response
+
+        def write(dog_id: int, age: int, **headers) -> Response:
+            request = factory.patch(
+                f"/api/dogs/{dog_id}/",
+                json.dumps({"age": age}),
+                content_type="application/json",
+                **headers,
+            )
+            return write_view(request, pk=dog_id)
+
+        def increment_blindly(dog_id: int) -> int:
+            age: int = read(dog_id).data["age"]
+            write(dog_id, age + 1)
+            return 0
+
+        def increment_locked(dog_id: int) -> int:
+            with transaction.atomic(), connection.cursor() as cursor:
+                # REPEATABLE READ would fail the lock wait on a changed row
+                cursor.execute(
+                    "SET TRANSACTION ISOLATION LEVEL READ COMMITTED"
+                )
+                Dog.objects.select_for_update().filter(id=dog_id).exists()
+                age: int = read(dog_id).data["age"]
+                write(dog_id, age + 1)
+            return 0
+
+        def increment_versioned(dog_id: int) -> int:
+            retries = 0
+            while True:
+                response: Response = read(dog_id)
+                response = write(
+                    dog_id,
+                    response.data["age"] + 1,
+                    HTTP_IF_MATCH=response["ETag"],
+                )
+                if response.status_code == status.HTTP_200_OK:
+                    return retries
+                retries += 1
+
+        increments: dict[str, Callable[[int], int]] = {
+            "last-writer-wins": increment_blindly,
+            "select-for-update": increment_locked,
+            "if-match": increment_versioned,
+        }
+
+        self.stdout.write(
+            f"{'strategy':<19}{'incr/s':>8}{'retries':>9}{'lost':>7}"
+        )
+        for strategy in STRATEGIES:
+            dog_ids: list[int] = [
+                dog.id
+                for dog in Dog.objects.bulk_create(
+                    Dog(name=BENCH_DOG_NAME, age=0)
+                    for _ in range(options["dogs"])
+                )
+            ]
+
+            def send(
+                _: int,
+                increment: Callable[[int], int] = increments[strategy],
+                dog_ids: list[int] = dog_ids,
+            ) -> int:
+                try:
+                    return increment(random.choice(dog_ids))
+                finally:
+                    # as the request_finished signal does with CONN_MAX_AGE=0
+                    connections.close_all()
+
+            with ThreadPoolExecutor(options["threads"]) as executor:
+                started: float = time.perf_counter()
+                retries: int = sum(
+                    executor.map(send, range(options["increments"]))
+                )
+                total: float = time.perf_counter() - started
+
+            applied: int = sum(
+                Dog.objects.filter(id__in=dog_ids).values_list(
+                    "age", flat=True
+                )
+            )
+            self.stdout.write(
+                f"{strategy:<19}{options['increments'] / total:>8.0f}"
+                f"{retries:>9}{options['increments'] - applied:>7}"
+            )
+            Dog.objects.filter(id__in=dog_ids).delete()
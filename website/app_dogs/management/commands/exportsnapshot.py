@@ -0,0 +1,46 @@
+"""Management command to write a columnar snapshot of dogs and breeds."""
+
+import time
+
+from app_dogs.utils.snapshot import get_root, write_snapshot
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Write a snapshot of dogs and breeds with a NumPy file per column "
+        "and remove the oldest snapshots."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.SNAPSHOTS["CHUNK_SIZE"],
+            help="number of rows fetched from the database at once",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        started: float = time.perf_counter()
+        manifest: dict = write_snapshot(chunk_size=options["chunk_size"])
+        elapsed: float = time.perf_counter() - started
+
+        rows: str = ", ".join(
+            f"{table['rows']} {name}"
+            for name, table in manifest["tables"].items()
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote snapshot {get_root() / manifest['name']} "
+                f"({rows}) in {elapsed:.2f} s."
+            )
+        )
@@ -0,0 +1,114 @@
+"""Management command to apply app_dogs migrations without long locks."""
+
+from app_dogs.utils.schema import OperationPlan, plan_migrations
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+from django.db import connection
+
+APP_LABEL = "app_dogs"
+BLOCKING: frozenset[str] = frozenset(("writes", "reads and writes"))
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Report the locks and the estimated durations of the pending "
+        "app_dogs migrations, timed on a sample of each table, and apply "
+        "them unless an operation blocks writes for too long."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        parser.add_argument(
+            "migration_name",
+            nargs="?",
+            help="name or prefix of the last migration to apply",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="only report the plan, nothing is applied",
+        )
+        parser.add_argument(
+            "--sample-percent",
+            type=float,
+            default=settings.SCHEMA_CHANGES["SAMPLE_PERCENT"],
+            help="share of the table pages the operations are timed on",
+        )
+        parser.add_argument(
+            "--allow-blocking",
+            action="store_true",
+            help="apply operations blocking writes for a long time too",
+        )
+
+    def write_plan(self, plans: list[OperationPlan]) -> None:
+        """
+        Print the plans of the operations by migrations.
+
+        Args:
+            plans (list[OperationPlan]): Plans of the operations.
+        """
+        migration: str | None = None
+        for plan in plans:
+            if plan.migration != migration:
+                migration = plan.migration
+                self.stdout.write(self.style.MIGRATE_LABEL(migration))
+            estimate: str = (
+                "unknown" if plan.seconds is None else f"{plan.seconds:.2f} s"
+            )
+            note: str = f" ({plan.note})" if plan.note else ""
+            self.stdout.write(
+                f"  {plan.description}\n"
+                f"    lock: {plan.lock}, blocks: {plan.blocks}, "
+                f"estimate: {estimate}{note}"
+            )
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        try:
+            plans: list[OperationPlan] = plan_migrations(
+                connection,
+                APP_LABEL,
+                options["migration_name"],
+                options["sample_percent"],
+            )
+        except (KeyError, ValueError) as error:
+            raise CommandError(error) from error
+
+        if not plans:
+            self.stdout.write("No migrations to apply.")
+            return
+        self.write_plan(plans)
+        if options["dry_run"]:
+            return
+
+        max_seconds: float = settings.SCHEMA_CHANGES["MAX_BLOCKING_SECONDS"]
+        blocking: list[str] = [
+            plan.description
+            for plan in plans
+            if plan.blocks in BLOCKING
+            and (plan.seconds is None or plan.seconds > max_seconds)
+        ]
+        if blocking and not options["allow_blocking"]:
+            raise CommandError(
+                "Operations blocking writes for long: "
+                f"{'; '.join(blocking)}. Use the concurrent operations of "
+                "app_dogs/utils/schema.py or pass --allow-blocking."
+            )
+
+        call_command(
+            "migrate",
+            APP_LABEL,
+            *filter(None, [options["migration_name"]]),
+            verbosity=options["verbosity"],
+        )
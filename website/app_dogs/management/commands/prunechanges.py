@@ -0,0 +1,62 @@
+"""Management command to compact and purge the change log."""
+
+from datetime import timedelta
+
+from app_dogs.utils.changelog import compact_changes, purge_changes
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    """Command realization.
+
+    Args:
+        BaseCommand: Django BaseCommand class.
+    """
+
+    help = (
+        "Remove superseded changes from the change log and drop all "
+        "changes older than the retention period."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments of the command."""
+        feed_settings: dict = settings.CHANGE_FEED
+        parser.add_argument(
+            "--compact-after-hours",
+            type=int,
+            default=feed_settings["COMPACT_AFTER_HOURS"],
+            help="compact superseded changes older than this",
+        )
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=feed_settings["RETENTION_DAYS"],
+            help="remove all changes older than this",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=feed_settings["PRUNE_BATCH_SIZE"],
+            help="max number of rows removed by one statement",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Run it as management command."""
+        now = timezone.now()
+
+        compacted: int = compact_changes(
+            before=now - timedelta(hours=options["compact_after_hours"]),
+            batch_size=options["batch_size"],
+        )
+        purged: int = purge_changes(
+            before=now - timedelta(days=options["retention_days"]),
+            batch_size=options["batch_size"],
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Compacted {compacted} changes, purged {purged} changes."
+            )
+        )
@@ -0,0 +1,315 @@
+"""Middlewares of the app_dogs."""
+
+from collections.abc import Callable
+from functools import partial
+
+from app_dogs.utils.accesslog import (
+    RequestTiming,
+    current_timing,
+    log_request,
+)
+from app_dogs.utils.admission import (
+    Overloaded,
+    Ticket,
+    admission_control,
+)
+from app_dogs.utils.profiling import get_profile_mode, profile_request
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.exception import convert_exception_to_response
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+from django.utils.module_loading import import_string
+
+
+class AccessLogMiddleware:
+    """
+    Time the requests of the app for the access log.
+
+    The middleware goes first in its chain, so the time includes
+    the queue of the admission control and the other middlewares.
+
+    Args:
+        get_response (Callable): Next handler of the request.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        """Initialize the middleware."""
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """
+        Pass the request to the next handler and log its timing.
+
+        Args:
+            request (HttpRequest): Django request.
+
+        Returns:
+            HttpResponse: Response of the next handler.
+        """
+        if not settings.ACCESS_LOG["ENABLED"]:
+            return self.get_response(request)
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        try:
+            with connection.execute_wrapper(timing.record_query):
+                response: HttpResponse = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        log_request(request, response, timing)
+        return response
+
+
+class AdmissionControlMiddleware:
+    """
+    Limit the requests of the endpoint classes run by the worker at once.
+
+    The class of a request is known once its view is resolved, so
+    the slot is taken by 'process_view' and freed when the response is
+    made. The middleware goes first in its chain: a shed request skips
+    the view hooks of the other middlewares.
+
+    Args:
+        get_response (Callable): Next handler of the request.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        """Initialize the middleware."""
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """
+        Pass the request to the next handler and free its slot.
+
+        Args:
+            request (HttpRequest): Django request.
+
+        Returns:
+            HttpResponse: Response of the next handler.
+        """
+        try:
+            return self.get_response(request)
+        finally:
+            ticket: Ticket | None = getattr(request, "admission_ticket", None)
+            if ticket is not None:
+                admission_control.release(ticket)
+
+    def process_view(
+        self,
+        request: HttpRequest,
+        view_func: Callable,
+        view_args: tuple,
+        view_kwargs: dict,
+    ) -> HttpResponse | None:
+        """
+        Admit the request or shed it with 503.
+
+        Args:
+            request (HttpRequest): Django request.
+            view_func (Callable): View resolved for the request.
+            view_args (tuple): Positional arguments of the view.
+            view_kwargs (dict): Keyword arguments of the view.
+
+        Returns:
+            HttpResponse | None: 503 response or None to run the view.
+        """
+        try:
+            request.admission_ticket = admission_control.admit(
+                request, view_func
+            )
+        except Overloaded:
+            return admission_control.get_shed_response()
+        return None
+
+    def process_exception(
+        self,
+        request: HttpRequest,
+        exception: Exception,
+    ) -> HttpResponse | None:
+        """
+        Shed the follower which couldn't get a slot to run the view.
+
+        Args:
+            request (HttpRequest): Django request.
+            exception (Exception): Error raised by the view.
+
+        Returns:
+            HttpResponse | None: 503 response or None for other errors.
+        """
+        if isinstance(exception, Overloaded):
+            return admission_control.get_shed_response()
+        return None
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request of the app on demand of a staff user.
+
+    Requests without the '_profile' parameter only pass the check of
+    the query string, the profilers aren't touched for them.
+
+    Args:
+        get_response (Callable): Next handler of the request.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        """Initialize the middleware."""
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """
+        Pass the request to the next handler.
+
+        Args:
+            request (HttpRequest): Django request.
+
+        Returns:
+            HttpResponse: Response of the next handler.
+        """
+        return self.get_response(request)
+
+    def process_view(
+        self,
+        request: HttpRequest,
+        view_func: Callable,
+        view_args: tuple,
+        view_kwargs: dict,
+    ) -> HttpResponse | None:
+        """
+        Run the view of the app under the requested profiler.
+
+        Args:
+            request (HttpRequest): Django request.
+            view_func (Callable): View resolved for the request.
+            view_args (tuple): Positional arguments of the view.
+            view_kwargs (dict): Keyword arguments of the view.
+
+        Returns:
+            HttpResponse | None: Response of the profiled view or None
+                to run the view as usual.
+        """
+        if not request.GET:
+            return None
+        mode: str | None = get_profile_mode(request)
+        if (
+            mode is None
+            or request.resolver_match.app_name != "app_dogs"
+            # the stream view is asynchronous and never ends
+            or iscoroutinefunction(view_func)
+        ):
+            return None
+        return profile_request(
+            mode,
+            request,
+            partial(view_func, request, *view_args, **view_kwargs),
+        )
+
+
+class MiddlewareChain(BaseHandler):
+    """
+    Handler running requests through its own list of middlewares.
+
+    The chain ends with the view processing of Django handlers, so the
+    'process_view', 'process_exception' and 'process_template_response'
+    hooks of the listed middlewares are run as usual.
+
+    Args:
+        middleware (list[str]): Import paths of the middlewares in the
+            order of the MIDDLEWARE setting.
+    """
+
+    def __init__(self, middleware: list[str]) -> None:
+        """Initialize the handler and load the middlewares."""
+        self.middleware = middleware
+        self.load_middleware()
+
+    def load_middleware(self, is_async: bool = False) -> None:
+        """
+        Build the chain of the synchronous middlewares.
+
+        Args:
+            is_async (bool): Unused, the chain is always synchronous.
+
+        Raises:
+            ImproperlyConfigured: A middleware factory returned None.
+        """
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+
+        handler: Callable = convert_exception_to_response(self._get_response)
+        for middleware_path in reversed(self.middleware):
+            try:
+                instance = import_string(middleware_path)(handler)
+            except MiddlewareNotUsed:
+                continue
+            if instance is None:
+                raise ImproperlyConfigured(
+                    f"Middleware factory {middleware_path} returned None."
+                )
+            if hasattr(instance, "process_view"):
+                self._view_middleware.insert(0, instance.process_view)
+            if hasattr(instance, "process_template_response"):
+                self._template_response_middleware.append(
+                    instance.process_template_response
+                )
+            if hasattr(instance, "process_exception"):
+                self._exception_middleware.append(instance.process_exception)
+            handler = convert_exception_to_response(instance)
+        self._middleware_chain = handler
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """
+        Pass the request through the chain.
+
+        Args:
+            request (HttpRequest): Django request.
+
+        Returns:
+            HttpResponse: Response of the chain.
+        """
+        return self._middleware_chain(request)
+
+
+class PathScopedMiddleware:
+    """
+    Run requests of the path prefixes through their own middlewares.
+
+    The middleware goes first in MIDDLEWARE. Requests with a path of
+    a SCOPED_MIDDLEWARE prefix are passed to the chain of the prefix
+    and skip the rest of MIDDLEWARE completely, other requests go on
+    as usual. Prefixes are checked in the order of the setting.
+
+    Args:
+        get_response (Callable): Next handler of the request.
+
+    Raises:
+        MiddlewareNotUsed: No scopes are configured.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        """Initialize the middleware and load the scoped chains."""
+        if not settings.SCOPED_MIDDLEWARE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.scopes: list[tuple[str, MiddlewareChain]] = [
+            (prefix, MiddlewareChain(middleware))
+            for prefix, middleware in settings.SCOPED_MIDDLEWARE.items()
+        ]
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """
+        Pass the request to the chain of its path.
+
+        Args:
+            request (HttpRequest): Django request.
+
+        Returns:
+            HttpResponse: Response of the chain.
+        """
+        for prefix, chain in self.scopes:
+            if request.path_info.startswith(prefix):
+                return chain(request)
+        return self.get_response(request)
@@ -0,0 +1,132 @@
+"""Change log of the Dog and Breed tables filled by the triggers."""
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+LOG_CHANGE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION app_dogs_log_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO app_dogs_changelog (model, object_id, operation, data)
+        VALUES (TG_ARGV[0], OLD.id, 'delete', NULL);
+        RETURN OLD;
+    END IF;
+
+    INSERT INTO app_dogs_changelog (model, object_id, operation, data)
+    VALUES (TG_ARGV[0], NEW.id, lower(TG_OP), to_jsonb(NEW));
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+CREATE_TRIGGERS_SQL = """
+CREATE TRIGGER app_dogs_{table}_log_insert_delete
+    AFTER INSERT OR DELETE ON app_dogs_{table}
+    FOR EACH ROW EXECUTE FUNCTION app_dogs_log_change('{table}');
+CREATE TRIGGER app_dogs_{table}_log_update
+    AFTER UPDATE ON app_dogs_{table}
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+    EXECUTE FUNCTION app_dogs_log_change('{table}');
+"""
+
+DROP_TRIGGERS_SQL = """
+DROP TRIGGER IF EXISTS app_dogs_{table}_log_insert_delete ON app_dogs_{table};
+DROP TRIGGER IF EXISTS app_dogs_{table}_log_update ON app_dogs_{table};
+"""
+
+
+class Migration(migrations.Migration):
+    """Django migration class. Define a ChangeLog and its triggers.
+
+    Args:
+        migrations.Migration: Django base migration class.
+    """
+
+    dependencies = [
+        ("app_dogs", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeLogHorizon",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("txid", models.BigIntegerField(default=0)),
+                ("seq", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ChangeLog",
+            fields=[
+                (
+                    "seq",
+                    models.BigAutoField(primary_key=True, serialize=False),
+                ),
+                (
+                    "txid",
+                    models.BigIntegerField(
+                        db_default=models.Func(
+                            function="txid_current",
+                            output_field=models.BigIntegerField(),
+                        )
+                    ),
+                ),
+                ("model", models.CharField(max_length=16)),
+                ("object_id", models.BigIntegerField()),
+                (
+                    "operation",
+                    models.CharField(
+                        choices=[
+                            ("insert", "Insert"),
+                            ("update", "Update"),
+                            ("delete", "Delete"),
+                        ],
+                        max_length=6,
+                    ),
+                ),
+                ("data", models.JSONField(default=None, null=True)),
+                (
+                    "changed_at",
+                    models.DateTimeField(
+                        db_default=django.db.models.functions.datetime.Now()
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["txid", "seq"], name="changelog_txid_seq_idx"
+                    ),
+                    models.Index(
+                        fields=["model", "object_id"],
+                        name="changelog_object_idx",
+                    ),
+                    models.Index(
+                        fields=["changed_at"], name="changelog_changed_at_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunSQL(
+            sql=LOG_CHANGE_FUNCTION_SQL,
+            reverse_sql="DROP FUNCTION IF EXISTS app_dogs_log_change();",
+        ),
+        migrations.RunSQL(
+            sql=[
+                CREATE_TRIGGERS_SQL.format(table=table)
+                for table in ("dog", "breed")
+            ],
+            reverse_sql=[
+                DROP_TRIGGERS_SQL.format(table=table)
+                for table in ("dog", "breed")
+            ],
+        ),
+    ]
@@ -0,0 +1,82 @@
+"""Publish the Dog and Breed changes with NOTIFY for live subscribers."""
+
+from django.db import migrations
+
+LOG_AND_NOTIFY_CHANGE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION app_dogs_log_change() RETURNS trigger AS $$
+DECLARE
+    row_data jsonb;
+    change_txid bigint;
+    change_seq bigint;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := to_jsonb(OLD);
+    ELSE
+        row_data := to_jsonb(NEW);
+    END IF;
+
+    INSERT INTO app_dogs_changelog (model, object_id, operation, data)
+    VALUES (
+        TG_ARGV[0],
+        (row_data->>'id')::bigint,
+        lower(TG_OP),
+        CASE WHEN TG_OP = 'DELETE' THEN NULL ELSE row_data END
+    )
+    RETURNING txid, seq INTO change_txid, change_seq;
+
+    PERFORM pg_notify(
+        'app_dogs_changes',
+        json_build_object(
+            'cursor', change_txid || '.' || change_seq,
+            'model', TG_ARGV[0],
+            'object_id', row_data->'id',
+            'operation', lower(TG_OP),
+            'breed_id', CASE
+                WHEN TG_ARGV[0] = 'breed' THEN row_data->'id'
+                ELSE row_data->'breed_id'
+            END
+        )::text
+    );
+
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+LOG_CHANGE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION app_dogs_log_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO app_dogs_changelog (model, object_id, operation, data)
+        VALUES (TG_ARGV[0], OLD.id, 'delete', NULL);
+        RETURN OLD;
+    END IF;
+
+    INSERT INTO app_dogs_changelog (model, object_id, operation, data)
+    VALUES (TG_ARGV[0], NEW.id, lower(TG_OP), to_jsonb(NEW));
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+class Migration(migrations.Migration):
+    """Django migration class. Send NOTIFY from the change log trigger.
+
+    Args:
+        migrations.Migration: Django base migration class.
+    """
+
+    dependencies = [
+        ("app_dogs", "0002_changelog"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=LOG_AND_NOTIFY_CHANGE_FUNCTION_SQL,
+            reverse_sql=LOG_CHANGE_FUNCTION_SQL,
+        ),
+    ]
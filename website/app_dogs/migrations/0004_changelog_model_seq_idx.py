@@ -0,0 +1,24 @@
+"""Index to get the latest change of a model from the change log."""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Django migration class. Add an index by the model and sequence.
+
+    Args:
+        migrations.Migration: Django base migration class.
+    """
+
+    dependencies = [
+        ("app_dogs", "0003_change_notify"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="changelog",
+            index=models.Index(
+                fields=["model", "seq"], name="changelog_model_seq_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,356 @@
+"""Store the Dog gender and the Breed size as small integer codes.
+
+Every column is converted without rewriting the table under a lock:
+a new smallint column is added with a trigger filling it for rows
+written in the meantime, the existing rows are filled by short
+batches, then the columns are swapped in one short transaction. The
+batches don't change the data, so they are not recorded in the change
+log. The check constraints are added without checking the existing
+rows, which are validated afterwards without blocking writes.
+"""
+
+import app_dogs.utils.fields
+from app_dogs.utils.schema import AddConstraintNotValid, ValidateConstraint
+from django.db import migrations, models, transaction
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+BATCH_SIZE = 10_000
+
+# table, column and its choices in the order of codes
+CODED_COLUMNS: tuple[tuple[str, str, tuple[str, ...]], ...] = (
+    ("app_dogs_dog", "gender", ("male", "female")),
+    ("app_dogs_breed", "size", ("tiny", "small", "medium", "large")),
+)
+
+SKIP_CHANGELOG_SQL = "SET LOCAL app_dogs.skip_changelog = 'on'"
+
+SYNC_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+BEGIN
+    NEW.{new_column} := {new_value};
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+SYNC_TRIGGER_SQL = """
+CREATE OR REPLACE TRIGGER {function}
+    BEFORE INSERT OR UPDATE OF {column} ON {table}
+    FOR EACH ROW EXECUTE FUNCTION {function}();
+"""
+
+LOG_CHANGE_SKIPPABLE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION app_dogs_log_change() RETURNS trigger AS $$
+DECLARE
+    row_data jsonb;
+    change_txid bigint;
+    change_seq bigint;
+BEGIN
+    -- maintenance backfills which don't change the data
+    IF current_setting('app_dogs.skip_changelog', true) = 'on' THEN
+        IF TG_OP = 'DELETE' THEN
+            RETURN OLD;
+        END IF;
+        RETURN NEW;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        row_data := to_jsonb(OLD);
+    ELSE
+        row_data := to_jsonb(NEW);
+    END IF;
+
+    INSERT INTO app_dogs_changelog (model, object_id, operation, data)
+    VALUES (
+        TG_ARGV[0],
+        (row_data->>'id')::bigint,
+        lower(TG_OP),
+        CASE WHEN TG_OP = 'DELETE' THEN NULL ELSE row_data END
+    )
+    RETURNING txid, seq INTO change_txid, change_seq;
+
+    PERFORM pg_notify(
+        'app_dogs_changes',
+        json_build_object(
+            'cursor', change_txid || '.' || change_seq,
+            'model', TG_ARGV[0],
+            'object_id', row_data->'id',
+            'operation', lower(TG_OP),
+            'breed_id', CASE
+                WHEN TG_ARGV[0] = 'breed' THEN row_data->'id'
+                ELSE row_data->'breed_id'
+            END
+        )::text
+    );
+
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+LOG_AND_NOTIFY_CHANGE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION app_dogs_log_change() RETURNS trigger AS $$
+DECLARE
+    row_data jsonb;
+    change_txid bigint;
+    change_seq bigint;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := to_jsonb(OLD);
+    ELSE
+        row_data := to_jsonb(NEW);
+    END IF;
+
+    INSERT INTO app_dogs_changelog (model, object_id, operation, data)
+    VALUES (
+        TG_ARGV[0],
+        (row_data->>'id')::bigint,
+        lower(TG_OP),
+        CASE WHEN TG_OP = 'DELETE' THEN NULL ELSE row_data END
+    )
+    RETURNING txid, seq INTO change_txid, change_seq;
+
+    PERFORM pg_notify(
+        'app_dogs_changes',
+        json_build_object(
+            'cursor', change_txid || '.' || change_seq,
+            'model', TG_ARGV[0],
+            'object_id', row_data->'id',
+            'operation', lower(TG_OP),
+            'breed_id', CASE
+                WHEN TG_ARGV[0] = 'breed' THEN row_data->'id'
+                ELSE row_data->'breed_id'
+            END
+        )::text
+    );
+
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def convert_column(
+    schema_editor: BaseDatabaseSchemaEditor,
+    table: str,
+    column: str,
+    column_type: str,
+    convert_sql: str,
+) -> None:
+    """
+    Replace the column with a new one of another type by batches.
+
+    The trigger sets the new column of every row inserted or updated
+    after it is added, so only the rows the batches haven't reached,
+    which still have NULL, are left for the swap.
+
+    Args:
+        schema_editor (BaseDatabaseSchemaEditor): Migration schema editor.
+        table (str): Table name.
+        column (str): Column name.
+        column_type (str): SQL type of the new column.
+        convert_sql (str): SQL expression of the new value, the old one
+            is referenced as 'old_value'.
+    """
+    connection = schema_editor.connection
+    quote = schema_editor.quote_name
+    new_column: str = quote(f"{column}_new")
+    new_value: str = convert_sql.replace("old_value", quote(column))
+    function: str = quote(f"{table}_{column}_sync")
+
+    with (
+        transaction.atomic(using=connection.alias),
+        connection.cursor() as cursor,
+    ):
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} "
+            f"ADD COLUMN IF NOT EXISTS {new_column} {column_type}"
+        )
+        cursor.execute(
+            SYNC_FUNCTION_SQL.format(
+                function=function,
+                new_column=new_column,
+                new_value=convert_sql.replace(
+                    "old_value", f"NEW.{quote(column)}"
+                ),
+            )
+        )
+        cursor.execute(
+            SYNC_TRIGGER_SQL.format(
+                function=function, column=quote(column), table=quote(table)
+            )
+        )
+        cursor.execute(f"SELECT coalesce(max(id), 0) FROM {quote(table)}")
+        (max_id,) = cursor.fetchone()
+
+    for start in range(0, max_id, BATCH_SIZE):
+        with (
+            transaction.atomic(using=connection.alias),
+            connection.cursor() as cursor,
+        ):
+            cursor.execute(SKIP_CHANGELOG_SQL)
+            cursor.execute(
+                f"UPDATE {quote(table)} SET {new_column} = {new_value} "
+                f"WHERE id > %s AND id <= %s AND {new_column} IS NULL",
+                (start, start + BATCH_SIZE),
+            )
+
+    with (
+        transaction.atomic(using=connection.alias),
+        connection.cursor() as cursor,
+    ):
+        cursor.execute(SKIP_CHANGELOG_SQL)
+        cursor.execute(f"LOCK TABLE {quote(table)} IN EXCLUSIVE MODE")
+        # rows written before the trigger and missed by the batches
+        cursor.execute(
+            f"UPDATE {quote(table)} SET {new_column} = {new_value} "
+            f"WHERE {new_column} IS NULL"
+        )
+        cursor.execute(f"DROP TRIGGER {function} ON {quote(table)}")
+        cursor.execute(f"DROP FUNCTION {function}()")
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} DROP COLUMN {quote(column)}"
+        )
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} "
+            f"RENAME COLUMN {new_column} TO {quote(column)}"
+        )
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} "
+            f"ALTER COLUMN {quote(column)} SET NOT NULL"
+        )
+
+
+def encode_columns(
+    apps: StateApps,
+    schema_editor: BaseDatabaseSchemaEditor,
+) -> None:
+    """
+    Convert choice strings into their codes.
+
+    Args:
+        apps (StateApps): Historical models.
+        schema_editor (BaseDatabaseSchemaEditor): Migration schema editor.
+    """
+    for table, column, choices in CODED_COLUMNS:
+        cases: str = " ".join(
+            f"WHEN '{value}' THEN {code}" for code, value in enumerate(choices)
+        )
+        convert_column(
+            schema_editor,
+            table=table,
+            column=column,
+            column_type="smallint",
+            convert_sql=f"CASE old_value {cases} END",
+        )
+
+
+def decode_columns(
+    apps: StateApps,
+    schema_editor: BaseDatabaseSchemaEditor,
+) -> None:
+    """
+    Convert codes back into choice strings.
+
+    Args:
+        apps (StateApps): Historical models.
+        schema_editor (BaseDatabaseSchemaEditor): Migration schema editor.
+    """
+    for table, column, choices in CODED_COLUMNS:
+        cases: str = " ".join(
+            f"WHEN {code} THEN '{value}'" for code, value in enumerate(choices)
+        )
+        convert_column(
+            schema_editor,
+            table=table,
+            column=column,
+            column_type="varchar(6)",
+            convert_sql=f"CASE old_value {cases} END",
+        )
+
+
+class Migration(migrations.Migration):
+    """Django migration class. Convert choice columns into codes.
+
+    Args:
+        migrations.Migration: Django base migration class.
+    """
+
+    # every batch is committed separately
+    atomic = False
+
+    dependencies = [
+        ("app_dogs", "0004_changelog_model_seq_idx"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=LOG_CHANGE_SKIPPABLE_FUNCTION_SQL,
+            reverse_sql=LOG_AND_NOTIFY_CHANGE_FUNCTION_SQL,
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(
+                    code=encode_columns,
+                    reverse_code=decode_columns,
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="breed",
+                    name="size",
+                    field=app_dogs.utils.fields.CodedChoiceField(
+                        choices=[
+                            ("tiny", "Tiny"),
+                            ("small", "Small"),
+                            ("medium", "Medium"),
+                            ("large", "Large"),
+                        ],
+                        default="medium",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="dog",
+                    name="gender",
+                    field=app_dogs.utils.fields.CodedChoiceField(
+                        choices=[("male", "Male"), ("female", "Female")],
+                        default="male",
+                        help_text=(
+                            "Select a gender of the dog: male or female."
+                        ),
+                    ),
+                ),
+            ],
+        ),
+        AddConstraintNotValid(
+            model_name="breed",
+            constraint=models.CheckConstraint(
+                condition=models.Q(
+                    ("size__in", ["tiny", "small", "medium", "large"])
+                ),
+                name="breed_size_code_check",
+            ),
+        ),
+        AddConstraintNotValid(
+            model_name="dog",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("gender__in", ["male", "female"])),
+                name="dog_gender_code_check",
+            ),
+        ),
+        ValidateConstraint(
+            model_name="breed",
+            name="breed_size_code_check",
+        ),
+        ValidateConstraint(
+            model_name="dog",
+            name="dog_gender_code_check",
+        ),
+    ]
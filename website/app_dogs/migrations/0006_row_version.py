@@ -0,0 +1,73 @@
+"""Version of the Dog and Breed rows for optimistic concurrency control.
+
+The version is increased by a trigger before every update changing
+the row, so writes of the API, the admin panel and the raw SQL all
+change it. Maintenance backfills which don't change the data skip it,
+as they skip the change log. The column is added with a constant
+default, which doesn't rewrite the table.
+"""
+
+from django.db import migrations, models
+
+BUMP_VERSION_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION app_dogs_bump_version() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('app_dogs.skip_changelog', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
+
+    NEW.version := OLD.version + 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+CREATE_TRIGGER_SQL = """
+CREATE TRIGGER app_dogs_{table}_bump_version
+    BEFORE UPDATE ON app_dogs_{table}
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+    EXECUTE FUNCTION app_dogs_bump_version();
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS app_dogs_{table}_bump_version ON app_dogs_{table};
+"""
+
+
+class Migration(migrations.Migration):
+    """Django migration class. Add the row versions and their trigger.
+
+    Args:
+        migrations.Migration: Django base migration class.
+    """
+
+    dependencies = [
+        ("app_dogs", "0005_coded_choices"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="breed",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="dog",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunSQL(
+            sql=BUMP_VERSION_FUNCTION_SQL,
+            reverse_sql="DROP FUNCTION IF EXISTS app_dogs_bump_version();",
+        ),
+        migrations.RunSQL(
+            sql=[
+                CREATE_TRIGGER_SQL.format(table=table)
+                for table in ("dog", "breed")
+            ],
+            reverse_sql=[
+                DROP_TRIGGER_SQL.format(table=table)
+                for table in ("dog", "breed")
+            ],
+        ),
+    ]
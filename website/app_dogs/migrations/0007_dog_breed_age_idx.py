@@ -0,0 +1,34 @@
+"""Index to aggregate ages of the dogs of a breed.
+
+The average age of the breed shown in the dog list reads every dog of
+the breed from the table, about a page per dog. With the ages in the
+index it is an index-only scan. The index is built concurrently, so
+writes to the dogs are not blocked while it is built.
+"""
+
+from app_dogs.utils.schema import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Django migration class. Add an index by the breed and age.
+
+    Args:
+        migrations.Migration: Django base migration class.
+    """
+
+    # the index can't be built concurrently in a transaction
+    atomic = False
+
+    dependencies = [
+        ("app_dogs", "0006_row_version"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="dog",
+            index=models.Index(
+                fields=["breed", "age"], name="dog_breed_age_idx"
+            ),
+        ),
+    ]
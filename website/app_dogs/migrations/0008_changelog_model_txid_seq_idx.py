@@ -0,0 +1,44 @@
+"""Index to get the latest visible change of a model from the change log.
+
+The latest change is looked up in the feed order, by the transaction id
+and the sequence, below the snapshot horizon. With the model first in
+the index it is read backward from the horizon, instead of skipping
+the changes of the other models. The index replaces the one by the
+model and sequence and is built concurrently, so writes to the change
+log are not blocked while it is built.
+"""
+
+from app_dogs.utils.schema import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Django migration class. Index the change log by the model and cursor.
+
+    Args:
+        migrations.Migration: Django base migration class.
+    """
+
+    # the index can't be built concurrently in a transaction
+    atomic = False
+
+    dependencies = [
+        ("app_dogs", "0007_dog_breed_age_idx"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="changelog",
+            index=models.Index(
+                fields=["model", "txid", "seq"],
+                name="changelog_model_txid_seq_idx",
+            ),
+        ),
+        RemoveIndexConcurrently(
+            model_name="changelog",
+            name="changelog_model_seq_idx",
+        ),
+    ]
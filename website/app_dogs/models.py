@@ -1,7 +1,14 @@
 """Django models representing entities in the database."""
 
-from app_dogs.utils.choises import GenderChioce, RatingChoice, SizeChioce
+from app_dogs.utils.choises import (
+    ChangeOperationChoice,
+    GenderChioce,
+    RatingChoice,
+    SizeChioce,
+)
+from app_dogs.utils.fields import CodedChoiceField
 from django.db import models
+from django.db.models.functions import Now
 
 
 class Dog(models.Model):
@@ -21,8 +28,7 @@ class Dog(models.Model):
         default=None,
         related_name="dogs",
     )
-    gender = models.CharField(
-        max_length=6,
+    gender = CodedChoiceField(
         choices=GenderChioce,
         default=GenderChioce.MALE,
         help_text="Select a gender of the dog: male or female.",
@@ -30,6 +36,25 @@ class Dog(models.Model):
     color = models.CharField(max_length=255, default="other")
     favorite_food = models.CharField(max_length=255, null=True, default=None)
     favorite_toy = models.CharField(max_length=255, null=True, default=None)
+    # increased by the trigger on every change of the row
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        """Django Meta class. Restrict the stored code of the gender."""
+
+        constraints = (
+            models.CheckConstraint(
+                condition=models.Q(gender__in=GenderChioce.values),
+                name="dog_gender_code_check",
+            ),
+        )
+        indexes = (
+            # ages of a breed are aggregated by an index-only scan
+            models.Index(
+                fields=("breed", "age"),
+                name="dog_breed_age_idx",
+            ),
+        )
 
     def __str__(self) -> str:
         """
@@ -49,8 +74,7 @@ class Breed(models.Model):
     """
 
     name = models.CharField(max_length=255, null=False)
-    size = models.CharField(
-        max_length=6,
+    size = CodedChoiceField(
         choices=SizeChioce,
         default=SizeChioce.MEDIUM,
     )
@@ -70,6 +94,18 @@ class Breed(models.Model):
         choices=RatingChoice,
         default=RatingChoice.THREE,
     )
+    # increased by the trigger on every change of the row
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        """Django Meta class. Restrict the stored code of the size."""
+
+        constraints = (
+            models.CheckConstraint(
+                condition=models.Q(size__in=SizeChioce.values),
+                name="breed_size_code_check",
+            ),
+        )
 
     def __str__(self) -> str:
         """
@@ -79,3 +115,88 @@ class Breed(models.Model):
             str: Model string representation.
         """
         return f"<{self.id}> '{self.name}'"
+
+
+class ChangeLog(models.Model):
+    """
+    Append-only log of the Dog and Breed changes in the database.
+
+    Rows are written by the database triggers (see the migrations), so
+    bulk operations and raw SQL are recorded as well. The 'seq' is
+    a monotonic sequence number, the 'txid' is an id of the writing
+    transaction. Changes are read in the (txid, seq) order.
+
+    Args:
+        models.Model: Django ORM model class.
+    """
+
+    seq = models.BigAutoField(primary_key=True)
+    txid = models.BigIntegerField(
+        db_default=models.Func(
+            function="txid_current",
+            output_field=models.BigIntegerField(),
+        ),
+    )
+    model = models.CharField(max_length=16)
+    object_id = models.BigIntegerField()
+    operation = models.CharField(
+        max_length=6,
+        choices=ChangeOperationChoice,
+    )
+    data = models.JSONField(null=True, default=None)
+    changed_at = models.DateTimeField(db_default=Now())
+
+    class Meta:
+        """Django Meta class. Define indexes for the feed reading."""
+
+        indexes = (
+            models.Index(
+                fields=("txid", "seq"),
+                name="changelog_txid_seq_idx",
+            ),
+            models.Index(
+                fields=("model", "object_id"),
+                name="changelog_object_idx",
+            ),
+            models.Index(
+                fields=("changed_at",),
+                name="changelog_changed_at_idx",
+            ),
+            models.Index(
+                fields=("model", "txid", "seq"),
+                name="changelog_model_txid_seq_idx",
+            ),
+        )
+
+    def __str__(self) -> str:
+        """
+        Set up the string representation of the Model.
+
+        Returns:
+            str: Model string representation.
+        """
+        return f"<{self.seq}> {self.operation} {self.model} {self.object_id}"
+
+
+class ChangeLogHorizon(models.Model):
+    """
+    Position of the last change removed from the log by the retention.
+
+    There is only one row of this table. Clients with a cursor older
+    than the horizon have missed some changes and must resync.
+
+    Args:
+        models.Model: Django ORM model class.
+    """
+
+    txid = models.BigIntegerField(default=0)
+    seq = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        """
+        Set up the string representation of the Model.
+
+        Returns:
+            str: Model string representation.
+        """
+        return f"<horizon> {self.txid}.{self.seq}"
@@ -1,19 +1,193 @@
 """Serializers in the app_dogs."""
 
-from app_dogs.models import Breed, Dog
+import re
+from functools import cached_property, partial
+
+from app_dogs.models import Breed, ChangeLog, Dog
+from app_dogs.utils.accesslog import time_serializer
+from app_dogs.utils.changelog import (
+    encode_cursor,
+    get_change_data,
+    get_cursor,
+)
+from app_dogs.utils.choises import GenderChioce, RatingChoice, SizeChioce
+from app_dogs.utils.sharedbreeds import BreedSnapshot
+from app_dogs.utils.similarity import RATING_FIELDS, TRAIT_FIELDS
+from django.conf import settings
+from django.db.models import Model
 from rest_framework import serializers
 
+EXPAND_QUERY_PARAM = "expand"
+# context key of the shared snapshot of the breeds read by the request
+BREED_SNAPSHOT_CONTEXT = "breed_snapshot"
+
+
+def get_expand_fields(context: dict) -> set[str]:
+    """
+    Get a set of relations requested for expansion by the client.
+
+    Relations are passed as a comma separated list of names in
+    the query parameter, e.g. '?expand=breed'.
+
+    Args:
+        context (dict): Serializer context.
+
+    Returns:
+        set[str]: Names of relations that should be expanded.
+    """
+    request = context.get("request")
+    if request is None:
+        return set()
+
+    query_params = getattr(request, "query_params", request.GET)
+    raw_values: list[str] = query_params.getlist(EXPAND_QUERY_PARAM)
+
+    return {
+        name.strip()
+        for value in raw_values
+        for name in value.split(",")
+        if name.strip()
+    }
+
+
+class TimedRepresentationMixin:
+    """Count the time of the representation in the access log."""
+
+    def to_representation(self, instance: Model) -> dict:
+        """
+        Represent the instance and time it for the request.
+
+        Args:
+            instance (Model): Django model instance.
+
+        Returns:
+            dict: Serialized data.
+        """
+        return time_serializer(partial(super().to_representation, instance))
+
+
+class ExpandBreedMixin:
+    """
+    Embed the related Breed into the Dog representation on demand.
+
+    The Breed is taken from the already loaded instance
+    (e.g. by 'select_related'), so the expansion doesn't make extra
+    queries to the database.
+    """
+
+    @cached_property
+    def expand_breed(self) -> bool:
+        """
+        Check whether the client requested the breed expansion.
+
+        Returns:
+            bool: True if the breed should be embedded.
+        """
+        return "breed" in get_expand_fields(self.context)
+
+    @cached_property
+    def breed_serializer(self) -> "BreedDetailSerializer":
+        """
+        Get the one serializer instance to represent all related breeds.
+
+        Returns:
+            BreedDetailSerializer: Serializer of the embedded breed.
+        """
+        return BreedDetailSerializer(context=self.context)
+
+    def to_representation(self, instance: Dog) -> dict:
+        """
+        Represent the Dog and replace the breed key with breed data.
+
+        Args:
+            instance (Dog): Dog model instance.
+
+        Returns:
+            dict: Serialized Dog data.
+        """
+        data = super().to_representation(instance)
+
+        if self.expand_breed:
+            breed: Breed | None = instance.breed
+            data["breed"] = (
+                self.breed_serializer.to_representation(breed)
+                if breed is not None
+                else None
+            )
+
+        return data
+
 
-class DogListSerializer(serializers.HyperlinkedModelSerializer):
+class BreedAggregateMixin:
+    """
+    Read the aggregate of the dog's breed from the shared snapshot.
+
+    The snapshot is passed in the context by the view. Without it
+    the value annotated by the queryset is read.
+    """
+
+    aggregate: str
+
+    def get_attribute(self, instance: Dog) -> int | float | None:
+        """
+        Get the aggregate of the breed of the dog.
+
+        Args:
+            instance (Dog): Dog model instance.
+
+        Returns:
+            int | float | None: Value of the aggregate.
+        """
+        snapshot: BreedSnapshot | None = self.context.get(
+            BREED_SNAPSHOT_CONTEXT
+        )
+        if snapshot is None:
+            return super().get_attribute(instance)
+        if instance.breed_id is None:
+            return None
+        return snapshot.get_aggregate(instance.breed_id, self.aggregate)
+
+
+class BreedAvgAgeField(BreedAggregateMixin, serializers.FloatField):
+    """
+    Average age of the dogs of the breed.
+
+    Args:
+        BreedAggregateMixin: Read the value from the shared snapshot.
+        FloatField: DRF float field.
+    """
+
+    aggregate = "avg_age"
+
+
+class BreedDogCountField(BreedAggregateMixin, serializers.IntegerField):
+    """
+    Number of the dogs of the breed.
+
+    Args:
+        BreedAggregateMixin: Read the value from the shared snapshot.
+        IntegerField: DRF integer field.
+    """
+
+    aggregate = "dog_count"
+
+
+class DogListSerializer(
+    TimedRepresentationMixin,
+    ExpandBreedMixin,
+    serializers.HyperlinkedModelSerializer,
+):
     """
     Serializer for listing Dogs with minimal fields.
 
     Args:
+        TimedRepresentationMixin: Time the representation for the log.
+        ExpandBreedMixin: Embed the breed data by '?expand=breed'.
         HyperlinkedModelSerializer: DRF serializer based on django model.
         Processed detail links.
     """
 
-    breed_avg_age = serializers.FloatField(read_only=True)
+    breed_avg_age = BreedAvgAgeField(read_only=True)
     detail_url = serializers.HyperlinkedIdentityField(
         view_name="app_dogs:dogs-detail",
         lookup_field="pk",
@@ -37,15 +211,21 @@ class DogListSerializer(serializers.HyperlinkedModelSerializer):
         )
 
 
-class DogDetailSerializer(serializers.ModelSerializer):
+class DogDetailSerializer(
+    TimedRepresentationMixin,
+    ExpandBreedMixin,
+    serializers.ModelSerializer,
+):
     """
     Serializer for detailed Dog view with all fields.
 
     Args:
+        TimedRepresentationMixin: Time the representation for the log.
+        ExpandBreedMixin: Embed the breed data by '?expand=breed'.
         ModelSerializer: DRF serializer based on django model.
     """
 
-    same_breed_count = serializers.IntegerField(read_only=True)
+    same_breed_count = BreedDogCountField(read_only=True)
 
     class Meta:
         """
@@ -64,15 +244,21 @@ class DogDetailSerializer(serializers.ModelSerializer):
             "color",
             "favorite_food",
             "favorite_toy",
+            "version",
             "same_breed_count",
         )
+        read_only_fields = ("version",)
 
 
-class BreedListSerializer(serializers.HyperlinkedModelSerializer):
+class BreedListSerializer(
+    TimedRepresentationMixin,
+    serializers.HyperlinkedModelSerializer,
+):
     """
     Specify how you want to serialize Breed entities.
 
     Args:
+        TimedRepresentationMixin: Time the representation for the log.
         HyperlinkedModelSerializer: DRF serializer based on django model.
         Processed detail links.
     """
@@ -95,13 +281,18 @@ class BreedListSerializer(serializers.HyperlinkedModelSerializer):
             "detail_url",
             "dog_count",
         ]
+        read_only_fields = ("version",)
 
 
-class BreedDetailSerializer(serializers.ModelSerializer):
+class BreedDetailSerializer(
+    TimedRepresentationMixin,
+    serializers.ModelSerializer,
+):
     """
     Serializer for detailed Breed view with all fields.
 
     Args:
+        TimedRepresentationMixin: Time the representation for the log.
         ModelSerializer: DRF serializer based on django model.
     """
 
@@ -114,3 +305,354 @@ class BreedDetailSerializer(serializers.ModelSerializer):
 
         model = Breed
         fields = "__all__"
+        read_only_fields = ("version",)
+
+
+class ChangeLogSerializer(
+    TimedRepresentationMixin,
+    serializers.ModelSerializer,
+):
+    """
+    Serializer for the change feed entries.
+
+    Args:
+        TimedRepresentationMixin: Time the representation for the log.
+        ModelSerializer: DRF serializer based on django model.
+    """
+
+    cursor = serializers.SerializerMethodField()
+    data = serializers.SerializerMethodField()
+
+    class Meta:
+        """
+        Serializer django Meta class.
+
+        Define a related model and serializable fields.
+        """
+
+        model = ChangeLog
+        fields = (
+            "seq",
+            "cursor",
+            "model",
+            "object_id",
+            "operation",
+            "data",
+            "changed_at",
+        )
+
+    def get_cursor(self, instance: ChangeLog) -> str:
+        """
+        Get the cursor to continue reading the feed after this change.
+
+        Args:
+            instance (ChangeLog): Change log entry.
+
+        Returns:
+            str: Cursor representation.
+        """
+        return encode_cursor(get_cursor(instance))
+
+    def get_data(self, instance: ChangeLog) -> dict | None:
+        """
+        Get the row written by the change.
+
+        Args:
+            instance (ChangeLog): Change log entry.
+
+        Returns:
+            dict | None: Row values or None for a delete.
+        """
+        return get_change_data(instance)
+
+
+class SimilarBreedsQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the search for breeds similar to the given one.
+
+    Args:
+        Serializer: DRF base serializer.
+    """
+
+    k = serializers.IntegerField(
+        min_value=1,
+        default=lambda: settings.BREED_SIMILARITY["DEFAULT_K"],
+    )
+
+    def validate_k(self, value: int) -> int:
+        """
+        Limit the number of breeds by the settings.
+
+        Args:
+            value (int): Requested number of breeds.
+
+        Returns:
+            int: Number of breeds to find.
+        """
+        return min(value, settings.BREED_SIMILARITY["MAX_K"])
+
+
+class BreedMatchQuerySerializer(SimilarBreedsQuerySerializer):
+    """
+    Query parameters of the search for breeds by desired traits.
+
+    Every trait is optional and has an optional weight, 1 by default.
+
+    Args:
+        SimilarBreedsQuerySerializer: Serializer of the 'k' parameter.
+    """
+
+    size = serializers.ChoiceField(choices=SizeChioce.choices, required=False)
+    size_weight = serializers.FloatField(min_value=0, default=1.0)
+
+    def get_fields(self) -> dict[str, serializers.Field]:
+        """
+        Add fields of the rating traits and their weights.
+
+        Returns:
+            dict[str, serializers.Field]: All fields of the serializer.
+        """
+        fields = super().get_fields()
+        for name in RATING_FIELDS:
+            fields[name] = serializers.ChoiceField(
+                choices=RatingChoice.choices,
+                required=False,
+            )
+            fields[f"{name}_weight"] = serializers.FloatField(
+                min_value=0,
+                default=1.0,
+            )
+        return fields
+
+    def validate(self, attrs: dict) -> dict:
+        """
+        Check at least one trait is passed.
+
+        Args:
+            attrs (dict): Validated values.
+
+        Raises:
+            ValidationError: No traits are passed.
+
+        Returns:
+            dict: Validated values.
+        """
+        if not any(name in attrs for name in TRAIT_FIELDS):
+            raise serializers.ValidationError(
+                f"Pass at least one of the traits: {', '.join(TRAIT_FIELDS)}."
+            )
+        return attrs
+
+
+class BreedAutocompleteQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the autocomplete of breed names.
+
+    Args:
+        serializers.Serializer: DRF base serializer.
+    """
+
+    q = serializers.CharField(max_length=255, allow_blank=True)
+    limit = serializers.IntegerField(
+        min_value=1,
+        default=lambda: settings.BREED_AUTOCOMPLETE["DEFAULT_LIMIT"],
+    )
+
+    def validate_limit(self, value: int) -> int:
+        """
+        Limit the number of breeds by the settings.
+
+        Args:
+            value (int): Requested number of breeds.
+
+        Returns:
+            int: Number of breeds to find.
+        """
+        return min(value, settings.BREED_AUTOCOMPLETE["MAX_LIMIT"])
+
+
+class BreedFilterQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the filtering of breeds by their traits.
+
+    Ratings are filtered by the optional '<rating>_min' and
+    '<rating>_max' bounds, the size by any number of 'size' values,
+    e.g. '?friendliness_min=4&size=small&size=medium'.
+
+    Args:
+        serializers.Serializer: DRF base serializer.
+    """
+
+    size = serializers.MultipleChoiceField(
+        choices=SizeChioce.choices,
+        required=False,
+    )
+
+    def get_fields(self) -> dict[str, serializers.Field]:
+        """
+        Add bounds of the rating traits.
+
+        Returns:
+            dict[str, serializers.Field]: All fields of the serializer.
+        """
+        fields = super().get_fields()
+        for name in RATING_FIELDS:
+            for bound in ("min", "max"):
+                fields[f"{name}_{bound}"] = serializers.ChoiceField(
+                    choices=RatingChoice.choices,
+                    required=False,
+                )
+        return fields
+
+
+class DogRankQuerySerializer(BreedMatchQuerySerializer):
+    """
+    Query parameters of the ranking of dogs by the owner preferences.
+
+    Besides the breed traits, the desired age, gender and color can be
+    passed, every preference has an optional weight, 1 by default.
+
+    Args:
+        BreedMatchQuerySerializer: Serializer of the breed traits.
+    """
+
+    age = serializers.IntegerField(min_value=0, required=False)
+    age_weight = serializers.FloatField(min_value=0, default=1.0)
+    gender = serializers.ChoiceField(
+        choices=GenderChioce.choices,
+        required=False,
+    )
+    gender_weight = serializers.FloatField(min_value=0, default=1.0)
+    color = serializers.CharField(max_length=255, required=False)
+    color_weight = serializers.FloatField(min_value=0, default=1.0)
+    page = serializers.IntegerField(min_value=1, default=1)
+    page_size = serializers.IntegerField(
+        min_value=1,
+        default=lambda: settings.DOG_RANKING["PAGE_SIZE"],
+    )
+
+    def get_fields(self) -> dict[str, serializers.Field]:
+        """
+        Replace the 'k' parameter with the page parameters.
+
+        Returns:
+            dict[str, serializers.Field]: All fields of the serializer.
+        """
+        fields = super().get_fields()
+        del fields["k"]
+        return fields
+
+    def validate_page_size(self, value: int) -> int:
+        """
+        Limit the page size by the settings.
+
+        Args:
+            value (int): Requested page size.
+
+        Returns:
+            int: Page size.
+        """
+        return min(value, settings.DOG_RANKING["MAX_PAGE_SIZE"])
+
+    def validate(self, attrs: dict) -> dict:
+        """
+        Check at least one preference is passed and the page is not deep.
+
+        Args:
+            attrs (dict): Validated values.
+
+        Raises:
+            ValidationError: No preferences are passed or the page is
+                beyond the ranked dogs.
+
+        Returns:
+            dict: Validated values.
+        """
+        names: tuple[str, ...] = ("age", "gender", "color") + TRAIT_FIELDS
+        if not any(name in attrs for name in names):
+            raise serializers.ValidationError(
+                f"Pass at least one of the preferences: {', '.join(names)}."
+            )
+
+        max_results: int = settings.DOG_RANKING["MAX_RESULTS"]
+        if (attrs["page"] - 1) * attrs["page_size"] >= max_results:
+            raise serializers.ValidationError(
+                {"page": f"Only {max_results} best dogs can be paged."}
+            )
+        return attrs
+
+
+class BatchItemSerializer(serializers.Serializer):
+    """
+    Sub-request of the batch.
+
+    Args:
+        Serializer: DRF base serializer.
+    """
+
+    method = serializers.ChoiceField(
+        choices=("GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE")
+    )
+    path = serializers.RegexField(r"^/", max_length=2048)
+    headers = serializers.DictField(
+        child=serializers.CharField(allow_blank=True, max_length=8192),
+        required=False,
+        default=dict,
+    )
+    body = serializers.JSONField(required=False, default=None)
+
+    def validate_headers(self, value: dict[str, str]) -> dict[str, str]:
+        """
+        Check the names of the headers.
+
+        Args:
+            value (dict[str, str]): Headers by their names.
+
+        Raises:
+            ValidationError: A name isn't a token of letters, digits and
+                dashes.
+
+        Returns:
+            dict[str, str]: Headers.
+        """
+        for name in value:
+            if not re.fullmatch(r"[A-Za-z0-9-]+", name):
+                raise serializers.ValidationError(
+                    f"Invalid header name: {name!r}."
+                )
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    """
+    Batch of API requests.
+
+    Args:
+        Serializer: DRF base serializer.
+    """
+
+    requests = serializers.ListField(
+        child=BatchItemSerializer(),
+        allow_empty=False,
+    )
+    atomic = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value: list[dict]) -> list[dict]:
+        """
+        Limit the number of sub-requests by the settings.
+
+        Args:
+            value (list[dict]): Validated sub-requests.
+
+        Raises:
+            ValidationError: There are too many sub-requests.
+
+        Returns:
+            list[dict]: Sub-requests.
+        """
+        max_requests: int = settings.BATCH_REQUESTS["MAX_REQUESTS"]
+        if len(value) > max_requests:
+            raise serializers.ValidationError(
+                f"Ensure this field has no more than {max_requests} elements."
+            )
+        return value
@@ -0,0 +1,55 @@
+"""Signal receivers of the app_dogs models."""
+
+from functools import partial
+
+from app_dogs.models import Breed
+from app_dogs.utils.autocomplete import breed_name_index_cache
+from app_dogs.utils.sharedbreeds import shared_breeds
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=Breed)
+def index_saved_breed(sender: type[Breed], instance: Breed, **kwargs) -> None:
+    """
+    Put the saved breed into the autocomplete index after the commit.
+
+    Args:
+        sender (type[Breed]): Model class.
+        instance (Breed): Saved breed.
+        kwargs: Other arguments of the signal.
+    """
+    transaction.on_commit(
+        partial(breed_name_index_cache.put, {instance.id: instance.name})
+    )
+
+
+@receiver(post_delete, sender=Breed)
+def unindex_deleted_breed(
+    sender: type[Breed], instance: Breed, **kwargs
+) -> None:
+    """
+    Remove the deleted breed from the autocomplete index after the commit.
+
+    Args:
+        sender (type[Breed]): Model class.
+        instance (Breed): Deleted breed.
+        kwargs: Other arguments of the signal.
+    """
+    transaction.on_commit(
+        partial(breed_name_index_cache.put, {instance.id: None})
+    )
+
+
+@receiver(post_save, sender=Breed)
+@receiver(post_delete, sender=Breed)
+def invalidate_shared_breeds(sender: type[Breed], **kwargs) -> None:
+    """
+    Make the shared snapshot of the breeds stale after the commit.
+
+    Args:
+        sender (type[Breed]): Model class.
+        kwargs: Other arguments of the signal.
+    """
+    shared_breeds.invalidate()
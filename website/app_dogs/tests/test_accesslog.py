@@ -0,0 +1,224 @@
+"""Tests for the structured access log of the app requests.
+
+Check the following operations:
+    - a request of the app is logged with its route, status, times,
+      number of queries and response size;
+    - unsampled requests are skipped unless they failed or were slow,
+      requests out of the app and all requests with the log disabled are
+      not logged;
+    - the handler writes JSON lines in batches from its thread and drops
+      records when its queue is full, without blocking the caller.
+"""
+
+import io
+import json
+import logging
+import threading
+
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.accesslog import (
+    ACCESS_LOGGER,
+    AccessLogHandler,
+    JsonFormatter,
+)
+from app_dogs.utils.admission import Ticket, admission_control
+from django.conf import settings
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+
+ACCESS_LOG_SETTINGS = {"ENABLED": True, "SAMPLE_RATE": 1, "SLOW_MS": 60_000}
+
+
+@override_settings(ACCESS_LOG=ACCESS_LOG_SETTINGS)
+class AccessLogAPITestCase(APITestCase):
+    """
+    Tests the access log of the API requests.
+
+    Args:
+        APITestCase: DRF test class based on django TestCase.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Set up data for the entire APITestCase.
+
+        This method is executed once before any tests run.
+        """
+        breed: Breed = Breed.objects.create(name="pitbull")
+        for name in ("Axe", "Bo"):
+            Dog.objects.create(name=name, age=3, breed=breed)
+        cls.url_dogs = reverse("app_dogs:dogs-list")
+
+    def test_record(self) -> None:
+        """Check the record of a request."""
+        with (
+            self.assertLogs(ACCESS_LOGGER, "INFO") as logs,
+            CaptureQueriesContext(connection) as queries,
+        ):
+            response: Response = self.client.get(
+                self.url_dogs, {"expand": "breed"}
+            )
+
+        self.assertEqual(1, len(logs.records))
+        access: dict = logs.records[0].access
+        self.assertEqual(
+            {
+                "method": "GET",
+                "route": "app_dogs:dogs-list",
+                "status": status.HTTP_200_OK,
+                "queries": len(queries),
+                "bytes": len(response.content),
+            },
+            {
+                key: access[key]
+                for key in ("method", "route", "status", "queries", "bytes")
+            },
+        )
+        self.assertGreater(access["serializer_ms"], 0)
+        self.assertGreater(access["db_ms"], 0)
+        self.assertGreaterEqual(
+            access["total_ms"], access["db_ms"] + access["serializer_ms"]
+        )
+
+    @override_settings(ACCESS_LOG={**ACCESS_LOG_SETTINGS, "SAMPLE_RATE": 0})
+    def test_sampling(self) -> None:
+        """Check unsampled requests are logged only if they failed."""
+        with self.assertNoLogs(ACCESS_LOGGER, "INFO"):
+            self.client.get(self.url_dogs)
+
+        request = RequestFactory().post(self.url_dogs)
+        ticket: Ticket = admission_control.acquire("aggregate", request)
+        self.addCleanup(admission_control.release, ticket)
+        options: dict = settings.ADMISSION_CONTROL
+        aggregate: dict = {
+            **options["CLASSES"]["aggregate"],
+            "LIMIT": 1,
+            "QUEUE_SIZE": 0,
+        }
+        with (
+            override_settings(
+                ADMISSION_CONTROL={
+                    **options,
+                    "ENABLED": True,
+                    "CLASSES": {**options["CLASSES"], "aggregate": aggregate},
+                }
+            ),
+            self.assertLogs(ACCESS_LOGGER, "INFO") as logs,
+        ):
+            self.client.get(self.url_dogs)
+
+        self.assertEqual(
+            [status.HTTP_503_SERVICE_UNAVAILABLE],
+            [record.access["status"] for record in logs.records],
+        )
+
+    @override_settings(ACCESS_LOG={**ACCESS_LOG_SETTINGS, "SAMPLE_RATE": 0})
+    def test_slow(self) -> None:
+        """Check slow requests are logged."""
+        with (
+            override_settings(
+                ACCESS_LOG={**settings.ACCESS_LOG, "SLOW_MS": 0}
+            ),
+            self.assertLogs(ACCESS_LOGGER, "INFO") as logs,
+        ):
+            self.client.get(self.url_dogs)
+
+        self.assertEqual(1, len(logs.records))
+
+    def test_skipped(self) -> None:
+        """Check requests out of the app and without the log."""
+        with self.assertNoLogs(ACCESS_LOGGER, "INFO"):
+            self.client.get(reverse("admin:login"))
+            self.client.get("/api/missing/")
+            with override_settings(
+                ACCESS_LOG={**ACCESS_LOG_SETTINGS, "ENABLED": False}
+            ):
+                self.client.get(self.url_dogs)
+
+
+class BlockingStream(io.StringIO):
+    """
+    Stream holding the first write until it is released.
+
+    Args:
+        io.StringIO: Python text stream in memory.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the stream."""
+        super().__init__()
+        self.entered = threading.Event()
+        self.released = threading.Event()
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        """
+        Write the text, the first write waits for the release.
+
+        Args:
+            text (str): Text to write.
+
+        Returns:
+            int: Number of written characters.
+        """
+        self.writes += 1
+        self.entered.set()
+        self.released.wait()
+        return super().write(text)
+
+
+class AccessLogHandlerTestCase(SimpleTestCase):
+    """
+    Tests the queued writes of the handler.
+
+    Args:
+        SimpleTestCase: Django test class without the database.
+    """
+
+    def make_record(self, number: int) -> logging.LogRecord:
+        """
+        Make an access record.
+
+        Args:
+            number (int): Number of the record.
+
+        Returns:
+            logging.LogRecord: Log record.
+        """
+        record = logging.makeLogRecord({"msg": "GET", "levelno": 20})
+        record.access = {"number": number}
+        return record
+
+    def test_batches(self) -> None:
+        """Check the records are written in batches or dropped."""
+        stream = BlockingStream()
+        handler = AccessLogHandler(
+            stream=stream, queue_size=6, batch_size=4, flush_interval=0
+        )
+        handler.setFormatter(JsonFormatter())
+        self.addCleanup(handler.close)
+
+        handler.handle(self.make_record(0))
+        self.assertTrue(stream.entered.wait(timeout=5))
+        # the writer is blocked, the caller is not
+        for number in range(1, 11):
+            handler.handle(self.make_record(number))
+        self.assertEqual(4, handler.stats["dropped"])
+
+        stream.released.set()
+        handler.flush()
+
+        lines: list[dict] = [
+            json.loads(line) for line in stream.getvalue().splitlines()
+        ]
+        self.assertEqual(list(range(7)), [line["number"] for line in lines])
+        self.assertIn("time", lines[0])
+        # the first record and two batches of the queued ones
+        self.assertEqual((3, 3), (stream.writes, handler.stats["batches"]))
+        self.assertEqual(7, handler.stats["written"])
@@ -0,0 +1,213 @@
+"""Tests for the bulk actions of the admin panel.
+
+Check the following operations:
+    - the action shows the number of selected rows and its form first;
+    - the breed, gender and color are set to the dogs by one UPDATE,
+      which skips the dogs already having the value;
+    - the dogs are deleted by one DELETE without loading them, and the
+      default delete action is replaced;
+    - the action is applied to all dogs with 'select_across';
+    - the breeds are merged: their dogs are moved to the chosen breed,
+      the other breeds are deleted and the changes reach the change log.
+"""
+
+from app_dogs.models import Breed, ChangeLog, Dog
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+class BulkActionsTestCase(TestCase):
+    """
+    Tests the bulk actions.
+
+    Args:
+        TestCase: Django test class.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Set up data for the entire TestCase.
+
+        This method is executed once before any tests run.
+        """
+        cls.pitbull = Breed.objects.create(name="pitbull")
+        cls.pit_bull = Breed.objects.create(name="pit bull")
+        cls.terrier = Breed.objects.create(name="terrier")
+        cls.dogs = [
+            Dog.objects.create(name="Axe", age=3, breed=cls.pitbull),
+            Dog.objects.create(name="Bolt", age=5, breed=cls.pit_bull),
+            Dog.objects.create(name="Rex", age=7, gender="female"),
+        ]
+        cls.admin = get_user_model().objects.create_superuser(
+            username="admin", password="admin"
+        )
+        cls.url_dogs = reverse("admin:app_dogs_dog_changelist")
+        cls.url_breeds = reverse("admin:app_dogs_breed_changelist")
+
+    def setUp(self) -> None:
+        """Run this method before each test function in this class."""
+        self.client.force_login(self.admin)
+
+    def post_action(
+        self,
+        url: str,
+        action: str,
+        objects: list,
+        **data,
+    ):
+        """
+        Post the action for the objects.
+
+        Args:
+            url (str): Change list url.
+            action (str): Action name.
+            objects (list): Selected objects.
+            data: Other POST data.
+
+        Returns:
+            HttpResponse: Django response.
+        """
+        return self.client.post(
+            url,
+            {
+                "action": action,
+                "_selected_action": [obj.id for obj in objects],
+                **data,
+            },
+        )
+
+    def test_update(self) -> None:
+        """Check the dogs are changed by one UPDATE."""
+        dogs: list[Dog] = self.dogs[1:]
+
+        response = self.post_action(self.url_dogs, "set_gender", dogs)
+        self.assertContains(response, "Selected dogs: 2.")
+        self.assertContains(response, 'name="gender"')
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.post_action(
+                self.url_dogs,
+                "set_gender",
+                dogs,
+                gender="female",
+                apply="Apply",
+            )
+        updates: list[str] = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith("UPDATE")
+        ]
+        self.assertRedirects(response, self.url_dogs)
+        self.assertEqual(1, len(updates))
+        self.assertEqual(
+            ["male", "female", "female"],
+            list(Dog.objects.order_by("id").values_list("gender", flat=True)),
+        )
+        # the dog with the same gender isn't updated
+        self.assertEqual(
+            1,
+            ChangeLog.objects.filter(model="dog", operation="update").count(),
+        )
+
+        self.post_action(
+            self.url_dogs,
+            "reassign_breed",
+            dogs,
+            breed=self.terrier.id,
+            apply="Apply",
+        )
+        self.post_action(
+            self.url_dogs, "set_color", dogs, color="white", apply="Apply"
+        )
+        self.assertEqual(
+            [self.terrier.id, self.terrier.id],
+            [dog.breed_id for dog in Dog.objects.filter(color="white")],
+        )
+
+        self.post_action(
+            self.url_dogs, "reassign_breed", dogs, breed="", apply="Apply"
+        )
+        self.assertEqual(
+            [self.pitbull.id],
+            list(
+                Dog.objects.filter(breed__isnull=False).values_list(
+                    "breed", flat=True
+                )
+            ),
+        )
+
+    def test_delete(self) -> None:
+        """Check the dogs are deleted by one DELETE."""
+        response = self.client.get(self.url_dogs)
+        self.assertNotContains(response, 'value="delete_selected"')
+
+        with CaptureQueriesContext(connection) as context:
+            self.post_action(
+                self.url_dogs, "delete_dogs", self.dogs[:2], apply="Apply"
+            )
+        # the change list counts the dogs, but no dog is loaded
+        statements: list[str] = [
+            query["sql"].split(maxsplit=1)[0]
+            for query in context.captured_queries
+            if '"app_dogs_dog"' in query["sql"]
+            and not query["sql"].startswith("SELECT COUNT(*)")
+        ]
+        self.assertEqual(["DELETE"], statements)
+        self.assertEqual([self.dogs[2]], list(Dog.objects.all()))
+
+    def test_select_across(self) -> None:
+        """Check the action is applied to all dogs."""
+        # the change list posts the dogs of its page with 'select_across'
+        self.post_action(
+            self.url_dogs,
+            "set_color",
+            self.dogs[:1],
+            color="black",
+            select_across="1",
+            apply="Apply",
+        )
+
+        self.assertEqual(3, Dog.objects.filter(color="black").count())
+
+    def test_merge(self) -> None:
+        """Check the breeds are merged into the chosen one."""
+        breeds: list[Breed] = [self.pitbull, self.pit_bull]
+
+        response = self.post_action(self.url_breeds, "merge_breeds", breeds)
+        self.assertContains(response, "<td>pit bull</td>")
+        self.assertContains(response, "<td>1</td>", count=2)
+
+        response = self.post_action(
+            self.url_breeds,
+            "merge_breeds",
+            breeds,
+            target=self.pitbull.id,
+            apply="Apply",
+        )
+
+        self.assertRedirects(response, self.url_breeds)
+        self.assertEqual(
+            [self.pitbull.id, self.pitbull.id, None],
+            list(Dog.objects.order_by("id").values_list("breed", flat=True)),
+        )
+        self.assertFalse(Breed.objects.filter(id=self.pit_bull.id).exists())
+        self.assertTrue(
+            ChangeLog.objects.filter(
+                model="breed",
+                object_id=self.pit_bull.id,
+                operation="delete",
+            ).exists()
+        )
+
+        response = self.post_action(
+            self.url_breeds,
+            "merge_breeds",
+            [self.pitbull],
+            target=self.terrier.id,
+            apply="Apply",
+        )
+        self.assertContains(response, "Select a valid choice.")
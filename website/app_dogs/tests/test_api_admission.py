@@ -0,0 +1,376 @@
+"""Tests for the admission control of API requests.
+
+Check the following operations:
+    - requests are sorted into the endpoint classes by their views,
+      requests out of the app are not limited;
+    - sub-requests of a batch are admitted by their own classes;
+    - a request over the limit of its class gets 503 with 'Retry-After'
+      when the queue is full or after the queue timeout, other classes
+      are still served;
+    - a queued request is admitted when a slot is freed;
+    - a queued request is woken up as a follower when a leader of
+      an identical request starts, its key is computed once;
+    - a follower which runs the view itself, because its flight has
+      ended, takes a slot or is shed;
+    - the adaptive limit is lowered while the latency is over the target
+      and raised back while the class is saturated within it.
+"""
+
+import threading
+
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.admission import (
+    SHED_DETAIL,
+    AdmissionQueue,
+    Overloaded,
+    Ticket,
+    admission_control,
+)
+from app_dogs.utils.coalescing import single_flight
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import resolve, reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+
+ADAPTIVE_SETTINGS = {
+    "ENABLED": True,
+    "WINDOW_SECONDS": 0,
+    "MIN_SAMPLES": 2,
+    "DECREASE": 0.5,
+    "MIN_LIMIT": 1,
+}
+
+
+def get_settings(**aggregate) -> dict:
+    """
+    Get the settings with the options of the 'aggregate' class.
+
+    Args:
+        aggregate: Options of the class replaced.
+
+    Returns:
+        dict: Settings of the admission control.
+    """
+    options: dict = settings.ADMISSION_CONTROL
+    return {
+        **options,
+        "ENABLED": True,
+        "CLASSES": {
+            **options["CLASSES"],
+            "aggregate": {**options["CLASSES"]["aggregate"], **aggregate},
+        },
+    }
+
+
+class AdmissionAPITestCase(APITestCase):
+    """
+    Tests the limits of the endpoint classes.
+
+    Args:
+        APITestCase: DRF test class based on django TestCase.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Set up data for the entire APITestCase.
+
+        This method is executed once before any tests run.
+        """
+        breed: Breed = Breed.objects.create(name="pitbull")
+        cls.dog = Dog.objects.create(name="Axe", age=3, breed=breed)
+        cls.url_dogs = reverse("app_dogs:dogs-list")
+        cls.url_dog = reverse("app_dogs:dogs-detail", args=(cls.dog.id,))
+
+    def take_slot(self) -> Ticket:
+        """
+        Take the only slot of the 'aggregate' class.
+
+        Returns:
+            Ticket: Taken slot, freed at the end of the test.
+        """
+        request = RequestFactory().post(self.url_dogs)
+        ticket: Ticket = admission_control.acquire("aggregate", request)
+        self.addCleanup(admission_control.release, ticket)
+        return ticket
+
+    def test_class_names(self) -> None:
+        """Check requests are sorted by their views."""
+        factory = RequestFactory()
+        cases: list[tuple[str, str, str | None]] = [
+            ("get", self.url_dogs, "aggregate"),
+            ("get", self.url_dog, "read"),
+            ("patch", self.url_dog, "write"),
+            ("post", self.url_dogs, "write"),
+            ("get", reverse("app_dogs:breeds-autocomplete"), "read"),
+            ("post", reverse("app_dogs:batch"), None),
+            ("get", reverse("app_dogs:stream"), None),
+            ("get", reverse("admin:login"), None),
+            ("post", reverse("admin:login"), None),
+        ]
+        for method, url, name in cases:
+            with self.subTest(method=method, url=url):
+                request = getattr(factory, method)(url)
+                request.resolver_match = resolve(url)
+                self.assertEqual(
+                    name,
+                    admission_control.get_class_name(
+                        request, request.resolver_match.func
+                    ),
+                )
+
+    @override_settings(ADMISSION_CONTROL=get_settings(LIMIT=1, QUEUE_SIZE=0))
+    def test_queue_full(self) -> None:
+        """Check the request over the limit is shed at once."""
+        self.take_slot()
+        shed_before: int = admission_control.stats.get(
+            "aggregate.shed_queue_full", 0
+        )
+
+        response: Response = self.client.get(self.url_dogs)
+
+        self.assertEqual(
+            status.HTTP_503_SERVICE_UNAVAILABLE, response.status_code
+        )
+        self.assertEqual({"detail": SHED_DETAIL}, response.json())
+        self.assertEqual("1", response["Retry-After"])
+        self.assertEqual(
+            shed_before + 1,
+            admission_control.stats["aggregate.shed_queue_full"],
+        )
+        # other classes have their own slots
+        response = self.client.get(self.url_dog)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        # and pages out of the API aren't limited
+        response = self.client.get(reverse("admin:login"))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    @override_settings(ADMISSION_CONTROL=get_settings(LIMIT=1, QUEUE_SIZE=0))
+    def test_batch(self) -> None:
+        """Check sub-requests of a batch take the slots of their classes."""
+        self.take_slot()
+        shed_before: int = admission_control.stats.get("aggregate.shed", 0)
+
+        response: Response = self.client.post(
+            reverse("app_dogs:batch"),
+            {
+                "requests": [
+                    {"method": "GET", "path": self.url_dogs},
+                    {"method": "GET", "path": self.url_dog},
+                    {"method": "GET", "path": f"{self.url_dogs}?page=2"},
+                ]
+            },
+            format="json",
+        )
+
+        responses: list[dict] = response.json()["responses"]
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [503, 200, 503], [item["status"] for item in responses]
+        )
+        self.assertEqual({"detail": SHED_DETAIL}, responses[0]["body"])
+        self.assertEqual("1", responses[0]["headers"]["Retry-After"])
+        self.assertEqual(
+            shed_before + 2, admission_control.stats["aggregate.shed"]
+        )
+
+    @override_settings(
+        ADMISSION_CONTROL=get_settings(
+            LIMIT=1, QUEUE_SIZE=1, QUEUE_TIMEOUT_MS=50
+        )
+    )
+    def test_queue_timeout(self) -> None:
+        """Check the queued request is shed after the timeout."""
+        self.take_slot()
+
+        response: Response = self.client.get(self.url_dogs)
+
+        self.assertEqual(
+            status.HTTP_503_SERVICE_UNAVAILABLE, response.status_code
+        )
+        metrics: dict = admission_control.get_metrics()["aggregate"]
+        self.assertEqual(
+            (1, 0, 1),
+            tuple(metrics[key] for key in ("in_flight", "waiting", "limit")),
+        )
+        self.assertGreaterEqual(metrics["shed_timeout"], 1)
+
+    @override_settings(
+        ADMISSION_CONTROL=get_settings(
+            LIMIT=1, QUEUE_SIZE=1, QUEUE_TIMEOUT_MS=10_000
+        )
+    )
+    def test_queued(self) -> None:
+        """Check the queued request is admitted once the slot is freed."""
+        request = RequestFactory().post(self.url_dogs)
+        ticket: Ticket = admission_control.acquire("aggregate", request)
+        queued_before: int = admission_control.stats.get("aggregate.queued", 0)
+        timer = threading.Timer(0.05, admission_control.release, (ticket,))
+        timer.start()
+        self.addCleanup(timer.join)
+
+        response: Response = self.client.get(self.url_dogs)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            queued_before + 1, admission_control.stats["aggregate.queued"]
+        )
+        self.assertEqual(
+            0, admission_control.get_metrics()["aggregate"]["in_flight"]
+        )
+
+
+class AdaptiveLimitTestCase(SimpleTestCase):
+    """
+    Tests the adaptive limit of a class.
+
+    Args:
+        SimpleTestCase: Django test class without the database.
+    """
+
+    def run_window(
+        self,
+        queue: AdmissionQueue,
+        options: dict,
+        latency: float,
+        saturated: bool,
+    ) -> int:
+        """
+        Run a window of two requests.
+
+        Args:
+            queue (AdmissionQueue): Queue of the class.
+            options (dict): Settings of the class.
+            latency (float): Latency of the requests in seconds.
+            saturated (bool): Whether the requests fill the slots.
+
+        Returns:
+            int: Limit after the window.
+        """
+        queue.saturated = saturated
+        for _ in range(2):
+            queue.acquire(options, ADAPTIVE_SETTINGS, lambda: None)
+            queue.release(latency, options, ADAPTIVE_SETTINGS)
+        return queue.get_limit(options, ADAPTIVE_SETTINGS)
+
+    def test_adaptive(self) -> None:
+        """Check the limit follows the latency."""
+        queue = AdmissionQueue("aggregate")
+        options: dict = {
+            "LIMIT": 8,
+            "QUEUE_SIZE": 0,
+            "QUEUE_TIMEOUT_MS": 0,
+            "TARGET_MS": 100,
+        }
+
+        self.assertEqual(
+            [4, 2, 1, 1],
+            [self.run_window(queue, options, 0.5, True) for _ in range(4)],
+        )
+        self.assertEqual(500, queue.latency * 1000)
+        # not saturated, the limit isn't needed higher
+        self.assertEqual(1, self.run_window(queue, options, 0.01, False))
+        self.assertEqual(
+            [2, 3],
+            [self.run_window(queue, options, 0.01, True) for _ in range(2)],
+        )
+        # the configured limit is the max
+        queue.limit = 20
+        self.assertEqual(8, queue.get_limit(options, ADAPTIVE_SETTINGS))
+
+
+@override_settings(
+    SINGLE_FLIGHT={**settings.SINGLE_FLIGHT, "CROSS_PROCESS": False}
+)
+class AdmissionFollowerTestCase(SimpleTestCase):
+    """
+    Tests the queued requests following a leader.
+
+    Args:
+        SimpleTestCase: Django test class without the database.
+    """
+
+    def test_follower_woken(self) -> None:
+        """Check the queued request follows the leader once it starts."""
+        queue = AdmissionQueue("aggregate")
+        options: dict = {
+            "LIMIT": 1,
+            "QUEUE_SIZE": 1,
+            "QUEUE_TIMEOUT_MS": 10_000,
+            "TARGET_MS": 100,
+        }
+        adaptive: dict = {**ADAPTIVE_SETTINGS, "ENABLED": False}
+        request = RequestFactory().get(reverse("app_dogs:dogs-list"))
+        keys: list[str] = []
+        outcomes: list[str] = []
+
+        def get_flight_key() -> str | None:
+            keys.append(single_flight.get_key(request))
+            return keys[-1]
+
+        self.assertEqual(
+            "admitted", queue.acquire(options, adaptive, lambda: None)
+        )
+        thread = threading.Thread(
+            target=lambda: outcomes.append(
+                queue.acquire(options, adaptive, get_flight_key)
+            )
+        )
+        thread.start()
+        while not queue.waiting:
+            thread.join(timeout=0.001)
+
+        def view() -> HttpResponse:
+            thread.join(timeout=5)
+            return HttpResponse()
+
+        single_flight.run(request, view)
+
+        self.assertEqual(["follower"], outcomes)
+        self.assertEqual(1, len(keys))
+        self.assertEqual((1, 0), (queue.in_flight, queue.waiting))
+
+    @override_settings(
+        ADMISSION_CONTROL=get_settings(
+            LIMIT=1, QUEUE_SIZE=1, QUEUE_TIMEOUT_MS=50
+        )
+    )
+    def test_follower_promoted(self) -> None:
+        """Check the follower running the view itself takes a slot."""
+        url: str = reverse("app_dogs:dogs-list")
+        queue: AdmissionQueue = admission_control.get_queue("aggregate")
+
+        def follow() -> tuple[HttpRequest, Ticket]:
+            leader_request = RequestFactory().get(url)
+            follower_request = RequestFactory().get(url)
+            busy: Ticket = admission_control.acquire(
+                "aggregate", leader_request
+            )
+
+            def leader_view() -> HttpResponse:
+                self.assertIsNone(
+                    admission_control.acquire("aggregate", follower_request)
+                )
+                return HttpResponse()
+
+            # the flight ends before the follower runs
+            single_flight.run(leader_request, leader_view)
+            return follower_request, busy
+
+        def view() -> HttpResponse:
+            self.assertEqual(1, queue.in_flight)
+            return HttpResponse()
+
+        request, busy = follow()
+        with self.assertRaises(Overloaded):
+            single_flight.run(request, view)
+        admission_control.release(busy)
+
+        request, busy = follow()
+        admission_control.release(busy)
+        single_flight.run(request, view)
+        admission_control.release(request.admission_ticket)
+        self.assertEqual(0, queue.in_flight)
@@ -0,0 +1,262 @@
+"""Tests for the batch of API requests.
+
+Check the following operations:
+    - POST: sub-requests of all methods are run in order and their
+      responses are returned with statuses, headers and bodies;
+    - POST: paths out of the app or not found get error statuses;
+    - POST: the atomic batch is rolled back after a failed sub-request,
+      and the rest of the sub-requests aren't run;
+    - POST: the atomic batch with a sub-request failed by a server error
+      returns its 500 response;
+    - POST: conditional headers are taken from the sub-request, not from
+      the batch request;
+    - POST: reads between writes are run concurrently if the settings
+      allow several threads;
+    - POST: sub-requests are checked for CSRF as the batch request;
+    - POST: the invalid batch returns 400.
+
+Reads are run in separate threads and connections, so the tests are run
+without the wrapping transaction.
+"""
+
+import time
+from unittest import mock
+
+from app_dogs.models import Breed, Dog
+from app_dogs.views import DogViewSet
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+
+class BatchAPITestCase(TransactionTestCase):
+    """
+    Tests the batch of requests.
+
+    Args:
+        TransactionTestCase: Django test class without the wrapping
+            transaction.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Create some test data.
+        """
+        self.client = APIClient()
+        self.url = reverse("app_dogs:batch")
+        self.breed = Breed.objects.create(name="pitbull")
+        self.dog = Dog.objects.create(name="Axe", age=3, breed=self.breed)
+        self.url_dog = reverse("app_dogs:dogs-detail", args=(self.dog.id,))
+        self.url_dogs = reverse("app_dogs:dogs-list")
+
+    def post_batch(self, requests: list[dict], **kwargs) -> Response:
+        """
+        Send the batch.
+
+        Args:
+            requests (list[dict]): Sub-requests.
+            kwargs: Other fields of the batch.
+
+        Returns:
+            Response: Response of the batch.
+        """
+        return self.client.post(
+            self.url, {"requests": requests, **kwargs}, format="json"
+        )
+
+    def test_batch(self) -> None:
+        """Check sub-requests are run in order."""
+        response: Response = self.post_batch(
+            [
+                {"method": "GET", "path": f"{self.url_dog}?expand=breed"},
+                {
+                    "method": "POST",
+                    "path": self.url_dogs,
+                    "body": {"name": "Bolt", "age": 2},
+                },
+                {"method": "PATCH", "path": self.url_dog, "body": {"age": 4}},
+                {"method": "GET", "path": self.url_dog},
+                {"method": "DELETE", "path": self.url_dog},
+                {"method": "GET", "path": self.url_dog},
+                {"method": "GET", "path": "/api/unknown/"},
+                {"method": "GET", "path": "/admin/"},
+                {"method": "POST", "path": self.url, "body": {}},
+            ]
+        )
+        responses: list[dict] = response.json()["responses"]
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [200, 201, 200, 200, 204, 404, 404, 400, 400],
+            [item["status"] for item in responses],
+        )
+        self.assertEqual("pitbull", responses[0]["body"]["breed"]["name"])
+        self.assertEqual("Bolt", responses[1]["body"]["name"])
+        self.assertEqual(4, responses[3]["body"]["age"])
+        self.assertIsNone(responses[4]["body"])
+        self.assertIn("Allow", responses[0]["headers"])
+        self.assertFalse(Dog.objects.filter(id=self.dog.id).exists())
+        self.assertTrue(Dog.objects.filter(name="Bolt").exists())
+
+    def test_atomic(self) -> None:
+        """Check the atomic batch is rolled back after a failure."""
+        requests: list[dict] = [
+            {"method": "PATCH", "path": self.url_dog, "body": {"age": 5}},
+            {"method": "PATCH", "path": self.url_dog, "body": {"age": -1}},
+            {"method": "DELETE", "path": self.url_dog},
+        ]
+        response: Response = self.post_batch(requests, atomic=True)
+
+        self.dog.refresh_from_db()
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertFalse(response.json()["committed"])
+        self.assertEqual(
+            [200, 400, 424],
+            [item["status"] for item in response.json()["responses"]],
+        )
+        self.assertEqual(3, self.dog.age)
+
+        response = self.post_batch(requests[:1], atomic=True)
+
+        self.dog.refresh_from_db()
+        self.assertTrue(response.json()["committed"])
+        self.assertEqual(5, self.dog.age)
+
+    def test_atomic_server_error(self) -> None:
+        """Check the server error of a sub-request fails the batch."""
+        url_breed: str = reverse(
+            "app_dogs:breeds-detail", args=(self.breed.id,)
+        )
+        # the test client raises errors of views signaled to Django
+        self.client.raise_request_exception = False
+        with self.assertLogs("django.request", "ERROR"):
+            response: Response = self.post_batch(
+                [
+                    {"method": "GET", "path": url_breed},
+                    # the breed of the dog is protected from deletion
+                    {"method": "DELETE", "path": url_breed},
+                    {"method": "GET", "path": self.url_dogs},
+                ],
+                atomic=True,
+            )
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertFalse(response.json()["committed"])
+        self.assertEqual(
+            [200, 500, 424],
+            [item["status"] for item in response.json()["responses"]],
+        )
+        self.assertTrue(Breed.objects.filter(id=self.breed.id).exists())
+
+    def test_conditional_headers(self) -> None:
+        """Check 'If-Match' is taken from the sub-request only."""
+        etag: str = self.client.get(self.url_dog)["ETag"]
+        requests: list[dict] = [
+            {
+                "method": "PATCH",
+                "path": self.url_dog,
+                "headers": {"If-Match": etag},
+                "body": {"age": age},
+            }
+            for age in (4, 5)
+        ]
+        requests.append(
+            {"method": "PATCH", "path": self.url_dog, "body": {"age": 6}}
+        )
+        response: Response = self.client.post(
+            self.url,
+            {"requests": requests},
+            format="json",
+            HTTP_IF_MATCH='"999"',
+        )
+
+        self.dog.refresh_from_db()
+        self.assertEqual(
+            [200, 412, 200],
+            [item["status"] for item in response.json()["responses"]],
+        )
+        self.assertEqual(6, self.dog.age)
+
+    @override_settings(
+        BATCH_REQUESTS={"MAX_REQUESTS": 50, "MAX_CONCURRENCY": 4}
+    )
+    def test_concurrent_reads(self) -> None:
+        """Check reads between writes are run at once."""
+        retrieve = DogViewSet.retrieve
+
+        def retrieve_slowly(view: DogViewSet, *args, **kwargs) -> Response:
+            time.sleep(0.5)
+            return retrieve(view, *args, **kwargs)
+
+        read: dict = {"method": "GET", "path": self.url_dog}
+        write: dict = {
+            "method": "PATCH",
+            "path": self.url_dog,
+            "body": {"age": 7},
+        }
+        started: float = time.monotonic()
+        with mock.patch.object(DogViewSet, "retrieve", retrieve_slowly):
+            response: Response = self.post_batch([read] * 4 + [write, read])
+        elapsed: float = time.monotonic() - started
+
+        responses: list[dict] = response.json()["responses"]
+        self.assertEqual([200] * 6, [item["status"] for item in responses])
+        self.assertEqual(3, responses[3]["body"]["age"])
+        self.assertEqual(7, responses[5]["body"]["age"])
+        # two groups of reads, not six reads one by one
+        self.assertLess(elapsed, 2)
+
+    def test_csrf(self) -> None:
+        """Check sub-requests of a logged in user are checked for CSRF."""
+        user = get_user_model().objects.create_user(
+            username="user", password="user"
+        )
+        client = APIClient(enforce_csrf_checks=True)
+        client.force_login(user)
+        client.get(reverse("admin:login"))
+        token: str = client.cookies["csrftoken"].value
+        write: dict = {
+            "method": "PATCH",
+            "path": self.url_dog,
+            "body": {"age": 7},
+        }
+
+        response: Response = client.post(
+            self.url, {"requests": [write]}, format="json"
+        )
+        self.assertEqual(
+            status.HTTP_403_FORBIDDEN,
+            response.json()["responses"][0]["status"],
+        )
+
+        response = client.post(
+            self.url,
+            {"requests": [write]},
+            format="json",
+            HTTP_X_CSRFTOKEN=token,
+        )
+        self.assertEqual(
+            status.HTTP_200_OK,
+            response.json()["responses"][0]["status"],
+        )
+
+    def test_invalid(self) -> None:
+        """Check the invalid batch returns 400."""
+        for body in (
+            {"requests": []},
+            {"requests": [{"method": "TRACE", "path": self.url_dog}]},
+            {"requests": [{"method": "GET", "path": "dogs"}]},
+            {"requests": [{"method": "GET", "path": self.url_dog}] * 51},
+        ):
+            response: Response = self.client.post(
+                self.url, body, format="json"
+            )
+            self.assertEqual(
+                status.HTTP_400_BAD_REQUEST,
+                response.status_code,
+            )
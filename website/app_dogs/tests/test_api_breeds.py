@@ -110,6 +110,7 @@ class BreedAPITestCase(APITestCase):
                 "trainability": 5,
                 "shedding_amount": 1,
                 "exercise_needs": 3,
+                "version": 1,
                 "detail_url": self.url_breed_detail_1,
                 "dog_count": 1,
             },
@@ -121,6 +122,7 @@ class BreedAPITestCase(APITestCase):
                 "trainability": 3,
                 "shedding_amount": 2,
                 "exercise_needs": 5,
+                "version": 1,
                 "detail_url": self.url_breed_detail_2,
                 "dog_count": 2,
             },
@@ -132,6 +134,7 @@ class BreedAPITestCase(APITestCase):
                 "trainability": 4,
                 "shedding_amount": 2,
                 "exercise_needs": 2,
+                "version": 1,
                 "detail_url": self.url_breed_detail_3,
                 "dog_count": 0,
             },
@@ -178,6 +181,7 @@ class BreedAPITestCase(APITestCase):
             "trainability": 5,
             "shedding_amount": 1,
             "exercise_needs": 3,
+            "version": 1,
         }
         expected_data_2 = {
             "id": self.breed_2.id,
@@ -187,6 +191,7 @@ class BreedAPITestCase(APITestCase):
             "trainability": 3,
             "shedding_amount": 2,
             "exercise_needs": 5,
+            "version": 1,
         }
         expected_data_3 = {
             "id": self.breed_3.id,
@@ -196,6 +201,7 @@ class BreedAPITestCase(APITestCase):
             "trainability": 4,
             "shedding_amount": 2,
             "exercise_needs": 2,
+            "version": 1,
         }
 
         response_breed_1: Response = self.client.get(self.url_breed_detail_1)
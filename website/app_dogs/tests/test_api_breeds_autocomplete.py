@@ -0,0 +1,183 @@
+"""Tests for the autocomplete of breed names.
+
+Check the following operations:
+    - GET autocomplete: breeds with a word starting with the query,
+      the case and accents are ignored, breeds with more dogs first;
+    - requests after the first one don't query the database;
+    - breeds saved and deleted through the ORM are applied after
+      the commit;
+    - changes not seen by the signals and the dog counts are caught up
+      from the change log;
+    - invalid query parameters are rejected.
+
+The change log shows only committed changes, so its test is run
+without the wrapping transaction.
+"""
+
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.autocomplete import breed_name_index_cache
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+# no background refreshes while the tests run
+AUTOCOMPLETE = {**settings.BREED_AUTOCOMPLETE, "REFRESH_SECONDS": 3600}
+
+
+@override_settings(BREED_AUTOCOMPLETE=AUTOCOMPLETE)
+class BreedAutocompleteAPITestCase(APITestCase):
+    """
+    Tests the autocomplete of breed names.
+
+    Args:
+        APITestCase: DRF test class based on django TestCase.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Set up data for the entire APITestCase.
+
+        This method is executed once before any tests run.
+        """
+        cls.epagneul, cls.pitbull, cls.bull_terrier, cls.pinscher = (
+            Breed.objects.bulk_create(
+                [
+                    Breed(name="Épagneul  Breton"),
+                    Breed(name="Pitbull"),
+                    Breed(name="Bull Terrier"),
+                    Breed(name="pinscher"),
+                ]
+            )
+        )
+        Dog.objects.bulk_create(
+            [Dog(name="Axe", age=3, breed=cls.pitbull)] * 3
+            + [Dog(name="Bo", age=2, breed=cls.pinscher)]
+        )
+        cls.url = reverse("app_dogs:breeds-autocomplete")
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Drop the index loaded by other tests.
+        """
+        breed_name_index_cache.clear()
+
+    def get_names(self, query: str) -> list[str]:
+        """
+        Get names of the found breeds.
+
+        Args:
+            query (str): Query string of the autocomplete.
+
+        Returns:
+            list[str]: Names in the order of the results.
+        """
+        response: Response = self.client.get(f"{self.url}?{query}")
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return [breed["name"] for breed in response.json()["results"]]
+
+    def test_search(self) -> None:
+        """Check the matching and the ranking of breeds."""
+        response: Response = self.client.get(f"{self.url}?q=p")
+        self.assertEqual(
+            [
+                {"id": self.pitbull.id, "name": "Pitbull", "dog_count": 3},
+                {"id": self.pinscher.id, "name": "pinscher", "dog_count": 1},
+            ],
+            response.json()["results"],
+        )
+        # only word starts are matched
+        self.assertEqual(["Bull Terrier"], self.get_names("q=BULL"))
+        self.assertEqual(["Épagneul  Breton"], self.get_names("q=epag"))
+        self.assertEqual(["Épagneul  Breton"], self.get_names("q=bret"))
+        self.assertEqual(
+            ["Épagneul  Breton"], self.get_names("q=%C3%A9pagneul%20b")
+        )
+        self.assertEqual(["Pitbull"], self.get_names("q=p&limit=1"))
+        self.assertEqual([], self.get_names("q=bulldog"))
+        self.assertEqual([], self.get_names("q=%20"))
+
+    def test_no_queries(self) -> None:
+        """Check the index is read from memory after the first request."""
+        self.get_names("q=pit")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(["Pitbull"], self.get_names("q=pit"))
+
+    def test_signals(self) -> None:
+        """Check the committed ORM changes are applied at once."""
+        self.get_names("q=pit")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Breed.objects.create(name="Pitsky")
+            self.pinscher.name = "Pit pinscher"
+            self.pinscher.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bull_terrier.delete()
+
+        self.assertEqual(
+            ["Pitbull", "Pit pinscher", "Pitsky"], self.get_names("q=pit")
+        )
+        self.assertEqual([], self.get_names("q=terrier"))
+
+    def test_invalid_query(self) -> None:
+        """Check a missing query and invalid limits are rejected."""
+        for query in ("", "q=pit&limit=0", "q=pit&limit=x"):
+            response: Response = self.client.get(f"{self.url}?{query}")
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+
+@override_settings(
+    BREED_AUTOCOMPLETE={**AUTOCOMPLETE, "RECOUNT_SECONDS": 0},
+)
+class BreedAutocompleteCatchUpTestCase(APITransactionTestCase):
+    """
+    Tests the catching up of the index with the change log.
+
+    Args:
+        APITransactionTestCase: DRF test class without the wrapping
+            transaction.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Create some test data.
+        """
+        breed_name_index_cache.clear()
+        self.pitbull = Breed.objects.create(name="pitbull")
+        self.bulldog = Breed.objects.create(name="bulldog")
+        self.url = reverse("app_dogs:breeds-autocomplete")
+
+    def get_results(self) -> list[tuple[str, int]]:
+        """
+        Get names and dog counts of breeds starting with 'b'.
+
+        Returns:
+            list[tuple[str, int]]: Names and dog counts.
+        """
+        response: Response = self.client.get(f"{self.url}?q=b")
+        return [
+            (breed["name"], breed["dog_count"])
+            for breed in response.json()["results"]
+        ]
+
+    def test_catch_up(self) -> None:
+        """Check raw updates and dog counts are applied by the refresh."""
+        self.assertEqual([("bulldog", 0)], self.get_results())
+
+        # bulk updates don't send signals
+        Breed.objects.filter(id=self.pitbull.id).update(name="Bull pit")
+        Dog.objects.bulk_create(
+            [Dog(name="Axe", age=3, breed=self.pitbull)] * 2
+        )
+        self.assertEqual([("bulldog", 0)], self.get_results())
+
+        breed_name_index_cache.refresh()
+        self.assertEqual([("Bull pit", 2), ("bulldog", 0)], self.get_results())
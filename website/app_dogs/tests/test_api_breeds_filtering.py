@@ -0,0 +1,224 @@
+"""Tests for the filtering of breeds by their traits.
+
+Check the following operations:
+    - GET list: breeds are filtered by rating ranges and sizes;
+    - the in-memory index follows inserts, updates and deletes;
+    - changes of dogs are not applied and don't reload the index;
+    - invalid query parameters are rejected;
+    - bitsets after incremental updates give the same breeds as
+      the straightforward filtering.
+
+The index is refreshed from the change log, which shows only committed
+changes, so the API tests are run without the wrapping transaction.
+"""
+
+import random
+
+from app_dogs.models import Breed, ChangeLog, Dog
+from app_dogs.utils.changelog import get_head_cursor
+from app_dogs.utils.filtering import (
+    TRAIT_VALUES,
+    BreedTraitIndex,
+    breed_trait_index_cache,
+)
+from app_dogs.utils.similarity import TRAIT_FIELDS
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APITransactionTestCase
+
+QUERY = "friendliness_min=4&shedding_amount_max=2&size=small&size=medium"
+
+
+class BreedFilteringAPITestCase(APITransactionTestCase):
+    """
+    Tests the filtering of the breed list.
+
+    Args:
+        APITransactionTestCase: DRF test class without the wrapping
+            transaction.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Create some test data.
+        """
+        breed_trait_index_cache.clear()
+        self.url_breeds = reverse("app_dogs:breeds-list")
+
+        self.pug, self.beagle, self.husky, self.corgi = (
+            Breed.objects.bulk_create(
+                [
+                    Breed(
+                        name="pug",
+                        size="small",
+                        friendliness=5,
+                        shedding_amount=2,
+                    ),
+                    Breed(
+                        name="beagle",
+                        size="medium",
+                        friendliness=4,
+                        shedding_amount=1,
+                    ),
+                    Breed(
+                        name="husky",
+                        size="large",
+                        friendliness=5,
+                        shedding_amount=1,
+                    ),
+                    Breed(
+                        name="corgi",
+                        size="small",
+                        friendliness=3,
+                        shedding_amount=2,
+                    ),
+                ]
+            )
+        )
+
+    def get_names(self, query: str = QUERY) -> list[str]:
+        """
+        Get names of the filtered breeds.
+
+        Args:
+            query (str): Query string of the filter.
+
+        Returns:
+            list[str]: Names in the id order.
+        """
+        response: Response = self.client.get(f"{self.url_breeds}?{query}")
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return [breed["name"] for breed in response.json()["results"]]
+
+    def test_filter(self) -> None:
+        """Check breeds are filtered by all passed traits."""
+        self.assertEqual(["pug", "beagle"], self.get_names())
+        self.assertEqual(
+            ["pug", "husky", "corgi"], self.get_names("size=large&size=small")
+        )
+        self.assertEqual(
+            ["corgi"], self.get_names("friendliness_max=3&trainability_min=3")
+        )
+        self.assertEqual([], self.get_names("friendliness_min=5&size=medium"))
+
+    def test_changes(self) -> None:
+        """Check the index follows the changes of breeds."""
+        self.assertEqual(["pug", "beagle"], self.get_names())
+        index: BreedTraitIndex = breed_trait_index_cache.index
+
+        self.client.patch(
+            reverse("app_dogs:breeds-detail", args=(self.corgi.id,)),
+            {"friendliness": 4},
+        )
+        self.client.patch(
+            reverse("app_dogs:breeds-detail", args=(self.pug.id,)),
+            {"size": "large"},
+        )
+        self.assertEqual(["beagle", "corgi"], self.get_names())
+        # updates are applied to the arrays of the same breeds
+        self.assertIs(index.ids, breed_trait_index_cache.index.ids)
+
+        self.beagle.delete()
+        Breed.objects.create(
+            name="spitz", size="small", friendliness=5, shedding_amount=1
+        )
+        self.assertEqual(["corgi", "spitz"], self.get_names())
+
+    @override_settings(BREED_FILTERING={"MAX_APPLIED_CHANGES": 2})
+    def test_dog_changes(self) -> None:
+        """Check changes of dogs don't count for the reload."""
+        self.assertEqual(["pug", "beagle"], self.get_names())
+        index: BreedTraitIndex = breed_trait_index_cache.index
+
+        Dog.objects.bulk_create(
+            Dog(name=f"dog {i}", age=1, breed=self.pug) for i in range(5)
+        )
+        self.assertEqual(["pug", "beagle"], self.get_names())
+
+        # the same index is moved past the dog changes
+        self.assertIs(index.ids, breed_trait_index_cache.index.ids)
+        self.assertEqual(
+            get_head_cursor(), breed_trait_index_cache.index.cursor
+        )
+
+    def test_invalid_query(self) -> None:
+        """Check invalid bounds and sizes are rejected."""
+        for query in (
+            "friendliness_min=6",
+            "size=huge",
+            "exercise_needs_max=x",
+        ):
+            response: Response = self.client.get(f"{self.url_breeds}?{query}")
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+
+class BreedTraitIndexTestCase(SimpleTestCase):
+    """
+    Tests the bitsets of the index.
+
+    Args:
+        SimpleTestCase: Django test class without database queries.
+    """
+
+    def test_incremental_updates(self) -> None:
+        """Check bitsets of updated breeds match the brute force."""
+        rng = random.Random(42)
+        breeds: dict[int, dict] = {
+            breed_id: {
+                name: rng.choice(values)
+                for name, values in TRAIT_VALUES.items()
+            }
+            for breed_id in range(1, 200)
+        }
+        ids, codes = BreedTraitIndex.encode_rows(
+            [
+                (breed_id, *(traits[name] for name in TRAIT_FIELDS))
+                for breed_id, traits in breeds.items()
+            ]
+        )
+        index = BreedTraitIndex(ids, codes, cursor=(0, 0))
+
+        changes: list[ChangeLog] = []
+        for seq, breed_id in enumerate(rng.sample(sorted(breeds), 60), 1):
+            breeds[breed_id] = {
+                name: rng.choice(values)
+                for name, values in TRAIT_VALUES.items()
+            }
+            changes.append(
+                ChangeLog(
+                    seq=seq,
+                    txid=1,
+                    model="breed",
+                    object_id=breed_id,
+                    operation="update",
+                    data={
+                        **breeds[breed_id],
+                        # the change log holds the code of the size
+                        "size": TRAIT_VALUES["size"].index(
+                            breeds[breed_id]["size"]
+                        ),
+                    },
+                )
+            )
+        index = index.apply(changes)
+
+        for _ in range(50):
+            allowed: dict[str, list] = {
+                name: rng.sample(values, rng.randint(0, len(values)))
+                for name, values in rng.sample(
+                    sorted(TRAIT_VALUES.items()), rng.randint(1, 3)
+                )
+            }
+            expected: list[int] = [
+                breed_id
+                for breed_id, traits in breeds.items()
+                if all(
+                    traits[name] in values for name, values in allowed.items()
+                )
+            ]
+            self.assertEqual(expected, index.select(allowed).tolist())
+        self.assertEqual((1, 60), index.cursor)
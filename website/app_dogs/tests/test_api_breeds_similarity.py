@@ -0,0 +1,219 @@
+"""Tests for the search of similar breeds.
+
+Check the following operations:
+    - GET similar: breeds closest to the given one, the breed itself
+      is excluded;
+    - GET match: breeds closest to the desired weighted traits;
+    - the trait matrix is rebuilt after breeds have changed, also when
+      the changes are committed out of their order;
+    - invalid query parameters are rejected.
+
+The matrix follows the change log, which shows only committed changes,
+so the tests are run without the wrapping transaction.
+"""
+
+import threading
+
+from app_dogs.models import Breed
+from app_dogs.utils.similarity import trait_matrix_cache
+from django.db import connection, transaction
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APITransactionTestCase
+
+
+class BreedSimilarityAPITestCase(APITransactionTestCase):
+    """
+    Tests the search of similar breeds.
+
+    Args:
+        APITransactionTestCase: DRF test class without the wrapping
+            transaction.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Create some test data.
+        """
+        self.pitbull = Breed.objects.create(
+            name="pitbull",
+            friendliness=5,
+            trainability=5,
+            shedding_amount=1,
+        )
+        self.bandog = Breed.objects.create(
+            name="bandog",
+            size="large",
+            friendliness=2,
+            shedding_amount=2,
+            exercise_needs=5,
+        )
+        self.bull_terrier = Breed.objects.create(
+            name="bull terrier",
+            size="small",
+            friendliness=5,
+            trainability=4,
+            shedding_amount=2,
+            exercise_needs=2,
+        )
+        self.staffordshire = Breed.objects.create(
+            name="staffordshire terrier",
+            friendliness=5,
+            trainability=5,
+            shedding_amount=1,
+            exercise_needs=4,
+        )
+
+        self.url_match = reverse("app_dogs:breeds-match")
+
+    @staticmethod
+    def get_url_similar(breed: Breed) -> str:
+        """
+        Get the url of similar breeds.
+
+        Args:
+            breed (Breed): Target breed.
+
+        Returns:
+            str: Url.
+        """
+        return reverse("app_dogs:breeds-similar", args=(breed.id,))
+
+    def test_similar(self) -> None:
+        """Check breeds are ordered by the distance to the given one."""
+        response: Response = self.client.get(
+            self.get_url_similar(self.pitbull)
+        )
+
+        results: list[dict] = response.data["results"]
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [self.staffordshire.id, self.bull_terrier.id, self.bandog.id],
+            [item["id"] for item in results],
+        )
+        self.assertAlmostEqual(0.25, results[0]["distance"], places=5)
+        self.assertEqual("staffordshire terrier", results[0]["name"])
+        self.assertEqual(
+            sorted(item["distance"] for item in results),
+            [item["distance"] for item in results],
+        )
+
+    def test_similar_k(self) -> None:
+        """Check the number of found breeds is limited by k."""
+        response: Response = self.client.get(
+            self.get_url_similar(self.pitbull),
+            {"k": 1},
+        )
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(1, len(response.data["results"]))
+
+    def test_similar_not_found(self) -> None:
+        """Check the unknown breed is not found."""
+        url: str = reverse("app_dogs:breeds-similar", args=(0,))
+
+        response: Response = self.client.get(url)
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_matrix_rebuilt(self) -> None:
+        """Check changes of breeds are taken into account."""
+        self.client.get(self.get_url_similar(self.pitbull))
+        clone = Breed.objects.create(
+            name="pitbull clone",
+            friendliness=5,
+            trainability=5,
+            shedding_amount=1,
+        )
+        Breed.objects.filter(id=self.bandog.id).update(
+            size="medium",
+            friendliness=5,
+            trainability=5,
+            shedding_amount=1,
+            exercise_needs=3,
+        )
+
+        response: Response = self.client.get(
+            self.get_url_similar(self.pitbull),
+            {"k": 2},
+        )
+
+        results: list[dict] = response.data["results"]
+        self.assertEqual(5, len(trait_matrix_cache.get()))
+        self.assertEqual(
+            [(self.bandog.id, 0), (clone.id, 0)],
+            [(item["id"], item["distance"]) for item in results],
+        )
+
+    def test_matrix_commit_order(self) -> None:
+        """Check a change committed after a later one isn't missed."""
+        created = threading.Event()
+        commit = threading.Event()
+
+        def create_in_transaction() -> None:
+            try:
+                with transaction.atomic():
+                    Breed.objects.create(name="late", friendliness=5)
+                    created.set()
+                    commit.wait(timeout=5)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=create_in_transaction)
+        thread.start()
+        self.assertTrue(created.wait(timeout=5))
+        # a later change is committed first
+        Breed.objects.create(name="early", friendliness=5)
+        self.assertEqual(5, len(trait_matrix_cache.get()))
+
+        commit.set()
+        thread.join()
+
+        self.assertEqual(6, len(trait_matrix_cache.get()))
+
+    def test_match(self) -> None:
+        """Check breeds are ordered by the distance to desired traits."""
+        response: Response = self.client.get(
+            self.url_match,
+            {"size": "large", "exercise_needs": 5, "k": 2},
+        )
+
+        results: list[dict] = response.data["results"]
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(self.bandog.id, results[0]["id"])
+        self.assertEqual(0, results[0]["distance"])
+        self.assertEqual(2, len(results))
+
+    def test_match_weights(self) -> None:
+        """Check weights change the order of breeds."""
+        params = {"friendliness": 5, "shedding_amount": 2, "exercise_needs": 4}
+
+        response: Response = self.client.get(self.url_match, params)
+        response_weighted: Response = self.client.get(
+            self.url_match,
+            {**params, "exercise_needs_weight": 0},
+        )
+
+        self.assertEqual(
+            self.staffordshire.id,
+            response.data["results"][0]["id"],
+        )
+        self.assertEqual(
+            self.bull_terrier.id,
+            response_weighted.data["results"][0]["id"],
+        )
+
+    def test_match_invalid(self) -> None:
+        """Check invalid traits and weights are rejected."""
+        for params in (
+            {},
+            {"size": "huge"},
+            {"friendliness": 6},
+            {"friendliness": 5, "friendliness_weight": -1},
+            {"friendliness": 5, "k": 0},
+        ):
+            response: Response = self.client.get(self.url_match, params)
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
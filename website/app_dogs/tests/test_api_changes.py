@@ -0,0 +1,186 @@
+"""Tests for the change feed API.
+
+Check the following operations:
+    - all writes of dogs and breeds are recorded, bulk ones as well;
+    - GET: read the feed in batches by the cursor;
+    - compaction keeps only the latest change of each object;
+    - retention removes old changes and makes old cursors expired.
+
+The changes are visible only after the writing transaction has been
+finished, so the tests are run without the wrapping transaction.
+"""
+
+from datetime import timedelta
+
+from app_dogs.models import Breed, ChangeLog, Dog
+from app_dogs.utils.changelog import compact_changes, purge_changes
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APITransactionTestCase
+
+
+class ChangeFeedAPITestCase(APITransactionTestCase):
+    """
+    Tests change feed API.
+
+    Args:
+        APITransactionTestCase: DRF test class based on django
+            TransactionTestCase.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Create some test data.
+        """
+        self.url_changes = reverse("app_dogs:changes-list")
+        self.breed = Breed.objects.create(name="pitbull", friendliness=5)
+        self.dog = Dog.objects.create(name="Axe", age=3, breed=self.breed)
+
+    def get_all_changes(self, limit: int = 500) -> list[dict]:
+        """
+        Read the whole feed batch by batch.
+
+        Args:
+            limit (int): Size of the batch.
+
+        Returns:
+            list[dict]: All changes in the feed order.
+        """
+        results = []
+        params = {"limit": limit}
+        while True:
+            response: Response = self.client.get(self.url_changes, params)
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            results.extend(response.data["results"])
+            params["since"] = response.data["next_cursor"]
+            if not response.data["has_more"]:
+                return results
+
+    def test_single_writes(self) -> None:
+        """Check insert, update and delete are recorded in order."""
+        dog_id: int = self.dog.id
+        self.dog.age = 4
+        self.dog.save()
+        self.dog.delete()
+
+        changes = [
+            (item["model"], item["object_id"], item["operation"])
+            for item in self.get_all_changes()
+        ]
+
+        self.assertEqual(
+            [
+                ("breed", self.breed.id, "insert"),
+                ("dog", dog_id, "insert"),
+                ("dog", dog_id, "update"),
+                ("dog", dog_id, "delete"),
+            ],
+            changes,
+        )
+
+    def test_change_data(self) -> None:
+        """Check a change holds the new row data."""
+        results = self.get_all_changes()
+
+        self.assertEqual("Axe", results[1]["data"]["name"])
+        self.assertEqual(self.breed.id, results[1]["data"]["breed_id"])
+        self.assertEqual("male", results[1]["data"]["gender"])
+        self.assertEqual("medium", results[0]["data"]["size"])
+
+    def test_bulk_writes(self) -> None:
+        """Check bulk create, update and delete are recorded."""
+        dogs = Dog.objects.bulk_create(
+            Dog(name=f"dog {i}", age=1, breed=self.breed) for i in range(3)
+        )
+        Dog.objects.filter(breed=self.breed).update(color="black")
+        Dog.objects.filter(id__in=[dog.id for dog in dogs]).delete()
+        Dog.objects.filter(color="black").update(color="black")
+
+        operations = [item["operation"] for item in self.get_all_changes()]
+
+        self.assertEqual(2 + 3, operations.count("insert"))
+        self.assertEqual(4, operations.count("update"))
+        self.assertEqual(3, operations.count("delete"))
+
+    def test_batches(self) -> None:
+        """Check the feed is read by small batches without losses."""
+        Dog.objects.bulk_create(Dog(name=f"dog {i}", age=1) for i in range(6))
+
+        response: Response = self.client.get(self.url_changes, {"limit": 3})
+        all_results = self.get_all_changes(limit=3)
+
+        self.assertEqual(3, len(response.data["results"]))
+        self.assertTrue(response.data["has_more"])
+        self.assertEqual(8, len(all_results))
+        self.assertEqual(
+            sorted(item["seq"] for item in all_results),
+            [item["seq"] for item in all_results],
+        )
+
+    def test_empty_batch(self) -> None:
+        """Check the cursor isn't moved when there are no new changes."""
+        head: str = self.get_all_changes()[-1]["cursor"]
+
+        response: Response = self.client.get(
+            self.url_changes,
+            {"since": head},
+        )
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([], response.data["results"])
+        self.assertEqual(head, response.data["next_cursor"])
+        self.assertFalse(response.data["has_more"])
+
+    def test_invalid_params(self) -> None:
+        """Check invalid cursor and limit are rejected."""
+        for params in ({"since": "abc"}, {"since": "1.-1"}, {"limit": 0}):
+            response: Response = self.client.get(self.url_changes, params)
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_compaction(self) -> None:
+        """Check only the latest change of each object is kept."""
+        for age in range(5):
+            self.dog.age = age
+            self.dog.save()
+
+        removed: int = compact_changes(
+            before=timezone.now() + timedelta(seconds=1),
+            batch_size=2,
+        )
+        results = self.get_all_changes()
+
+        self.assertEqual(5, removed)
+        self.assertEqual(2, len(results))
+        self.assertEqual(4, results[-1]["data"]["age"])
+
+    def test_retention(self) -> None:
+        """Check old cursors are expired after the retention."""
+        old_cursor: str = self.get_all_changes()[0]["cursor"]
+        Dog.objects.create(name="Bryee", age=1)
+        ChangeLog.objects.filter(object_id=self.dog.id).update(
+            changed_at=timezone.now() - timedelta(days=30)
+        )
+        ChangeLog.objects.filter(model="breed").update(
+            changed_at=timezone.now() - timedelta(days=30)
+        )
+
+        removed: int = purge_changes(
+            before=timezone.now() - timedelta(days=7),
+            batch_size=1,
+        )
+        response: Response = self.client.get(
+            self.url_changes,
+            {"since": old_cursor},
+        )
+        last_change: ChangeLog = ChangeLog.objects.get()
+
+        self.assertEqual(2, removed)
+        self.assertEqual(status.HTTP_410_GONE, response.status_code)
+        self.assertEqual(
+            f"{last_change.txid}.{last_change.seq}",
+            response.data["head_cursor"],
+        )
@@ -0,0 +1,224 @@
+"""Tests for the single-flight coalescing of identical concurrent reads.
+
+Check the following operations:
+    - GET: a thundering herd of identical requests runs the aggregate
+      query once, and every request gets the same response;
+    - query parameters in another order are the same request, other
+      credentials or 'Accept' are not;
+    - in the cross-process mode workers share the response by the
+      advisory lock and the cache.
+
+Requests are sent from threads with their own database connections,
+so the tests are run without the wrapping transaction.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.coalescing import SingleFlight, get_flight_key
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+SINGLE_FLIGHT_SETTINGS = {
+    "ENABLED": True,
+    "WAIT_MS": 10_000,
+    "CROSS_PROCESS": False,
+    "CACHE": "default",
+    "POLL_MS": 10,
+}
+HERD_SIZE = 20
+# time of the expensive query, longer than the herd takes to arrive
+QUERY_DELAY = 0.3
+
+
+@override_settings(SINGLE_FLIGHT=SINGLE_FLIGHT_SETTINGS)
+class SingleFlightAPITestCase(TransactionTestCase):
+    """
+    Tests coalescing of the API reads.
+
+    Args:
+        TransactionTestCase: Django test class without the wrapping
+            transaction.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Create some test data.
+        """
+        breed = Breed.objects.create(name="pitbull")
+        Dog.objects.bulk_create(
+            Dog(name=f"dog {i}", age=i, breed=breed) for i in range(10)
+        )
+        self.expensive_queries: list[str] = []
+
+    def get_slowly(self, url: str, expensive: str) -> Response:
+        """
+        Send the request from a thread where the expensive query is slow.
+
+        Args:
+            url (str): URL of the request.
+            expensive (str): Part of the SQL of the expensive query.
+
+        Returns:
+            Response: API response.
+        """
+
+        def slow_down(
+            execute: Callable,
+            sql: str,
+            params: object,
+            many: bool,
+            context: dict,
+        ) -> object:
+            if expensive in sql:
+                self.expensive_queries.append(sql)
+                time.sleep(QUERY_DELAY)
+            return execute(sql, params, many, context)
+
+        try:
+            with connection.execute_wrapper(slow_down):
+                return APIClient().get(url)
+        finally:
+            connections.close_all()
+
+    def run_herd(self, urls: list[str], expensive: str) -> list[Response]:
+        """
+        Send the requests at once.
+
+        Args:
+            urls (list[str]): URLs of the requests.
+            expensive (str): Part of the SQL of the expensive query.
+
+        Returns:
+            list[Response]: API responses.
+        """
+        barrier = threading.Barrier(len(urls))
+
+        def send(url: str) -> Response:
+            barrier.wait()
+            return self.get_slowly(url, expensive)
+
+        with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+            return list(executor.map(send, urls))
+
+    def test_breeds_herd(self) -> None:
+        """Check the herd of breed list requests counts dogs once."""
+        responses: list[Response] = self.run_herd(
+            [reverse("app_dogs:breeds-list")] * HERD_SIZE,
+            'COUNT("app_dogs_dog"."id")',
+        )
+
+        self.assertEqual(1, len(self.expensive_queries))
+        self.assertEqual(
+            {status.HTTP_200_OK},
+            {response.status_code for response in responses},
+        )
+        self.assertEqual(1, len({response.content for response in responses}))
+        self.assertEqual(10, responses[0].json()["results"][0]["dog_count"])
+
+    def test_dogs_herd(self) -> None:
+        """Check the herd of dog pages with reordered parameters."""
+        url: str = reverse("app_dogs:dogs-list")
+        responses: list[Response] = self.run_herd(
+            [
+                f"{url}?page=1&format=json",
+                f"{url}?format=json&page=1",
+            ]
+            * (HERD_SIZE // 2),
+            "AVG(",
+        )
+
+        self.assertEqual(1, len(self.expensive_queries))
+        self.assertEqual(1, len({response.content for response in responses}))
+        self.assertEqual(10, responses[0].json()["count"])
+
+    def test_cross_process(self) -> None:
+        """Check workers share the response by the lock and the cache."""
+        workers: list[SingleFlight] = [
+            SingleFlight(settings_name="SINGLE_FLIGHT") for _ in range(2)
+        ]
+        request = RequestFactory().get("/api/breeds/")
+        calls: list[int] = []
+        barrier = threading.Barrier(HERD_SIZE)
+
+        def view() -> HttpResponse:
+            calls.append(1)
+            time.sleep(QUERY_DELAY)
+            return HttpResponse(b"breeds")
+
+        def send(i: int) -> HttpResponse:
+            barrier.wait()
+            try:
+                return workers[i % 2].run(request, view)
+            finally:
+                connections.close_all()
+
+        with (
+            override_settings(
+                SINGLE_FLIGHT={**SINGLE_FLIGHT_SETTINGS, "CROSS_PROCESS": True}
+            ),
+            ThreadPoolExecutor(max_workers=HERD_SIZE) as executor,
+        ):
+            responses: list[HttpResponse] = list(
+                executor.map(send, range(HERD_SIZE))
+            )
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual(
+            {b"breeds"}, {response.content for response in responses}
+        )
+        self.assertEqual(
+            [1, 1], [worker.stats["leaders"] for worker in workers]
+        )
+        self.assertEqual(
+            1,
+            sum(
+                worker.stats["shared_between_processes"] for worker in workers
+            ),
+        )
+
+
+class FlightKeyTestCase(SimpleTestCase):
+    """
+    Tests keys of the coalesced requests.
+
+    Args:
+        SimpleTestCase: Django test class without database queries.
+    """
+
+    def test_key(self) -> None:
+        """Check which requests are identical."""
+        factory = RequestFactory()
+        key: str = get_flight_key(factory.get("/api/dogs/?page=1&size=s"))
+
+        self.assertEqual(
+            key, get_flight_key(factory.get("/api/dogs/?size=s&page=1"))
+        )
+        for request in (
+            factory.get("/api/dogs/?page=2&size=s"),
+            factory.get("/api/dogs/?page=1&size=s", HTTP_ACCEPT="text/html"),
+            factory.get(
+                "/api/dogs/?page=1&size=s", HTTP_AUTHORIZATION="Basic YTpi"
+            ),
+            factory.head("/api/dogs/?page=1&size=s"),
+        ):
+            self.assertNotEqual(key, get_flight_key(request))
+
+        request = factory.get("/api/dogs/?page=1&size=s")
+        request.COOKIES["sessionid"] = "session"
+        self.assertNotEqual(key, get_flight_key(request))
@@ -0,0 +1,198 @@
+"""Tests for the deadlines of API requests.
+
+Check the following operations:
+    - GET: the request within its budget succeeds, its queries have
+      the timeout, and the timeout of the session isn't changed;
+    - GET: the view without a budget run after a budgeted one over
+      the same connection has no timeout;
+    - GET: the query running past the budget is canceled by PostgreSQL
+      and the request returns 503 with 'Retry-After';
+    - GET: the query started after the budget is spent isn't run;
+    - PATCH: the write canceled by the timeout is rolled back.
+
+A canceled query aborts the transaction, so the tests are run without
+the wrapping transaction.
+"""
+
+import time
+from unittest import mock
+
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.deadlines import request_deadlines
+from app_dogs.views import DogViewSet
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+TEST_DEADLINES = {
+    "DEFAULT_MS": 3000,
+    "VIEWS": {
+        "dogs.retrieve": 200,
+        "dogs.partial_update": 200,
+        "dogs.list": 0,
+    },
+    "RETRY_AFTER_SECONDS": 7,
+}
+
+
+@override_settings(REQUEST_DEADLINES=TEST_DEADLINES)
+class DeadlineAPITestCase(TransactionTestCase):
+    """
+    Tests the deadlines of requests.
+
+    Args:
+        TransactionTestCase: Django test class without the wrapping
+            transaction.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Create some test data.
+        """
+        self.client = APIClient()
+        self.breed = Breed.objects.create(name="pitbull")
+        self.dog = Dog.objects.create(name="Axe", age=3, breed=self.breed)
+        self.url = reverse("app_dogs:dogs-detail", args=(self.dog.id,))
+        self.stats_before: dict[str, int] = dict(request_deadlines.stats)
+
+    def get_stats_delta(self, name: str) -> int:
+        """
+        Get the change of the deadline counter in the test.
+
+        Args:
+            name (str): Counter name.
+
+        Returns:
+            int: Increment of the counter.
+        """
+        return request_deadlines.stats.get(name, 0) - self.stats_before.get(
+            name, 0
+        )
+
+    def get_session_timeout(self) -> str:
+        """
+        Get the statement timeout of the database session.
+
+        Returns:
+            str: Timeout as shown by PostgreSQL.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW statement_timeout")
+            return cursor.fetchone()[0]
+
+    def get_view_timeouts(self, url: str) -> list[str]:
+        """
+        Get the statement timeouts of the queries of the view.
+
+        Args:
+            url (str): URL of a dog view.
+
+        Returns:
+            list[str]: Timeouts of the queries for the dog and its queryset.
+        """
+        timeouts: list[str] = []
+        get_queryset = DogViewSet.get_queryset
+
+        def get_queryset_timed(view: DogViewSet):
+            timeouts.append(self.get_session_timeout())
+            return get_queryset(view)
+
+        with mock.patch.object(DogViewSet, "get_queryset", get_queryset_timed):
+            response: Response = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return timeouts
+
+    def assert_deadline_exceeded(self, response: Response) -> None:
+        """
+        Check the response is the error of the exceeded deadline.
+
+        Args:
+            response (Response): API response.
+        """
+        self.assertEqual(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            response.status_code,
+        )
+        self.assertEqual("deadline_exceeded", response.data["detail"].code)
+        self.assertEqual("7", response.headers["Retry-After"])
+        self.assertEqual("0", self.get_session_timeout())
+
+    def test_within_budget(self) -> None:
+        """Check the request within the budget succeeds."""
+        timeouts: list[str] = self.get_view_timeouts(self.url)
+
+        self.assertTrue(timeouts)
+        for timeout in timeouts:
+            self.assertRegex(timeout, r"^\d+ms$")
+            self.assertLessEqual(int(timeout[:-2]), 200)
+        self.assertEqual("0", self.get_session_timeout())
+        self.assertEqual(1, self.get_stats_delta("dogs.retrieve.requests"))
+        self.assertEqual(0, self.get_stats_delta("exceeded"))
+
+    def test_no_budget_after_budget(self) -> None:
+        """Check the timeout of a view isn't left to the next one."""
+        self.get_view_timeouts(self.url)
+        timeouts: list[str] = self.get_view_timeouts(
+            reverse("app_dogs:dogs-list")
+        )
+
+        self.assertTrue(timeouts)
+        self.assertEqual({"0"}, set(timeouts))
+
+    def test_query_canceled(self) -> None:
+        """Check the slow query is canceled by the timeout."""
+        get_object = DogViewSet.get_object
+
+        def get_object_slowly(view: DogViewSet) -> Dog:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_sleep(5)")
+            return get_object(view)
+
+        started: float = time.monotonic()
+        with mock.patch.object(DogViewSet, "get_object", get_object_slowly):
+            response: Response = self.client.get(self.url)
+
+        self.assert_deadline_exceeded(response)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(1, self.get_stats_delta("exceeded"))
+        self.assertEqual(1, self.get_stats_delta("dogs.retrieve.exceeded"))
+
+    def test_budget_spent(self) -> None:
+        """Check no query is run after the budget is spent."""
+        get_object = DogViewSet.get_object
+
+        def get_object_late(view: DogViewSet) -> Dog:
+            time.sleep(0.3)
+            return get_object(view)
+
+        with mock.patch.object(DogViewSet, "get_object", get_object_late):
+            response: Response = self.client.get(self.url)
+
+        self.assert_deadline_exceeded(response)
+        self.assertEqual(1, self.get_stats_delta("dogs.retrieve.exceeded"))
+
+    def test_write_canceled(self) -> None:
+        """Check the write canceled by the timeout is rolled back."""
+        perform_update = DogViewSet.perform_update
+
+        def update_slowly(view: DogViewSet, serializer) -> None:
+            perform_update(view, serializer)
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_sleep(5)")
+
+        with mock.patch.object(DogViewSet, "perform_update", update_slowly):
+            response: Response = self.client.patch(
+                self.url, {"age": 5}, format="json"
+            )
+
+        self.dog.refresh_from_db()
+        self.assert_deadline_exceeded(response)
+        self.assertEqual(3, self.dog.age)
+        self.assertEqual(
+            1, self.get_stats_delta("dogs.partial_update.exceeded")
+        )
@@ -8,11 +8,13 @@ A one of the dogs:
     - GET: get detail data of the Dog;
     - PUT: update detail data of the Dog;
     - DELETE: drop the Dog instance.
+The gender is stored as a code, but filtered and shown as a string.
 """
 
 import json
 
 from app_dogs.models import Breed, Dog
+from django.db import IntegrityError, connection, transaction
 from django.db.models.query import QuerySet
 from django.urls import reverse
 from rest_framework import status
@@ -159,6 +161,7 @@ class DogAPITestCase(APITestCase):
             "color": "other",
             "favorite_food": None,
             "favorite_toy": None,
+            "version": 1,
             "breed": self.breed_1.id,
             "same_breed_count": 1,
         }
@@ -170,6 +173,7 @@ class DogAPITestCase(APITestCase):
             "color": "black",
             "favorite_food": "beef",
             "favorite_toy": "ball",
+            "version": 1,
             "breed": self.breed_2.id,
             "same_breed_count": 2,
         }
@@ -181,6 +185,7 @@ class DogAPITestCase(APITestCase):
             "color": "gray",
             "favorite_food": "pork",
             "favorite_toy": "bone",
+            "version": 1,
             "breed": self.breed_2.id,
             "same_breed_count": 2,
         }
@@ -232,3 +237,30 @@ class DogAPITestCase(APITestCase):
 
         self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
         self.assertEqual(dogs_before_deleting - 1, dogs_after_deleting)
+
+    def test_gender_code(self) -> None:
+        """Check the gender is stored as a code and shown as a string."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT gender FROM app_dogs_dog WHERE id = %s",
+                (self.dog_1.id,),
+            )
+            (code,) = cursor.fetchone()
+        response: Response = self.client.get(self.url_dog_detail_1)
+
+        self.assertEqual(0, code)
+        self.assertEqual("male", response.data["gender"])
+        self.assertEqual(
+            [self.dog_2.id, self.dog_3.id],
+            list(
+                Dog.objects.filter(gender="female")
+                .order_by("id")
+                .values_list("id", flat=True)
+            ),
+        )
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE app_dogs_dog SET gender = 2 WHERE id = %s",
+                    (self.dog_1.id,),
+                )
@@ -0,0 +1,200 @@
+"""Tests for the coalescing of single Dog inserts.
+
+Check the following operations:
+    - POST: concurrent requests are inserted by shared batches and each
+      of them gets its own id;
+    - POST: validation errors are returned without batching;
+    - a database error of one row doesn't fail the other rows;
+    - any other error of a row fails only its request and the batcher
+      keeps flushing, a request not flushed in time gets 503;
+    - the batcher keeps its connection between batches and closes it
+      when idle;
+    - inside an outer transaction the Dog is saved directly.
+
+The batch is flushed by the background thread with its own database
+connection, so the tests are run without the wrapping transaction.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.batching import BatchTimeout, WriteBatcher
+from app_dogs.views import dog_batcher
+from django.db import IntegrityError, connections, transaction
+from django.db.backends.signals import connection_created
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+BATCHING_SETTINGS = {
+    "ENABLED": True,
+    "MAX_ROWS": 10,
+    "MAX_DELAY_MS": 50,
+    "RESULT_TIMEOUT_MS": 5000,
+    "IDLE_CLOSE_MS": 200,
+}
+
+
+@override_settings(DOG_WRITE_BATCHING=BATCHING_SETTINGS)
+class DogBatchingAPITestCase(TransactionTestCase):
+    """
+    Tests coalescing of Dog inserts.
+
+    Args:
+        TransactionTestCase: Django test class without the wrapping
+            transaction.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Create some test data.
+        """
+        self.url_dogs_base = reverse("app_dogs:dogs-list")
+        self.breed = Breed.objects.create(name="pitbull")
+
+    def post_dog(self, name: str) -> Response:
+        """
+        Create a new Dog by the API from a separate thread.
+
+        Args:
+            name (str): Name of the Dog.
+
+        Returns:
+            Response: API response.
+        """
+        try:
+            return APIClient().post(
+                path=self.url_dogs_base,
+                data=json.dumps(
+                    {"name": name, "age": 1, "breed": self.breed.id}
+                ),
+                content_type="application/json",
+            )
+        finally:
+            connections.close_all()
+
+    def test_concurrent_create(self) -> None:
+        """Check concurrent requests share batches and get their ids."""
+        batches_before: int = dog_batcher.stats["batches"]
+        names: list[str] = [f"dog {i}" for i in range(20)]
+
+        with ThreadPoolExecutor(max_workers=len(names)) as executor:
+            responses: list[Response] = list(
+                executor.map(self.post_dog, names)
+            )
+
+        batches: int = dog_batcher.stats["batches"] - batches_before
+        saved: dict[int, str] = dict(Dog.objects.values_list("id", "name"))
+
+        self.assertTrue(
+            all(r.status_code == status.HTTP_201_CREATED for r in responses)
+        )
+        self.assertEqual(
+            saved,
+            {r.data["id"]: r.data["name"] for r in responses},
+        )
+        self.assertLess(batches, len(names))
+
+    def test_validation_error(self) -> None:
+        """Check invalid data is rejected before batching."""
+        response: Response = self.client.post(
+            path=self.url_dogs_base,
+            data=json.dumps({"name": "Axe", "age": -1}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertIn("age", response.data)
+
+    def test_failed_row(self) -> None:
+        """Check an invalid row fails only its own request."""
+        batcher = WriteBatcher(model=Dog, settings_name="DOG_WRITE_BATCHING")
+
+        futures = [
+            batcher.submit(Dog(name="Axe", age=1, breed=self.breed)),
+            batcher.submit(Dog(name="Bryee", age=1, breed_id=self.breed.id)),
+            batcher.submit(Dog(name="Ghost", age=1, breed_id=0)),
+        ]
+
+        self.assertIsNotNone(futures[0].result().id)
+        self.assertIsNotNone(futures[1].result().id)
+        with self.assertRaises(IntegrityError):
+            futures[2].result()
+        self.assertEqual(2, Dog.objects.count())
+        self.assertEqual(3, batcher.stats["fallback_rows"])
+
+    def test_failed_row_not_database(self) -> None:
+        """Check an error out of the database doesn't stop the batcher."""
+        batcher = WriteBatcher(model=Dog, settings_name="DOG_WRITE_BATCHING")
+
+        futures = [
+            batcher.submit(Dog(name="Axe", age=1, breed=self.breed)),
+            batcher.submit(Dog(name="Bryee", age="old", breed=self.breed)),
+        ]
+
+        self.assertIsNotNone(futures[0].result(timeout=5).id)
+        with self.assertRaises(ValueError):
+            futures[1].result(timeout=5)
+        thread = batcher.thread
+        self.assertIsNotNone(batcher.save(Dog(name="Ghost", age=1)).id)
+        self.assertIs(thread, batcher.thread)
+        self.assertTrue(thread.is_alive())
+
+    def test_result_timeout(self) -> None:
+        """Check the request doesn't wait for its batch forever."""
+        batcher = WriteBatcher(model=Dog, settings_name="DOG_WRITE_BATCHING")
+
+        with override_settings(
+            DOG_WRITE_BATCHING={**BATCHING_SETTINGS, "RESULT_TIMEOUT_MS": 0}
+        ):
+            with self.assertRaises(BatchTimeout):
+                batcher.save(Dog(name="Axe", age=1))
+
+        # the late row is still inserted by its batch
+        batcher.save(Dog(name="Bryee", age=1))
+        self.assertEqual(2, Dog.objects.count())
+
+    def test_outer_transaction(self) -> None:
+        """Check the Dog is saved directly inside a transaction."""
+        rows_before: int = dog_batcher.stats["rows"]
+
+        with transaction.atomic():
+            response: Response = self.client.post(
+                path=self.url_dogs_base,
+                data=json.dumps({"name": "Axe", "age": 1}),
+                content_type="application/json",
+            )
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(rows_before, dog_batcher.stats["rows"])
+        self.assertTrue(Dog.objects.filter(id=response.data["id"]).exists())
+
+    def test_connection_reused(self) -> None:
+        """Check batches share the connection until the batcher is idle."""
+        batcher = WriteBatcher(model=Dog, settings_name="DOG_WRITE_BATCHING")
+        created: list[str] = []
+
+        def on_created(**kwargs) -> None:
+            if threading.current_thread() is batcher.thread:
+                created.append(kwargs["connection"].alias)
+
+        connection_created.connect(on_created)
+        try:
+            batcher.save(Dog(name="Axe", age=1))
+            batcher.save(Dog(name="Bryee", age=1))
+            self.assertEqual(["default"], created)
+
+            time.sleep(0.5)
+            batcher.save(Dog(name="Ghost", age=1))
+        finally:
+            connection_created.disconnect(on_created)
+
+        self.assertEqual(3, batcher.stats["batches"])
+        self.assertEqual(["default", "default"], created)
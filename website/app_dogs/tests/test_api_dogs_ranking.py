@@ -0,0 +1,298 @@
+"""Tests for the ranking of dogs by the owner preferences.
+
+Check the following operations:
+    - GET rank: dogs are ordered by the score, equal scores by id;
+    - GET rank: pages are stable and linked with each other;
+    - the in-memory columns follow inserts, updates and deletes;
+    - the change log is read without holding the lock of the columns;
+    - invalid query parameters are rejected;
+    - vectorized scores are equal to the straightforward computation.
+
+The columns are refreshed from the change log, which shows only
+committed changes, so the tests are run without the wrapping
+transaction.
+"""
+
+import math
+import threading
+
+import numpy as np
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.ranking import DogColumns, dog_columns_cache
+from app_dogs.utils.similarity import TraitMatrix, build_query
+from django.db import connection
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APITransactionTestCase
+
+PREFERENCES = {
+    "age": 3,
+    "gender": "female",
+    "color": "black",
+    "friendliness": 5,
+}
+
+
+class DogRankingAPITestCase(APITransactionTestCase):
+    """
+    Tests the ranking of dogs.
+
+    Args:
+        APITransactionTestCase: DRF test class without the wrapping
+            transaction.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Create some test data.
+        """
+        dog_columns_cache.clear()
+        self.url_rank = reverse("app_dogs:dogs-rank")
+
+        self.pitbull = Breed.objects.create(name="pitbull", friendliness=5)
+        self.bandog = Breed.objects.create(name="bandog", friendliness=2)
+        self.first, self.other, self.stray, self.second = (
+            Dog.objects.bulk_create(
+                [
+                    Dog(
+                        name="first",
+                        age=3,
+                        gender="female",
+                        color="black",
+                        breed=self.pitbull,
+                    ),
+                    Dog(
+                        name="other",
+                        age=3,
+                        gender="female",
+                        color="Black",
+                        breed=self.bandog,
+                    ),
+                    Dog(name="stray", age=8, color="white"),
+                    Dog(
+                        name="second",
+                        age=3,
+                        gender="female",
+                        color="black",
+                        breed=self.pitbull,
+                    ),
+                ]
+            )
+        )
+
+    def get_ranked(self, params: dict) -> list[tuple[int, float]]:
+        """
+        Get ids and scores of ranked dogs.
+
+        Args:
+            params (dict): Query parameters.
+
+        Returns:
+            list[tuple[int, float]]: Dog ids and scores.
+        """
+        response: Response = self.client.get(self.url_rank, params)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return [
+            (item["id"], item["score"]) for item in response.data["results"]
+        ]
+
+    def test_rank(self) -> None:
+        """Check dogs are ordered by the score and then by id."""
+        response: Response = self.client.get(self.url_rank, PREFERENCES)
+
+        results: list[dict] = response.data["results"]
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(4, response.data["count"])
+        self.assertEqual(
+            [self.first.id, self.second.id, self.other.id, self.stray.id],
+            [item["id"] for item in results],
+        )
+        self.assertEqual([1, 1], [item["score"] for item in results[:2]])
+        self.assertAlmostEqual(0.625, results[2]["score"], places=5)
+        self.assertAlmostEqual(
+            1 - math.sqrt(3.25 / 4),
+            results[3]["score"],
+            places=5,
+        )
+        self.assertEqual("first", results[0]["name"])
+
+    def test_rank_weights(self) -> None:
+        """Check weights change the order of dogs."""
+        ranked = self.get_ranked(
+            {
+                **PREFERENCES,
+                "age": 8,
+                "age_weight": 10,
+                "gender_weight": 0,
+                "color_weight": 0,
+                "friendliness_weight": 0,
+            }
+        )
+
+        self.assertEqual((self.stray.id, 1), ranked[0])
+
+    def test_rank_pages(self) -> None:
+        """Check pages are stable and linked with each other."""
+        response: Response = self.client.get(
+            self.url_rank,
+            {**PREFERENCES, "page_size": 3},
+        )
+        response_next: Response = self.client.get(response.data["next"])
+
+        self.assertIsNone(response.data["previous"])
+        self.assertIsNone(response_next.data["next"])
+        self.assertIn("page=2", response_next.request["QUERY_STRING"])
+        self.assertEqual(
+            self.get_ranked(PREFERENCES),
+            [
+                (item["id"], item["score"])
+                for item in response.data["results"]
+                + response_next.data["results"]
+            ],
+        )
+        self.assertEqual(
+            response.data["results"],
+            self.client.get(response_next.data["previous"]).data["results"],
+        )
+
+    def test_columns_refreshed(self) -> None:
+        """Check changes of dogs are taken into account."""
+        self.get_ranked(PREFERENCES)
+        best = Dog.objects.create(
+            name="best",
+            age=3,
+            gender="female",
+            color="black",
+            breed=self.pitbull,
+        )
+        Dog.objects.filter(id=self.stray.id).update(
+            age=3,
+            gender="female",
+            color="BLACK",
+            breed=self.pitbull,
+        )
+        self.first.delete()
+
+        ranked = self.get_ranked(PREFERENCES)
+
+        self.assertEqual(
+            [
+                (self.stray.id, 1),
+                (self.second.id, 1),
+                (best.id, 1),
+                (self.other.id, 0.625),
+            ],
+            ranked,
+        )
+        self.assertEqual(4, len(dog_columns_cache.get()))
+
+    def test_columns_not_locked(self) -> None:
+        """Check the change log is read without waiting for the lock."""
+        columns: DogColumns = dog_columns_cache.get()
+        got: list[DogColumns] = []
+
+        def get_columns() -> None:
+            try:
+                got.append(dog_columns_cache.get())
+            finally:
+                connection.close()
+
+        with dog_columns_cache.lock:
+            thread = threading.Thread(target=get_columns)
+            thread.start()
+            thread.join(timeout=5)
+            self.assertFalse(thread.is_alive())
+        thread.join()
+
+        self.assertEqual([columns], got)
+
+    def test_rank_invalid(self) -> None:
+        """Check invalid preferences and pages are rejected."""
+        for params in (
+            {},
+            {"page": 2},
+            {"age": -1},
+            {"gender": "unknown"},
+            {"age": 1, "age_weight": -1},
+            {"age": 1, "page": 0},
+            {"age": 1, "page": 11, "page_size": 100},
+        ):
+            response: Response = self.client.get(self.url_rank, params)
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+
+class DogColumnsTestCase(SimpleTestCase):
+    """
+    Tests vectorized scores without the database.
+
+    Args:
+        SimpleTestCase: Django test class without database queries.
+    """
+
+    def test_rank_matches_naive(self) -> None:
+        """Check the top of dogs is equal to the straightforward one."""
+        rng = np.random.default_rng(0)
+        count = 5000
+        matrix = TraitMatrix.from_rows(
+            (breed_id, *rng.integers(1, 6, 4).tolist(), "medium")
+            for breed_id in range(1, 11)
+        )
+        rows = [
+            (
+                dog_id,
+                int(rng.integers(0, 20)),
+                int(rng.integers(0, 12)) or None,
+                str(rng.choice(["male", "female"])),
+                str(rng.choice(["black", "White", "red"])),
+            )
+            for dog_id in range(1, count + 1)
+        ]
+        color_codes: dict[str, int] = {}
+        columns = DogColumns(
+            *DogColumns.encode_rows(rows, color_codes),
+            color_codes=color_codes,
+            cursor=(0, 0),
+        )
+        preferences = {
+            "age": 4,
+            "age_weight": 2.0,
+            "color": "white",
+            "color_weight": 0.5,
+            "friendliness": 3,
+            "friendliness_weight": 1.0,
+        }
+        target, weights = build_query(preferences)
+
+        ids, scores = columns.rank(
+            preferences=preferences,
+            matrix=matrix,
+            breed_target=target,
+            breed_weights=weights,
+            limit=50,
+            chunk_size=700,
+        )
+
+        def naive_score(row: tuple) -> float:
+            dog_id, age, breed_id, _, color = row
+            breed = matrix.get_traits(breed_id or 0)
+            breed_distance = (
+                1 if breed is None else float(breed[0] - target[0]) ** 2
+            )
+            distance = (
+                2 * min(abs(age - 4) / 10, 1) ** 2
+                + 0.5 * (color.lower() != "white")
+                + breed_distance
+            )
+            return round(1 - math.sqrt(distance / 3.5), 6)
+
+        expected = sorted(rows, key=lambda row: (-naive_score(row), row[0]))
+        self.assertEqual([row[0] for row in expected[:50]], ids.tolist())
+        np.testing.assert_allclose(
+            [naive_score(row) for row in expected[:50]],
+            scores,
+            atol=1e-5,
+        )
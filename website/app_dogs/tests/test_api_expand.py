@@ -0,0 +1,126 @@
+"""Tests for the embedded breed expansion of the Dog API.
+
+Check the following operations:
+    - GET list with '?expand=breed': breed data is embedded in each dog;
+    - GET detail with '?expand=breed': breed data replaces the breed key;
+    - the number of queries doesn't depend on the page size.
+"""
+
+from app_dogs.models import Breed, Dog
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+
+
+class DogExpandBreedAPITestCase(APITestCase):
+    """
+    Tests the breed expansion in the Dog API.
+
+    Args:
+        APITestCase: DRF test class based on django TestCase.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Set up data for the entire APITestCase.
+
+        Create more dogs than a single page holds, every dog has
+        its own breed. The last dog has no breed at all.
+        """
+        cls.breeds: list[Breed] = Breed.objects.bulk_create(
+            Breed(name=f"breed {i}", friendliness=i % 5 + 1) for i in range(6)
+        )
+        cls.dogs: list[Dog] = Dog.objects.bulk_create(
+            Dog(name=f"dog {i}", age=i + 1, breed=breed)
+            for i, breed in enumerate(cls.breeds)
+        )
+        cls.dog_without_breed: Dog = Dog.objects.create(name="stray", age=1)
+
+        cls.url_dogs_base = reverse("app_dogs:dogs-list")
+
+    @staticmethod
+    def breed_data(breed: Breed) -> dict:
+        """
+        Get expected representation of the embedded breed.
+
+        Args:
+            breed (Breed): Breed model instance.
+
+        Returns:
+            dict: Expected breed data.
+        """
+        return {
+            "id": breed.id,
+            "name": breed.name,
+            "size": breed.size,
+            "friendliness": breed.friendliness,
+            "trainability": breed.trainability,
+            "shedding_amount": breed.shedding_amount,
+            "exercise_needs": breed.exercise_needs,
+            "version": breed.version,
+        }
+
+    def test_list_without_expand(self) -> None:
+        """Check the list representation stays the same by default."""
+        response: Response = self.client.get(self.url_dogs_base)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotIn("breed", response.data["results"][0])
+
+    def test_list_expand(self) -> None:
+        """Check the breed is embedded into each dog of the list."""
+        response: Response = self.client.get(
+            self.url_dogs_base,
+            {"expand": "breed"},
+        )
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        for dog_data, breed in zip(response.data["results"], self.breeds):
+            self.assertEqual(self.breed_data(breed), dog_data["breed"])
+
+    def test_detail_expand(self) -> None:
+        """Check the breed is embedded into the dog detail data."""
+        dog: Dog = self.dogs[1]
+        url: str = reverse("app_dogs:dogs-detail", args=(dog.id,))
+
+        response: Response = self.client.get(url, {"expand": "breed"})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(self.breed_data(dog.breed), response.data["breed"])
+        self.assertEqual(1, response.data["same_breed_count"])
+
+    def test_detail_expand_without_breed(self) -> None:
+        """Check the dog without breed is expanded to the null value."""
+        url: str = reverse(
+            "app_dogs:dogs-detail",
+            args=(self.dog_without_breed.id,),
+        )
+
+        response: Response = self.client.get(url, {"expand": "breed"})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertIsNone(response.data["breed"])
+
+    def test_list_expand_query_count(self) -> None:
+        """Check the expansion doesn't make a query per dog."""
+        with CaptureQueriesContext(connection) as full_page:
+            response_full: Response = self.client.get(
+                self.url_dogs_base,
+                {"expand": "breed"},
+            )
+        with CaptureQueriesContext(connection) as short_page:
+            response_short: Response = self.client.get(
+                self.url_dogs_base,
+                {"expand": "breed", "page": 2},
+            )
+        with CaptureQueriesContext(connection) as not_expanded:
+            self.client.get(self.url_dogs_base)
+
+        self.assertEqual(5, len(response_full.data["results"]))
+        self.assertEqual(2, len(response_short.data["results"]))
+        self.assertEqual(len(short_page), len(full_page))
+        self.assertEqual(len(not_expanded), len(full_page))
@@ -0,0 +1,191 @@
+"""Tests for the snapshot of breeds shared by the worker processes.
+
+Check the following operations:
+    - GET list and detail of breeds and dogs: a fresh snapshot is read
+      instead of the database and gives the same responses;
+    - a missing snapshot is written in the background, the database is
+      read meanwhile;
+    - breed writes by the API make the snapshot stale for all
+      processes at once, until the next generation is written;
+    - a snapshot older than the max age is not read.
+
+The snapshot is written by a thread with its own connection, so
+the tests are run without the wrapping transaction.
+"""
+
+import tempfile
+
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.sharedbreeds import SharedBreedSnapshot, shared_breeds
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APITransactionTestCase
+
+
+class SharedBreedsAPITestCase(APITransactionTestCase):
+    """
+    Tests the reads of the shared snapshot of breeds.
+
+    Args:
+        APITransactionTestCase: DRF test class without the wrapping
+            transaction.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Create some test data and put the snapshot into a temporary
+        directory.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        options: dict = {
+            **settings.SHARED_BREED_SNAPSHOT,
+            "ENABLED": True,
+            "DIRECTORY": directory.name,
+            "MAX_AGE_SECONDS": 3600,
+        }
+        self.enterContext(override_settings(SHARED_BREED_SNAPSHOT=options))
+        self.addCleanup(self.wait_for_build)
+
+        self.pitbull = Breed.objects.create(name="pitbull", size="large")
+        self.pug = Breed.objects.create(name="pug", size="small")
+        self.dog = Dog.objects.create(name="Axe", age=3, breed=self.pitbull)
+        Dog.objects.create(name="Bo", age=6, breed=self.pitbull)
+        Dog.objects.create(name="Rex", age=2)
+        self.wait_for_build()
+
+    @staticmethod
+    def wait_for_build(access: SharedBreedSnapshot = shared_breeds) -> None:
+        """
+        Wait for the generation written in the background.
+
+        Args:
+            access (SharedBreedSnapshot): Access of a process.
+        """
+        if access.thread is not None:
+            access.thread.join()
+
+    def get(self, url: str) -> tuple[Response, list[str]]:
+        """
+        Send the GET request and catch the queries of the app tables.
+
+        Args:
+            url (str): Requested URL.
+
+        Returns:
+            tuple[Response, list[str]]: Response and the queries.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response: Response = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return response, [
+            query["sql"]
+            for query in queries.captured_queries
+            if "app_dogs_" in query["sql"]
+        ]
+
+    def test_reads(self) -> None:
+        """Check the snapshot gives the responses of the database."""
+        urls: list[str] = [
+            reverse("app_dogs:breeds-list"),
+            reverse("app_dogs:breeds-list") + "?size=small",
+            reverse("app_dogs:breeds-detail", args=(self.pitbull.id,)),
+            reverse("app_dogs:dogs-list"),
+            reverse("app_dogs:dogs-detail", args=(self.dog.id,)),
+        ]
+        self.assertTrue(shared_breeds.build())
+        expected: dict[str, dict] = {}
+        with override_settings(
+            SHARED_BREED_SNAPSHOT={
+                **settings.SHARED_BREED_SNAPSHOT,
+                "ENABLED": False,
+            }
+        ):
+            for url in urls:
+                expected[url] = self.get(url)[0].json()
+
+        for url in urls:
+            response, queries = self.get(url)
+            self.assertEqual(expected[url], response.json())
+            # the dogs are read, the aggregates of their breeds are not
+            self.assertEqual(
+                [],
+                [
+                    sql
+                    for sql in queries
+                    if "breeds" in url
+                    or "AVG(" in sql
+                    or ("COUNT(" in sql and "__count" not in sql)
+                ],
+            )
+
+        self.assertEqual(
+            {"name": "pitbull", "dog_count": 2},
+            {
+                key: value
+                for key, value in expected[urls[0]]["results"][0].items()
+                if key in ("name", "dog_count")
+            },
+        )
+        self.assertEqual(4.5, expected[urls[3]]["results"][0]["breed_avg_age"])
+        self.assertEqual(2, expected[urls[4]]["same_breed_count"])
+
+        missing: str = reverse("app_dogs:breeds-detail", args=(0,))
+        self.assertEqual(
+            status.HTTP_404_NOT_FOUND, self.client.get(missing).status_code
+        )
+
+    def test_build_in_background(self) -> None:
+        """Check a missing snapshot is written by a background thread."""
+        url: str = reverse("app_dogs:breeds-list")
+        self.assertTrue(self.get(url)[1])
+        self.wait_for_build()
+        self.assertEqual([], self.get(url)[1])
+
+    def test_writes(self) -> None:
+        """Check breed writes make the snapshot stale in all processes."""
+        self.assertTrue(shared_breeds.build())
+        # another worker process maps the same files
+        other = SharedBreedSnapshot()
+        self.addCleanup(self.wait_for_build, other)
+        self.assertEqual(
+            shared_breeds.get().generation, other.get().generation
+        )
+        url: str = reverse("app_dogs:breeds-detail", args=(self.pug.id,))
+
+        response: Response = self.client.patch(url, {"name": "Pug"})
+        self.assertIsNone(other.get())
+        self.assertEqual("Pug", self.get(url)[0].json()["name"])
+        self.wait_for_build()
+        response, queries = self.get(url)
+        self.assertEqual(("Pug", []), (response.json()["name"], queries))
+
+        # the conditional update doesn't send signals
+        response = self.client.patch(
+            url,
+            {"name": "Mops"},
+            HTTP_IF_MATCH=response.headers["ETag"],
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual("Mops", self.get(url)[0].json()["name"])
+        self.wait_for_build()
+        self.assertEqual("Mops", other.get().get_breed(self.pug.id).name)
+
+    def test_max_age(self) -> None:
+        """Check an old snapshot is not read."""
+        self.assertTrue(shared_breeds.build())
+        self.assertIsNotNone(shared_breeds.get())
+        with override_settings(
+            SHARED_BREED_SNAPSHOT={
+                **settings.SHARED_BREED_SNAPSHOT,
+                "MAX_AGE_SECONDS": 0,
+            }
+        ):
+            self.assertIsNone(shared_breeds.get())
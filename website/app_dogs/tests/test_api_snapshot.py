@@ -0,0 +1,169 @@
+"""Tests for the columnar snapshots of dogs and breeds.
+
+Check the following operations:
+    - the snapshot is written column by column: numbers as is, choices
+      and other texts by codes with dictionaries, NULLs by 0 and -1;
+    - the snapshot is loaded as read-only memory maps;
+    - only the latest snapshots are kept;
+    - POST: only staff users can write a snapshot;
+    - GET: the snapshots are listed, the manifest and the column files
+      are returned, unknown snapshots and columns return 404.
+"""
+
+import io
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.changelog import encode_cursor, get_head_cursor
+from app_dogs.utils.snapshot import (
+    list_snapshots,
+    load_snapshot,
+    write_snapshot,
+)
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+
+
+class SnapshotTestCase(APITestCase):
+    """
+    Tests the snapshots.
+
+    Args:
+        APITestCase: DRF test class based on django TestCase.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Set up data for the entire APITestCase.
+
+        This method is executed once before any tests run.
+        """
+        cls.breed = Breed.objects.create(
+            name="dachshund", size="small", friendliness=4
+        )
+        cls.dogs = [
+            Dog.objects.create(
+                name="Axe",
+                age=3,
+                breed=cls.breed,
+                color="black",
+                favorite_food="meat",
+            ),
+            Dog.objects.create(
+                name="Bolt", age=5, gender="female", color="white"
+            ),
+            Dog.objects.create(name="Rex", age=7, color="black"),
+        ]
+        cls.staff = get_user_model().objects.create_user(
+            username="staff",
+            password="staff",
+            is_staff=True,
+        )
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Keep the snapshots in a temporary directory.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        settings_override = override_settings(
+            SNAPSHOTS={"DIRECTORY": directory.name, "CHUNK_SIZE": 2, "KEEP": 2}
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_write(self) -> None:
+        """Check the columns are written with their dictionaries."""
+        manifest: dict = write_snapshot()
+        dogs: dict = manifest["tables"]["dogs"]
+        columns: dict = load_snapshot(self.root / manifest["name"])
+        dog_columns: dict[str, np.ndarray] = columns["dogs"]
+
+        self.assertEqual(encode_cursor(get_head_cursor()), manifest["cursor"])
+        self.assertEqual(3, dogs["rows"])
+        self.assertEqual(
+            [dog.id for dog in self.dogs], dog_columns["id"].tolist()
+        )
+        self.assertEqual(["Axe", "Bolt", "Rex"], dog_columns["name"].tolist())
+        self.assertEqual([3, 5, 7], dog_columns["age"].tolist())
+        self.assertEqual(
+            [self.breed.id, 0, 0], dog_columns["breed_id"].tolist()
+        )
+        self.assertEqual(
+            ["male", "female", "male"],
+            [
+                dogs["columns"]["gender"]["dictionary"][code]
+                for code in dog_columns["gender"]
+            ],
+        )
+        self.assertEqual(
+            ["black", "white"], dogs["columns"]["color"]["dictionary"]
+        )
+        self.assertEqual([0, 1, 0], dog_columns["color"].tolist())
+        self.assertEqual([0, -1, -1], dog_columns["favorite_food"].tolist())
+        self.assertEqual("int8", dogs["columns"]["gender"]["dtype"])
+        self.assertIsInstance(dog_columns["age"], np.memmap)
+        self.assertFalse(dog_columns["age"].flags.writeable)
+
+        breeds: dict = manifest["tables"]["breeds"]
+        self.assertEqual(
+            "small",
+            breeds["columns"]["size"]["dictionary"][
+                columns["breeds"]["size"][0]
+            ],
+        )
+        self.assertEqual([4], columns["breeds"]["friendliness"].tolist())
+
+    def test_keep(self) -> None:
+        """Check only the latest snapshots are kept."""
+        names: list[str] = [write_snapshot()["name"] for _ in range(3)]
+
+        self.assertEqual(names[:0:-1], list_snapshots())
+
+    def test_api(self) -> None:
+        """Check the snapshots are written and read by the API."""
+        url: str = reverse("app_dogs:snapshots-list")
+
+        response: Response = self.client.post(url)
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+        self.client.force_login(self.staff)
+        response = self.client.post(url)
+        name: str = response.json()["name"]
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+
+        response = self.client.get(url)
+        self.assertEqual([name], [item["name"] for item in response.json()])
+
+        response = self.client.get(
+            reverse("app_dogs:snapshots-detail", args=(name,))
+        )
+        self.assertEqual(3, response.json()["tables"]["dogs"]["rows"])
+
+        response = self.client.get(
+            reverse("app_dogs:snapshots-column", args=(name, "dogs", "age"))
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [3, 5, 7],
+            np.load(io.BytesIO(b"".join(response.streaming_content))).tolist(),
+        )
+
+        for args in ((name, "dogs", "weight"), ("20000101T000000000000",)):
+            url_name: str = (
+                "app_dogs:snapshots-column"
+                if len(args) > 1
+                else "app_dogs:snapshots-detail"
+            )
+            response = self.client.get(reverse(url_name, args=args))
+            self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
@@ -0,0 +1,148 @@
+"""Tests for the live stream of changes.
+
+Check the following operations:
+    - a change of a dog is pushed to subscribers after the commit;
+    - subscribers filtered by a breed receive only its changes;
+    - all subscribers of the worker share one LISTEN connection;
+    - a slow subscriber is closed when its queue is full;
+    - GET: the stream endpoint sends Server-Sent Events.
+
+Notifications are delivered after the writing transaction has been
+committed, so the tests are run without the wrapping transaction
+against the local PostgreSQL.
+"""
+
+import asyncio
+import json
+
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.stream import OVERFLOW_EVENT, Subscriber, broadcaster
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+EVENT_TIMEOUT = 5
+
+
+class ChangeStreamTestCase(TransactionTestCase):
+    """
+    Tests live stream of changes.
+
+    Args:
+        TransactionTestCase: Django test class without the wrapping
+            transaction.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Create some test data.
+        """
+        self.url_stream = reverse("app_dogs:stream")
+        self.breed_1 = Breed.objects.create(name="pitbull")
+        self.breed_2 = Breed.objects.create(name="bandog")
+
+    def tearDown(self) -> None:
+        """Close the listening connection left by a failed test."""
+        broadcaster.stop(reason=OVERFLOW_EVENT)
+
+    async def test_fan_out(self) -> None:
+        """Check changes are pushed to all matching subscribers."""
+        all_breeds = await broadcaster.subscribe(None)
+        breed_2 = await broadcaster.subscribe({self.breed_2.id})
+        try:
+            connection = broadcaster.connection
+            subscribers_count: int = len(broadcaster.subscribers)
+            dog_1 = await Dog.objects.acreate(
+                name="Axe",
+                age=3,
+                breed=self.breed_1,
+            )
+            dog_2 = await Dog.objects.acreate(
+                name="Bryee",
+                age=2,
+                breed=self.breed_2,
+            )
+
+            all_events = [
+                await asyncio.wait_for(all_breeds.queue.get(), EVENT_TIMEOUT)
+                for _ in range(2)
+            ]
+            breed_2_event = await asyncio.wait_for(
+                breed_2.queue.get(),
+                EVENT_TIMEOUT,
+            )
+        finally:
+            broadcaster.unsubscribe(all_breeds)
+            broadcaster.unsubscribe(breed_2)
+
+        self.assertEqual(
+            [dog_1.id, dog_2.id],
+            [event["object_id"] for event in all_events],
+        )
+        self.assertEqual(
+            {
+                "model": "dog",
+                "object_id": dog_2.id,
+                "operation": "insert",
+                "breed_id": self.breed_2.id,
+            },
+            {
+                key: value
+                for key, value in breed_2_event.items()
+                if key != "cursor"
+            },
+        )
+        self.assertTrue(breed_2.queue.empty())
+        self.assertIsNotNone(connection)
+        self.assertEqual(2, subscribers_count)
+        self.assertIsNone(broadcaster.connection)
+
+    def test_overflow(self) -> None:
+        """Check a slow subscriber is closed instead of buffering."""
+        subscriber = Subscriber(breed_ids=None, queue_size=2)
+
+        for object_id in range(3):
+            subscriber.push({"model": "dog", "object_id": object_id})
+
+        self.assertTrue(subscriber.closed)
+        self.assertEqual(1, subscriber.queue.qsize())
+        self.assertEqual(
+            {"event": OVERFLOW_EVENT},
+            subscriber.queue.get_nowait(),
+        )
+
+    async def test_stream_endpoint(self) -> None:
+        """Check the endpoint sends the change as an event."""
+        response = await self.async_client.get(
+            self.url_stream,
+            {"breed": self.breed_1.id},
+        )
+        chunks = aiter(response.streaming_content)
+        try:
+            connected: bytes = await anext(chunks)
+            breed = await Breed.objects.aget(id=self.breed_1.id)
+            breed.name = "american pitbull"
+            await breed.asave()
+            message: bytes = await asyncio.wait_for(
+                anext(chunks),
+                EVENT_TIMEOUT,
+            )
+        finally:
+            await chunks.aclose()
+
+        lines: list[str] = message.decode().splitlines()
+        event: dict = json.loads(lines[2].removeprefix("data: "))
+
+        self.assertEqual("text/event-stream", response["Content-Type"])
+        self.assertEqual(b": connected\n\n", connected)
+        self.assertEqual(f"id: {event['cursor']}", lines[0])
+        self.assertEqual("event: change", lines[1])
+        self.assertEqual("update", event["operation"])
+        self.assertEqual(self.breed_1.id, event["object_id"])
+
+    def test_invalid_breed(self) -> None:
+        """Check the invalid breed filter is rejected."""
+        response = self.client.get(self.url_stream, {"breed": "abc"})
+
+        self.assertEqual(400, response.status_code)
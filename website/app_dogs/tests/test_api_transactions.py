@@ -0,0 +1,166 @@
+"""Tests for the transaction policies of actions.
+
+Check the following operations:
+    - read-only policies: the function is run in one read-only
+      transaction at the isolation level of the policy;
+    - read-only policies: writes in the function are rejected;
+    - GET list and retrieve: statements are run in the autocommit mode
+      by default, and in a read-only transaction if the view set sets
+      such a policy;
+    - PATCH: the update is run in a read-write transaction.
+
+Isolation levels can be set only for the outermost transaction, so
+the tests are run without the wrapping transaction.
+"""
+
+import re
+from unittest import mock
+
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.transactions import TransactionPolicy, run_with_policy
+from app_dogs.views import DogViewSet
+from django.db import DatabaseError, connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+READ_ONLY_SQL_ERROR = "25006"
+# timeout of the request deadline sent with every query
+DEADLINE_SQL = re.compile(r"^SET LOCAL statement_timeout = \d+; ")
+
+
+def get_transaction_state() -> tuple[str, str, bool]:
+    """
+    Get the state of the current transaction.
+
+    Returns:
+        tuple[str, str, bool]: Isolation level, read-only flag and
+            whether an atomic block is open.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW transaction_isolation")
+        isolation_level: str = cursor.fetchone()[0]
+        cursor.execute("SHOW transaction_read_only")
+        read_only: str = cursor.fetchone()[0]
+    return isolation_level, read_only, connection.in_atomic_block
+
+
+class TransactionPolicyAPITestCase(TransactionTestCase):
+    """
+    Tests the transaction policies of actions.
+
+    Args:
+        TransactionTestCase: Django test class without the wrapping
+            transaction.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Create some test data.
+        """
+        self.client = APIClient()
+        self.breed = Breed.objects.create(name="pitbull")
+        self.dog = Dog.objects.create(name="Axe", age=3, breed=self.breed)
+        self.url_list = reverse("app_dogs:dogs-list")
+        self.url_detail = reverse("app_dogs:dogs-detail", args=(self.dog.id,))
+
+    def get_transaction_sql(self, method: str, url: str, **kwargs) -> list:
+        """
+        Send the request and collect its SET TRANSACTION statements.
+
+        Args:
+            method (str): Name of the client method.
+            url (str): Url of the request.
+            kwargs: Keyword arguments of the client method.
+
+        Returns:
+            list: SQL of the SET TRANSACTION statements.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response: Response = getattr(self.client, method)(url, **kwargs)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        queries: list[str] = [
+            DEADLINE_SQL.sub("", query["sql"])
+            for query in context.captured_queries
+        ]
+        return [sql for sql in queries if sql.startswith("SET TRANSACTION")]
+
+    def test_read_only_policies(self) -> None:
+        """Check read-only policies set the level of the transaction."""
+        self.assertEqual(
+            ("read committed", "off", False),
+            run_with_policy(
+                TransactionPolicy.AUTOCOMMIT, get_transaction_state
+            ),
+        )
+        self.assertEqual(
+            ("read committed", "on", True),
+            run_with_policy(
+                TransactionPolicy.READ_COMMITTED, get_transaction_state
+            ),
+        )
+        self.assertEqual(
+            ("repeatable read", "on", True),
+            run_with_policy(
+                TransactionPolicy.REPEATABLE_READ, get_transaction_state
+            ),
+        )
+
+    def test_read_only_rejects_writes(self) -> None:
+        """Check writes in a read-only transaction are rejected."""
+        with self.assertRaises(DatabaseError) as context:
+            run_with_policy(
+                TransactionPolicy.READ_COMMITTED,
+                Dog.objects.filter(id=self.dog.id).update,
+                age=5,
+            )
+
+        self.dog.refresh_from_db()
+        self.assertEqual(
+            READ_ONLY_SQL_ERROR, context.exception.__cause__.pgcode
+        )
+        self.assertEqual(3, self.dog.age)
+
+    def test_reads(self) -> None:
+        """Check the policies of GET list and retrieve."""
+        self.assertEqual([], self.get_transaction_sql("get", self.url_list))
+        self.assertEqual([], self.get_transaction_sql("get", self.url_detail))
+
+        policies: dict[str, TransactionPolicy] = {
+            **DogViewSet.transaction_policies,
+            "list": TransactionPolicy.REPEATABLE_READ,
+            "retrieve": TransactionPolicy.READ_COMMITTED,
+        }
+        with mock.patch.object(DogViewSet, "transaction_policies", policies):
+            self.assertEqual(
+                ["SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY"],
+                self.get_transaction_sql("get", self.url_list),
+            )
+            self.assertEqual(
+                ["SET TRANSACTION ISOLATION LEVEL READ COMMITTED READ ONLY"],
+                self.get_transaction_sql("get", self.url_detail),
+            )
+
+    def test_write(self) -> None:
+        """Check the update is run in a read-write transaction."""
+        states: list[tuple[str, str, bool]] = []
+        perform_update = DogViewSet.perform_update
+
+        def record_state(view: DogViewSet, serializer) -> None:
+            states.append(get_transaction_state())
+            perform_update(view, serializer)
+
+        with mock.patch.object(DogViewSet, "perform_update", record_state):
+            transaction_sql: list = self.get_transaction_sql(
+                "patch", self.url_detail, data={"age": 5}, format="json"
+            )
+
+        self.dog.refresh_from_db()
+        self.assertEqual([], transaction_sql)
+        self.assertEqual([("repeatable read", "off", True)], states)
+        self.assertEqual(5, self.dog.age)
@@ -0,0 +1,191 @@
+"""Tests for the optimistic concurrency control of dogs and breeds.
+
+Check the following operations:
+    - GET: the object is returned with its version in 'ETag';
+    - PUT/PATCH with 'If-Match': the object is updated by one conditional
+      UPDATE without reading it first, and the new version is returned;
+    - PUT/PATCH/DELETE with a stale or invalid 'If-Match': 412, nothing
+      is changed; unknown objects get 404;
+    - PATCH/DELETE without 'If-Match': the latest version is changed;
+    - concurrent read-modify-write cycles with 'If-Match' don't lose
+      updates.
+"""
+
+import re
+import threading
+
+from app_dogs.models import Breed, Dog
+from django.db import connection, connections
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APITestCase
+
+# timeout of the request deadline sent with every query
+DEADLINE_SQL = re.compile(r"^SET LOCAL statement_timeout = \d+; ")
+
+
+class VersionAPITestCase(APITestCase):
+    """
+    Tests the conditional writes.
+
+    Args:
+        APITestCase: DRF test class based on django TestCase.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Set up data for the entire APITestCase.
+
+        This method is executed once before any tests run.
+        """
+        cls.breed = Breed.objects.create(name="pitbull")
+        cls.dog = Dog.objects.create(name="Axe", age=3, breed=cls.breed)
+        cls.url_dog = reverse("app_dogs:dogs-detail", args=(cls.dog.id,))
+        cls.url_breed = reverse("app_dogs:breeds-detail", args=(cls.breed.id,))
+
+    def test_update(self) -> None:
+        """Check the update with the current version."""
+        response: Response = self.client.get(self.url_dog)
+        self.assertEqual('"1"', response["ETag"])
+        self.assertEqual(1, response.json()["version"])
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                f"{self.url_dog}?expand=breed",
+                {"age": 4},
+                HTTP_IF_MATCH=response["ETag"],
+            )
+        dog_queries: list[str] = [
+            DEADLINE_SQL.sub("", query["sql"])
+            for query in context.captured_queries
+            if '"app_dogs_dog"' in query["sql"]
+        ]
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('"2"', response["ETag"])
+        self.assertEqual(4, response.json()["age"])
+        self.assertEqual("pitbull", response.json()["breed"]["name"])
+        self.assertEqual(1, len(dog_queries))
+        self.assertTrue(dog_queries[0].startswith("UPDATE"))
+        self.dog.refresh_from_db()
+        self.assertEqual((4, 2), (self.dog.age, self.dog.version))
+
+        response = self.client.put(
+            self.url_dog,
+            {"name": "Axe", "age": 5, "gender": "female", "breed": None},
+            format="json",
+            HTTP_IF_MATCH='"1", "2"',
+        )
+        self.assertEqual('"3"', response["ETag"])
+        self.assertEqual("female", response.json()["gender"])
+
+        # an unchanged row keeps its version
+        response = self.client.patch(
+            self.url_dog, {"age": 5}, HTTP_IF_MATCH='"3"'
+        )
+        self.assertEqual('"3"', response["ETag"])
+
+    def test_stale(self) -> None:
+        """Check writes with a stale version are rejected."""
+        self.client.patch(self.url_dog, {"age": 4})
+
+        for if_match in ('"1"', 'W/"2"', "2"):
+            response: Response = self.client.patch(
+                self.url_dog, {"age": 9}, HTTP_IF_MATCH=if_match
+            )
+            self.assertEqual(
+                status.HTTP_412_PRECONDITION_FAILED, response.status_code
+            )
+        response = self.client.delete(self.url_dog, HTTP_IF_MATCH='"1"')
+        self.assertEqual(
+            status.HTTP_412_PRECONDITION_FAILED, response.status_code
+        )
+        response = self.client.patch(
+            reverse("app_dogs:dogs-detail", args=(self.dog.id + 1,)),
+            {"age": 9},
+            HTTP_IF_MATCH='"1"',
+        )
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+        self.dog.refresh_from_db()
+        self.assertEqual((4, 2), (self.dog.age, self.dog.version))
+
+        response = self.client.delete(self.url_dog, HTTP_IF_MATCH='"2"')
+        self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
+        self.assertFalse(Dog.objects.filter(id=self.dog.id).exists())
+
+    def test_unconditional(self) -> None:
+        """Check writes without 'If-Match' change the latest version."""
+        response: Response = self.client.patch(
+            self.url_breed, {"size": "small"}
+        )
+
+        self.assertEqual('"2"', response["ETag"])
+        self.assertEqual(2, response.json()["version"])
+
+        response = self.client.patch(
+            self.url_breed,
+            {"friendliness": 1, "version": 10},
+            HTTP_IF_MATCH="*",
+        )
+        self.assertEqual(3, response.json()["version"])
+
+        response = self.client.patch(
+            self.url_breed, {"friendliness": 2}, HTTP_IF_MATCH='"3"'
+        )
+        self.assertEqual(4, response.json()["version"])
+        self.assertEqual("small", response.json()["size"])
+
+
+class ConcurrentVersionAPITestCase(TransactionTestCase):
+    """
+    Tests concurrent conditional writes.
+
+    Args:
+        TransactionTestCase: Django test class without the wrapping
+            transaction, so the threads see the commits of each other.
+    """
+
+    def test_no_lost_updates(self) -> None:
+        """Check concurrent increments of the age are all applied."""
+        dog = Dog.objects.create(name="Axe", age=0)
+        url: str = reverse("app_dogs:dogs-detail", args=(dog.id,))
+        threads_count, increments = 4, 5
+        conflicts: list[int] = []
+
+        def increment() -> None:
+            client = APIClient()
+            try:
+                for _ in range(increments):
+                    while True:
+                        response: Response = client.get(url)
+                        response = client.patch(
+                            url,
+                            {"age": response.json()["age"] + 1},
+                            HTTP_IF_MATCH=response["ETag"],
+                        )
+                        if response.status_code == status.HTTP_200_OK:
+                            break
+                        conflicts.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        threads: list[threading.Thread] = [
+            threading.Thread(target=increment) for _ in range(threads_count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        dog.refresh_from_db()
+        self.assertEqual(threads_count * increments, dog.age)
+        self.assertEqual(threads_count * increments + 1, dog.version)
+        # lost races are reported as conflicts, never as errors
+        self.assertLessEqual(
+            set(conflicts), {status.HTTP_412_PRECONDITION_FAILED}
+        )
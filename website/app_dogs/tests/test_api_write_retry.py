@@ -0,0 +1,186 @@
+"""Tests for the retry of writes after serialization conflicts.
+
+Check the following operations:
+    - PATCH: the update conflicting with a concurrent transaction is
+      run again and applied to the new state of the row;
+    - PATCH: the conflict remaining after all attempts returns 409;
+    - many threads updating different fields of the same dog and breed
+      get no errors and lose no updates.
+
+Conflicts need concurrent transactions, so the tests are run without
+the wrapping transaction.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.retry import SERIALIZATION_FAILURE, write_retry
+from django.db import connection, connections, transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+
+class WriteRetryAPITestCase(TransactionTestCase):
+    """
+    Tests the retry of conflicting writes.
+
+    Args:
+        TransactionTestCase: Django test class without the wrapping
+            transaction.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Create some test data.
+        """
+        self.breed = Breed.objects.create(name="pitbull")
+        self.dog = Dog.objects.create(name="Axe", age=3, breed=self.breed)
+        self.url_dog = reverse("app_dogs:dogs-detail", args=(self.dog.id,))
+        self.url_breed = reverse(
+            "app_dogs:breeds-detail",
+            args=(self.breed.id,),
+        )
+        self.stats_before: dict[str, int] = dict(write_retry.stats)
+
+    def get_stats_delta(self, name: str) -> int:
+        """
+        Get the change of the retry counter in the test.
+
+        Args:
+            name (str): Counter name.
+
+        Returns:
+            int: Increment of the counter.
+        """
+        return write_retry.stats[name] - self.stats_before[name]
+
+    def patch(self, url: str, data: dict) -> Response:
+        """
+        Send PATCH from a separate thread and close its connection.
+
+        Args:
+            url (str): Url of the object.
+            data (dict): Changed fields.
+
+        Returns:
+            Response: API response.
+        """
+        try:
+            return APIClient().patch(url, data, format="json")
+        finally:
+            connections.close_all()
+
+    def patch_while_locked(self) -> Response:
+        """
+        Update the dog while a concurrent transaction changes it.
+
+        The concurrent transaction commits once the request is waiting
+        for the row lock, so the first attempt fails.
+
+        Returns:
+            Response: API response.
+        """
+        locked = threading.Event()
+        release = threading.Event()
+
+        def hold() -> None:
+            try:
+                with transaction.atomic():
+                    Dog.objects.filter(id=self.dog.id).update(age=10)
+                    locked.set()
+                    release.wait(timeout=10)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(2) as executor:
+            holder = executor.submit(hold)
+            locked.wait(timeout=10)
+            request = executor.submit(self.patch, self.url_dog, {"age": 5})
+
+            with connection.cursor() as cursor:
+                for _ in range(200):
+                    cursor.execute(
+                        "SELECT count(*) FROM pg_stat_activity "
+                        "WHERE wait_event_type = 'Lock'"
+                    )
+                    if cursor.fetchone()[0]:
+                        break
+                    time.sleep(0.01)
+
+            release.set()
+            holder.result()
+            return request.result()
+
+    def test_conflict_retried(self) -> None:
+        """Check the conflicting update is run again."""
+        response: Response = self.patch_while_locked()
+
+        self.dog.refresh_from_db()
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(5, self.dog.age)
+        self.assertEqual(1, self.get_stats_delta(SERIALIZATION_FAILURE))
+        self.assertEqual(1, self.get_stats_delta("retries"))
+        self.assertEqual(1, self.get_stats_delta("recovered"))
+
+    @override_settings(
+        DB_WRITE_RETRY={
+            "MAX_ATTEMPTS": 1,
+            "BASE_DELAY_MS": 5,
+            "MAX_DELAY_MS": 200,
+        }
+    )
+    def test_conflict_exhausted(self) -> None:
+        """Check the conflict remaining after all attempts returns 409."""
+        response: Response = self.patch_while_locked()
+
+        self.dog.refresh_from_db()
+        self.assertEqual(status.HTTP_409_CONFLICT, response.status_code)
+        self.assertEqual("write_conflict", response.data["detail"].code)
+        self.assertEqual(10, self.dog.age)
+        self.assertEqual(1, self.get_stats_delta("exhausted"))
+
+    @override_settings(
+        DB_WRITE_RETRY={
+            "MAX_ATTEMPTS": 50,
+            "BASE_DELAY_MS": 1,
+            "MAX_DELAY_MS": 50,
+        }
+    )
+    def test_stress(self) -> None:
+        """Check concurrent updates of the same rows lose nothing."""
+        values: dict[tuple[str, str], list] = {
+            (self.url_dog, "name"): [f"Axe {i}" for i in range(20)],
+            (self.url_dog, "age"): list(range(20)),
+            (self.url_dog, "color"): [f"color {i}" for i in range(20)],
+            (self.url_dog, "favorite_toy"): [f"toy {i}" for i in range(20)],
+            (self.url_breed, "name"): [f"pitbull {i}" for i in range(20)],
+            (self.url_breed, "friendliness"): [1, 2, 3, 4, 5] * 4,
+            (self.url_breed, "exercise_needs"): [5, 4, 3, 2, 1] * 4,
+        }
+
+        def hammer(key: tuple[str, str]) -> set[int]:
+            url, field = key
+            return {
+                self.patch(url, {field: value}).status_code
+                for value in values[key]
+            }
+
+        with ThreadPoolExecutor(len(values)) as executor:
+            statuses: set[int] = set().union(*executor.map(hammer, values))
+
+        self.dog.refresh_from_db()
+        self.breed.refresh_from_db()
+        self.assertEqual({status.HTTP_200_OK}, statuses)
+        for (url, field), field_values in values.items():
+            instance = self.dog if url == self.url_dog else self.breed
+            self.assertEqual(field_values[-1], getattr(instance, field))
+        self.assertEqual(140, self.get_stats_delta("calls"))
+        self.assertEqual(0, self.get_stats_delta("exhausted"))
+        self.assertGreater(self.get_stats_delta("retries"), 0)
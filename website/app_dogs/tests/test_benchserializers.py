@@ -0,0 +1,140 @@
+"""Tests for the benchmark of serializers.
+
+Check the following operations:
+    - all serializers are measured in both directions without queries
+      to the database, and the results are written as JSON;
+    - results worse than the baseline beyond the threshold fail
+      the command;
+    - regressions against the baseline from another machine are only
+      warned about.
+"""
+
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+
+class BenchSerializersTestCase(SimpleTestCase):
+    """
+    Tests the benchmark command of serializers.
+
+    Args:
+        SimpleTestCase: Django test class forbidding database queries.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Measure small sizes once and keep the report.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.report_path: Path = self.directory / "report.json"
+        self.run_command(self.directory / "missing.json")
+        self.report: dict = json.loads(self.report_path.read_text())
+
+    def run_command(
+        self, baseline: Path, stderr: StringIO | None = None
+    ) -> str:
+        """
+        Run the benchmark of 10 objects.
+
+        Args:
+            baseline (Path): Path of the baseline.
+            stderr (StringIO): Buffer of the errors output.
+
+        Returns:
+            str: Output of the command.
+        """
+        stdout = StringIO()
+        call_command(
+            "benchserializers",
+            sizes=[10],
+            repeat=1,
+            output=self.report_path,
+            baseline=baseline,
+            stdout=stdout,
+            stderr=stderr or StringIO(),
+        )
+        return stdout.getvalue()
+
+    def write_baseline(
+        self, speed: float, memory: float, machine: dict | None = None
+    ) -> Path:
+        """
+        Write the baseline scaled from the report.
+
+        Args:
+            speed (float): Factor of the throughput.
+            memory (float): Factor of the memory peak.
+            machine (dict): Machine of the baseline, the current one
+                by default.
+
+        Returns:
+            Path: Path of the baseline.
+        """
+        baseline_path: Path = self.directory / "baseline.json"
+        results: dict = {
+            name: {
+                "objects_per_second": result["objects_per_second"] * speed,
+                "peak_kb": result["peak_kb"] * memory,
+            }
+            for name, result in self.report["results"].items()
+        }
+        baseline_path.write_text(
+            json.dumps(
+                {
+                    "machine": machine or self.report["machine"],
+                    "results": results,
+                }
+            )
+        )
+        return baseline_path
+
+    def test_report(self) -> None:
+        """Check every serializer is measured in both directions."""
+        self.assertEqual(
+            {
+                f"{serializer}.{direction}.10"
+                for serializer in (
+                    "DogListSerializer",
+                    "DogDetailSerializer",
+                    "BreedListSerializer",
+                    "BreedDetailSerializer",
+                )
+                for direction in ("serialize", "validate")
+            },
+            set(self.report["results"]),
+        )
+        for result in self.report["results"].values():
+            self.assertGreater(result["objects_per_second"], 0)
+            self.assertGreater(result["peak_kb"], 0)
+
+    def test_baseline(self) -> None:
+        """Check the regressions beyond the threshold fail the command."""
+        output: str = self.run_command(self.write_baseline(0.1, 10))
+        self.assertNotIn("REGRESSION", output)
+
+        with self.assertRaisesMessage(CommandError, "DogListSerializer"):
+            self.run_command(self.write_baseline(10, 10))
+        with self.assertRaisesMessage(CommandError, "BreedDetailSerializer"):
+            self.run_command(self.write_baseline(0.1, 0.1))
+
+    def test_other_machine(self) -> None:
+        """Check the regressions on another machine are warnings."""
+        machine: dict = {**self.report["machine"], "host": "other"}
+        stderr = StringIO()
+        output: str = self.run_command(
+            self.write_baseline(10, 10, machine), stderr
+        )
+
+        self.assertIn("REGRESSION", output)
+        self.assertIn("DogListSerializer", stderr.getvalue())
+        self.assertIn("another machine", stderr.getvalue())
@@ -0,0 +1,301 @@
+"""Tests for the Python client of the API against the test server.
+
+Check the following operations:
+    - all pages of a list are read in order by the sync and the asyncio
+      clients over a few kept alive connections;
+    - bulk creates are split into parallel batches, invalid items are
+      reported with their indexes;
+    - requests answered with 503 are retried, invalid ones are not;
+    - a request over an idle connection closed by the server is sent
+      again, a write whose response broke after the status is not.
+
+The test server runs in a separate thread and connections, so the tests
+are run without the wrapping transaction.
+"""
+
+import asyncio
+import http.client
+import socket
+import struct
+import threading
+import time
+from unittest import mock
+
+from app_dogs.models import Breed, Dog
+from app_dogs.views import DogViewSet
+from django.test import LiveServerTestCase, SimpleTestCase
+from dogs_client import (
+    ApiError,
+    AsyncDogsClient,
+    BulkItemError,
+    DogsClient,
+    RetryPolicy,
+)
+from rest_framework import status
+from rest_framework.response import Response
+
+# no pauses between the attempts
+RETRY = RetryPolicy(attempts=3, backoff=0)
+OK_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+    b"Content-Length: 2\r\n\r\n{}"
+)
+
+
+class ClientTestCase(LiveServerTestCase):
+    """
+    Tests the clients of the API.
+
+    Args:
+        LiveServerTestCase: Django test class running the test server.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Create some test data and the clients.
+        """
+        self.breed = Breed.objects.create(name="pitbull")
+        self.dogs: list[Dog] = Dog.objects.bulk_create(
+            Dog(name=f"Dog {number}", age=3, breed=self.breed)
+            for number in range(23)
+        )
+        self.api = DogsClient(self.live_server_url, retry=RETRY)
+        self.addCleanup(self.api.close)
+
+    def test_iter_dogs(self) -> None:
+        """Check the sync client reads all pages over a few connections."""
+        dogs: list[dict] = list(self.api.iter_dogs(prefetch=2))
+
+        self.assertEqual(
+            [dog.id for dog in self.dogs], [dog["id"] for dog in dogs]
+        )
+        self.assertLessEqual(self.api.pool.created, 3)
+        self.assertEqual(
+            [self.breed.id],
+            [breed["id"] for breed in self.api.iter_breeds()],
+        )
+
+    def test_iter_dogs_async(self) -> None:
+        """Check the asyncio client reads all pages over a few connections."""
+
+        async def read() -> tuple[list[dict], int]:
+            async with AsyncDogsClient(
+                self.live_server_url, retry=RETRY
+            ) as client:
+                dogs: list[dict] = [
+                    dog async for dog in client.iter_dogs(prefetch=2)
+                ]
+                return dogs, client.pool.created
+
+        dogs, created = asyncio.run(read())
+
+        self.assertEqual(
+            [dog.id for dog in self.dogs], [dog["id"] for dog in dogs]
+        )
+        self.assertLessEqual(created, 3)
+
+    def test_bulk_create(self) -> None:
+        """Check items are created by batches and errors are reported."""
+        breeds: list[dict] = [
+            {"name": f"breed {number}"} for number in range(45)
+        ]
+        breeds[30] = {"name": ""}
+
+        result = self.api.bulk_create_breeds(
+            breeds, chunk_size=10, concurrency=3
+        )
+
+        self.assertEqual(44, len(result.created))
+        self.assertEqual("breed 44", result.created[-1]["name"])
+        self.assertEqual(
+            [BulkItemError(30, status.HTTP_400_BAD_REQUEST, mock.ANY)],
+            result.errors,
+        )
+        self.assertEqual(45, Breed.objects.count())
+
+    def test_bulk_create_async(self) -> None:
+        """Check the asyncio client creates items by batches."""
+
+        async def create() -> list[dict]:
+            async with AsyncDogsClient(self.live_server_url) as client:
+                result = await client.bulk_create_dogs(
+                    [{"name": "Bolt", "age": 2}] * 12, chunk_size=5
+                )
+                return result.created
+
+        self.assertEqual(12, len(asyncio.run(create())))
+        self.assertEqual(35, Dog.objects.count())
+
+    def test_retry(self) -> None:
+        """Check 503 responses are retried and 400 ones are not."""
+        retrieve = DogViewSet.retrieve
+        calls: list[int] = []
+
+        def fail_once(view, request, *args, **kwargs) -> Response:
+            calls.append(1)
+            if len(calls) == 1:
+                return Response(
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={"Retry-After": "0"},
+                )
+            return retrieve(view, request, *args, **kwargs)
+
+        with mock.patch.object(DogViewSet, "retrieve", fail_once):
+            dog: dict = self.api.request("GET", f"dogs/{self.dogs[0].id}/")
+
+        self.assertEqual(self.dogs[0].id, dog["id"])
+        self.assertEqual(2, len(calls))
+
+        with self.assertRaises(ApiError) as error:
+            self.api.request("POST", "dogs/", data={"name": "Rex"})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, error.exception.status)
+        self.assertIn("age", error.exception.body)
+
+
+class ScriptedServer(threading.Thread):
+    """
+    HTTP server answering the requests by the script.
+
+    Requests after the end of the script are answered with 'ok'.
+
+    Args:
+        script (list[str]): Action of each request: 'ok' responds,
+            'close' responds and closes the idle connection, 'break'
+            sends the status and a part of the body and resets
+            the connection.
+    """
+
+    def __init__(self, script: list[str]) -> None:
+        """Initialize the server listening on a free port."""
+        super().__init__(daemon=True)
+        self.script = list(script)
+        self.methods: list[str] = []
+        self.stopped = threading.Event()
+        self.socket = socket.create_server(("localhost", 0))
+        self.socket.settimeout(0.05)
+        self.url = f"http://localhost:{self.socket.getsockname()[1]}"
+
+    def run(self) -> None:
+        """Serve the connections one by one until the server is stopped."""
+        with self.socket:
+            while not self.stopped.is_set():
+                try:
+                    connection, _ = self.socket.accept()
+                except TimeoutError:
+                    continue
+                with connection:
+                    connection.settimeout(None)
+                    while self.handle(connection):
+                        pass
+
+    def stop(self) -> None:
+        """Stop the server and wait for it."""
+        self.stopped.set()
+        self.join()
+
+    def handle(self, connection: socket.socket) -> bool:
+        """
+        Read a request and answer it by the next action.
+
+        Args:
+            connection (socket.socket): Accepted connection.
+
+        Returns:
+            bool: Whether the connection is kept alive.
+        """
+        data = b""
+        while b"\r\n\r\n" not in data:
+            chunk: bytes = connection.recv(65536)
+            if not chunk:
+                return False
+            data += chunk
+        head, _, body = data.partition(b"\r\n\r\n")
+        length: int = next(
+            (
+                int(line.split(b":")[1])
+                for line in head.lower().split(b"\r\n")
+                if line.startswith(b"content-length:")
+            ),
+            0,
+        )
+        while len(body) < length:
+            body += connection.recv(65536)
+        self.methods.append(head.split(b" ")[0].decode())
+
+        action: str = self.script.pop(0) if self.script else "ok"
+        if action == "break":
+            connection.sendall(
+                b"HTTP/1.1 201 Created\r\nContent-Length: 10\r\n\r\n{"
+            )
+            time.sleep(0.1)
+            # close with RST
+            connection.setsockopt(
+                socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0)
+            )
+            return False
+        connection.sendall(OK_RESPONSE)
+        return action == "ok"
+
+
+class ClientConnectionTestCase(SimpleTestCase):
+    """
+    Tests the resending of requests over broken connections.
+
+    Args:
+        SimpleTestCase: Django test class without the database.
+    """
+
+    def start_server(self, script: list[str]) -> ScriptedServer:
+        """
+        Start the scripted server.
+
+        Args:
+            script (list[str]): Actions of the requests.
+
+        Returns:
+            ScriptedServer: Started server.
+        """
+        server = ScriptedServer(script)
+        server.start()
+        self.addCleanup(server.stop)
+        return server
+
+    def test_stale_connection(self) -> None:
+        """Check a write over a closed idle connection is sent again."""
+        server: ScriptedServer = self.start_server(["close"])
+
+        with DogsClient(server.url, retry=RETRY) as api:
+            api.request("GET", "dogs/")
+            # the server closes the connection
+            time.sleep(0.1)
+            self.assertEqual({}, api.request("POST", "dogs/", data={}))
+            self.assertEqual(2, api.pool.created)
+
+        self.assertEqual(["GET", "POST"], server.methods)
+
+    def test_broken_response(self) -> None:
+        """Check a write broken after the status is not sent again."""
+        server: ScriptedServer = self.start_server(["ok", "break"])
+
+        with DogsClient(server.url, retry=RETRY) as api:
+            api.request("GET", "dogs/")
+            with self.assertRaises(OSError):
+                api.request("POST", "dogs/", data={})
+
+        self.assertEqual(["GET", "POST"], server.methods)
+
+    def test_broken_response_async(self) -> None:
+        """Check the asyncio client doesn't send the write again."""
+        server: ScriptedServer = self.start_server(["ok", "break"])
+
+        async def request() -> None:
+            async with AsyncDogsClient(server.url, retry=RETRY) as api:
+                await api.request("GET", "dogs/")
+                await api.request("POST", "dogs/", data={})
+
+        with self.assertRaises((OSError, EOFError, http.client.HTTPException)):
+            asyncio.run(request())
+
+        self.assertEqual(["GET", "POST"], server.methods)
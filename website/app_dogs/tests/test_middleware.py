@@ -0,0 +1,69 @@
+"""Tests for the middlewares scoped by the request paths.
+
+Check the following operations:
+    - API requests skip the middlewares not listed for '/api/';
+    - admin requests still pass the full MIDDLEWARE;
+    - session users are authenticated by the API;
+    - without scopes API requests pass the full MIDDLEWARE.
+"""
+
+from app_dogs.models import Breed
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+
+
+class PathScopedMiddlewareTestCase(APITestCase):
+    """
+    Tests the middleware chains of the paths.
+
+    Args:
+        APITestCase: DRF test class based on django TestCase.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Set up data for the entire APITestCase.
+
+        This method is executed once before any tests run.
+        """
+        Breed.objects.create(name="pitbull")
+        cls.url_breeds = reverse("app_dogs:breeds-list")
+
+    def test_api(self) -> None:
+        """Check the API skips the clickjacking and messages middlewares."""
+        response: Response = self.client.get(self.url_breeds)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotIn("X-Frame-Options", response)
+        self.assertFalse(hasattr(response.wsgi_request, "_messages"))
+
+    def test_admin(self) -> None:
+        """Check other paths pass the full list of middlewares."""
+        response: Response = self.client.get(reverse("admin:login"))
+
+        self.assertEqual("DENY", response["X-Frame-Options"])
+        self.assertIn("csrftoken", response.cookies)
+        self.assertTrue(hasattr(response.wsgi_request, "_messages"))
+
+    def test_session(self) -> None:
+        """Check the API authenticates users by the session cookie."""
+        user = get_user_model().objects.create_user(
+            username="user", password="user"
+        )
+        self.client.force_login(user)
+
+        response: Response = self.client.get(self.url_breeds)
+
+        self.assertEqual(user, response.wsgi_request.user)
+
+    @override_settings(SCOPED_MIDDLEWARE={})
+    def test_without_scopes(self) -> None:
+        """Check the API passes the full list without scopes."""
+        response: Response = self.client.get(self.url_breeds)
+
+        self.assertEqual("DENY", response["X-Frame-Options"])
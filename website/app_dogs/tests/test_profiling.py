@@ -0,0 +1,176 @@
+"""Tests for the profiling of requests on demand.
+
+Check the following operations:
+    - GET ?_profile=sql: every query of the request is saved with its
+      plan made by 'EXPLAIN (ANALYZE, BUFFERS)';
+    - reads locking rows or calling volatile functions, such as advisory
+      locks, are only planned and not run again;
+    - GET ?_profile=cprofile: the call stats of the request are saved;
+    - requests of users who aren't staff aren't profiled;
+    - only the latest profiles are kept;
+    - the admin pages show the list of profiles and a profile.
+"""
+
+import tempfile
+
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.profiling import PROFILE_HEADER, explain, profile_store
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+
+
+class ProfilingTestCase(APITestCase):
+    """
+    Tests the profiling of requests.
+
+    Args:
+        APITestCase: DRF test class based on django TestCase.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Set up data for the entire APITestCase.
+
+        This method is executed once before any tests run.
+        """
+        breed = Breed.objects.create(name="pitbull")
+        cls.dog = Dog.objects.create(name="Axe", age=3, breed=breed)
+        cls.staff = get_user_model().objects.create_user(
+            username="staff",
+            password="staff",
+            is_staff=True,
+        )
+        cls.user = get_user_model().objects.create_user(
+            username="user",
+            password="user",
+        )
+        cls.url = reverse("app_dogs:dogs-list")
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Keep the profiles in a temporary directory.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(
+            REQUEST_PROFILING={
+                "DIRECTORY": directory.name,
+                "MAX_RECORDS": 2,
+                "MAX_FUNCTIONS": 10,
+            }
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_login(self.staff)
+
+    def test_sql(self) -> None:
+        """Check the queries are saved with their plans."""
+        response: Response = self.client.get(self.url, {"_profile": "sql"})
+        record: dict = profile_store.get(response[PROFILE_HEADER])
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual("sql", record["mode"])
+        self.assertEqual("staff", record["user"])
+        self.assertEqual(200, record["status"])
+        selects: list[dict] = [
+            query
+            for query in record["queries"]
+            if query["sql"].startswith("SELECT")
+        ]
+        self.assertTrue(selects)
+        for query in selects:
+            self.assertIn("Buffers:", query["plan"])
+            self.assertIn("Execution Time", query["plan"])
+
+    def test_side_effects(self) -> None:
+        """Check reads with side effects aren't run again."""
+        plans: list[str] = [
+            explain("SELECT pg_try_advisory_lock(%s)", (4242,)),
+            explain(
+                'SELECT "id" FROM "app_dogs_dog" WHERE "id" = %s FOR UPDATE',
+                (self.dog.id,),
+            ),
+            explain("SELECT nextval('app_dogs_dog_id_seq')", None),
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' "
+                "AND pid = pg_backend_pid()"
+            )
+            (advisory_locks,) = cursor.fetchone()
+
+        for plan in plans:
+            self.assertIn("cost=", plan)
+            self.assertNotIn("Execution Time", plan)
+        self.assertEqual(0, advisory_locks)
+        self.assertIn(
+            "Execution Time",
+            explain('SELECT count(*) FROM "app_dogs_dog"', None),
+        )
+
+    def test_cprofile(self) -> None:
+        """Check the call stats are saved."""
+        response: Response = self.client.get(
+            self.url, {"_profile": "cprofile"}
+        )
+        record: dict = profile_store.get(response[PROFILE_HEADER])
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual("cprofile", record["mode"])
+        self.assertIn("function calls", record["stats"])
+        self.assertIn("called...", record["stats"])
+
+    def test_not_staff(self) -> None:
+        """Check requests of other users aren't profiled."""
+        self.client.force_login(self.user)
+        response: Response = self.client.get(self.url, {"_profile": "sql"})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotIn(PROFILE_HEADER, response)
+        self.assertEqual([], profile_store.list())
+
+    def test_rotation(self) -> None:
+        """Check only the latest profiles are kept."""
+        record_ids: list[str] = [
+            self.client.get(self.url, {"_profile": "sql"})[PROFILE_HEADER]
+            for _ in range(3)
+        ]
+
+        self.assertEqual(
+            record_ids[:0:-1],
+            [record["id"] for record in profile_store.list()],
+        )
+        self.assertIsNone(profile_store.get(record_ids[0]))
+
+    def test_admin_pages(self) -> None:
+        """Check the admin pages show the profiles."""
+        record_id: str = self.client.get(self.url, {"_profile": "sql"})[
+            PROFILE_HEADER
+        ]
+
+        response = self.client.get(reverse("profile-list"))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertContains(
+            response, reverse("profile-detail", args=(record_id,))
+        )
+
+        response = self.client.get(
+            reverse("profile-detail", args=(record_id,))
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertContains(response, "Execution Time")
+
+        response = self.client.get(reverse("profile-detail", args=("x",)))
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("profile-list"))
+        self.assertEqual(status.HTTP_302_FOUND, response.status_code)
@@ -0,0 +1,193 @@
+"""Tests for the schema changes which don't block writes.
+
+Check the following operations:
+    - backfill: rows are updated by batches without change log entries
+      and new versions, a repeated backfill updates nothing;
+    - BackfillColumn refuses to run inside a transaction;
+    - the planner reports the locks of the operations and times them
+      on a sample of the table;
+    - migrateonline --dry-run reports that nothing is pending.
+
+Every batch of the backfill is committed separately, so the tests are
+run without the wrapping transaction.
+"""
+
+from io import StringIO
+
+from app_dogs.models import Breed, ChangeLog, Dog
+from app_dogs.utils.schema import (
+    AddConstraintNotValid,
+    AddIndexConcurrently,
+    BackfillColumn,
+    OperationPlan,
+    Planner,
+    ValidateConstraint,
+    backfill,
+)
+from django.core.management import call_command
+from django.db import (
+    NotSupportedError,
+    connection,
+    migrations,
+    models,
+    transaction,
+)
+from django.db.migrations.executor import MigrationExecutor
+from django.db.migrations.state import ProjectState
+from django.test import TransactionTestCase
+
+
+class SchemaChangesTestCase(TransactionTestCase):
+    """
+    Tests the operations of the online schema changes.
+
+    Args:
+        TransactionTestCase: Django test class without the wrapping
+            transaction.
+    """
+
+    def setUp(self) -> None:
+        """
+        Run this method before each test function in this class.
+
+        Create some test data.
+        """
+        breed = Breed.objects.create(name="pitbull")
+        Dog.objects.bulk_create(
+            [
+                Dog(name=f"dog {number}", age=number % 20, breed=breed)
+                for number in range(50)
+            ]
+        )
+
+    def get_state(self) -> ProjectState:
+        """
+        Get the state after all applied migrations of the app.
+
+        Returns:
+            ProjectState: Project state.
+        """
+        loader = MigrationExecutor(connection).loader
+        return loader.project_state(loader.graph.leaf_nodes("app_dogs")[0])
+
+    def test_backfill(self) -> None:
+        """Check rows are updated by batches without the change log."""
+        changes: int = ChangeLog.objects.count()
+        updated: int = backfill(
+            connection,
+            table=Dog._meta.db_table,
+            column="name",
+            value_sql="upper(name)",
+            batch_size=7,
+            pause=0,
+        )
+        self.assertEqual(50, updated)
+        self.assertFalse(Dog.objects.filter(name__startswith="dog").exists())
+        self.assertFalse(Dog.objects.exclude(version=1).exists())
+        self.assertEqual(changes, ChangeLog.objects.count())
+
+        self.assertEqual(
+            0,
+            backfill(
+                connection,
+                table=Dog._meta.db_table,
+                column="name",
+                value_sql="upper(name)",
+                batch_size=7,
+                pause=0,
+            ),
+        )
+
+    def test_backfill_in_transaction(self) -> None:
+        """Check the backfill operation needs a non-atomic migration."""
+        operation = BackfillColumn("dog", "name", "upper(name)", pause_ms=0)
+        state: ProjectState = self.get_state()
+        with (
+            transaction.atomic(),
+            connection.schema_editor(atomic=False) as schema_editor,
+        ):
+            with self.assertRaises(NotSupportedError):
+                operation.database_forwards(
+                    "app_dogs", schema_editor, state, state
+                )
+
+        with connection.schema_editor(atomic=False) as schema_editor:
+            operation.database_forwards(
+                "app_dogs", schema_editor, state, state
+            )
+        self.assertEqual(
+            50, Dog.objects.filter(name__startswith="DOG").count()
+        )
+
+    def test_plan(self) -> None:
+        """Check the locks and estimates of the operations."""
+        index = models.Index(fields=("name",), name="dog_name_test_idx")
+        migration = migrations.Migration("0100_test", "app_dogs")
+        migration.operations = [
+            migrations.AddIndex("dog", index),
+            AddIndexConcurrently("dog", index.clone()),
+            migrations.AddConstraint(
+                "dog",
+                models.CheckConstraint(
+                    condition=models.Q(age__lte=30), name="dog_age_test_check"
+                ),
+            ),
+            AddConstraintNotValid(
+                "dog",
+                models.CheckConstraint(
+                    condition=models.Q(age__lte=10), name="dog_age_test_valid"
+                ),
+            ),
+            ValidateConstraint("dog", "dog_age_test_valid"),
+            migrations.AddField(
+                "dog", "age_months", models.PositiveIntegerField(null=True)
+            ),
+            BackfillColumn("dog", "age_months", "age * 12", batch_size=20),
+        ]
+        migration.operations[1].index.name = "dog_name_test_concurrent_idx"
+
+        with transaction.atomic():
+            planner = Planner(
+                connection,
+                connection.schema_editor(collect_sql=True, atomic=False),
+                percent=100,
+            )
+            plans: list[OperationPlan] = planner.plan_migration(
+                migration, self.get_state()
+            )
+            transaction.set_rollback(True)
+
+        self.assertEqual(
+            [
+                ("SHARE", "writes"),
+                ("SHARE UPDATE EXCLUSIVE", "nothing"),
+                ("ACCESS EXCLUSIVE", "reads and writes"),
+                ("ACCESS EXCLUSIVE", "reads and writes, briefly"),
+                ("SHARE UPDATE EXCLUSIVE", "nothing"),
+                ("ACCESS EXCLUSIVE", "reads and writes, briefly"),
+                ("ROW EXCLUSIVE", "rows of a batch of 20"),
+            ],
+            [(plan.lock, plan.blocks) for plan in plans],
+        )
+        for position in (0, 1, 2, 6):
+            self.assertGreater(plans[position].seconds, 0)
+        self.assertIsNone(plans[3].seconds)
+        # existing rows violate the validated constraint
+        self.assertIsNone(plans[4].seconds)
+        self.assertIn("fails on the sample", plans[4].note)
+        self.assertEqual({"app_dogs_dog": (50, 50)}, planner.sizes)
+        # nothing is left by the planner
+        with connection.cursor() as cursor:
+            columns = connection.introspection.get_table_description(
+                cursor, Dog._meta.db_table
+            )
+        self.assertNotIn("age_months", [column.name for column in columns])
+        self.assertEqual(
+            50, Dog.objects.filter(name__startswith="dog").count()
+        )
+
+    def test_dry_run(self) -> None:
+        """Check the command reports no pending migrations."""
+        stdout = StringIO()
+        call_command("migrateonline", dry_run=True, stdout=stdout)
+        self.assertEqual("No migrations to apply.\n", stdout.getvalue())
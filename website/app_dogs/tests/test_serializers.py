@@ -142,6 +142,7 @@ class SerializersTestCase(TestCase):
             "color": "other",
             "favorite_food": None,
             "favorite_toy": None,
+            "version": 1,
             "breed": self.breed_1.id,
         }
         expected_data_dog_2 = {
@@ -152,6 +153,7 @@ class SerializersTestCase(TestCase):
             "color": "black",
             "favorite_food": "beef",
             "favorite_toy": "ball",
+            "version": 1,
             "breed": self.breed_2.id,
         }
         expected_data_dog_3 = {
@@ -162,6 +164,7 @@ class SerializersTestCase(TestCase):
             "color": "gray",
             "favorite_food": "pork",
             "favorite_toy": "bone",
+            "version": 1,
             "breed": self.breed_2.id,
         }
 
@@ -192,6 +195,7 @@ class SerializersTestCase(TestCase):
                 "trainability": 5,
                 "shedding_amount": 1,
                 "exercise_needs": 3,
+                "version": 1,
                 "detail_url": self.url_breed_detail_1,
                 "dog_count": 1,
             },
@@ -203,6 +207,7 @@ class SerializersTestCase(TestCase):
                 "trainability": 3,
                 "shedding_amount": 2,
                 "exercise_needs": 5,
+                "version": 1,
                 "detail_url": self.url_breed_detail_2,
                 "dog_count": 2,
             },
@@ -214,6 +219,7 @@ class SerializersTestCase(TestCase):
                 "trainability": 4,
                 "shedding_amount": 2,
                 "exercise_needs": 2,
+                "version": 1,
                 "detail_url": self.url_breed_detail_3,
                 "dog_count": 0,
             },
@@ -237,6 +243,7 @@ class SerializersTestCase(TestCase):
             "trainability": 5,
             "shedding_amount": 1,
             "exercise_needs": 3,
+            "version": 1,
         }
         expected_data_breed_2 = {
             "id": self.breed_2.id,
@@ -246,6 +253,7 @@ class SerializersTestCase(TestCase):
             "trainability": 3,
             "shedding_amount": 2,
             "exercise_needs": 5,
+            "version": 1,
         }
         expected_data_breed_3 = {
             "id": self.breed_3.id,
@@ -255,6 +263,7 @@ class SerializersTestCase(TestCase):
             "trainability": 4,
             "shedding_amount": 2,
             "exercise_needs": 2,
+            "version": 1,
         }
 
         serialized_data_breed_1 = BreedDetailSerializer(self.breed_1).data
@@ -1,15 +1,26 @@
 """Urls in this app 'app_dogs'."""
 
-from app_dogs.views import BreedViewSet, DogViewSet
+from app_dogs.views import (
+    BatchView,
+    BreedViewSet,
+    ChangeLogViewSet,
+    ChangeStreamView,
+    DogViewSet,
+    SnapshotViewSet,
+)
 from django.urls import include, path
 from rest_framework import routers
 
 router = routers.DefaultRouter()
 router.register(r"dogs", DogViewSet, basename="dogs")
 router.register(r"breeds", BreedViewSet, basename="breeds")
+router.register(r"changes", ChangeLogViewSet, basename="changes")
+router.register(r"snapshots", SnapshotViewSet, basename="snapshots")
 
 app_name = "app_dogs"
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("stream/", ChangeStreamView.as_view(), name="stream"),
+    path("batch/", BatchView.as_view(), name="batch"),
 ]
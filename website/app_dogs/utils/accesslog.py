@@ -0,0 +1,362 @@
+"""Structured access log of the app requests.
+
+Every request of the app is timed by AccessLogMiddleware: the total
+time, the time and the number of its queries, the time of the response
+serializers and the size of the response. A sample of the requests is
+logged as JSON lines to the 'app_dogs.access' logger, errors and slow
+requests always are.
+
+Request threads never write the log. AccessLogHandler only puts
+the record into a bounded queue, and a writer thread of the process
+formats the records and writes them in batches. When the queue is full,
+the record is dropped and counted instead of waiting for the writer.
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler
+from typing import Any, TextIO
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+ACCESS_LOGGER = "app_dogs.access"
+access_logger = logging.getLogger(ACCESS_LOGGER)
+
+
+class RequestTiming:
+    """Timing of a request collected while it runs."""
+
+    def __init__(self) -> None:
+        """Start the timing."""
+        self.started: float = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.serializer_time = 0.0
+        # depth of nested serializers, only the outer one is timed
+        self.serializer_depth = 0
+
+    def record_query(
+        self,
+        execute: Callable,
+        sql: str,
+        params: Any,
+        many: bool,
+        context: dict,
+    ) -> Any:
+        """
+        Time the query, used as the execute wrapper of the connection.
+
+        Args:
+            execute (Callable): Next wrapper or the query execution.
+            sql (str): SQL of the query.
+            params (Any): Parameters of the query.
+            many (bool): Whether it is 'executemany'.
+            context (dict): Connection and cursor of the query.
+
+        Returns:
+            Any: Result of the execution.
+        """
+        started: float = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+current_timing: ContextVar[RequestTiming | None] = ContextVar(
+    "current_timing", default=None
+)
+
+
+def time_serializer(represent: Callable[[], Any]) -> Any:
+    """
+    Run the representation and add its time to the request timing.
+
+    Args:
+        represent (Callable[[], Any]): Representation of a serializer.
+
+    Returns:
+        Any: Result of the representation.
+    """
+    timing: RequestTiming | None = current_timing.get()
+    if timing is None or timing.serializer_depth:
+        return represent()
+    timing.serializer_depth += 1
+    started: float = time.perf_counter()
+    try:
+        return represent()
+    finally:
+        timing.serializer_time += time.perf_counter() - started
+        timing.serializer_depth -= 1
+
+
+def get_response_size(response: HttpResponse) -> int | None:
+    """
+    Get the size of the response body.
+
+    Args:
+        response (HttpResponse): Django response.
+
+    Returns:
+        int | None: Size in bytes, None for a streaming response.
+    """
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+def should_log(status_code: int, total_ms: float) -> bool:
+    """
+    Decide whether the request is logged.
+
+    Args:
+        status_code (int): Status of the response.
+        total_ms (float): Time of the request in milliseconds.
+
+    Returns:
+        bool: Whether the request is in the sample, an error or slow.
+    """
+    options: dict = settings.ACCESS_LOG
+    return (
+        status_code >= 500
+        or total_ms >= options["SLOW_MS"]
+        or random.random() < options["SAMPLE_RATE"]
+    )
+
+
+def log_request(
+    request: HttpRequest,
+    response: HttpResponse,
+    timing: RequestTiming,
+) -> None:
+    """
+    Log the finished request of the app if it is sampled.
+
+    Args:
+        request (HttpRequest): Django request.
+        response (HttpResponse): Its response.
+        timing (RequestTiming): Timing of the request.
+    """
+    total_ms: float = (time.perf_counter() - timing.started) * 1000
+    match = request.resolver_match
+    if (
+        match is None
+        or match.app_name != "app_dogs"
+        or not should_log(response.status_code, total_ms)
+    ):
+        return
+    access_logger.info(
+        "%s %s",
+        request.method,
+        match.view_name,
+        extra={
+            "access": {
+                "method": request.method,
+                "route": match.view_name,
+                "status": response.status_code,
+                "total_ms": round(total_ms, 2),
+                "db_ms": round(timing.db_time * 1000, 2),
+                "queries": timing.queries,
+                "serializer_ms": round(timing.serializer_time * 1000, 2),
+                "bytes": get_response_size(response),
+            }
+        },
+    )
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format the access record as a JSON line.
+
+    Args:
+        logging.Formatter: Python log formatter.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Format the record.
+
+        Args:
+            record (logging.LogRecord): Record with the 'access' dict,
+                other records are logged by their message.
+
+        Returns:
+            str: JSON object in one line.
+        """
+        data: dict = getattr(record, "access", None) or {
+            "message": record.getMessage()
+        }
+        return json.dumps(
+            {
+                "time": datetime.fromtimestamp(record.created, UTC).isoformat(
+                    timespec="milliseconds"
+                ),
+                **data,
+            }
+        )
+
+
+class AccessLogHandler(QueueHandler):
+    """
+    Handler passing the records to the writer thread of the process.
+
+    The writer is started by the first record of the process, so
+    the workers forked from a preloaded application start their own.
+
+    Args:
+        filename (str): Log file, stdout if empty.
+        stream (TextIO | None): Stream to write if there is no file.
+        queue_size (int): Records waiting for the writer, more are
+            dropped.
+        batch_size (int): Max number of records written at once.
+        flush_interval (float): Max seconds a record waits for
+            the batch.
+    """
+
+    def __init__(
+        self,
+        filename: str = "",
+        stream: TextIO | None = None,
+        queue_size: int = 10_000,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+    ) -> None:
+        """Initialize the handler without the writer."""
+        super().__init__(queue.Queue(queue_size))
+        self.filename = filename
+        self.stream = stream
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.writer: threading.Thread | None = None
+        self.writer_pid: int | None = None
+        self.stats: dict[str, int] = {
+            "written": 0,
+            "batches": 0,
+            "dropped": 0,
+        }
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Pass the record as is, it is formatted by the writer.
+
+        Args:
+            record (logging.LogRecord): Log record.
+
+        Returns:
+            logging.LogRecord: The same record.
+        """
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Put the record into the queue or drop it if the queue is full.
+
+        Args:
+            record (logging.LogRecord): Log record.
+        """
+        self.start_writer()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self.lock:
+                self.stats["dropped"] += 1
+
+    def start_writer(self) -> None:
+        """Start the writer thread unless it runs in this process."""
+        pid: int = os.getpid()
+        if self.writer_pid == pid:
+            return
+        with self.lock:
+            if self.writer_pid == pid:
+                return
+            if self.writer_pid is not None:
+                # the queue of the parent process may hold its records
+                self.queue = queue.Queue(self.queue.maxsize)
+            self.writer = threading.Thread(
+                target=self.write_records,
+                name="access-log-writer",
+                daemon=True,
+            )
+            self.writer.start()
+            self.writer_pid = pid
+
+    def get_batch(self) -> list[logging.LogRecord | None]:
+        """
+        Wait for the records of the next batch.
+
+        The writer sleeps while the batch is collected instead of waking
+        up for every record, which would take the GIL from the request
+        threads for each of them.
+
+        Returns:
+            list[logging.LogRecord | None]: Records, None stops the writer.
+        """
+        batch: list[logging.LogRecord | None] = [self.queue.get()]
+        if batch[0] is not None and self.queue.qsize() < self.batch_size:
+            time.sleep(self.flush_interval)
+        while len(batch) < self.batch_size and batch[-1] is not None:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def write_records(self) -> None:
+        """Write the batches of records until the handler is closed."""
+        stream: TextIO = (
+            open(self.filename, "a", encoding="utf-8")
+            if self.filename
+            else self.stream or sys.stdout
+        )
+        try:
+            while True:
+                batch: list[logging.LogRecord | None] = self.get_batch()
+                records: list[logging.LogRecord] = [
+                    record for record in batch if record is not None
+                ]
+                try:
+                    if records:
+                        stream.write(
+                            "".join(
+                                f"{self.format(record)}\n"
+                                for record in records
+                            )
+                        )
+                        stream.flush()
+                        with self.lock:
+                            self.stats["written"] += len(records)
+                            self.stats["batches"] += 1
+                except (OSError, TypeError, ValueError):
+                    self.handleError(records[0])
+                finally:
+                    for _ in batch:
+                        self.queue.task_done()
+                if len(records) < len(batch):
+                    return
+        finally:
+            if self.filename:
+                stream.close()
+
+    def flush(self) -> None:
+        """Wait until the queued records are written."""
+        if self.writer_pid == os.getpid() and self.writer.is_alive():
+            self.queue.join()
+
+    def close(self) -> None:
+        """Write the queued records and stop the writer."""
+        if self.writer_pid == os.getpid() and self.writer.is_alive():
+            self.queue.put(None)
+            self.writer.join()
+        self.writer_pid = None
+        super().close()
@@ -0,0 +1,478 @@
+"""Admission control of API requests.
+
+A worker process runs a limited number of requests of each endpoint
+class at once: cheap reads, expensive aggregates and writes. A request
+over the limit waits in a short queue of its class, and a request which
+doesn't fit into the queue or has waited too long gets a fast 503 with
+'Retry-After' instead of piling up until every request times out.
+
+In the adaptive mode the limit of a class follows its latency: after
+each window of requests the limit is lowered multiplicatively when the
+90th percentile of the window is over the target of the class, and it
+is raised by one when the window was saturated within the target, up to
+the configured limit. So the worker keeps as many requests in flight as
+it can serve in time and sheds the rest.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import NamedTuple
+
+from app_dogs.utils.coalescing import BEFORE_RUN_ATTRIBUTE, single_flight
+from django.conf import settings
+from django.http import HttpRequest, JsonResponse
+from rest_framework import status
+
+READ_METHODS: frozenset[str] = frozenset(("GET", "HEAD", "OPTIONS"))
+SHED_DETAIL = "The server is overloaded, try again later."
+
+
+class Overloaded(Exception):
+    """
+    Request shed by the admission control.
+
+    Args:
+        Exception: Python base exception.
+    """
+
+
+class AdmissionQueue:
+    """
+    Slots of the endpoint class in the worker and their waiting queue.
+
+    Args:
+        name (str): Name of the endpoint class.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Initialize the class without requests."""
+        self.name = name
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.waiting = 0
+        # adaptive limit, None until the first request
+        self.limit: int | None = None
+        # latencies of the current window of the adaptive mode
+        self.samples: list[float] = []
+        self.window_start: float = time.monotonic()
+        self.saturated = False
+        # 90th percentile of the last window in seconds
+        self.latency: float | None = None
+
+    def get_limit(self, options: dict, adaptive: dict) -> int:
+        """
+        Get the current limit of requests in flight.
+
+        Args:
+            options (dict): Settings of the class.
+            adaptive (dict): Settings of the adaptive mode.
+
+        Returns:
+            int: Limit of the class.
+        """
+        if not adaptive["ENABLED"]:
+            return options["LIMIT"]
+        if self.limit is None:
+            self.limit = options["LIMIT"]
+        return min(self.limit, options["LIMIT"])
+
+    def acquire(
+        self,
+        options: dict,
+        adaptive: dict,
+        get_flight_key: Callable[[], str | None],
+    ) -> str:
+        """
+        Take a slot, waiting for it in the queue if needed.
+
+        Arrivals don't pass waiting requests, so the queue is served
+        roughly in order. A request which would follow an identical
+        request in flight needs no slot: it only waits for the response
+        of the leader, see app_dogs/utils/coalescing.py. A queued
+        request is woken up when such a leader starts.
+
+        Args:
+            options (dict): Settings of the class.
+            adaptive (dict): Settings of the adaptive mode.
+            get_flight_key (Callable[[], str | None]): Key of identical
+                requests, called once if the request can't be admitted
+                at once.
+
+        Returns:
+            str: 'admitted' or 'queued' if the slot is taken, 'follower'
+                if no slot is needed, 'queue_full' or 'timeout' if
+                the request is shed.
+        """
+        with self.condition:
+            if not self.waiting and self.in_flight < self.get_limit(
+                options, adaptive
+            ):
+                self.in_flight += 1
+                return "admitted"
+            self.saturated = True
+            key: str | None = get_flight_key()
+            if key is None:
+                return self.wait(options, adaptive, [])
+
+            followed: list[bool] = []
+
+            def follow() -> None:
+                with self.condition:
+                    followed.append(True)
+                    self.condition.notify_all()
+
+            if single_flight.watch(key, follow):
+                return "follower"
+            try:
+                return self.wait(options, adaptive, followed)
+            finally:
+                single_flight.unwatch(key, follow)
+
+    def wait(self, options: dict, adaptive: dict, followed: list) -> str:
+        """
+        Wait in the queue for a slot or for a leader to follow.
+
+        Called with the condition held.
+
+        Args:
+            options (dict): Settings of the class.
+            adaptive (dict): Settings of the adaptive mode.
+            followed (list): Not empty once a leader of an identical
+                request has started.
+
+        Returns:
+            str: 'queued' if the slot is taken, 'follower' if no slot is
+                needed, 'queue_full' or 'timeout' if the request is shed.
+        """
+        if self.waiting >= options["QUEUE_SIZE"]:
+            return "queue_full"
+
+        self.waiting += 1
+        try:
+            deadline: float = (
+                time.monotonic() + options["QUEUE_TIMEOUT_MS"] / 1000
+            )
+            while self.in_flight >= self.get_limit(options, adaptive):
+                if followed:
+                    return "follower"
+                remaining: float = deadline - time.monotonic()
+                if remaining <= 0:
+                    return "timeout"
+                self.condition.wait(remaining)
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        return "queued"
+
+    def release(self, latency: float, options: dict, adaptive: dict) -> None:
+        """
+        Free the slot of the finished request.
+
+        Args:
+            latency (float): Time of the request in the slot in seconds.
+            options (dict): Settings of the class.
+            adaptive (dict): Settings of the adaptive mode.
+        """
+        with self.condition:
+            self.in_flight -= 1
+            if adaptive["ENABLED"]:
+                self.adapt(latency, options, adaptive)
+            self.condition.notify_all()
+
+    def adapt(self, latency: float, options: dict, adaptive: dict) -> None:
+        """
+        Add the latency to the window and adapt the limit at its end.
+
+        Called with the condition held.
+
+        Args:
+            latency (float): Time of the request in the slot in seconds.
+            options (dict): Settings of the class.
+            adaptive (dict): Settings of the adaptive mode.
+        """
+        self.samples.append(latency)
+        now: float = time.monotonic()
+        if (
+            len(self.samples) < adaptive["MIN_SAMPLES"]
+            or now - self.window_start < adaptive["WINDOW_SECONDS"]
+        ):
+            return
+
+        samples: list[float] = sorted(self.samples)
+        self.latency = samples[int(len(samples) * 0.9)]
+        limit: int = self.get_limit(options, adaptive)
+        if self.latency * 1000 > options["TARGET_MS"]:
+            self.limit = max(
+                adaptive["MIN_LIMIT"], int(limit * adaptive["DECREASE"])
+            )
+        elif self.saturated:
+            self.limit = limit + 1
+        self.samples = []
+        self.window_start = now
+        self.saturated = False
+
+
+class Ticket(NamedTuple):
+    """Slot taken by an admitted request."""
+
+    queue: AdmissionQueue
+    # time.monotonic() of the admission
+    started: float
+
+
+class AdmissionControl:
+    """
+    Per-process registry of the endpoint classes and their stats.
+
+    Args:
+        settings_name (str): Name of the settings dict with 'ENABLED',
+            'CLASSES', 'VIEWS', 'ADAPTIVE' and 'RETRY_AFTER_SECONDS' keys.
+    """
+
+    def __init__(self, settings_name: str) -> None:
+        """Initialize the registry without requests."""
+        self.settings_name = settings_name
+        self.lock = threading.Lock()
+        self.queues: dict[str, AdmissionQueue] = {}
+        # "admitted", "queued", "followers", "promoted" and "shed" are
+        # totals, the rest are by classes and kinds of shedding
+        self.stats: dict[str, int] = {
+            "admitted": 0,
+            "queued": 0,
+            "followers": 0,
+            "promoted": 0,
+            "shed": 0,
+        }
+
+    @property
+    def options(self) -> dict:
+        """
+        Get the settings of the admission control.
+
+        Returns:
+            dict: Settings dict.
+        """
+        return getattr(settings, self.settings_name)
+
+    def count(self, *names: str) -> None:
+        """
+        Increment the stats counters.
+
+        Args:
+            names (str): Names of the counters.
+        """
+        with self.lock:
+            for name in names:
+                self.stats[name] = self.stats.get(name, 0) + 1
+
+    def get_queue(self, name: str) -> AdmissionQueue:
+        """
+        Get the queue of the endpoint class.
+
+        Args:
+            name (str): Name of the endpoint class.
+
+        Returns:
+            AdmissionQueue: Queue of the class.
+        """
+        with self.lock:
+            if name not in self.queues:
+                self.queues[name] = AdmissionQueue(name)
+            return self.queues[name]
+
+    def get_class_name(
+        self,
+        request: HttpRequest,
+        view_func: Callable,
+    ) -> str | None:
+        """
+        Get the endpoint class of the request.
+
+        Only the views of the app are limited. View set actions are
+        named '<basename>.<action>', other views by their URL names.
+        Views missing in the 'VIEWS' settings are 'read' for reading
+        methods and 'write' for the others.
+
+        Args:
+            request (HttpRequest): Django request.
+            view_func (Callable): View resolved for the request.
+
+        Returns:
+            str | None: Name of the class, None if the view isn't limited.
+        """
+        if request.resolver_match.app_name != "app_dogs":
+            return None
+        actions: dict[str, str] | None = getattr(view_func, "actions", None)
+        if actions:
+            view_name: str = (
+                f"{view_func.initkwargs.get('basename')}."
+                f"{actions.get(request.method.lower())}"
+            )
+        else:
+            view_name = request.resolver_match.url_name
+        views: dict[str, str | None] = self.options["VIEWS"]
+        if view_name in views:
+            return views[view_name]
+        return "read" if request.method in READ_METHODS else "write"
+
+    def admit(
+        self,
+        request: HttpRequest,
+        view_func: Callable,
+    ) -> Ticket | None:
+        """
+        Admit the request by the class of its view.
+
+        Args:
+            request (HttpRequest): Django request with the resolver match.
+            view_func (Callable): View resolved for the request.
+
+        Raises:
+            Overloaded: The request is shed.
+
+        Returns:
+            Ticket | None: Taken slot, None if the request needs none.
+        """
+        if not self.options["ENABLED"]:
+            return None
+        name: str | None = self.get_class_name(request, view_func)
+        if name is None:
+            return None
+        return self.acquire(name, request)
+
+    def acquire(
+        self,
+        name: str,
+        request: HttpRequest,
+        follow: bool = True,
+    ) -> Ticket | None:
+        """
+        Admit the request of the endpoint class.
+
+        A follower gets no slot until it runs the view itself: if its
+        leader has finished before it or hasn't shared the response,
+        the slot is taken then by 'promote'.
+
+        Args:
+            name (str): Name of the endpoint class.
+            request (HttpRequest): Django request.
+            follow (bool): Admit the request as a follower of an identical
+                request in flight.
+
+        Raises:
+            Overloaded: The request is shed.
+
+        Returns:
+            Ticket | None: Taken slot, None if the request needs none.
+        """
+        options: dict = self.options
+        queue: AdmissionQueue = self.get_queue(name)
+        outcome: str = queue.acquire(
+            options["CLASSES"][name],
+            options["ADAPTIVE"],
+            (
+                partial(single_flight.get_key, request)
+                if follow
+                else lambda: None
+            ),
+        )
+        if outcome in ("queue_full", "timeout"):
+            self.count("shed", f"{name}.shed", f"{name}.shed_{outcome}")
+            raise Overloaded(outcome)
+        if outcome == "follower":
+            self.count("followers", f"{name}.followers")
+            setattr(
+                request,
+                BEFORE_RUN_ATTRIBUTE,
+                partial(self.promote, name, request),
+            )
+            return None
+        self.count("admitted", f"{name}.admitted")
+        if outcome == "queued":
+            self.count("queued", f"{name}.queued")
+        return Ticket(queue, time.monotonic())
+
+    def promote(self, name: str, request: HttpRequest) -> None:
+        """
+        Take a slot for the follower which runs the view itself.
+
+        The ticket is put to 'admission_ticket' of the request to be
+        released with the response.
+
+        Args:
+            name (str): Name of the endpoint class.
+            request (HttpRequest): Django request admitted as a follower.
+
+        Raises:
+            Overloaded: The request is shed.
+        """
+        delattr(request, BEFORE_RUN_ATTRIBUTE)
+        request.admission_ticket = self.acquire(name, request, follow=False)
+        self.count("promoted", f"{name}.promoted")
+
+    def release(self, ticket: Ticket) -> None:
+        """
+        Free the slot of the finished request.
+
+        Args:
+            ticket (Ticket): Slot taken by the request.
+        """
+        options: dict = self.options
+        ticket.queue.release(
+            time.monotonic() - ticket.started,
+            options["CLASSES"][ticket.queue.name],
+            options["ADAPTIVE"],
+        )
+
+    def get_shed_response(self) -> JsonResponse:
+        """
+        Get the response of a shed request.
+
+        Returns:
+            JsonResponse: 503 response with 'Retry-After'.
+        """
+        response = JsonResponse(
+            {"detail": SHED_DETAIL},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        response["Retry-After"] = str(self.options["RETRY_AFTER_SECONDS"])
+        return response
+
+    def get_metrics(self) -> dict[str, dict]:
+        """
+        Get the current state of the endpoint classes.
+
+        Returns:
+            dict[str, dict]: Requests in flight and waiting, the limit and
+                the latency of the last adaptive window by class names.
+        """
+        options: dict = self.options
+        with self.lock:
+            queues: list[AdmissionQueue] = list(self.queues.values())
+            stats: dict[str, int] = dict(self.stats)
+        metrics: dict[str, dict] = {}
+        for queue in queues:
+            with queue.condition:
+                metrics[queue.name] = {
+                    "in_flight": queue.in_flight,
+                    "waiting": queue.waiting,
+                    "limit": queue.get_limit(
+                        options["CLASSES"][queue.name], options["ADAPTIVE"]
+                    ),
+                    "latency_ms": (
+                        None
+                        if queue.latency is None
+                        else round(queue.latency * 1000, 1)
+                    ),
+                    **{
+                        key.removeprefix(f"{queue.name}."): value
+                        for key, value in stats.items()
+                        if key.startswith(f"{queue.name}.")
+                    },
+                }
+        return metrics
+
+
+admission_control = AdmissionControl(settings_name="ADMISSION_CONTROL")
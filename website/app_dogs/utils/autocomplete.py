@@ -0,0 +1,353 @@
+"""Autocomplete of breed names from an in-memory prefix index.
+
+Names are normalized: accents are stripped by the NFKD decomposition,
+the case is folded and runs of spaces are collapsed. Every word start
+of a normalized name is a key of a sorted list, so the breeds having
+a word that starts with the query are found by two binary searches
+and ranked by the number of their dogs without queries to the database.
+
+The index is loaded on the first use. Breeds saved and deleted through
+the ORM are applied by the model signals as soon as their transactions
+commit. Breeds changed by raw SQL and bulk updates or by other
+processes and the dog counts are caught up in a background thread from
+the change log, started by a request finding the index older than
+'REFRESH_SECONDS', so requests never wait for the database.
+"""
+
+import heapq
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import NamedTuple
+
+from app_dogs.models import Breed, ChangeLog, Dog
+from app_dogs.utils.changelog import (
+    Cursor,
+    get_change_data,
+    get_changes,
+    get_head_cursor,
+    get_horizon,
+)
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+
+# sorts after any character of a key
+KEY_END = chr(0x10FFFF)
+
+
+def normalize(text: str) -> str:
+    """
+    Get the text compared by the autocomplete.
+
+    Args:
+        text (str): Breed name or query.
+
+    Returns:
+        str: Case folded text without accents and extra spaces.
+    """
+    decomposed: str = unicodedata.normalize("NFKD", text)
+    stripped: str = "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    )
+    return " ".join(stripped.casefold().split())
+
+
+def count_dogs() -> dict[int, int]:
+    """
+    Count the dogs of every breed.
+
+    Returns:
+        dict[int, int]: Numbers of dogs by breed ids.
+    """
+    return dict(
+        Dog.objects.filter(breed__isnull=False)
+        .order_by()
+        .values_list("breed")
+        .annotate(count=Count("id"))
+    )
+
+
+class BreedEntry(NamedTuple):
+    """Breed in the autocomplete index."""
+
+    name: str
+    key: str
+    dog_count: int
+
+
+class BreedNameIndex:
+    """
+    Immutable prefix index of the breed names.
+
+    Args:
+        breeds (dict[int, BreedEntry]): Breeds by ids.
+        cursor (Cursor): Position of the last change log entry applied.
+        counted (Cursor): Position of the change log the dogs were
+            counted at.
+        counted_at (float): Monotonic time the dogs were counted at.
+        refreshed_at (float): Monotonic time the index was caught up
+            with the change log at.
+    """
+
+    def __init__(
+        self,
+        breeds: dict[int, BreedEntry],
+        cursor: Cursor,
+        counted: Cursor,
+        counted_at: float,
+        refreshed_at: float,
+    ) -> None:
+        """Initialize the index and sort the word starts of the names."""
+        self.breeds = breeds
+        self.cursor = cursor
+        self.counted = counted
+        self.counted_at = counted_at
+        self.refreshed_at = refreshed_at
+
+        pairs: list[tuple[str, int]] = sorted(
+            (entry.key[start:], breed_id)
+            for breed_id, entry in breeds.items()
+            for start in range(len(entry.key))
+            if start == 0 or entry.key[start - 1] == " "
+        )
+        self.keys: list[str] = [key for key, _ in pairs]
+        self.key_ids: list[int] = [breed_id for _, breed_id in pairs]
+
+    def __len__(self) -> int:
+        """
+        Get the number of breeds.
+
+        Returns:
+            int: Number of breeds.
+        """
+        return len(self.breeds)
+
+    @classmethod
+    def load(cls) -> "BreedNameIndex":
+        """
+        Read all breeds and count their dogs.
+
+        The change log position is taken before reading, so changes made
+        in the meantime are applied again by the next refresh.
+
+        Returns:
+            BreedNameIndex: New index.
+        """
+        cursor: Cursor = get_head_cursor()
+        counts: dict[int, int] = count_dogs()
+        now: float = time.monotonic()
+        return cls(
+            {
+                breed_id: BreedEntry(
+                    name, normalize(name), counts.get(breed_id, 0)
+                )
+                for breed_id, name in Breed.objects.values_list("id", "name")
+            },
+            cursor=cursor,
+            counted=cursor,
+            counted_at=now,
+            refreshed_at=now,
+        )
+
+    def apply(
+        self,
+        names: dict[int, str | None],
+        counts: dict[int, int] | None = None,
+        **positions,
+    ) -> "BreedNameIndex":
+        """
+        Get a new index with the changed breeds.
+
+        Args:
+            names (dict[int, str | None]): New names by breed ids, None
+                for deleted breeds.
+            counts (dict[int, int] | None): Numbers of dogs of all breeds
+                if they were counted again.
+            positions: New values of 'cursor', 'counted', 'counted_at'
+                and 'refreshed_at'.
+
+        Returns:
+            BreedNameIndex: New index.
+        """
+        breeds: dict[int, BreedEntry] = dict(self.breeds)
+        for breed_id, name in names.items():
+            if name is None:
+                breeds.pop(breed_id, None)
+            else:
+                dog_count: int = (
+                    breeds[breed_id].dog_count if breed_id in breeds else 0
+                )
+                breeds[breed_id] = BreedEntry(name, normalize(name), dog_count)
+        if counts is not None:
+            breeds = {
+                breed_id: entry._replace(dog_count=counts.get(breed_id, 0))
+                for breed_id, entry in breeds.items()
+            }
+        return BreedNameIndex(
+            breeds,
+            **{
+                "cursor": self.cursor,
+                "counted": self.counted,
+                "counted_at": self.counted_at,
+                "refreshed_at": self.refreshed_at,
+                **positions,
+            },
+        )
+
+    def search(self, query: str, limit: int) -> list[dict]:
+        """
+        Get the breeds having a word of the name starting with the query.
+
+        Args:
+            query (str): Typed text.
+            limit (int): Max number of breeds.
+
+        Returns:
+            list[dict]: Breeds with most dogs first, then by names.
+        """
+        key: str = normalize(query)
+        if not key:
+            return []
+        start: int = bisect_left(self.keys, key)
+        stop: int = bisect_left(self.keys, key + KEY_END, lo=start)
+        found: set[int] = set(self.key_ids[start:stop])
+
+        ranked: list[int] = heapq.nsmallest(
+            limit,
+            found,
+            key=lambda breed_id: (
+                -self.breeds[breed_id].dog_count,
+                self.breeds[breed_id].key,
+                breed_id,
+            ),
+        )
+        return [
+            {
+                "id": breed_id,
+                "name": self.breeds[breed_id].name,
+                "dog_count": self.breeds[breed_id].dog_count,
+            }
+            for breed_id in ranked
+        ]
+
+
+def catch_up(index: BreedNameIndex) -> BreedNameIndex:
+    """
+    Get the index with the new entries of the change log applied.
+
+    Dogs are counted again if they have been changed and the counts are
+    older than 'RECOUNT_SECONDS'. The index is loaded again if there are
+    too many changes or some of them have been removed by the retention.
+
+    Args:
+        index (BreedNameIndex): Index to catch up.
+
+    Returns:
+        BreedNameIndex: New index.
+    """
+    options: dict = settings.BREED_AUTOCOMPLETE
+    max_changes: int = options["MAX_APPLIED_CHANGES"]
+    if index.counted < get_horizon():
+        return BreedNameIndex.load()
+
+    head: Cursor = get_head_cursor()
+    changes: list[ChangeLog] = get_changes(
+        index.cursor, max_changes + 1, model="breed"
+    )
+    if len(changes) > max_changes:
+        return BreedNameIndex.load()
+    names: dict[int, str | None] = {
+        change.object_id: (
+            None if (data := get_change_data(change)) is None else data["name"]
+        )
+        for change in changes
+    }
+
+    now: float = time.monotonic()
+    positions: dict = {"cursor": head, "refreshed_at": now}
+    counts: dict[int, int] | None = None
+    if now - index.counted_at >= options["RECOUNT_SECONDS"] and get_changes(
+        index.counted, 1, model="dog"
+    ):
+        counts = count_dogs()
+        positions.update(counted=head, counted_at=now)
+    return index.apply(names, counts, **positions)
+
+
+class BreedNameIndexCache:
+    """Index of the breed names shared by threads of the process."""
+
+    def __init__(self) -> None:
+        """Initialize the cache without an index."""
+        self.index: BreedNameIndex | None = None
+        self.lock = threading.Lock()
+        self.refreshing = False
+
+    def clear(self) -> None:
+        """Drop the index, it is loaded again on the next request."""
+        with self.lock:
+            self.index = None
+
+    def get(self) -> BreedNameIndex:
+        """
+        Get the index, it is loaded by the first call.
+
+        An index older than 'REFRESH_SECONDS' is returned as is, and
+        a background thread catches it up for the next requests.
+
+        Returns:
+            BreedNameIndex: Index of all breeds.
+        """
+        with self.lock:
+            if self.index is None:
+                self.index = BreedNameIndex.load()
+            elif (
+                not self.refreshing
+                and time.monotonic() - self.index.refreshed_at
+                >= settings.BREED_AUTOCOMPLETE["REFRESH_SECONDS"]
+            ):
+                self.refreshing = True
+                threading.Thread(
+                    target=self.refresh_in_background, daemon=True
+                ).start()
+            return self.index
+
+    def put(self, names: dict[int, str | None]) -> None:
+        """
+        Apply the committed changes of breeds to the loaded index.
+
+        Args:
+            names (dict[int, str | None]): New names by breed ids, None
+                for deleted breeds.
+        """
+        with self.lock:
+            if self.index is not None:
+                self.index = self.index.apply(names)
+
+    def refresh(self) -> None:
+        """
+        Catch up the index with the change log.
+
+        Breeds put while the change log is read are dropped with the old
+        index, their changes are read by this or the next refresh.
+        """
+        index: BreedNameIndex | None = self.index
+        if index is None:
+            return
+        new_index: BreedNameIndex = catch_up(index)
+        with self.lock:
+            if self.index is not None:
+                self.index = new_index
+
+    def refresh_in_background(self) -> None:
+        """Refresh the index in the thread and close its connection."""
+        try:
+            self.refresh()
+        finally:
+            self.refreshing = False
+            connection.close()
+
+
+breed_name_index_cache = BreedNameIndexCache()
@@ -0,0 +1,342 @@
+"""Batches of API requests run in one round trip.
+
+Every sub-request is resolved by the URL resolver and passed to its view
+directly, without middlewares and HTTP. It gets the headers, cookies and
+user of the batch request, so authentication and CSRF checks of DRF work
+as for a separate request. Conditional headers like 'If-Match' are about
+one object, so they are taken only from the headers of the sub-request
+itself. A sub-request is admitted by the class of its view
+as a separate request would be, see app_dogs/utils/admission.py. Reads
+between two writes don't depend on each other and are run concurrently:
+they are spread over a few lanes, each running its reads one by one in
+its own thread and connection.
+"""
+
+import asyncio
+import json
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from app_dogs.utils.admission import Overloaded, Ticket, admission_control
+from app_dogs.utils.retry import (
+    RETRYABLE_SQLSTATES,
+    get_sqlstate,
+    write_retry,
+)
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.handlers.exception import response_for_exception
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.urls import Resolver404, ResolverMatch, resolve
+from rest_framework import status
+
+APP_NAME = "app_dogs"
+BATCH_URL_NAME = "batch"
+READ_METHODS: frozenset[str] = frozenset(("GET", "HEAD", "OPTIONS"))
+CONDITIONAL_HEADERS: frozenset[str] = frozenset(
+    (
+        "HTTP_IF_MATCH",
+        "HTTP_IF_NONE_MATCH",
+        "HTTP_IF_MODIFIED_SINCE",
+        "HTTP_IF_UNMODIFIED_SINCE",
+        "HTTP_IF_RANGE",
+        "HTTP_RANGE",
+    )
+)
+
+
+class BatchFailed(Exception):
+    """
+    Failure of a sub-request rolling back the atomic batch.
+
+    Args:
+        Exception: Python base exception.
+    """
+
+    def __init__(self, responses: list[dict]) -> None:
+        """
+        Initialize the failure.
+
+        Args:
+            responses (list[dict]): Responses up to the failed one.
+        """
+        super().__init__("A sub-request of the atomic batch failed.")
+        self.responses = responses
+
+
+def get_error(status_code: int, detail: str) -> dict:
+    """
+    Get the response of the sub-request which isn't run.
+
+    Args:
+        status_code (int): HTTP status of the error.
+        detail (str): Error message.
+
+    Returns:
+        dict: Sub-response.
+    """
+    return {"status": status_code, "headers": {}, "body": {"detail": detail}}
+
+
+def resolve_path(path: str) -> ResolverMatch | dict:
+    """
+    Resolve the path of the sub-request to a synchronous view of the app.
+
+    Args:
+        path (str): Path without the query string.
+
+    Returns:
+        ResolverMatch | dict: Resolved view or the error sub-response.
+    """
+    try:
+        match: ResolverMatch = resolve(path)
+    except Resolver404:
+        return get_error(status.HTTP_404_NOT_FOUND, "Not found.")
+
+    if (
+        match.app_name != APP_NAME
+        or match.url_name == BATCH_URL_NAME
+        or iscoroutinefunction(match.func)
+    ):
+        return get_error(
+            status.HTTP_400_BAD_REQUEST,
+            "The path can't be requested in a batch.",
+        )
+    return match
+
+
+def make_request(parent: HttpRequest, item: dict) -> HttpRequest:
+    """
+    Make the sub-request with the headers and user of the batch request.
+
+    The conditional headers of the batch request are dropped, the headers
+    of the sub-request are added over the rest.
+
+    Args:
+        parent (HttpRequest): Batch request.
+        item (dict): Validated sub-request with the method, path, headers
+            and body.
+
+    Returns:
+        HttpRequest: Sub-request.
+    """
+    url = urlsplit(item["path"])
+    body: bytes = (
+        b"" if item["body"] is None else json.dumps(item["body"]).encode()
+    )
+    environ: dict = {
+        **{
+            key: value
+            for key, value in parent.META.items()
+            if isinstance(value, str) and key not in CONDITIONAL_HEADERS
+        },
+        **{
+            "HTTP_" + name.upper().replace("-", "_"): value
+            for name, value in item["headers"].items()
+        },
+        "REQUEST_METHOD": item["method"],
+        "SCRIPT_NAME": "",
+        "PATH_INFO": url.path,
+        "QUERY_STRING": url.query,
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": BytesIO(body),
+        "wsgi.url_scheme": parent.scheme,
+    }
+    request = WSGIRequest(environ)
+    request.user = parent.user
+    if hasattr(parent, "session"):
+        request.session = parent.session
+    return request
+
+
+def run_item(
+    parent: HttpRequest,
+    item: dict,
+    raise_retryable: bool = False,
+) -> dict:
+    """
+    Run the sub-request by its view.
+
+    A sub-request shed by the admission control gets its 503 response.
+    Errors of the view are turned into responses as Django does.
+
+    Args:
+        parent (HttpRequest): Batch request.
+        item (dict): Validated sub-request with the method, path, headers
+            and body.
+        raise_retryable (bool): Raise serialization failures and
+            deadlocks, so the transaction can be run again.
+
+    Returns:
+        dict: Sub-response with the status, headers and body.
+    """
+    match: ResolverMatch | dict = resolve_path(urlsplit(item["path"]).path)
+    if isinstance(match, dict):
+        return match
+
+    request: HttpRequest = make_request(parent, item)
+    request.resolver_match = match
+    try:
+        request.admission_ticket = admission_control.admit(request, match.func)
+    except Overloaded:
+        response: HttpResponse = admission_control.get_shed_response()
+    else:
+        try:
+            response = match.func(request, *match.args, **match.kwargs)
+            if callable(getattr(response, "render", None)):
+                response.render()
+        except Overloaded:
+            # a follower which has to run the view couldn't get a slot
+            response = admission_control.get_shed_response()
+        except Exception as error:  # noqa: PIE786
+            if raise_retryable and get_sqlstate(error) in RETRYABLE_SQLSTATES:
+                raise
+            response = response_for_exception(request, error)
+        finally:
+            ticket: Ticket | None = request.admission_ticket
+            if ticket is not None:
+                admission_control.release(ticket)
+
+    body: object = response.content.decode() or None
+    if body and response.get("Content-Type", "").startswith(
+        "application/json"
+    ):
+        body = json.loads(body)
+    headers: dict[str, str] = {
+        name: value
+        for name, value in response.items()
+        if name not in ("Content-Type", "Content-Length")
+    }
+    return {"status": response.status_code, "headers": headers, "body": body}
+
+
+def run_lane(parent: HttpRequest, items: list[dict]) -> list[dict]:
+    """
+    Run the read sub-requests in a worker thread and close its connection.
+
+    Args:
+        parent (HttpRequest): Batch request.
+        items (list[dict]): Validated read sub-requests.
+
+    Returns:
+        list[dict]: Sub-responses.
+    """
+    try:
+        return [run_item(parent, item) for item in items]
+    finally:
+        connections.close_all()
+
+
+async def run_reads(parent: HttpRequest, items: list[dict]) -> list[dict]:
+    """
+    Run the read sub-requests concurrently.
+
+    Opening a connection takes longer than a simple read, so a lane runs
+    several reads by one connection. A single lane runs in the thread of
+    the batch request and uses its connection.
+
+    Args:
+        parent (HttpRequest): Batch request.
+        items (list[dict]): Validated read sub-requests.
+
+    Returns:
+        list[dict]: Sub-responses in order.
+    """
+    lane_count: int = min(
+        len(items), settings.BATCH_REQUESTS["MAX_CONCURRENCY"]
+    )
+    if lane_count <= 1:
+        return [await sync_to_async(run_item)(parent, item) for item in items]
+
+    lanes: list[list[dict]] = await asyncio.gather(
+        *(
+            sync_to_async(run_lane, thread_sensitive=False)(
+                parent, items[lane::lane_count]
+            )
+            for lane in range(lane_count)
+        )
+    )
+    responses: list[dict] = [{}] * len(items)
+    for lane, lane_responses in enumerate(lanes):
+        responses[lane::lane_count] = lane_responses
+    return responses
+
+
+def run_atomic(parent: HttpRequest, items: list[dict]) -> list[dict]:
+    """
+    Run all sub-requests in one transaction retried after conflicts.
+
+    Args:
+        parent (HttpRequest): Batch request.
+        items (list[dict]): Validated sub-requests.
+
+    Raises:
+        BatchFailed: A sub-request failed, the transaction is rolled
+            back.
+
+    Returns:
+        list[dict]: Sub-responses.
+    """
+
+    def run_all() -> list[dict]:
+        responses: list[dict] = []
+        for item in items:
+            # conflicts are raised to be retried, other errors are
+            # responses failing the batch
+            responses.append(run_item(parent, item, raise_retryable=True))
+            if responses[-1]["status"] >= status.HTTP_400_BAD_REQUEST:
+                raise BatchFailed(responses)
+        return responses
+
+    return write_retry.run(run_all)
+
+
+async def run_batch(
+    parent: HttpRequest,
+    items: list[dict],
+    atomic: bool,
+) -> dict:
+    """
+    Run the sub-requests and collect their responses in order.
+
+    Args:
+        parent (HttpRequest): Batch request.
+        items (list[dict]): Validated sub-requests.
+        atomic (bool): Run all sub-requests in one transaction.
+
+    Returns:
+        dict: Body of the batch response.
+    """
+    # the lazy user can't be loaded in the event loop
+    parent.user = await parent.auser()
+
+    if atomic:
+        try:
+            responses: list[dict] = await sync_to_async(run_atomic)(
+                parent, items
+            )
+        except BatchFailed as error:
+            responses = error.responses + [
+                get_error(
+                    status.HTTP_424_FAILED_DEPENDENCY,
+                    "Not run: a previous sub-request failed.",
+                )
+            ] * (len(items) - len(error.responses))
+            return {"committed": False, "responses": responses}
+        return {"committed": True, "responses": responses}
+
+    responses = []
+    reads: list[dict] = []
+    for item in items:
+        if item["method"] in READ_METHODS:
+            reads.append(item)
+            continue
+        # a write may depend on the previous reads and change the next ones
+        responses.extend(await run_reads(parent, reads))
+        reads = []
+        responses.append(await sync_to_async(run_item)(parent, item))
+    responses.extend(await run_reads(parent, reads))
+    return {"responses": responses}
@@ -0,0 +1,250 @@
+"""Coalescing of single-row inserts into batched 'bulk_create' calls.
+
+Request threads put validated model instances into the per-process
+batcher and wait for the result. A background thread flushes pending
+rows every 'MAX_ROWS' rows or 'MAX_DELAY_MS' milliseconds with a single
+'bulk_create', so many requests share one transaction and one commit.
+
+The thread keeps its database connection between batches. It is
+closed when an error leaves it unusable or after 'IDLE_CLOSE_MS'
+milliseconds without rows, so an idle batcher holds no connection.
+
+Any error of the flush, not only a database one, is set to the futures
+of its batch and the thread goes on, so no request waits forever.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Model
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class BatchTimeout(APIException):
+    """
+    Error of the request whose batch hasn't been flushed in time.
+
+    Args:
+        APIException: DRF base API exception.
+    """
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The write has taken too long, try again later."
+    default_code = "batch_timeout"
+
+
+class WriteBatcher:
+    """
+    Per-process queue of model instances waiting to be inserted.
+
+    Args:
+        model (type[Model]): Django model of the inserted instances.
+        settings_name (str): Name of the settings dict with 'MAX_ROWS',
+            'MAX_DELAY_MS', 'RESULT_TIMEOUT_MS' and 'IDLE_CLOSE_MS' keys.
+    """
+
+    def __init__(self, model: type[Model], settings_name: str) -> None:
+        """Initialize the batcher without the flushing thread."""
+        self.model = model
+        self.settings_name = settings_name
+        self.pending: list[tuple[Model, Future]] = []
+        self.condition = threading.Condition()
+        self.thread: threading.Thread | None = None
+        self.stats: dict[str, int] = {
+            "rows": 0,
+            "batches": 0,
+            "fallback_rows": 0,
+        }
+
+    @property
+    def max_rows(self) -> int:
+        """
+        Get the number of rows flushing the batch immediately.
+
+        Returns:
+            int: Max size of the batch.
+        """
+        return getattr(settings, self.settings_name)["MAX_ROWS"]
+
+    @property
+    def max_delay(self) -> float:
+        """
+        Get the time the first row of the batch waits for others.
+
+        Returns:
+            float: Delay in seconds.
+        """
+        return getattr(settings, self.settings_name)["MAX_DELAY_MS"] / 1000
+
+    @property
+    def result_timeout(self) -> float:
+        """
+        Get the time the request waits for its batch.
+
+        Returns:
+            float: Timeout in seconds.
+        """
+        options: dict = getattr(settings, self.settings_name)
+        return options["RESULT_TIMEOUT_MS"] / 1000
+
+    @property
+    def idle_close(self) -> float:
+        """
+        Get the time the thread keeps its connection without rows.
+
+        Returns:
+            float: Timeout in seconds.
+        """
+        options: dict = getattr(settings, self.settings_name)
+        return options["IDLE_CLOSE_MS"] / 1000
+
+    def submit(self, instance: Model) -> Future:
+        """
+        Put the instance into the next batch.
+
+        Args:
+            instance (Model): Unsaved model instance.
+
+        Returns:
+            Future: Resolved with the saved instance or the database
+                error of its insert.
+        """
+        future = Future()
+        with self.condition:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run,
+                    name=f"{self.model.__name__}WriteBatcher",
+                    daemon=True,
+                )
+                self.thread.start()
+
+            self.pending.append((instance, future))
+            self.condition.notify()
+
+        return future
+
+    def save(self, instance: Model) -> Model:
+        """
+        Insert the instance within the next batch and wait for the result.
+
+        The row of a timed out request may still be inserted later by
+        its batch.
+
+        Args:
+            instance (Model): Unsaved model instance.
+
+        Returns:
+            Model: Saved instance with the assigned primary key.
+
+        Raises:
+            BatchTimeout: The batch hasn't been flushed in time.
+        """
+        try:
+            return self.submit(instance).result(timeout=self.result_timeout)
+        except FutureTimeoutError as exc:
+            raise BatchTimeout() from exc
+
+    def run(self) -> None:
+        """Collect pending rows into batches and flush them forever."""
+        while True:
+            with self.condition:
+                idle: bool = not self.condition.wait_for(
+                    lambda: self.pending, self.idle_close
+                )
+
+            if idle:
+                connection.close()
+                continue
+
+            with self.condition:
+                deadline: float = time.monotonic() + self.max_delay
+                while len(self.pending) < self.max_rows:
+                    remaining: float = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+
+                batch = self.pending[: self.max_rows]
+                del self.pending[: self.max_rows]
+
+            try:
+                self.flush(batch)
+            except Exception as exc:  # noqa: PIE786
+                # the thread must outlive any error of a batch
+                self.fail(batch, exc)
+
+    def fail(self, batch: list[tuple[Model, Future]], exc: Exception) -> None:
+        """
+        Set the error to the futures of the batch not resolved yet.
+
+        Args:
+            batch (list[tuple[Model, Future]]): Instances and futures.
+            exc (Exception): Error of the flush.
+        """
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(exc)
+
+    def flush(self, batch: list[tuple[Model, Future]]) -> None:
+        """
+        Insert the batch in one transaction and resolve its futures.
+
+        If the batch fails, rows are inserted one by one, so only
+        the requests with invalid rows get the error. A connection
+        broken by the error, e.g. by a restart of the database, is
+        closed before that, so the next query opens a new one.
+
+        Args:
+            batch (list[tuple[Model, Future]]): Instances and futures.
+        """
+        self.check_connection()
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create(
+                    [instance for instance, _ in batch]
+                )
+        except Exception:  # noqa: PIE786
+            self.check_connection()
+            for instance, future in batch:
+                self.save_one(instance, future)
+        else:
+            self.stats["batches"] += 1
+            for instance, future in batch:
+                future.set_result(instance)
+        finally:
+            self.stats["rows"] += len(batch)
+
+    def check_connection(self) -> None:
+        """Close the connection of the thread left unusable by an error."""
+        if connection.connection is None or not connection.errors_occurred:
+            return
+
+        if connection.is_usable():
+            connection.errors_occurred = False
+        else:
+            connection.close()
+
+    def save_one(self, instance: Model, future: Future) -> None:
+        """
+        Insert the single instance and resolve its future.
+
+        Args:
+            instance (Model): Unsaved model instance.
+            future (Future): Future of the request waiting for it.
+        """
+        instance.pk = None
+        try:
+            with transaction.atomic():
+                instance.save(force_insert=True)
+        except Exception as exc:  # noqa: PIE786
+            future.set_exception(exc)
+        else:
+            future.set_result(instance)
+        finally:
+            self.stats["fallback_rows"] += 1
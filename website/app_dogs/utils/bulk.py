@@ -0,0 +1,110 @@
+"""Bulk changes of dogs and breeds run as set-based SQL.
+
+Every change is one UPDATE or DELETE over the whole set of rows instead
+of loading and saving objects one by one. Rows already having the new
+values are skipped: updating them would only leave dead tuples, and
+the change log trigger ignores them anyway.
+
+Per-breed aggregates are counted by queries and the caches follow the
+change log, which the triggers fill in the same transaction. So a bulk
+change is seen by them at once, as any other transaction.
+"""
+
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.retry import write_retry
+from django.db.models import Count
+from django.db.models.query import QuerySet
+
+
+def get_changed_rows(queryset: QuerySet, **values) -> QuerySet:
+    """
+    Get the rows of the queryset which differ from the new values.
+
+    Args:
+        queryset (QuerySet): Rows to change.
+        values: New values of the fields.
+
+    Returns:
+        QuerySet: Rows with at least one different value.
+    """
+    return queryset.exclude(**values)
+
+
+def update_rows(queryset: QuerySet, **values) -> int:
+    """
+    Set the values of the rows by one UPDATE.
+
+    Args:
+        queryset (QuerySet): Rows to change.
+        values: New values of the fields.
+
+    Returns:
+        int: Number of changed rows.
+    """
+    return get_changed_rows(queryset, **values).update(**values)
+
+
+def delete_dogs(queryset: QuerySet[Dog]) -> int:
+    """
+    Delete the dogs by one DELETE.
+
+    Nothing refers to the dogs and nothing listens to their deletion,
+    so Django deletes them without loading.
+
+    Args:
+        queryset (QuerySet[Dog]): Dogs to delete.
+
+    Returns:
+        int: Number of deleted dogs.
+    """
+    deleted, _ = queryset.delete()
+    return deleted
+
+
+def count_breed_dogs(breeds: QuerySet[Breed]) -> dict[int, int]:
+    """
+    Count the dogs of every breed by the index of the breed column.
+
+    Args:
+        breeds (QuerySet[Breed]): Counted breeds.
+
+    Returns:
+        dict[int, int]: Numbers of dogs by breed ids, breeds without
+            dogs are missing.
+    """
+    return dict(
+        Dog.objects.filter(breed__in=breeds.values("id"))
+        .order_by()
+        .values("breed")
+        .annotate(count=Count("breed"))
+        .values_list("breed", "count")
+    )
+
+
+def merge_breeds(target: Breed, breeds: QuerySet[Breed]) -> tuple[int, int]:
+    """
+    Move the dogs of the breeds to the target and delete the breeds.
+
+    Both statements are run in one transaction retried after conflicts,
+    so no one sees the dogs of a deleted breed or a half merged breed.
+    The breeds are deleted by the ORM after the dogs are moved, so the
+    'on_delete=PROTECT' check still guards against dogs left behind.
+
+    Args:
+        target (Breed): Breed getting the dogs.
+        breeds (QuerySet[Breed]): Merged breeds, the target is kept if
+            it is among them.
+
+    Returns:
+        tuple[int, int]: Numbers of moved dogs and deleted breeds.
+    """
+    sources: QuerySet[Breed] = breeds.exclude(id=target.id)
+
+    def merge() -> tuple[int, int]:
+        moved: int = Dog.objects.filter(breed__in=sources.values("id")).update(
+            breed=target
+        )
+        deleted, _ = sources.delete()
+        return moved, deleted
+
+    return write_retry.run(merge)
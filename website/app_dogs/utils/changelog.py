@@ -0,0 +1,246 @@
+"""Reading and maintenance of the Dog and Breed change log.
+
+The log is filled by the database triggers. Changes are read in
+the order of (txid, seq) and only from transactions older than
+the oldest transaction still in progress, so a change committed later
+can never appear behind the cursor already returned to a client.
+"""
+
+from datetime import datetime
+
+from app_dogs.models import Breed, ChangeLog, ChangeLogHorizon, Dog
+from app_dogs.utils.fields import CodedChoiceField
+from django.db import transaction
+from django.db.models import BigIntegerField, Exists, OuterRef, Q, Subquery
+from django.db.models.expressions import RawSQL
+from django.db.models.query import QuerySet
+
+Cursor = tuple[int, int]
+
+START_CURSOR: Cursor = (0, 0)
+CURSOR_SEPARATOR = "."
+
+LOGGED_MODELS: dict[str, type[Dog] | type[Breed]] = {
+    "dog": Dog,
+    "breed": Breed,
+}
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    """
+    Convert the log position into an opaque string for clients.
+
+    Args:
+        cursor (Cursor): Pair of the transaction id and the sequence.
+
+    Returns:
+        str: Cursor representation.
+    """
+    return CURSOR_SEPARATOR.join(str(part) for part in cursor)
+
+
+def decode_cursor(value: str | None) -> Cursor:
+    """
+    Parse the cursor received from a client.
+
+    Args:
+        value (str | None): Cursor representation. Empty value means
+            the beginning of the log.
+
+    Raises:
+        ValueError: The value is not a valid cursor.
+
+    Returns:
+        Cursor: Pair of the transaction id and the sequence.
+    """
+    if not value:
+        return START_CURSOR
+
+    txid, seq = value.split(CURSOR_SEPARATOR)
+    cursor: Cursor = (int(txid), int(seq))
+    if min(cursor) < 0:
+        raise ValueError(f"Negative cursor value: {value}")
+
+    return cursor
+
+
+def get_cursor(change: ChangeLog) -> Cursor:
+    """
+    Get the log position of the change.
+
+    Args:
+        change (ChangeLog): Change log entry.
+
+    Returns:
+        Cursor: Pair of the transaction id and the sequence.
+    """
+    return (change.txid, change.seq)
+
+
+def get_change_data(change: ChangeLog) -> dict | None:
+    """
+    Get the row written by the change with values as the API shows them.
+
+    The trigger saves the raw row, so coded choices are decoded here.
+
+    Args:
+        change (ChangeLog): Change log entry.
+
+    Returns:
+        dict | None: Row values or None for a delete.
+    """
+    if change.data is None:
+        return None
+
+    data = dict(change.data)
+    for field in LOGGED_MODELS[change.model]._meta.concrete_fields:
+        if isinstance(field, CodedChoiceField) and field.attname in data:
+            data[field.attname] = field.to_python(data[field.attname])
+    return data
+
+
+def get_visible_changes() -> QuerySet[ChangeLog]:
+    """
+    Get changes of all finished transactions in the feed order.
+
+    Returns:
+        QuerySet[ChangeLog]: Changes safe to be returned to clients.
+    """
+    snapshot_xmin = RawSQL(
+        "txid_snapshot_xmin(txid_current_snapshot())",
+        (),
+        output_field=BigIntegerField(),
+    )
+    return ChangeLog.objects.filter(txid__lt=snapshot_xmin).order_by(
+        "txid",
+        "seq",
+    )
+
+
+def get_changes(
+    since: Cursor,
+    limit: int,
+    model: str | None = None,
+) -> list[ChangeLog]:
+    """
+    Get a batch of changes after the cursor.
+
+    Args:
+        since (Cursor): Position of the last change seen by a client.
+        limit (int): Max number of changes in the batch.
+        model (str | None): Name of the only model to get changes of,
+            all models if None.
+
+    Returns:
+        list[ChangeLog]: Changes in the feed order.
+    """
+    txid, seq = since
+    changes: QuerySet[ChangeLog] = get_visible_changes().filter(
+        Q(txid__gt=txid) | Q(txid=txid, seq__gt=seq)
+    )
+    if model is not None:
+        changes = changes.filter(model=model)
+    return list(changes[:limit])
+
+
+def get_head_cursor() -> Cursor:
+    """
+    Get the position of the latest change visible to clients.
+
+    A client that has to resync takes this cursor, lists the tables
+    and then reads the feed from the cursor.
+
+    Returns:
+        Cursor: Pair of the transaction id and the sequence.
+    """
+    head: Cursor | None = (
+        get_visible_changes().reverse().values_list("txid", "seq").first()
+    )
+    return head or START_CURSOR
+
+
+def get_horizon() -> Cursor:
+    """
+    Get the position of the last change removed by the retention.
+
+    Returns:
+        Cursor: Pair of the transaction id and the sequence.
+    """
+    horizon: Cursor | None = ChangeLogHorizon.objects.values_list(
+        "txid",
+        "seq",
+    ).first()
+    return horizon or START_CURSOR
+
+
+def compact_changes(before: datetime, batch_size: int) -> int:
+    """
+    Remove changes superseded by a later change of the same object.
+
+    Clients mirror the tables by upserting the last state of objects,
+    so only the latest change of an object is required to sync.
+
+    Args:
+        before (datetime): Only changes older than this are removed.
+        batch_size (int): Max number of rows removed by one statement.
+
+    Returns:
+        int: Number of removed changes.
+    """
+    superseded = ChangeLog.objects.filter(
+        Q(txid__gt=OuterRef("txid"))
+        | Q(txid=OuterRef("txid"), seq__gt=OuterRef("seq")),
+        model=OuterRef("model"),
+        object_id=OuterRef("object_id"),
+    )
+    batch = (
+        ChangeLog.objects.filter(changed_at__lt=before)
+        .filter(Exists(superseded))
+        .values("seq")[:batch_size]
+    )
+
+    removed = 0
+    while True:
+        deleted, _ = ChangeLog.objects.filter(seq__in=Subquery(batch)).delete()
+        removed += deleted
+        if deleted < batch_size:
+            return removed
+
+
+def purge_changes(before: datetime, batch_size: int) -> int:
+    """
+    Remove all changes older than the retention period.
+
+    The position of the latest removed change is saved as the horizon.
+
+    Args:
+        before (datetime): Changes older than this are removed.
+        batch_size (int): Max number of rows removed by one statement.
+
+    Returns:
+        int: Number of removed changes.
+    """
+    removed = 0
+    while True:
+        with transaction.atomic():
+            batch: list[Cursor] = list(
+                ChangeLog.objects.filter(changed_at__lt=before)
+                .order_by("txid", "seq")
+                .values_list("txid", "seq")[:batch_size]
+            )
+            if not batch:
+                return removed
+
+            deleted, _ = ChangeLog.objects.filter(
+                seq__in=[seq for _, seq in batch]
+            ).delete()
+            removed += deleted
+
+            horizon = max(get_horizon(), batch[-1])
+            ChangeLogHorizon.objects.update_or_create(
+                pk=1,
+                defaults={"txid": horizon[0], "seq": horizon[1]},
+            )
+
+        if len(batch) < batch_size:
+            return removed
@@ -73,3 +73,24 @@ class RatingChoice(models.IntegerChoices):
         5,
         "5",
     )
+
+
+class ChangeOperationChoice(models.TextChoices):
+    """All operations recorded in the change log.
+
+    Args:
+        models.TextChoices: Django model field.
+    """
+
+    INSERT = (
+        "insert",
+        "Insert",
+    )
+    UPDATE = (
+        "update",
+        "Update",
+    )
+    DELETE = (
+        "delete",
+        "Delete",
+    )
@@ -0,0 +1,373 @@
+"""Single-flight coalescing of identical concurrent reads.
+
+When a popular page is requested by many clients at once, each request
+would run the same queries. Instead, the first request of a worker
+becomes the leader and runs the view, and identical requests arriving
+before it finishes wait for it and get a copy of its rendered response.
+Requests are identical if they have the same method, path, query
+parameters in any order, 'Accept' header and credentials, so a response
+is never shared between clients authenticated differently. Only
+requests running at the same time are coalesced, nothing is cached
+after the flight.
+
+In the cross-process mode the leaders of the workers also take
+a PostgreSQL advisory lock of the request: the first one runs the view
+and puts the response into the shared cache, the others wait for the
+lock and take the response from the cache if it has been finished after
+they had arrived. The mode needs a cache shared by the workers, e.g.
+Redis or the database cache.
+
+A request which runs the view itself, as a leader or after its leader
+has failed, first calls the 'single_flight_before_run' callable of the
+request if it has one. The admission control sets it for requests
+admitted as followers without a slot, see app_dogs/utils/admission.py.
+"""
+
+import hashlib
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import NamedTuple
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+
+COALESCED_METHODS: frozenset[str] = frozenset(("GET", "HEAD"))
+BEFORE_RUN_ATTRIBUTE = "single_flight_before_run"
+
+
+class SharedResponse(NamedTuple):
+    """Rendered response which can be copied to other requests."""
+
+    status: int
+    headers: list[tuple[str, str]]
+    content: bytes
+    # time.time() of the end of the flight, compared between processes
+    finished_at: float
+
+
+def get_flight_key(request: HttpRequest) -> str:
+    """
+    Get the key identical requests share.
+
+    Args:
+        request (HttpRequest): Django request.
+
+    Returns:
+        str: Hex digest of the normalized request.
+    """
+    query: str = urlencode(
+        sorted(parse_qsl(request.META.get("QUERY_STRING", ""), True))
+    )
+    scope: str = "\n".join(
+        (
+            request.headers.get("Authorization", ""),
+            request.COOKIES.get(settings.SESSION_COOKIE_NAME, ""),
+        )
+    )
+    normalized: str = "\n".join(
+        (
+            request.method,
+            request.path,
+            query,
+            request.headers.get("Accept", ""),
+            scope,
+        )
+    )
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def share_response(response: HttpResponse) -> SharedResponse | None:
+    """
+    Render the response of the leader to be copied.
+
+    Args:
+        response (HttpResponse): Response of the view.
+
+    Returns:
+        SharedResponse | None: Rendered response or None if it can't be
+            shared: it is streamed or sets cookies.
+    """
+    if response.streaming or response.cookies:
+        return None
+    if hasattr(response, "render"):
+        response.render()
+    return SharedResponse(
+        status=response.status_code,
+        headers=list(response.items()),
+        content=response.content,
+        finished_at=time.time(),
+    )
+
+
+def copy_response(shared: SharedResponse) -> HttpResponse:
+    """
+    Make the response of a follower.
+
+    Args:
+        shared (SharedResponse): Response of the leader.
+
+    Returns:
+        HttpResponse: New response with the same status, headers and
+            content.
+    """
+    return HttpResponse(
+        shared.content,
+        status=shared.status,
+        headers=dict(shared.headers),
+    )
+
+
+class SingleFlight:
+    """
+    Per-process registry of the requests in flight.
+
+    Args:
+        settings_name (str): Name of the settings dict with 'ENABLED',
+            'WAIT_MS', 'CROSS_PROCESS', 'CACHE' and 'POLL_MS' keys.
+    """
+
+    def __init__(self, settings_name: str) -> None:
+        """Initialize the registry without flights."""
+        self.settings_name = settings_name
+        self.lock = threading.Lock()
+        self.flights: dict[str, Future] = {}
+        # callbacks of the requests waiting for a leader of the key
+        self.watchers: dict[str, list[Callable[[], None]]] = {}
+        self.stats: dict[str, int] = {
+            "leaders": 0,
+            "followers": 0,
+            "shared_between_processes": 0,
+        }
+
+    @property
+    def options(self) -> dict:
+        """
+        Get the settings of the coalescing.
+
+        Returns:
+            dict: Settings dict.
+        """
+        return getattr(settings, self.settings_name)
+
+    def count(self, name: str) -> None:
+        """
+        Increment the stats counter.
+
+        Args:
+            name (str): Name of the counter.
+        """
+        with self.lock:
+            self.stats[name] += 1
+
+    def get_key(self, request: HttpRequest) -> str | None:
+        """
+        Get the key of the request if it can be coalesced.
+
+        Args:
+            request (HttpRequest): Django request.
+
+        Returns:
+            str | None: Key of the flight, None if the request is always
+                run by itself.
+        """
+        if (
+            not self.options["ENABLED"]
+            or request.method not in COALESCED_METHODS
+        ):
+            return None
+        return get_flight_key(request)
+
+    def watch(self, key: str, callback: Callable[[], None]) -> bool:
+        """
+        Call back once a leader of the key starts, unless it runs already.
+
+        Args:
+            key (str): Key of the flight.
+            callback (Callable[[], None]): Called by the thread of
+                the leader.
+
+        Returns:
+            bool: Whether an identical request is in flight already.
+        """
+        with self.lock:
+            if key in self.flights:
+                return True
+            self.watchers.setdefault(key, []).append(callback)
+            return False
+
+    def unwatch(self, key: str, callback: Callable[[], None]) -> None:
+        """
+        Forget the callback of the key if it hasn't been called.
+
+        Args:
+            key (str): Key of the flight.
+            callback (Callable[[], None]): Callback passed to 'watch'.
+        """
+        with self.lock:
+            callbacks: list[Callable[[], None]] = self.watchers.get(key, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+                if not callbacks:
+                    del self.watchers[key]
+
+    def run(
+        self,
+        request: HttpRequest,
+        view: Callable[[], HttpResponse],
+    ) -> HttpResponse:
+        """
+        Run the view once for identical requests in flight.
+
+        A follower which has waited longer than 'WAIT_MS' or whose
+        leader has failed or returned a response which can't be shared
+        runs the view itself.
+
+        Args:
+            request (HttpRequest): Django request.
+            view (Callable[[], HttpResponse]): View called with the
+                request.
+
+        Returns:
+            HttpResponse: Response of the view or its copy.
+        """
+        if (
+            not self.options["ENABLED"]
+            or request.method not in COALESCED_METHODS
+        ):
+            return view()
+
+        def run_view() -> HttpResponse:
+            before_run: Callable[[], None] | None = getattr(
+                request, BEFORE_RUN_ATTRIBUTE, None
+            )
+            if before_run is not None:
+                before_run()
+            return view()
+
+        key: str = get_flight_key(request)
+        callbacks: list[Callable[[], None]] = []
+        with self.lock:
+            flight: Future | None = self.flights.get(key)
+            if flight is None:
+                flight = self.flights[key] = Future()
+                callbacks = self.watchers.pop(key, [])
+                leader = True
+            else:
+                leader = False
+        for callback in callbacks:
+            callback()
+
+        if not leader:
+            self.count("followers")
+            try:
+                shared: SharedResponse | None = flight.result(
+                    timeout=self.options["WAIT_MS"] / 1000
+                )
+            except FutureTimeoutError:
+                shared = None
+            if shared is None:
+                return run_view()
+            return copy_response(shared)
+
+        self.count("leaders")
+        try:
+            response, shared = self.lead(key, run_view)
+        except BaseException:
+            flight.set_result(None)
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+        flight.set_result(shared)
+        return response
+
+    def lead(
+        self,
+        key: str,
+        view: Callable[[], HttpResponse],
+    ) -> tuple[HttpResponse, SharedResponse | None]:
+        """
+        Run the view as the leader of the process.
+
+        Args:
+            key (str): Key of the request.
+            view (Callable[[], HttpResponse]): View called with the
+                request.
+
+        Returns:
+            tuple[HttpResponse, SharedResponse | None]: Response and its
+                shareable copy.
+        """
+        if not self.options["CROSS_PROCESS"]:
+            response: HttpResponse = view()
+            return response, share_response(response)
+
+        arrived: float = time.time()
+        # the first 8 bytes of the key as a signed bigint of the lock
+        lock_id: int = int.from_bytes(bytes.fromhex(key[:16]), signed=True)
+        cache_key: str = f"single_flight:{key}"
+        locked: bool = self.acquire_lock(lock_id)
+        try:
+            shared: SharedResponse | None = caches[self.options["CACHE"]].get(
+                cache_key
+            )
+            if locked and shared is not None and shared.finished_at >= arrived:
+                self.count("shared_between_processes")
+                return copy_response(shared), shared
+
+            response = view()
+            shared = share_response(response)
+            if locked and shared is not None:
+                caches[self.options["CACHE"]].set(
+                    cache_key, shared, timeout=self.options["WAIT_MS"] / 1000
+                )
+            return response, shared
+        finally:
+            if locked:
+                self.release_lock(lock_id)
+
+    def acquire_lock(self, lock_id: int) -> bool:
+        """
+        Wait for the advisory lock of the request.
+
+        The lock is polled, so the wait is limited by 'WAIT_MS'
+        regardless of the statement timeout of the session.
+
+        Args:
+            lock_id (int): Key of the lock.
+
+        Returns:
+            bool: Whether the lock has been taken.
+        """
+        deadline: float = time.monotonic() + self.options["WAIT_MS"] / 1000
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", [lock_id])
+                if cursor.fetchone()[0]:
+                    return True
+                if time.monotonic() > deadline:
+                    return False
+                time.sleep(self.options["POLL_MS"] / 1000)
+
+    @staticmethod
+    def release_lock(lock_id: int) -> None:
+        """
+        Release the advisory lock of the request.
+
+        Args:
+            lock_id (int): Key of the lock.
+        """
+        if connection.connection is None:
+            # the lock has ended with the closed session
+            return
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_id])
+
+
+single_flight = SingleFlight(settings_name="SINGLE_FLIGHT")
@@ -0,0 +1,181 @@
+"""Deadlines of API requests.
+
+Every view has a latency budget. It is checked before each query, so
+a request doing many queries or waiting for retries stops once the
+budget is spent, and the rest of it is passed to PostgreSQL as
+'statement_timeout', so a slow query is canceled by the server instead
+of holding the worker. Such a request gets 503 with 'Retry-After'.
+
+The timeout is sent as 'SET LOCAL' in the same round trip as the query.
+It ends with the transaction of the query: the explicit one or, in the
+autocommit mode, the implicit one of the query itself. So the session
+of the connection keeps its own timeout for other views and commands.
+"""
+
+import math
+import threading
+import time
+from collections.abc import Callable
+from contextlib import ExitStack
+from typing import Any
+
+from app_dogs.utils.retry import get_sqlstate
+from django.conf import settings
+from django.db import connection
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+QUERY_CANCELED = "57014"
+
+
+class DeadlineExceeded(APIException):
+    """
+    Error of the request which has spent its latency budget.
+
+    DRF sends the 'wait' attribute in the 'Retry-After' header.
+
+    Args:
+        APIException: DRF base API exception.
+    """
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The request has taken too long, try again later."
+    default_code = "deadline_exceeded"
+
+    def __init__(self, wait: int) -> None:
+        """
+        Initialize the error.
+
+        Args:
+            wait (int): Seconds to wait before the next request.
+        """
+        super().__init__()
+        self.wait = wait
+
+
+class RequestDeadlines:
+    """
+    Keeper of the request deadlines and their stats.
+
+    Args:
+        settings_name (str): Name of the settings dict with
+            'DEFAULT_MS', 'VIEWS' and 'RETRY_AFTER_SECONDS' keys.
+    """
+
+    def __init__(self, settings_name: str) -> None:
+        """Initialize the keeper with empty stats."""
+        self.settings_name = settings_name
+        self.lock = threading.Lock()
+        # "requests" and "exceeded" are totals, the rest are by views
+        self.stats: dict[str, int] = {"requests": 0, "exceeded": 0}
+
+    def count(self, *names: str) -> None:
+        """
+        Increment the stats counters.
+
+        Args:
+            names (str): Names of the counters.
+        """
+        with self.lock:
+            for name in names:
+                self.stats[name] = self.stats.get(name, 0) + 1
+
+    def get_budget(self, view_name: str) -> int:
+        """
+        Get the latency budget of the view.
+
+        Args:
+            view_name (str): Name of the view as '<basename>.<action>'.
+
+        Returns:
+            int: Budget in milliseconds, 0 for no deadline.
+        """
+        deadline_settings: dict = getattr(settings, self.settings_name)
+        return deadline_settings["VIEWS"].get(
+            view_name,
+            deadline_settings["DEFAULT_MS"],
+        )
+
+    def get_error(self, view_name: str) -> DeadlineExceeded:
+        """
+        Count the exceeded deadline and get the error of the request.
+
+        Args:
+            view_name (str): Name of the view as '<basename>.<action>'.
+
+        Returns:
+            DeadlineExceeded: Error to be returned to the client.
+        """
+        self.count("exceeded", f"{view_name}.exceeded")
+        return DeadlineExceeded(
+            wait=getattr(settings, self.settings_name)["RETRY_AFTER_SECONDS"]
+        )
+
+    def start(self, view_name: str) -> ExitStack:
+        """
+        Start the deadline of the request.
+
+        Queries run by a server-side cursor and batches of 'executemany'
+        are only checked, they can't be prefixed by 'SET LOCAL'.
+
+        Args:
+            view_name (str): Name of the view as '<basename>.<action>'.
+
+        Returns:
+            ExitStack: Stack to be closed when the request is finished.
+        """
+        stack = ExitStack()
+        budget: int = self.get_budget(view_name)
+        self.count("requests", f"{view_name}.requests")
+        if not budget:
+            return stack
+
+        deadline: float = time.monotonic() + budget / 1000
+
+        def check_deadline(
+            execute: Callable,
+            sql: str,
+            params: Any,
+            many: bool,
+            context: dict,
+        ) -> Any:
+            remaining: float = deadline - time.monotonic()
+            if remaining <= 0:
+                raise self.get_error(view_name)
+            if (
+                not many
+                and isinstance(sql, str)
+                and getattr(context["cursor"].cursor, "name", None) is None
+            ):
+                sql = (
+                    "SET LOCAL statement_timeout = "
+                    f"{math.ceil(remaining * 1000)}; {sql}"
+                )
+            return execute(sql, params, many, context)
+
+        stack.enter_context(connection.execute_wrapper(check_deadline))
+        return stack
+
+    def convert_error(
+        self,
+        error: Exception,
+        view_name: str,
+    ) -> Exception:
+        """
+        Convert the query canceled by the timeout to the API error.
+
+        Args:
+            error (Exception): Error raised by the view.
+            view_name (str): Name of the view as '<basename>.<action>'.
+
+        Returns:
+            Exception: DeadlineExceeded or the error as is.
+        """
+        if get_sqlstate(error) != QUERY_CANCELED:
+            return error
+        deadline_error: DeadlineExceeded = self.get_error(view_name)
+        deadline_error.__cause__ = error
+        return deadline_error
+
+
+request_deadlines = RequestDeadlines(settings_name="REQUEST_DEADLINES")
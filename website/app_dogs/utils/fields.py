@@ -0,0 +1,114 @@
+"""Custom model fields in the app_dogs."""
+
+from typing import Any
+
+from django.db import models
+
+
+class CodedChoiceField(models.Field):
+    """
+    Text choice stored as a small integer code.
+
+    The code of a choice is its position in the choices, so new choices
+    must be appended to the end. In Python and in the API the value is
+    the choice string, only the database column holds the code. Rows
+    are ordered by codes, i.e. in the order of the choices.
+
+    Args:
+        models.Field: Django base model field.
+    """
+
+    description = "Text choice stored as a small integer code"
+
+    def __init__(self, *args, **kwargs) -> None:
+        """
+        Initialize the field and the codes of its choices.
+
+        Raises:
+            ValueError: The field is declared without choices.
+        """
+        super().__init__(*args, **kwargs)
+        if not self.choices:
+            raise ValueError(f"{self.__class__.__name__} requires choices.")
+
+        self.values: list[str] = [value for value, _ in self.flatchoices]
+        self.codes: dict[str, int] = {
+            value: code for code, value in enumerate(self.values)
+        }
+
+    def get_internal_type(self) -> str:
+        """
+        Get the type of the database column.
+
+        Returns:
+            str: Name of the built-in field with the same column type.
+        """
+        return "SmallIntegerField"
+
+    def decode(self, code: int | None) -> str | None:
+        """
+        Get the choice of the code.
+
+        Args:
+            code (int | None): Stored code.
+
+        Raises:
+            ValueError: There is no choice with this code.
+
+        Returns:
+            str | None: Choice value.
+        """
+        if code is None:
+            return None
+        if not 0 <= code < len(self.values):
+            raise ValueError(f"Unknown code of '{self.name}': {code}.")
+        return self.values[code]
+
+    def from_db_value(self, value: int | None, *args) -> str | None:
+        """
+        Convert the stored code into the choice.
+
+        Args:
+            value (int | None): Stored code.
+
+        Returns:
+            str | None: Choice value.
+        """
+        return self.decode(value)
+
+    def to_python(self, value: Any) -> str | None:
+        """
+        Convert the code or the choice into the choice.
+
+        Args:
+            value (Any): Code, e.g. from the change log data, or choice.
+
+        Returns:
+            str | None: Choice value.
+        """
+        if isinstance(value, int):
+            return self.decode(value)
+        return value
+
+    def get_prep_value(self, value: Any) -> int | None:
+        """
+        Convert the choice into the code for queries.
+
+        Args:
+            value (Any): Choice value.
+
+        Raises:
+            ValueError: The value is not a choice of the field.
+
+        Returns:
+            int | None: Code to store.
+        """
+        value = super().get_prep_value(value)
+        if value is None:
+            return None
+        if value not in self.codes:
+            raise ValueError(
+                f"Field '{self.name}' expected one of {self.values}, "
+                f"got {value!r}."
+            )
+        return self.codes[value]
@@ -0,0 +1,326 @@
+"""Filtering of breeds by ranges of their traits.
+
+Every trait has a few values, so B-tree indexes on the trait columns
+are not selective and PostgreSQL still scans most of the table for
+a query on several traits. Instead, the traits of all breeds are kept
+in memory as uint8 columns of value codes, sorted by the breed id,
+and every value of a trait has a precomputed bitset of the breeds
+having it. A query is resolved by ORing the bitsets of the allowed
+values of each trait and ANDing the results, and only the found ids
+are read from the database. The index is kept up to date by applying
+new entries of the change log: changed traits flip their bits, and
+only inserts and deletes lay the arrays out again.
+"""
+
+import threading
+
+import numpy as np
+from app_dogs.models import Breed, ChangeLog
+from app_dogs.utils.changelog import (
+    Cursor,
+    get_change_data,
+    get_changes,
+    get_cursor,
+    get_head_cursor,
+    get_horizon,
+)
+from app_dogs.utils.choises import RatingChoice, SizeChioce
+from app_dogs.utils.similarity import RATING_FIELDS, TRAIT_FIELDS
+from django.conf import settings
+
+# values of each trait, the code of a value is its position
+TRAIT_VALUES: dict[str, list] = {
+    **{name: list(RatingChoice.values) for name in RATING_FIELDS},
+    "size": list(SizeChioce.values),
+}
+TRAIT_CODES: dict[str, dict] = {
+    name: {value: code for code, value in enumerate(values)}
+    for name, values in TRAIT_VALUES.items()
+}
+
+
+def get_allowed_values(query: dict) -> dict[str, list]:
+    """
+    Get the allowed values of each filtered trait.
+
+    Args:
+        query (dict): Validated query with '<rating>_min' and
+            '<rating>_max' bounds and a collection of 'size' values.
+            Missing bounds and an empty collection don't filter.
+
+    Returns:
+        dict[str, list]: Allowed values by the filtered traits.
+    """
+    allowed: dict[str, list] = {}
+    for name in RATING_FIELDS:
+        low = query.get(f"{name}_min")
+        high = query.get(f"{name}_max")
+        if low is None and high is None:
+            continue
+        allowed[name] = [
+            value
+            for value in TRAIT_VALUES[name]
+            if (low is None or value >= low)
+            and (high is None or value <= high)
+        ]
+    if query.get("size"):
+        allowed["size"] = [
+            value for value in TRAIT_VALUES["size"] if value in query["size"]
+        ]
+    return allowed
+
+
+class BreedTraitIndex:
+    """
+    Immutable index of the traits of all breeds sorted by id.
+
+    Args:
+        ids (np.ndarray): Breed ids.
+        codes (dict[str, np.ndarray]): uint8 codes of the values by
+            trait names.
+        cursor (Cursor): Position of the last change log entry applied.
+        bitsets (dict[str, np.ndarray] | None): Little-endian bitsets of
+            the breed positions, a row per value code, by trait names.
+            Computed from the codes if not passed.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        codes: dict[str, np.ndarray],
+        cursor: Cursor,
+        bitsets: dict[str, np.ndarray] | None = None,
+    ) -> None:
+        """Initialize the index from ready arrays."""
+        self.ids = ids
+        self.codes = codes
+        self.cursor = cursor
+        if bitsets is None:
+            bitsets = {
+                name: np.packbits(
+                    np.arange(len(TRAIT_VALUES[name]))[:, None] == column,
+                    axis=1,
+                    bitorder="little",
+                )
+                for name, column in codes.items()
+            }
+        self.bitsets = bitsets
+
+    def __len__(self) -> int:
+        """
+        Get the number of breeds.
+
+        Returns:
+            int: Number of rows.
+        """
+        return len(self.ids)
+
+    @staticmethod
+    def encode_rows(rows: list[tuple]) -> tuple[np.ndarray, dict]:
+        """
+        Convert breed rows into the ids and code columns.
+
+        Args:
+            rows (list[tuple]): Rows of the id and traits in the
+                TRAIT_FIELDS order.
+
+        Returns:
+            tuple[np.ndarray, dict]: Ids and codes by trait names.
+        """
+        ids, *traits = zip(*rows) if rows else [()] * (1 + len(TRAIT_FIELDS))
+        return np.array(ids, dtype=np.int64), {
+            name: np.array(
+                [TRAIT_CODES[name][value] for value in values],
+                dtype=np.uint8,
+            )
+            for name, values in zip(TRAIT_FIELDS, traits)
+        }
+
+    @classmethod
+    def load(cls) -> "BreedTraitIndex":
+        """
+        Read all breeds from the database.
+
+        The change log position is taken before reading, so changes made
+        in the meantime are applied again by the next refresh.
+
+        Returns:
+            BreedTraitIndex: New index.
+        """
+        cursor: Cursor = get_head_cursor()
+        ids, codes = cls.encode_rows(
+            list(Breed.objects.order_by("id").values_list("id", *TRAIT_FIELDS))
+        )
+        return cls(ids, codes, cursor)
+
+    def apply(
+        self,
+        changes: list[ChangeLog],
+        cursor: Cursor | None = None,
+    ) -> "BreedTraitIndex":
+        """
+        Get a new index with the changes applied.
+
+        Updates of existing breeds move their bits between the bitsets
+        of the old and new values. Inserts and deletes change positions
+        of the breeds, so the arrays are laid out again.
+
+        Args:
+            changes (list[ChangeLog]): Change log entries in the feed
+                order, changes of other models are skipped.
+            cursor (Cursor | None): Position the index is caught up to,
+                the last change by default.
+
+        Returns:
+            BreedTraitIndex: New index.
+        """
+        latest: dict[int, dict | None] = {
+            change.object_id: get_change_data(change)
+            for change in changes
+            if change.model == "breed"
+        }
+        if cursor is None:
+            cursor = get_cursor(changes[-1]) if changes else self.cursor
+        if not latest:
+            return BreedTraitIndex(self.ids, self.codes, cursor, self.bitsets)
+
+        changed_ids = np.fromiter(latest, dtype=np.int64)
+        positions = np.searchsorted(self.ids, changed_ids)
+        exists = positions < len(self.ids)
+        exists[exists] = self.ids[positions[exists]] == changed_ids[exists]
+        rows: list[tuple] = [
+            (breed_id, *(data[name] for name in TRAIT_FIELDS))
+            for breed_id, data in latest.items()
+            if data is not None
+        ]
+
+        if not exists.all() or len(rows) < len(latest):
+            keep = ~np.isin(self.ids, changed_ids)
+            new_ids, new_codes = self.encode_rows(rows)
+            ids = np.concatenate((self.ids[keep], new_ids))
+            order = np.argsort(ids, kind="stable")
+            return BreedTraitIndex(
+                ids[order],
+                {
+                    name: np.concatenate((column[keep], new_codes[name]))[
+                        order
+                    ]
+                    for name, column in self.codes.items()
+                },
+                cursor,
+            )
+
+        _, new_codes = self.encode_rows(rows)
+        offsets = positions >> 3
+        masks = (1 << (positions & 7)).astype(np.uint8)
+        codes: dict[str, np.ndarray] = {}
+        bitsets: dict[str, np.ndarray] = {}
+        for name, column in self.codes.items():
+            codes[name] = column.copy()
+            codes[name][positions] = new_codes[name]
+            bitsets[name] = self.bitsets[name].copy()
+            # unbuffered, several changed breeds can share a byte
+            np.bitwise_and.at(
+                bitsets[name], (column[positions], offsets), ~masks
+            )
+            np.bitwise_or.at(bitsets[name], (new_codes[name], offsets), masks)
+        return BreedTraitIndex(self.ids, codes, cursor, bitsets)
+
+    def select(self, allowed: dict[str, list]) -> np.ndarray:
+        """
+        Get the breeds with the allowed values of the traits.
+
+        Args:
+            allowed (dict[str, list]): Allowed values by trait names.
+
+        Returns:
+            np.ndarray: Sorted ids of the found breeds.
+        """
+        found: np.ndarray | None = None
+        for name, values in allowed.items():
+            codes = [TRAIT_CODES[name][value] for value in values]
+            matched = np.bitwise_or.reduce(
+                self.bitsets[name][codes],
+                axis=0,
+                initial=0,
+            ).astype(np.uint8)
+            found = matched if found is None else found & matched
+
+        if found is None:
+            return self.ids
+        positions = np.flatnonzero(
+            np.unpackbits(found, count=len(self.ids), bitorder="little")
+        )
+        return self.ids[positions]
+
+
+class BreedTraitIndexCache:
+    """Index of all breeds shared by threads and refreshed on demand."""
+
+    def __init__(self) -> None:
+        """Initialize the cache without an index."""
+        self.index: BreedTraitIndex | None = None
+        self.lock = threading.Lock()
+
+    def clear(self) -> None:
+        """Drop the index, it is loaded again on the next request."""
+        with self.lock:
+            self.index = None
+
+    def get(self) -> BreedTraitIndex:
+        """
+        Get the index with all breed changes of the change log applied.
+
+        The index is loaded again if there are too many changes or some
+        of them have been removed by the retention. The change log is
+        read without the lock, which only guards the swap of the index.
+
+        Returns:
+            BreedTraitIndex: Index of all breeds.
+        """
+        index: BreedTraitIndex | None = self.index
+        new_index: BreedTraitIndex | None = None
+        if index is not None and index.cursor >= get_horizon():
+            new_index = self.catch_up(index)
+            if new_index is index:
+                return index
+        if new_index is None:
+            new_index = BreedTraitIndex.load()
+
+        with self.lock:
+            # a concurrent request may have caught up further
+            if self.index is None or self.index.cursor < new_index.cursor:
+                self.index = new_index
+            return self.index
+
+    def catch_up(self, index: BreedTraitIndex) -> BreedTraitIndex | None:
+        """
+        Apply the new breed changes to the index.
+
+        The index is moved to the head of the change log, so changes of
+        dogs are not read again by the next requests.
+
+        Args:
+            index (BreedTraitIndex): Index to catch up.
+
+        Returns:
+            BreedTraitIndex | None: New index, the same one if nothing
+                has changed, or None if there are too many changes.
+        """
+        max_changes: int = settings.BREED_FILTERING["MAX_APPLIED_CHANGES"]
+        head: Cursor = get_head_cursor()
+        changes: list[ChangeLog] = get_changes(
+            index.cursor, max_changes + 1, model="breed"
+        )
+        if len(changes) > max_changes:
+            return None
+        # changes committed after the head was taken are read as well
+        cursor: Cursor = max(
+            head, get_cursor(changes[-1]) if changes else index.cursor
+        )
+        if cursor == index.cursor:
+            return index
+        return index.apply(changes, cursor)
+
+
+breed_trait_index_cache = BreedTraitIndexCache()
@@ -0,0 +1,376 @@
+"""Profiling of single requests on demand.
+
+A staff user adds '?_profile=cprofile' or '?_profile=sql' to a request
+of the app. The request is run under cProfile or with every query
+recorded and explained, reads by 'EXPLAIN (ANALYZE, BUFFERS)', and the
+record is written to a directory keeping only the latest records.
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import re
+import time
+import uuid
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.http import HttpResponse
+
+PROFILE_PARAM = "_profile"
+PROFILE_HEADER = "X-Profile-Id"
+CPROFILE = "cprofile"
+SQL = "sql"
+PROFILE_MODES: tuple[str, ...] = (CPROFILE, SQL)
+RECORD_NAME_LENGTH = 40
+FUNCTION_CALL = re.compile(r"\b([a-z_][a-z0-9_]*)\s*\(", re.IGNORECASE)
+ROW_LOCK = re.compile(
+    r"\bFOR\s+(?:NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b",
+    re.IGNORECASE,
+)
+
+
+class ProfileStore:
+    """
+    Directory of profile records keeping only the latest of them.
+
+    Args:
+        settings_name (str): Name of the settings dict with
+            'DIRECTORY' and 'MAX_RECORDS' keys.
+    """
+
+    def __init__(self, settings_name: str) -> None:
+        """Initialize the store."""
+        self.settings_name = settings_name
+
+    @property
+    def directory(self) -> Path:
+        """
+        Get the directory of the records.
+
+        Returns:
+            Path: Directory path.
+        """
+        return Path(getattr(settings, self.settings_name)["DIRECTORY"])
+
+    def get_path(self, record_id: str) -> Path | None:
+        """
+        Get the path of the record file.
+
+        Args:
+            record_id (str): Id of the record.
+
+        Returns:
+            Path | None: Path or None if the id isn't valid.
+        """
+        if len(record_id) != RECORD_NAME_LENGTH or not all(
+            char.isalnum() or char == "-" for char in record_id
+        ):
+            return None
+        return self.directory / f"{record_id}.json"
+
+    def save(self, record: dict) -> str:
+        """
+        Write the record and remove the oldest ones beyond the limit.
+
+        Args:
+            record (dict): Profile data.
+
+        Returns:
+            str: Id of the record.
+        """
+        # names are sorted by the creation time
+        record_id: str = (
+            f"{datetime.now(UTC):%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:18]}"
+        )
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path: Path = self.directory / f"{record_id}.json"
+        path.write_text(json.dumps({"id": record_id, **record}))
+
+        max_records: int = getattr(settings, self.settings_name)["MAX_RECORDS"]
+        for old_path in self.get_paths()[max_records:]:
+            old_path.unlink(missing_ok=True)
+        return record_id
+
+    def get_paths(self) -> list[Path]:
+        """
+        Get paths of the records from the newest one.
+
+        Returns:
+            list[Path]: Record files.
+        """
+        if not self.directory.is_dir():
+            return []
+        return sorted(self.directory.glob("*.json"), reverse=True)
+
+    def list(self) -> list[dict]:
+        """
+        Get summaries of the records from the newest one.
+
+        Returns:
+            list[dict]: Records without the profile data.
+        """
+        summaries: list[dict] = []
+        for path in self.get_paths():
+            try:
+                record: dict = json.loads(path.read_text())
+            except (OSError, ValueError):
+                # removed or being written by another process
+                continue
+            record.pop("stats", None)
+            summaries.append(
+                {**record, "query_count": len(record.pop("queries", []))}
+            )
+        return summaries
+
+    def get(self, record_id: str) -> dict | None:
+        """
+        Get the record.
+
+        Args:
+            record_id (str): Id of the record.
+
+        Returns:
+            dict | None: Record or None if it doesn't exist.
+        """
+        path: Path | None = self.get_path(record_id)
+        if path is None:
+            return None
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+
+def get_profile_mode(request: Any) -> str | None:
+    """
+    Get the profile mode requested by a staff user.
+
+    Args:
+        request (Any): Django request.
+
+    Returns:
+        str | None: Mode or None if the request isn't profiled.
+    """
+    mode: str | None = request.GET.get(PROFILE_PARAM)
+    if mode not in PROFILE_MODES:
+        return None
+    user = getattr(request, "user", None)
+    if user is None or not user.is_staff:
+        return None
+    return mode
+
+
+def render(response: HttpResponse) -> HttpResponse:
+    """
+    Render the template or DRF response to profile its rendering too.
+
+    Args:
+        response (HttpResponse): Response of the view.
+
+    Returns:
+        HttpResponse: Rendered response.
+    """
+    if callable(getattr(response, "render", None)):
+        response.render()
+    return response
+
+
+def profile_calls(
+    view: Callable[[], HttpResponse],
+) -> tuple[HttpResponse, dict]:
+    """
+    Run the view under cProfile.
+
+    Args:
+        view (Callable[[], HttpResponse]): View bound to the request.
+
+    Returns:
+        tuple[HttpResponse, dict]: Response and the profile data with
+            the duration, stats and callees of the most expensive
+            functions.
+    """
+    started: float = time.perf_counter()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        response: HttpResponse = render(view())
+    finally:
+        profiler.disable()
+    duration_ms: float = (time.perf_counter() - started) * 1000
+
+    max_functions: int = settings.REQUEST_PROFILING["MAX_FUNCTIONS"]
+    stats_text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stats_text)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(max_functions)
+    stats.print_callees(max_functions)
+    return response, {
+        "duration_ms": duration_ms,
+        "stats": stats_text.getvalue(),
+    }
+
+
+def has_side_effects(sql: str) -> bool:
+    """
+    Check the read locks rows or calls a volatile function.
+
+    Such reads, e.g. 'SELECT ... FOR UPDATE', 'nextval()' or
+    'pg_try_advisory_lock()', would take locks, advance sequences or send
+    notifications again when run. Any name followed by a parenthesis is
+    looked up in the catalog, so a column or keyword can only make the
+    check stricter.
+
+    Args:
+        sql (str): Query.
+
+    Returns:
+        bool: The query can't be run again safely.
+    """
+    if ROW_LOCK.search(sql):
+        return True
+
+    names: list[str] = list(
+        {name.lower() for name in FUNCTION_CALL.findall(sql)}
+    )
+    if not names:
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT FROM pg_proc "
+            "WHERE proname = ANY(%s) AND provolatile = 'v')",
+            (names,),
+        )
+        return cursor.fetchone()[0]
+
+
+def explain(sql: str, params: Any) -> str:
+    """
+    Explain the query.
+
+    SELECT queries are run again by 'EXPLAIN (ANALYZE, BUFFERS)' in
+    a transaction which is rolled back. Writes and reads with side
+    effects are only planned: running them again would change the data
+    or take locks. Other statements, such as SET or SAVEPOINT, have no
+    plan.
+
+    Args:
+        sql (str): Query.
+        params (Any): Query parameters.
+
+    Returns:
+        str: Query plan, the error of explaining or an empty string.
+    """
+    statement: str = sql.split(maxsplit=1)[0].upper()
+    if statement not in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE"):
+        return ""
+    try:
+        with transaction.atomic():
+            prefix: str = "EXPLAIN "
+            if statement in ("SELECT", "WITH") and not has_side_effects(sql):
+                prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                plan: str = "\n".join(row[0] for row in cursor.fetchall())
+            transaction.set_rollback(True)
+            return plan
+    except DatabaseError as error:
+        return f"{type(error).__name__}: {error}"
+
+
+def profile_queries(
+    view: Callable[[], HttpResponse],
+) -> tuple[HttpResponse, dict]:
+    """
+    Run the view recording its queries, then explain each of them.
+
+    Args:
+        view (Callable[[], HttpResponse]): View bound to the request.
+
+    Returns:
+        tuple[HttpResponse, dict]: Response and the profile data with
+            the duration and the timeline of queries.
+    """
+    started: float = time.perf_counter()
+    queries: list[dict] = []
+
+    def record_query(
+        execute: Callable,
+        sql: str,
+        params: Any,
+        many: bool,
+        context: dict,
+    ) -> Any:
+        query_started: float = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            queries.append(
+                {
+                    "sql": sql,
+                    "params": None if many else params,
+                    "many": many,
+                    "start_ms": (query_started - started) * 1000,
+                    "duration_ms": (time.perf_counter() - query_started)
+                    * 1000,
+                }
+            )
+
+    with connection.execute_wrapper(record_query):
+        response: HttpResponse = render(view())
+    duration_ms: float = (time.perf_counter() - started) * 1000
+
+    for query in queries:
+        query["plan"] = (
+            "" if query["many"] else explain(query["sql"], query["params"])
+        )
+        query["params"] = repr(query["params"])
+    return response, {"duration_ms": duration_ms, "queries": queries}
+
+
+PROFILERS: dict[
+    str,
+    Callable[[Callable[[], HttpResponse]], tuple[HttpResponse, dict]],
+] = {
+    CPROFILE: profile_calls,
+    SQL: profile_queries,
+}
+
+
+def profile_request(
+    mode: str,
+    request: Any,
+    view: Callable[[], HttpResponse],
+) -> HttpResponse:
+    """
+    Run the view by the profiler of the mode and save the record.
+
+    Args:
+        mode (str): Profile mode.
+        request (Any): Django request.
+        view (Callable[[], HttpResponse]): View bound to the request.
+
+    Returns:
+        HttpResponse: Response with the id of the record in a header.
+    """
+    response, data = PROFILERS[mode](view)
+    record_id: str = profile_store.save(
+        {
+            "created": datetime.now(UTC).isoformat(),
+            "mode": mode,
+            "method": request.method,
+            "path": request.get_full_path(),
+            "user": request.user.get_username(),
+            "status": response.status_code,
+            **data,
+        }
+    )
+    response[PROFILE_HEADER] = record_id
+    return response
+
+
+profile_store = ProfileStore(settings_name="REQUEST_PROFILING")
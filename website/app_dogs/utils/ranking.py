@@ -0,0 +1,349 @@
+"""Ranking of dogs by how well they fit the owner preferences.
+
+Dogs are kept in memory as NumPy column arrays loaded from the database
+by chunks with 'values_list'. Then the columns are kept up to date by
+applying new entries of the change log, so a request doesn't read all
+dogs from the database. Scores are computed over the columns by chunks
+of a fixed size, only the running top of dogs is kept between chunks.
+"""
+
+import threading
+
+import numpy as np
+from app_dogs.models import ChangeLog, Dog
+from app_dogs.utils.changelog import (
+    Cursor,
+    get_change_data,
+    get_changes,
+    get_cursor,
+    get_head_cursor,
+    get_horizon,
+)
+from app_dogs.utils.choises import GenderChioce
+from app_dogs.utils.similarity import TraitMatrix
+from django.conf import settings
+
+GENDER_CODES: dict[str, int] = {
+    value: code for code, value in enumerate(GenderChioce.values)
+}
+
+# scores are compared as integers with this precision
+SCORE_SCALE = 10**6
+# ids take the lower bits of the sort key
+ID_BITS = 40
+
+DOG_FIELDS: tuple[str, ...] = ("id", "age", "breed_id", "gender", "color")
+
+
+class DogColumns:
+    """
+    Immutable column arrays of all dogs sorted by id.
+
+    Args:
+        ids (np.ndarray): Dog ids.
+        ages (np.ndarray): Ages.
+        breed_ids (np.ndarray): Breed ids, 0 if there is no breed.
+        genders (np.ndarray): Codes of genders from GENDER_CODES.
+        colors (np.ndarray): Codes of lowercase colors.
+        color_codes (dict[str, int]): Codes by lowercase colors.
+        cursor (Cursor): Position of the last change log entry applied.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        ages: np.ndarray,
+        breed_ids: np.ndarray,
+        genders: np.ndarray,
+        colors: np.ndarray,
+        color_codes: dict[str, int],
+        cursor: Cursor,
+    ) -> None:
+        """Initialize the columns from ready arrays."""
+        self.ids = ids
+        self.ages = ages
+        self.breed_ids = breed_ids
+        self.genders = genders
+        self.colors = colors
+        self.color_codes = color_codes
+        self.cursor = cursor
+
+    def __len__(self) -> int:
+        """
+        Get the number of dogs.
+
+        Returns:
+            int: Number of rows.
+        """
+        return len(self.ids)
+
+    @staticmethod
+    def encode_rows(
+        rows: list[tuple],
+        color_codes: dict[str, int],
+    ) -> tuple[np.ndarray, ...]:
+        """
+        Convert dog rows into column arrays.
+
+        Args:
+            rows (list[tuple]): Rows of values in the DOG_FIELDS order.
+            color_codes (dict[str, int]): Codes by lowercase colors,
+                new colors are added to it.
+
+        Returns:
+            tuple[np.ndarray, ...]: Arrays in the DOG_FIELDS order.
+        """
+        ids, ages, breed_ids, genders, colors = (
+            zip(*rows) if rows else [()] * len(DOG_FIELDS)
+        )
+        return (
+            np.array(ids, dtype=np.int64),
+            np.array(ages, dtype=np.int16),
+            np.array(
+                [breed_id or 0 for breed_id in breed_ids],
+                dtype=np.int64,
+            ),
+            np.array(
+                [GENDER_CODES[gender] for gender in genders],
+                dtype=np.int8,
+            ),
+            np.array(
+                [
+                    color_codes.setdefault(color.lower(), len(color_codes))
+                    for color in colors
+                ],
+                dtype=np.int32,
+            ),
+        )
+
+    @classmethod
+    def load(cls, chunk_size: int) -> "DogColumns":
+        """
+        Read all dogs from the database by chunks.
+
+        The change log position is taken before reading, so changes made
+        in the meantime are applied again by the next refresh.
+
+        Args:
+            chunk_size (int): Number of rows read by one query.
+
+        Returns:
+            DogColumns: New columns.
+        """
+        cursor: Cursor = get_head_cursor()
+        color_codes: dict[str, int] = {}
+        queryset = Dog.objects.order_by("id").values_list(*DOG_FIELDS)
+
+        chunks: list[tuple[np.ndarray, ...]] = []
+        last_id = 0
+        while True:
+            rows: list[tuple] = list(
+                queryset.filter(id__gt=last_id)[:chunk_size]
+            )
+            if not rows:
+                break
+            chunks.append(cls.encode_rows(rows, color_codes))
+            last_id = rows[-1][0]
+
+        if not chunks:
+            chunks.append(cls.encode_rows([], color_codes))
+
+        return cls(
+            *(np.concatenate(column) for column in zip(*chunks)),
+            color_codes=color_codes,
+            cursor=cursor,
+        )
+
+    def apply(self, changes: list[ChangeLog]) -> "DogColumns":
+        """
+        Get new columns with the changes applied.
+
+        Args:
+            changes (list[ChangeLog]): Change log entries in the feed
+                order, changes of other models are skipped.
+
+        Returns:
+            DogColumns: New columns.
+        """
+        latest: dict[int, ChangeLog] = {
+            change.object_id: change
+            for change in changes
+            if change.model == "dog"
+        }
+        color_codes: dict[str, int] = dict(self.color_codes)
+        new_rows: list[tuple] = [
+            tuple(data[field] for field in DOG_FIELDS)
+            for data in map(get_change_data, latest.values())
+            if data is not None
+        ]
+        new_columns = self.encode_rows(new_rows, color_codes)
+
+        keep = ~np.isin(self.ids, np.fromiter(latest, dtype=np.int64))
+        columns = [
+            np.concatenate((old[keep], new))
+            for old, new in zip(
+                (
+                    self.ids,
+                    self.ages,
+                    self.breed_ids,
+                    self.genders,
+                    self.colors,
+                ),
+                new_columns,
+            )
+        ]
+        order = np.argsort(columns[0], kind="stable")
+
+        return DogColumns(
+            *(column[order] for column in columns),
+            color_codes=color_codes,
+            cursor=get_cursor(changes[-1]) if changes else self.cursor,
+        )
+
+    def rank(
+        self,
+        preferences: dict,
+        matrix: TraitMatrix,
+        breed_target: np.ndarray,
+        breed_weights: np.ndarray,
+        limit: int,
+        chunk_size: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the best dogs for the owner preferences.
+
+        Each preference gives a distance in [0, 1] to the dog, the score
+        is '1 - sqrt(weighted mean of squared distances)'. Dogs with
+        equal scores are ordered by id.
+
+        Args:
+            preferences (dict): Desired 'age', 'gender', 'color' and
+                their '<name>_weight' weights. Missing ones are ignored.
+            matrix (TraitMatrix): Traits of all breeds.
+            breed_target (np.ndarray): Scaled desired breed traits.
+            breed_weights (np.ndarray): Weights of the breed traits.
+            limit (int): Number of dogs to return.
+            chunk_size (int): Number of dogs scored at once.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Ids and scores of the best
+                dogs, the best first.
+        """
+        total_weight = float(breed_weights.sum())
+        age: int | None = preferences.get("age")
+        gender: str | None = preferences.get("gender")
+        color: str | None = preferences.get("color")
+        for name in ("age", "gender", "color"):
+            if preferences.get(name) is not None:
+                total_weight += preferences[f"{name}_weight"]
+
+        if total_weight == 0 or not len(self):
+            order = np.arange(min(limit, len(self)))
+            return self.ids[order], np.ones(len(order), dtype=np.float64)
+
+        # squared distance of each breed, dogs without breed are the worst
+        breed_distances = np.append(
+            np.square(matrix.traits - breed_target) @ breed_weights,
+            breed_weights.sum(),
+        ).astype(np.float32)
+        age_scale = float(settings.DOG_RANKING["AGE_SCALE"])
+
+        best_keys = np.empty(0, dtype=np.int64)
+        for start in range(0, len(self), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            distances = np.zeros(len(self.ids[chunk]), dtype=np.float32)
+
+            if age is not None:
+                age_distances = np.minimum(
+                    np.abs(self.ages[chunk] - age) / age_scale,
+                    1,
+                )
+                distances += preferences["age_weight"] * age_distances**2
+            if gender is not None:
+                distances += preferences["gender_weight"] * (
+                    self.genders[chunk] != GENDER_CODES[gender]
+                )
+            if color is not None:
+                distances += preferences["color_weight"] * (
+                    self.colors[chunk]
+                    != self.color_codes.get(color.lower(), -1)
+                )
+            if len(matrix) > 0:
+                positions = np.searchsorted(matrix.ids, self.breed_ids[chunk])
+                positions = np.minimum(positions, len(matrix) - 1)
+                positions[matrix.ids[positions] != self.breed_ids[chunk]] = (
+                    len(matrix)
+                )
+                distances += breed_distances[positions]
+            else:
+                distances += breed_distances[-1]
+
+            scores = 1 - np.sqrt(np.maximum(distances / total_weight, 0))
+            keys = (
+                np.rint(scores * SCORE_SCALE).astype(np.int64) << ID_BITS
+            ) - self.ids[chunk]
+
+            best_keys = np.concatenate((best_keys, keys))
+            if len(best_keys) > limit:
+                best_keys = np.partition(best_keys, -limit)[-limit:]
+
+        # key = (score << ID_BITS) - id, where 0 < id < 2 ** ID_BITS
+        best_keys = np.sort(best_keys)[::-1]
+        scores = (best_keys >> ID_BITS) + 1
+        ids = (scores << ID_BITS) - best_keys
+
+        return ids, scores / SCORE_SCALE
+
+
+class DogColumnsCache:
+    """Columns of all dogs shared by threads and refreshed on demand."""
+
+    def __init__(self) -> None:
+        """Initialize the cache without columns."""
+        self.columns: DogColumns | None = None
+        self.lock = threading.Lock()
+
+    def clear(self) -> None:
+        """Drop the columns, they are loaded again on the next request."""
+        with self.lock:
+            self.columns = None
+
+    def get(self) -> DogColumns:
+        """
+        Get the columns with all dog changes of the change log applied.
+
+        The change log is read without the lock, so requests don't wait
+        for each other's queries. The columns are loaded again if there
+        are too many changes or some of them have been removed by
+        the retention.
+
+        Returns:
+            DogColumns: Columns of all dogs.
+        """
+        ranking_settings: dict = settings.DOG_RANKING
+        max_changes: int = ranking_settings["MAX_APPLIED_CHANGES"]
+
+        columns: DogColumns | None = self.columns
+        if columns is not None and columns.cursor >= get_horizon():
+            changes: list[ChangeLog] = get_changes(
+                columns.cursor,
+                max_changes + 1,
+                model="dog",
+            )
+            if not changes:
+                return columns
+            if len(changes) <= max_changes:
+                with self.lock:
+                    # unless another request has replaced them already
+                    if self.columns is columns:
+                        self.columns = columns.apply(changes)
+                    if self.columns is not None:
+                        return self.columns
+
+        with self.lock:
+            if self.columns is None or self.columns is columns:
+                self.columns = DogColumns.load(ranking_settings["CHUNK_SIZE"])
+            return self.columns
+
+
+dog_columns_cache = DogColumnsCache()
@@ -0,0 +1,159 @@
+"""Retry of writes failed by serialization conflicts.
+
+Transactions use the REPEATABLE READ isolation, so PostgreSQL aborts
+a transaction which updates a row changed by a concurrent one after
+its snapshot (SQLSTATE 40001) or which is chosen as a deadlock victim
+(40P01). Such a transaction can be safely run again from the start.
+The next attempt waits for a random delay growing exponentially
+("full jitter"), so conflicting writers don't collide again.
+"""
+
+import random
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+SERIALIZATION_FAILURE = "40001"
+DEADLOCK_DETECTED = "40P01"
+RETRYABLE_SQLSTATES: frozenset[str] = frozenset(
+    (SERIALIZATION_FAILURE, DEADLOCK_DETECTED)
+)
+
+
+class WriteConflict(APIException):
+    """
+    Error of the write which has kept conflicting after all retries.
+
+    Args:
+        APIException: DRF base API exception.
+    """
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The object is being changed concurrently, try again."
+    default_code = "write_conflict"
+
+
+def get_sqlstate(error: BaseException) -> str | None:
+    """
+    Get the SQLSTATE code of the database error.
+
+    Django wraps errors of the driver, so the chain of causes is walked.
+
+    Args:
+        error (BaseException): Raised error.
+
+    Returns:
+        str | None: Code or None if the error isn't from the database.
+    """
+    while error is not None:
+        sqlstate: str | None = getattr(error, "pgcode", None)
+        if sqlstate:
+            return sqlstate
+        error = error.__cause__
+    return None
+
+
+class WriteRetry:
+    """
+    Runner of write functions retried after serialization conflicts.
+
+    Args:
+        settings_name (str): Name of the settings dict with
+            'MAX_ATTEMPTS', 'BASE_DELAY_MS' and 'MAX_DELAY_MS' keys.
+    """
+
+    def __init__(self, settings_name: str) -> None:
+        """Initialize the runner with empty stats."""
+        self.settings_name = settings_name
+        self.lock = threading.Lock()
+        self.stats: dict[str, int] = {
+            "calls": 0,
+            "retries": 0,
+            "recovered": 0,
+            "exhausted": 0,
+            SERIALIZATION_FAILURE: 0,
+            DEADLOCK_DETECTED: 0,
+        }
+
+    def count(self, *names: str) -> None:
+        """
+        Increment the stats counters.
+
+        Args:
+            names (str): Names of the counters.
+        """
+        with self.lock:
+            for name in names:
+                self.stats[name] += 1
+
+    def get_delay(self, attempt: int) -> float:
+        """
+        Get a random delay before the next attempt.
+
+        Args:
+            attempt (int): Number of the failed attempt, starting at 1.
+
+        Returns:
+            float: Delay in seconds.
+        """
+        retry_settings: dict = getattr(settings, self.settings_name)
+        ceiling: float = min(
+            retry_settings["MAX_DELAY_MS"],
+            retry_settings["BASE_DELAY_MS"] * 2 ** (attempt - 1),
+        )
+        return random.uniform(0, ceiling) / 1000
+
+    def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run the function in a transaction, retry it after conflicts.
+
+        Inside an outer transaction the function is called directly:
+        only the outermost transaction can be run again.
+
+        Args:
+            func (Callable): Function doing the writes.
+            args: Positional arguments of the function.
+            kwargs: Keyword arguments of the function.
+
+        Raises:
+            WriteConflict: The function has conflicted on every attempt.
+
+        Returns:
+            Any: Result of the function.
+        """
+        if transaction.get_connection().in_atomic_block:
+            return func(*args, **kwargs)
+
+        max_attempts: int = getattr(settings, self.settings_name)[
+            "MAX_ATTEMPTS"
+        ]
+        self.count("calls")
+        for attempt in range(1, max_attempts + 1):
+            try:
+                with transaction.atomic():
+                    result = func(*args, **kwargs)
+            except DatabaseError as error:
+                sqlstate: str | None = get_sqlstate(error)
+                if sqlstate not in RETRYABLE_SQLSTATES:
+                    raise
+                self.count(sqlstate)
+                if attempt == max_attempts:
+                    self.count("exhausted")
+                    raise WriteConflict() from error
+
+                self.count("retries")
+                time.sleep(self.get_delay(attempt))
+                continue
+
+            if attempt > 1:
+                self.count("recovered")
+            return result
+
+
+write_retry = WriteRetry(settings_name="DB_WRITE_RETRY")
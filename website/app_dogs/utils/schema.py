@@ -0,0 +1,678 @@
+"""Schema changes of the app_dogs tables which don't block writes.
+
+A plain migration holds locks for as long as the change takes: 'CREATE
+INDEX' blocks writes to the table while the index is built, and adding
+a validated constraint or filling a new column in one 'UPDATE' blocks
+them while all rows are read or rewritten. For large tables migrations
+use the operations below instead:
+
+    - 'AddIndexConcurrently' builds the index without blocking writes;
+    - 'BackfillColumn' fills a column by short batches with pauses;
+    - 'AddConstraintNotValid' adds a constraint checked only for new
+      rows, then 'ValidateConstraint' checks the existing rows without
+      blocking writes.
+
+Operations which must run outside a transaction need 'atomic = False'
+on the migration. DDL taking a lock waits for it no longer than
+'LOCK_TIMEOUT_MS', so it fails instead of queueing all requests behind
+itself. The plan of pending migrations, the locks of their operations
+and the estimated durations are reported by the 'migrateonline
+--dry-run' command, which times the operations on a sample copy of
+the table.
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.postgres import operations as postgres_operations
+from django.db import DatabaseError, NotSupportedError, transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations import Migration, operations
+from django.db.migrations.executor import MigrationExecutor
+from django.db.migrations.operations.base import Operation
+from django.db.migrations.state import ProjectState
+from django.db.models import CheckConstraint, Model
+
+SKIP_CHANGELOG_SQL = "SET LOCAL app_dogs.skip_changelog = 'on'"
+SAMPLE_TABLE = "app_dogs_schema_sample"
+
+
+@contextmanager
+def lock_timeout(connection: BaseDatabaseWrapper) -> Iterator[None]:
+    """
+    Limit the time the statements wait for locks.
+
+    Args:
+        connection (BaseDatabaseWrapper): Database connection.
+
+    Yields:
+        None: Statements are run with the timeout.
+    """
+    scope: str = "LOCAL" if connection.in_atomic_block else "SESSION"
+    timeout = int(settings.SCHEMA_CHANGES["LOCK_TIMEOUT_MS"])
+    with connection.cursor() as cursor:
+        cursor.execute(f"SET {scope} lock_timeout = {timeout}")
+    try:
+        yield
+    finally:
+        if scope == "SESSION":
+            with connection.cursor() as cursor:
+                cursor.execute("RESET lock_timeout")
+
+
+class LockTimeoutMixin:
+    """Run the DDL of the operation with the lock timeout."""
+
+    def database_forwards(
+        self,
+        app_label: str,
+        schema_editor: BaseDatabaseSchemaEditor,
+        from_state: ProjectState,
+        to_state: ProjectState,
+    ) -> None:
+        """
+        Apply the operation with the lock timeout.
+
+        Args:
+            app_label (str): Label of the app.
+            schema_editor (BaseDatabaseSchemaEditor): Schema editor.
+            from_state (ProjectState): State before the operation.
+            to_state (ProjectState): State after the operation.
+        """
+        with lock_timeout(schema_editor.connection):
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+
+# the index is built by two table scans without blocking writes, it is
+# left invalid if the build fails, so no lock timeout here
+AddIndexConcurrently = postgres_operations.AddIndexConcurrently
+RemoveIndexConcurrently = postgres_operations.RemoveIndexConcurrently
+
+
+class AddConstraintNotValid(
+    LockTimeoutMixin, postgres_operations.AddConstraintNotValid
+):
+    """Add a check constraint without checking the existing rows."""
+
+
+class ValidateConstraint(
+    LockTimeoutMixin, postgres_operations.ValidateConstraint
+):
+    """Check the existing rows against the NOT VALID constraint."""
+
+
+def backfill(
+    connection: BaseDatabaseWrapper,
+    table: str,
+    column: str,
+    value_sql: str,
+    batch_size: int,
+    pause: float,
+) -> int:
+    """
+    Set the column of all rows by batches of the id ranges.
+
+    Every batch is committed separately and locks only its rows. Rows
+    already having the value are skipped, so a stopped backfill can be
+    run again. Backfills compute the column from the data the rows
+    already have, so they are not recorded in the change log and don't
+    change the row versions.
+
+    Args:
+        connection (BaseDatabaseWrapper): Database connection.
+        table (str): Table name.
+        column (str): Column name.
+        value_sql (str): SQL expression of the value over the row.
+        batch_size (int): Number of ids in a batch.
+        pause (float): Seconds to wait after each batch.
+
+    Returns:
+        int: Number of updated rows.
+    """
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT coalesce(max(id), 0) FROM {quote(table)}")
+        (max_id,) = cursor.fetchone()
+
+    updated = 0
+    for start in range(0, max_id, batch_size):
+        with (
+            transaction.atomic(using=connection.alias),
+            connection.cursor() as cursor,
+        ):
+            cursor.execute(SKIP_CHANGELOG_SQL)
+            cursor.execute(
+                f"UPDATE {quote(table)} SET {quote(column)} = {value_sql} "
+                "WHERE id > %s AND id <= %s "
+                f"AND {quote(column)} IS DISTINCT FROM {value_sql}",
+                (start, start + batch_size),
+            )
+            updated += cursor.rowcount
+        time.sleep(pause)
+    return updated
+
+
+class BackfillColumn(Operation):
+    """
+    Fill the column of the existing rows by short batches.
+
+    Args:
+        model_name (str): Name of the model.
+        name (str): Name of the field.
+        value_sql (str): SQL expression of the value over the row.
+        batch_size (int | None): Number of ids in a batch, 'BATCH_SIZE'
+            of the settings by default.
+        pause_ms (int | None): Pause after each batch, 'PAUSE_MS' of
+            the settings by default.
+    """
+
+    atomic = False
+    reduces_to_sql = False
+    reversible = True
+
+    def __init__(
+        self,
+        model_name: str,
+        name: str,
+        value_sql: str,
+        batch_size: int | None = None,
+        pause_ms: int | None = None,
+    ) -> None:
+        """Initialize the operation."""
+        self.model_name = model_name
+        self.name = name
+        self.value_sql = value_sql
+        self.batch_size = batch_size
+        self.pause_ms = pause_ms
+
+    def deconstruct(self) -> tuple[str, list, dict]:
+        """
+        Get the arguments to write the operation into a migration.
+
+        Returns:
+            tuple[str, list, dict]: Name, args and kwargs.
+        """
+        kwargs = {
+            "model_name": self.model_name,
+            "name": self.name,
+            "value_sql": self.value_sql,
+        }
+        if self.batch_size is not None:
+            kwargs["batch_size"] = self.batch_size
+        if self.pause_ms is not None:
+            kwargs["pause_ms"] = self.pause_ms
+        return (self.__class__.__name__, [], kwargs)
+
+    def describe(self) -> str:
+        """
+        Get the description shown by the migration commands.
+
+        Returns:
+            str: Description.
+        """
+        return f"Backfill {self.name} of model {self.model_name} by batches"
+
+    @property
+    def migration_name_fragment(self) -> str:
+        """
+        Get the part of the migration name generated for the operation.
+
+        Returns:
+            str: Name fragment.
+        """
+        return f"backfill_{self.model_name.lower()}_{self.name.lower()}"
+
+    def get_options(self) -> tuple[int, float]:
+        """
+        Get the batch size and the pause.
+
+        Returns:
+            tuple[int, float]: Ids in a batch and the pause in seconds.
+        """
+        options: dict = settings.SCHEMA_CHANGES
+        batch_size: int = self.batch_size or options["BATCH_SIZE"]
+        pause_ms: int = (
+            options["PAUSE_MS"] if self.pause_ms is None else self.pause_ms
+        )
+        return batch_size, pause_ms / 1000
+
+    def state_forwards(self, app_label: str, state: ProjectState) -> None:
+        """
+        Keep the state, only the data is changed.
+
+        Args:
+            app_label (str): Label of the app.
+            state (ProjectState): Project state.
+        """
+
+    def database_forwards(
+        self,
+        app_label: str,
+        schema_editor: BaseDatabaseSchemaEditor,
+        from_state: ProjectState,
+        to_state: ProjectState,
+    ) -> None:
+        """
+        Fill the column by batches.
+
+        Args:
+            app_label (str): Label of the app.
+            schema_editor (BaseDatabaseSchemaEditor): Schema editor.
+            from_state (ProjectState): State before the operation.
+            to_state (ProjectState): State after the operation.
+
+        Raises:
+            NotSupportedError: The migration is run in a transaction.
+        """
+        connection: BaseDatabaseWrapper = schema_editor.connection
+        if connection.in_atomic_block:
+            raise NotSupportedError(
+                f"The {self.__class__.__name__} operation cannot be executed "
+                "inside a transaction (set atomic = False on the migration)."
+            )
+        model: type[Model] = to_state.apps.get_model(
+            app_label, self.model_name
+        )
+        if not self.allow_migrate_model(connection.alias, model):
+            return
+        batch_size, pause = self.get_options()
+        backfill(
+            connection,
+            table=model._meta.db_table,
+            column=model._meta.get_field(self.name).column,
+            value_sql=self.value_sql,
+            batch_size=batch_size,
+            pause=pause,
+        )
+
+    def database_backwards(
+        self,
+        app_label: str,
+        schema_editor: BaseDatabaseSchemaEditor,
+        from_state: ProjectState,
+        to_state: ProjectState,
+    ) -> None:
+        """
+        Keep the data, the column is removed by its own operation.
+
+        Args:
+            app_label (str): Label of the app.
+            schema_editor (BaseDatabaseSchemaEditor): Schema editor.
+            from_state (ProjectState): State before the operation.
+            to_state (ProjectState): State after the operation.
+        """
+
+
+class OperationPlan(NamedTuple):
+    """Locks and the estimated duration of a migration operation."""
+
+    migration: str
+    description: str
+    lock: str
+    # what is blocked while the operation runs
+    blocks: str
+    seconds: float | None
+    note: str = ""
+
+
+# locks of the operations which are not timed, by their classes
+STATIC_LOCKS: dict[type[Operation], tuple[str, str, str]] = {
+    postgres_operations.RemoveIndexConcurrently: (
+        "SHARE UPDATE EXCLUSIVE",
+        "nothing",
+        "",
+    ),
+    postgres_operations.AddConstraintNotValid: (
+        "ACCESS EXCLUSIVE",
+        "reads and writes, briefly",
+        "existing rows are not checked",
+    ),
+    operations.RemoveIndex: ("ACCESS EXCLUSIVE", "reads and writes", ""),
+    operations.AddField: (
+        "ACCESS EXCLUSIVE",
+        "reads and writes, briefly",
+        "a constant default doesn't rewrite the table",
+    ),
+    operations.RemoveField: (
+        "ACCESS EXCLUSIVE",
+        "reads and writes, briefly",
+        "",
+    ),
+    operations.AlterField: (
+        "ACCESS EXCLUSIVE",
+        "reads and writes",
+        "a type change rewrites the table",
+    ),
+    operations.RunSQL: ("unknown", "unknown", "review the SQL"),
+    operations.RunPython: ("unknown", "unknown", "review the code"),
+}
+
+
+class Planner:
+    """
+    Estimator of the migration operations on a sample of the tables.
+
+    The sample is a copy of the table with its indexes and 'percent' of
+    its pages, made in a transaction rolled back at the end. Durations
+    on the sample are scaled by the number of rows of the table.
+
+    Args:
+        connection (BaseDatabaseWrapper): Database connection.
+        schema_editor (BaseDatabaseSchemaEditor): Schema editor making
+            the SQL of the operations.
+        percent (float): Share of the table pages in the sample.
+    """
+
+    def __init__(
+        self,
+        connection: BaseDatabaseWrapper,
+        schema_editor: BaseDatabaseSchemaEditor,
+        percent: float,
+    ) -> None:
+        """Initialize the planner without samples."""
+        self.connection = connection
+        self.schema_editor = schema_editor
+        self.percent = percent
+        # rows of the table and of its sample by table names
+        self.sizes: dict[str, tuple[int, int]] = {}
+
+    def make_sample(self, table: str) -> float:
+        """
+        Copy a sample of the table.
+
+        Args:
+            table (str): Table name.
+
+        Returns:
+            float: Ratio of the table rows to the sample rows.
+        """
+        quote = self.connection.ops.quote_name
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SAMPLE_TABLE}")
+            cursor.execute(
+                f"CREATE TEMP TABLE {SAMPLE_TABLE} "
+                f"(LIKE {quote(table)} INCLUDING ALL)"
+            )
+            cursor.execute(
+                f"INSERT INTO {SAMPLE_TABLE} SELECT * FROM {quote(table)} "
+                "TABLESAMPLE SYSTEM (%s) REPEATABLE (0)",
+                [self.percent],
+            )
+            sample_rows: int = cursor.rowcount
+            cursor.execute(f"ANALYZE {SAMPLE_TABLE}")
+            if table not in self.sizes:
+                cursor.execute(f"SELECT count(*) FROM {quote(table)}")
+                self.sizes[table] = (cursor.fetchone()[0], sample_rows)
+        rows, _ = self.sizes[table]
+        return rows / max(sample_rows, 1)
+
+    def time_sql(self, sql: str) -> float:
+        """
+        Run the SQL on the sample in a savepoint rolled back after it.
+
+        Args:
+            sql (str): SQL statement.
+
+        Returns:
+            float: Duration in seconds.
+        """
+        with transaction.atomic(using=self.connection.alias):
+            started: float = time.perf_counter()
+            with self.connection.cursor() as cursor:
+                cursor.execute(sql)
+            duration: float = time.perf_counter() - started
+            transaction.set_rollback(True, using=self.connection.alias)
+        return duration
+
+    def time_on_sample(self, model: type[Model], statement: object) -> float:
+        """
+        Time the DDL statement of the table on its sample.
+
+        Args:
+            model (type[Model]): Model of the table.
+            statement (object): Django 'Statement' referencing the table.
+
+        Returns:
+            float: Estimated duration on the table in seconds.
+        """
+        scale: float = self.make_sample(model._meta.db_table)
+        statement.rename_table_references(model._meta.db_table, SAMPLE_TABLE)
+        return self.time_sql(str(statement)) * scale
+
+    def time_check(
+        self,
+        model: type[Model],
+        constraint: CheckConstraint,
+    ) -> tuple[float | None, str]:
+        """
+        Time the check of the existing rows against the constraint.
+
+        Args:
+            model (type[Model]): Model of the table.
+            constraint (CheckConstraint): Checked constraint.
+
+        Returns:
+            tuple[float | None, str]: Estimated duration and a note.
+        """
+        try:
+            return (
+                self.time_on_sample(
+                    model, constraint.create_sql(model, self.schema_editor)
+                ),
+                "",
+            )
+        except DatabaseError as error:
+            return None, f"fails on the sample: {str(error).splitlines()[0]}"
+
+    def plan_operation(
+        self,
+        migration: str,
+        operation: Operation,
+        app_label: str,
+        from_state: ProjectState,
+        to_state: ProjectState,
+    ) -> OperationPlan:
+        """
+        Get the locks and the estimated duration of the operation.
+
+        Args:
+            migration (str): Name of the migration.
+            operation (Operation): Migration operation.
+            app_label (str): Label of the app.
+            from_state (ProjectState): State before the operation.
+            to_state (ProjectState): State after the operation.
+
+        Returns:
+            OperationPlan: Plan of the operation.
+        """
+        description: str = operation.describe()
+
+        if isinstance(operation, operations.AddIndex):
+            model = to_state.apps.get_model(app_label, operation.model_name)
+            seconds = self.time_on_sample(
+                model, operation.index.create_sql(model, self.schema_editor)
+            )
+            if isinstance(operation, postgres_operations.AddIndexConcurrently):
+                # two scans of the table instead of one
+                return OperationPlan(
+                    migration,
+                    description,
+                    "SHARE UPDATE EXCLUSIVE",
+                    "nothing",
+                    2 * seconds,
+                    "waits for running transactions",
+                )
+            return OperationPlan(
+                migration, description, "SHARE", "writes", seconds
+            )
+
+        if isinstance(operation, postgres_operations.ValidateConstraint):
+            model = from_state.apps.get_model(app_label, operation.model_name)
+            constraint = from_state.models[
+                app_label, operation.model_name.lower()
+            ].get_constraint_by_name(operation.name)
+            seconds, note = self.time_check(model, constraint)
+            return OperationPlan(
+                migration,
+                description,
+                "SHARE UPDATE EXCLUSIVE",
+                "nothing",
+                seconds,
+                note,
+            )
+
+        if isinstance(operation, operations.AddConstraint) and not isinstance(
+            operation, postgres_operations.AddConstraintNotValid
+        ):
+            if not isinstance(operation.constraint, CheckConstraint):
+                return OperationPlan(
+                    migration,
+                    description,
+                    "SHARE ROW EXCLUSIVE",
+                    "writes",
+                    None,
+                    "builds a unique index",
+                )
+            model = to_state.apps.get_model(app_label, operation.model_name)
+            seconds, note = self.time_check(model, operation.constraint)
+            return OperationPlan(
+                migration,
+                description,
+                "ACCESS EXCLUSIVE",
+                "reads and writes",
+                seconds,
+                note or "use AddConstraintNotValid and ValidateConstraint",
+            )
+
+        if isinstance(operation, BackfillColumn):
+            model = to_state.apps.get_model(app_label, operation.model_name)
+            field = model._meta.get_field(operation.name)
+            scale: float = self.make_sample(model._meta.db_table)
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    f"ALTER TABLE {SAMPLE_TABLE} ADD COLUMN IF NOT EXISTS "
+                    f"{self.connection.ops.quote_name(field.column)} "
+                    f"{field.db_type(self.connection)}"
+                )
+            seconds = scale * self.time_sql(
+                f"UPDATE {SAMPLE_TABLE} SET "
+                f"{self.connection.ops.quote_name(field.column)} = "
+                f"{operation.value_sql}"
+            )
+            batch_size, pause = operation.get_options()
+            rows, _ = self.sizes[model._meta.db_table]
+            return OperationPlan(
+                migration,
+                description,
+                "ROW EXCLUSIVE",
+                f"rows of a batch of {batch_size}",
+                seconds + pause * -(-rows // batch_size),
+                "the estimate includes pauses",
+            )
+
+        for operation_class, (lock, blocks, note) in STATIC_LOCKS.items():
+            if isinstance(operation, operation_class):
+                return OperationPlan(
+                    migration, description, lock, blocks, None, note
+                )
+        return OperationPlan(
+            migration, description, "unknown", "unknown", None
+        )
+
+    def plan_migration(
+        self,
+        migration: Migration,
+        state: ProjectState,
+    ) -> list[OperationPlan]:
+        """
+        Get the plans of the operations of the migration.
+
+        Args:
+            migration (Migration): Migration to be applied.
+            state (ProjectState): State before the migration.
+
+        Returns:
+            list[OperationPlan]: Plans in the order of the operations.
+        """
+        plans: list[OperationPlan] = []
+        for operation in migration.operations:
+            to_state: ProjectState = state.clone()
+            operation.state_forwards(migration.app_label, to_state)
+            plans.append(
+                self.plan_operation(
+                    migration.name,
+                    operation,
+                    migration.app_label,
+                    state,
+                    to_state,
+                )
+            )
+            state = to_state
+        return plans
+
+
+def plan_migrations(
+    connection: BaseDatabaseWrapper,
+    app_label: str,
+    target: str | None,
+    percent: float,
+) -> list[OperationPlan]:
+    """
+    Get the plans of the operations of the migrations to be applied.
+
+    Nothing is changed: the operations are timed on samples in
+    a transaction rolled back at the end.
+
+    Args:
+        connection (BaseDatabaseWrapper): Database connection.
+        app_label (str): Label of the app.
+        target (str | None): Name or prefix of the last migration to be
+            applied, the latest one if None.
+        percent (float): Share of the table pages in the samples.
+
+    Raises:
+        ValueError: The target is older than the applied migrations.
+
+    Returns:
+        list[OperationPlan]: Plans of all operations in the order they
+            are applied.
+    """
+    executor = MigrationExecutor(connection)
+    targets: list[tuple[str, str]] = (
+        [
+            (
+                app_label,
+                executor.loader.get_migration_by_prefix(
+                    app_label, target
+                ).name,
+            )
+        ]
+        if target
+        else executor.loader.graph.leaf_nodes(app_label)
+    )
+
+    plans: list[OperationPlan] = []
+    with transaction.atomic(using=connection.alias):
+        planner = Planner(
+            connection,
+            connection.schema_editor(collect_sql=True, atomic=False),
+            percent,
+        )
+        for migration, backwards in executor.migration_plan(targets):
+            if backwards:
+                raise ValueError(
+                    f"{migration.app_label}.{migration.name} would be "
+                    "unapplied, use the migrate command."
+                )
+            state: ProjectState = executor.loader.project_state(
+                (migration.app_label, migration.name), at_end=False
+            )
+            plans.extend(planner.plan_migration(migration, state))
+        transaction.set_rollback(True, using=connection.alias)
+    return plans
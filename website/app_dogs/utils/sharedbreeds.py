@@ -0,0 +1,555 @@
+"""Snapshot of the breeds and their aggregates shared by worker processes.
+
+The snapshot lives in memory mapped files of a shared memory directory
+('/dev/shm' on Linux), so all workers map the same pages: the breeds
+take the memory once and every worker sees the same data.
+
+A data file holds one generation of the snapshot: a JSON header and
+a NumPy column per field, read in place without copying. A small
+control file holds the number of the current generation and a counter
+of breed writes. The process committing a breed write increments
+the counter, which makes the snapshot stale for all workers at once,
+and writes the next generation from a background thread.
+
+A request reads the snapshot only if it has seen all counted writes and
+is younger than 'MAX_AGE_SECONDS', which bounds the lag of the dog
+aggregates and of breed writes made around the app. Otherwise the
+request reads the database and a background thread writes a new
+generation. Requests inside a transaction always read the database,
+so they see its uncommitted writes.
+"""
+
+import fcntl
+import json
+import mmap
+import os
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.transactions import read_only_transaction
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, Count
+
+# generation of the data file and counter of the breed writes
+CONTROL_SIZE = 2 * np.dtype(np.uint64).itemsize
+CONTROL_SUFFIX = ".control"
+# held while the control file is changed
+LOCK_SUFFIX = ".lock"
+# held while a generation is read from the database and written
+BUILD_SUFFIX = ".build"
+TEMPORARY_SUFFIX = ".tmp"
+# columns start at offsets aligned to this
+ALIGNMENT = 8
+# type of the header length at the start of a data file
+LENGTH_DTYPE = np.dtype(np.uint64)
+
+BREED_FIELDS: tuple[str, ...] = (
+    "id",
+    "name",
+    "size",
+    "friendliness",
+    "trainability",
+    "shedding_amount",
+    "exercise_needs",
+    "version",
+)
+COLUMN_DTYPES: dict[str, str] = {
+    "id": "int64",
+    "size": "int8",
+    "friendliness": "int16",
+    "trainability": "int16",
+    "shedding_amount": "int16",
+    "exercise_needs": "int16",
+    "version": "int64",
+    "dog_count": "int64",
+    # NaN for breeds without dogs
+    "avg_age": "float64",
+}
+SIZE_FIELD = Breed._meta.get_field("size")
+
+
+def align(offset: int) -> int:
+    """
+    Round the offset up to the column alignment.
+
+    Args:
+        offset (int): Offset in bytes.
+
+    Returns:
+        int: Aligned offset.
+    """
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def get_base_path() -> Path:
+    """
+    Get the path of the snapshot files without their suffixes.
+
+    The name includes the database name, so the test database doesn't
+    share the snapshot with the main one.
+
+    Returns:
+        Path: Base path of the files.
+    """
+    options: dict = settings.SHARED_BREED_SNAPSHOT
+    return Path(options["DIRECTORY"]) / (
+        f"{options['NAME']}_{connection.settings_dict['NAME']}"
+    )
+
+
+def read_columns() -> dict[str, np.ndarray]:
+    """
+    Read the breeds and their dog aggregates in one database snapshot.
+
+    Returns:
+        dict[str, np.ndarray]: Columns ordered by the breed ids.
+    """
+    with read_only_transaction("REPEATABLE READ"):
+        rows: list[tuple] = list(
+            Breed.objects.order_by("id").values_list(*BREED_FIELDS)
+        )
+        aggregates: dict[int, tuple[int, float]] = {
+            breed_id: (dog_count, avg_age)
+            for breed_id, dog_count, avg_age in Dog.objects.filter(
+                breed__isnull=False
+            )
+            .order_by()
+            .values_list("breed")
+            .annotate(Count("id"), Avg("age"))
+        }
+
+    values: dict[str, list] = {
+        name: [row[position] for row in rows]
+        for position, name in enumerate(BREED_FIELDS)
+    }
+    values["size"] = [SIZE_FIELD.codes[size] for size in values["size"]]
+    values["dog_count"] = [
+        aggregates.get(breed_id, (0, None))[0] for breed_id in values["id"]
+    ]
+    values["avg_age"] = [
+        aggregates.get(breed_id, (0, None))[1] for breed_id in values["id"]
+    ]
+    columns: dict[str, np.ndarray] = {
+        name: np.array(column, dtype=COLUMN_DTYPES[name])
+        for name, column in values.items()
+        if name in COLUMN_DTYPES
+    }
+    # fixed width of the longest name
+    columns["name"] = np.array(values["name"], dtype=np.str_)
+    return columns
+
+
+def write_data(path: Path, columns: dict[str, np.ndarray], meta: dict) -> None:
+    """
+    Write the generation to a file.
+
+    The file is written under a temporary name and renamed, so readers
+    never map a half written file.
+
+    Args:
+        path (Path): Path of the data file.
+        columns (dict[str, np.ndarray]): Columns of the snapshot.
+        meta (dict): Other fields of the header.
+    """
+    layout: list[dict] = []
+    offset = 0
+    for name, column in columns.items():
+        layout.append(
+            {
+                "name": name,
+                "dtype": column.dtype.str,
+                "offset": offset,
+                "length": len(column),
+            }
+        )
+        offset = align(offset + column.nbytes)
+    header: bytes = json.dumps({**meta, "columns": layout}).encode()
+    start: int = align(LENGTH_DTYPE.itemsize + len(header))
+
+    temporary: Path = path.with_name(path.name + TEMPORARY_SUFFIX)
+    with open(temporary, "wb") as file:
+        file.write(np.array(len(header), dtype=LENGTH_DTYPE).tobytes())
+        file.write(header)
+        for column, info in zip(columns.values(), layout):
+            file.seek(start + info["offset"])
+            file.write(column.tobytes())
+        file.truncate(start + offset)
+    os.replace(temporary, path)
+
+
+class BreedSnapshot:
+    """
+    One generation of the snapshot read from its mapped file.
+
+    Columns are NumPy arrays over the mapped pages. The mapping is
+    closed when the last reference to the columns is dropped.
+
+    Args:
+        buffer (mmap.mmap): Read-only mapping of the data file.
+    """
+
+    def __init__(self, buffer: mmap.mmap) -> None:
+        """Read the header and map the columns."""
+        length = int(np.frombuffer(buffer, dtype=LENGTH_DTYPE, count=1)[0])
+        start: int = LENGTH_DTYPE.itemsize
+        stop: int = start + length
+        header: dict = json.loads(buffer[start:stop])
+        start = align(stop)
+
+        self.generation: int = header["generation"]
+        self.writes: int = header["writes"]
+        self.built_at: float = header["built_at"]
+        self.columns: dict[str, np.ndarray] = {
+            info["name"]: np.frombuffer(
+                buffer,
+                dtype=info["dtype"],
+                count=info["length"],
+                offset=start + info["offset"],
+            )
+            for info in header["columns"]
+        }
+        self.ids: np.ndarray = self.columns["id"]
+
+    def __len__(self) -> int:
+        """
+        Get the number of breeds.
+
+        Returns:
+            int: Number of breeds.
+        """
+        return len(self.ids)
+
+    def locate(self, breed_id: int) -> int | None:
+        """
+        Get the position of the breed in the columns.
+
+        Args:
+            breed_id (int): Id of the breed.
+
+        Returns:
+            int | None: Position or None if there is no such breed.
+        """
+        position = int(np.searchsorted(self.ids, breed_id))
+        if position < len(self.ids) and self.ids[position] == breed_id:
+            return position
+        return None
+
+    def make_breed(self, position: int) -> Breed:
+        """
+        Build the breed as if it was read from the database.
+
+        Args:
+            position (int): Position of the breed in the columns.
+
+        Returns:
+            Breed: Breed with the 'dog_count' attribute.
+        """
+        columns: dict[str, np.ndarray] = self.columns
+        values: list = [
+            (
+                SIZE_FIELD.decode(int(columns[name][position]))
+                if name == "size"
+                else columns[name][position].item()
+            )
+            for name in BREED_FIELDS
+        ]
+        breed: Breed = Breed.from_db(connection.alias, BREED_FIELDS, values)
+        breed.dog_count = int(columns["dog_count"][position])
+        return breed
+
+    def get_breed(self, breed_id: int) -> Breed | None:
+        """
+        Get the breed by its id.
+
+        Args:
+            breed_id (int): Id of the breed.
+
+        Returns:
+            Breed | None: Breed or None if there is no such breed.
+        """
+        position: int | None = self.locate(breed_id)
+        return None if position is None else self.make_breed(position)
+
+    def select(self, allowed: dict[str, list]) -> "SnapshotBreeds":
+        """
+        Get the breeds having the allowed values of the traits.
+
+        Args:
+            allowed (dict[str, list]): Allowed values by the traits.
+
+        Returns:
+            SnapshotBreeds: Found breeds ordered by ids.
+        """
+        mask: np.ndarray = np.ones(len(self), dtype=bool)
+        for name, values in allowed.items():
+            if name == "size":
+                values = [SIZE_FIELD.codes[value] for value in values]
+            mask &= np.isin(self.columns[name], values)
+        return SnapshotBreeds(self, np.flatnonzero(mask))
+
+    def get_aggregate(self, breed_id: int, name: str) -> int | float | None:
+        """
+        Get the aggregate of the dogs of the breed.
+
+        Args:
+            breed_id (int): Id of the breed.
+            name (str): 'dog_count' or 'avg_age'.
+
+        Returns:
+            int | float | None: Value, None for an unknown breed or
+                the average age of a breed without dogs.
+        """
+        position: int | None = self.locate(breed_id)
+        if position is None:
+            return None
+        value: int | float = self.columns[name][position].item()
+        return None if value != value else value
+
+
+class SnapshotBreeds(Sequence):
+    """
+    Breeds of the snapshot built only when they are read.
+
+    The paginator slices the sequence, so only the breeds of the page
+    are built.
+
+    Args:
+        snapshot (BreedSnapshot): Snapshot of the breeds.
+        positions (np.ndarray): Positions of the breeds in the columns.
+    """
+
+    def __init__(self, snapshot: BreedSnapshot, positions: np.ndarray) -> None:
+        """Initialize the sequence."""
+        self.snapshot = snapshot
+        self.positions = positions
+
+    def __len__(self) -> int:
+        """
+        Get the number of breeds.
+
+        Returns:
+            int: Number of breeds.
+        """
+        return len(self.positions)
+
+    def __getitem__(self, index: int | slice) -> Breed | list[Breed]:
+        """
+        Build the breed or the breeds of the slice.
+
+        Args:
+            index (int | slice): Index or slice of the breeds.
+
+        Returns:
+            Breed | list[Breed]: Built breeds.
+        """
+        if isinstance(index, slice):
+            return [
+                self.snapshot.make_breed(position)
+                for position in self.positions[index]
+            ]
+        return self.snapshot.make_breed(self.positions[index])
+
+
+class SharedBreedSnapshot:
+    """Access of a process to the shared snapshot of the breeds."""
+
+    def __init__(self) -> None:
+        """Initialize the access without mapped files."""
+        self.lock = threading.Lock()
+        self.base: Path | None = None
+        self.control: np.ndarray | None = None
+        self.snapshot: BreedSnapshot | None = None
+        self.thread: threading.Thread | None = None
+
+    def get_control(self, base: Path) -> np.ndarray:
+        """
+        Map the control file, it is created by the first process.
+
+        Args:
+            base (Path): Base path of the snapshot files.
+
+        Returns:
+            np.ndarray: Generation and the counter of writes.
+        """
+        with self.lock:
+            if self.base != base or self.control is None:
+                base.parent.mkdir(parents=True, exist_ok=True)
+                descriptor: int = os.open(
+                    base.with_name(base.name + CONTROL_SUFFIX),
+                    os.O_RDWR | os.O_CREAT,
+                    0o600,
+                )
+                try:
+                    if os.fstat(descriptor).st_size < CONTROL_SIZE:
+                        os.ftruncate(descriptor, CONTROL_SIZE)
+                    buffer = mmap.mmap(descriptor, CONTROL_SIZE)
+                finally:
+                    os.close(descriptor)
+                self.base = base
+                self.control = np.frombuffer(buffer, dtype=np.uint64)
+                self.snapshot = None
+            return self.control
+
+    @staticmethod
+    @contextmanager
+    def locked(base: Path, suffix: str, blocking: bool = True) -> Iterator:
+        """
+        Hold the lock file shared by the processes.
+
+        Args:
+            base (Path): Base path of the snapshot files.
+            suffix (str): Suffix of the lock file.
+            blocking (bool): Whether to wait for the lock.
+
+        Raises:
+            BlockingIOError: The lock is held by another process.
+
+        Yields:
+            Iterator: The lock is held.
+        """
+        descriptor: int = os.open(
+            base.with_name(base.name + suffix), os.O_RDWR | os.O_CREAT, 0o600
+        )
+        try:
+            fcntl.flock(
+                descriptor, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB)
+            )
+            yield
+        finally:
+            os.close(descriptor)
+
+    def load(self, base: Path, generation: int) -> BreedSnapshot | None:
+        """
+        Map the data file of the generation.
+
+        Args:
+            base (Path): Base path of the snapshot files.
+            generation (int): Generation to map.
+
+        Returns:
+            BreedSnapshot | None: Snapshot or None if there is no
+                generation yet or it has been replaced and removed.
+        """
+        with self.lock:
+            if (
+                self.snapshot is not None
+                and self.snapshot.generation == generation
+            ):
+                return self.snapshot
+            if not generation:
+                return None
+            try:
+                with open(base.with_name(f"{base.name}.{generation}")) as file:
+                    buffer = mmap.mmap(
+                        file.fileno(), 0, access=mmap.ACCESS_READ
+                    )
+            except FileNotFoundError:
+                return None
+            self.snapshot = BreedSnapshot(buffer)
+            return self.snapshot
+
+    def get(self) -> BreedSnapshot | None:
+        """
+        Get the snapshot if it is fresh.
+
+        A missing or stale snapshot is written again in the background.
+
+        Returns:
+            BreedSnapshot | None: Snapshot or None if the database
+                should be read.
+        """
+        options: dict = settings.SHARED_BREED_SNAPSHOT
+        if not options["ENABLED"] or connection.in_atomic_block:
+            return None
+        base: Path = get_base_path()
+        control: np.ndarray = self.get_control(base)
+        generation, writes = int(control[0]), int(control[1])
+
+        snapshot: BreedSnapshot | None = self.load(base, generation)
+        if (
+            snapshot is not None
+            and snapshot.writes == writes
+            and time.time() - snapshot.built_at < options["MAX_AGE_SECONDS"]
+        ):
+            return snapshot
+        self.build_in_background()
+        return None
+
+    def build(self) -> bool:
+        """
+        Read the breeds and publish them as the next generation.
+
+        The counter of writes is taken before reading, so a write
+        committed in the meantime leaves the new generation stale.
+        Older files are removed except the previous generation, which
+        a worker may be just mapping.
+
+        Returns:
+            bool: Whether the generation was written, False if another
+                process was writing one.
+        """
+        base: Path = get_base_path()
+        control: np.ndarray = self.get_control(base)
+        try:
+            with self.locked(base, BUILD_SUFFIX, blocking=False):
+                writes = int(control[1])
+                columns: dict[str, np.ndarray] = read_columns()
+                with self.locked(base, LOCK_SUFFIX):
+                    generation: int = int(control[0]) + 1
+                    write_data(
+                        base.with_name(f"{base.name}.{generation}"),
+                        columns,
+                        {
+                            "generation": generation,
+                            "writes": writes,
+                            "built_at": time.time(),
+                        },
+                    )
+                    control[0] = generation
+        except BlockingIOError:
+            return False
+
+        for path in base.parent.glob(f"{base.name}.*"):
+            suffix: str = path.name.removeprefix(f"{base.name}.")
+            if suffix.isdigit() and int(suffix) < generation - 1:
+                path.unlink(missing_ok=True)
+        return True
+
+    def build_in_background(self) -> None:
+        """Start a thread writing the next generation unless it runs."""
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(
+                target=self.build_and_close, daemon=True
+            )
+            self.thread.start()
+
+    def build_and_close(self) -> None:
+        """Write the next generation and close the thread connection."""
+        try:
+            self.build()
+        finally:
+            connection.close()
+
+    def mark_written(self) -> None:
+        """Make the snapshot stale and write the next generation."""
+        base: Path = get_base_path()
+        control: np.ndarray = self.get_control(base)
+        with self.locked(base, LOCK_SUFFIX):
+            control[1] += 1
+        self.build_in_background()
+
+    def invalidate(self) -> None:
+        """Mark the snapshot stale after the commit of the breed write."""
+        if settings.SHARED_BREED_SNAPSHOT["ENABLED"]:
+            transaction.on_commit(self.mark_written)
+
+
+shared_breeds = SharedBreedSnapshot()
@@ -0,0 +1,258 @@
+"""Nearest-neighbour search of breeds by their traits.
+
+All breeds are kept in an in-memory NumPy matrix, one row per breed
+and one column per trait scaled to [0, 1]. Distances to all breeds are
+computed at once and the top-k is selected with 'argpartition'.
+The matrix is rebuilt lazily when the latest breed change visible in
+the change log differs from the one the matrix has been built at.
+"""
+
+import threading
+from collections.abc import Iterable
+
+import numpy as np
+from app_dogs.models import Breed
+from app_dogs.utils.changelog import Cursor, get_visible_changes
+from app_dogs.utils.choises import RatingChoice, SizeChioce
+
+RATING_FIELDS: tuple[str, ...] = (
+    "friendliness",
+    "trainability",
+    "shedding_amount",
+    "exercise_needs",
+)
+TRAIT_FIELDS: tuple[str, ...] = RATING_FIELDS + ("size",)
+
+SIZE_CODES: dict[str, int] = {
+    value: code for code, value in enumerate(SizeChioce.values)
+}
+
+# subtract the minimum and divide by the range of each trait
+TRAIT_OFFSETS = np.array(
+    [min(RatingChoice.values)] * len(RATING_FIELDS) + [0],
+    dtype=np.float32,
+)
+TRAIT_SCALES = np.array(
+    [max(RatingChoice.values) - min(RatingChoice.values)] * len(RATING_FIELDS)
+    + [len(SIZE_CODES) - 1],
+    dtype=np.float32,
+)
+
+
+def scale_traits(values: np.ndarray) -> np.ndarray:
+    """
+    Scale raw trait values to the [0, 1] range.
+
+    Args:
+        values (np.ndarray): Trait values in the TRAIT_FIELDS order,
+            size is given by its code.
+
+    Returns:
+        np.ndarray: Scaled float32 values.
+    """
+    return (np.asarray(values, dtype=np.float32) - TRAIT_OFFSETS) / (
+        TRAIT_SCALES
+    )
+
+
+def build_query(traits: dict) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Build the target traits and weights of the free-form search.
+
+    Args:
+        traits (dict): Desired raw trait values by trait names and
+            weights by '<trait>_weight' names. Missing traits are
+            ignored by the search.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Scaled target traits and weights.
+    """
+    values, weights = [], []
+    for name in TRAIT_FIELDS:
+        value = traits.get(name)
+        if value is None:
+            values.append(TRAIT_OFFSETS[len(values)])
+            weights.append(0.0)
+            continue
+
+        values.append(SIZE_CODES[value] if name == "size" else value)
+        weights.append(traits.get(f"{name}_weight", 1.0))
+
+    return scale_traits(values), np.array(weights, dtype=np.float32)
+
+
+class TraitMatrix:
+    """
+    Immutable matrix of scaled breed traits.
+
+    Args:
+        ids (np.ndarray): Sorted breed ids.
+        traits (np.ndarray): Scaled traits, a row per breed.
+        version (Cursor | None): Position of the latest breed change
+            the matrix has been built at.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        traits: np.ndarray,
+        version: Cursor | None = None,
+    ) -> None:
+        """Initialize the matrix from ready arrays."""
+        self.ids = ids
+        self.traits = traits
+        self.version = version
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[tuple],
+        version: Cursor | None = None,
+    ) -> "TraitMatrix":
+        """
+        Build the matrix from the breed rows.
+
+        Args:
+            rows (Iterable[tuple]): Rows of the breed id and raw traits
+                in the TRAIT_FIELDS order, sorted by id.
+            version (Cursor | None): Position of the latest breed
+                change.
+
+        Returns:
+            TraitMatrix: New matrix.
+        """
+        rows = [
+            (breed_id, *ratings, SIZE_CODES[size])
+            for breed_id, *ratings, size in rows
+        ]
+        data = np.array(rows, dtype=np.int64).reshape(
+            -1,
+            1 + len(TRAIT_FIELDS),
+        )
+        return cls(
+            ids=data[:, 0],
+            traits=scale_traits(data[:, 1:]),
+            version=version,
+        )
+
+    def __len__(self) -> int:
+        """
+        Get the number of breeds in the matrix.
+
+        Returns:
+            int: Number of rows.
+        """
+        return len(self.ids)
+
+    def get_traits(self, breed_id: int) -> np.ndarray | None:
+        """
+        Get the scaled traits of the breed.
+
+        Args:
+            breed_id (int): Breed id.
+
+        Returns:
+            np.ndarray | None: Traits or None if there is no such breed.
+        """
+        position = int(np.searchsorted(self.ids, breed_id))
+        if position == len(self.ids) or self.ids[position] != breed_id:
+            return None
+        return self.traits[position]
+
+    def nearest(
+        self,
+        target: np.ndarray,
+        weights: np.ndarray,
+        k: int,
+        exclude_id: int | None = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Find k breeds closest to the target traits.
+
+        The distance is the weighted Euclidean distance of scaled traits.
+        Equal distances are ordered by the breed id.
+
+        Args:
+            target (np.ndarray): Scaled target traits.
+            weights (np.ndarray): Non-negative weight of each trait.
+            k (int): Number of breeds to find.
+            exclude_id (int | None): Breed to skip, e.g. the target one.
+
+        Returns:
+            list[tuple[int, float]]: Breed ids and distances, closest
+                first.
+        """
+        distances = np.sqrt(
+            np.square(self.traits - target) @ weights.astype(np.float32)
+        )
+        if exclude_id is not None:
+            distances[self.ids == exclude_id] = np.inf
+
+        k = min(k, int(np.count_nonzero(np.isfinite(distances))))
+        if k <= 0:
+            return []
+
+        candidates = np.argpartition(distances, k - 1)[:k]
+        # break ties by the breed id, the ids are sorted already
+        order = candidates[np.lexsort((candidates, distances[candidates]))]
+
+        return [
+            (int(breed_id), float(distance))
+            for breed_id, distance in zip(self.ids[order], distances[order])
+        ]
+
+
+def get_version() -> Cursor | None:
+    """
+    Get the position of the latest visible breed change.
+
+    Changes of transactions still in progress are not visible, so
+    the version moves once all the changes before it are committed, even
+    if a later sequence has been committed first.
+
+    Returns:
+        Cursor | None: Pair of the transaction id and the sequence or None
+            if there are no changes.
+    """
+    return (
+        get_visible_changes()
+        .filter(model="breed")
+        .reverse()
+        .values_list("txid", "seq")
+        .first()
+    )
+
+
+class TraitMatrixCache:
+    """Lazily rebuilt matrix of all breeds shared by threads."""
+
+    def __init__(self) -> None:
+        """Initialize the cache without a matrix."""
+        self.matrix: TraitMatrix | None = None
+        self.lock = threading.Lock()
+
+    def get(self) -> TraitMatrix:
+        """
+        Get the matrix, rebuild it if breeds have changed.
+
+        Returns:
+            TraitMatrix: Matrix of all breeds.
+        """
+        version: Cursor | None = get_version()
+        matrix: TraitMatrix | None = self.matrix
+        if matrix is not None and matrix.version == version:
+            return matrix
+
+        with self.lock:
+            if self.matrix is None or self.matrix.version != version:
+                self.matrix = TraitMatrix.from_rows(
+                    Breed.objects.order_by("id").values_list(
+                        "id",
+                        *TRAIT_FIELDS,
+                    ),
+                    version=version,
+                )
+            return self.matrix
+
+
+trait_matrix_cache = TraitMatrixCache()
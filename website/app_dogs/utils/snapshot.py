@@ -0,0 +1,303 @@
+"""Columnar snapshots of the dogs and breeds for analytics.
+
+A snapshot is a directory with one NumPy '.npy' file per column of
+a table and 'manifest.json' describing the columns. Text columns with
+few distinct values are stored as integer codes with the dictionary of
+values in the manifest. Files are written and read as memory maps, so
+neither the export nor the load keeps the whole table in memory.
+
+All tables are read in one REPEATABLE READ transaction by server-side
+cursors. The manifest holds the change feed cursor taken in the same
+transaction, so a client can catch up on later changes via the feed.
+"""
+
+import json
+import shutil
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+from app_dogs.models import Breed, Dog
+from app_dogs.utils.changelog import encode_cursor, get_head_cursor
+from app_dogs.utils.transactions import read_only_transaction
+from django.conf import settings
+from django.db import connection
+from django.db.models import Model
+
+MANIFEST_NAME = "manifest.json"
+TEMPORARY_SUFFIX = ".tmp"
+SNAPSHOT_NAME_FORMAT = "%Y%m%dT%H%M%S%f"
+# codes of missing values: ids start at 1, dictionary codes at 0
+NULL_ID = 0
+NULL_CODE = -1
+
+
+class Column(NamedTuple):
+    """
+    Stored column of a table.
+
+    Kinds of columns:
+        - "number": the value as is, NULL is stored as 0;
+        - "text": fixed width unicode of the longest value;
+        - "choice": code of a CodedChoiceField, the dictionary is
+          the choices;
+        - "category": code in the dictionary built while reading,
+          NULL is stored as -1.
+    """
+
+    name: str
+    kind: str
+    dtype: str
+
+
+SNAPSHOT_TABLES: dict[str, tuple[type[Model], tuple[Column, ...]]] = {
+    "dogs": (
+        Dog,
+        (
+            Column("id", "number", "int64"),
+            Column("name", "text", "U"),
+            Column("age", "number", "int16"),
+            Column("breed_id", "number", "int64"),
+            Column("gender", "choice", "int8"),
+            Column("color", "category", "int32"),
+            Column("favorite_food", "category", "int32"),
+            Column("favorite_toy", "category", "int32"),
+        ),
+    ),
+    "breeds": (
+        Breed,
+        (
+            Column("id", "number", "int64"),
+            Column("name", "text", "U"),
+            Column("size", "choice", "int8"),
+            Column("friendliness", "number", "int8"),
+            Column("trainability", "number", "int8"),
+            Column("shedding_amount", "number", "int8"),
+            Column("exercise_needs", "number", "int8"),
+        ),
+    ),
+}
+
+
+def get_root() -> Path:
+    """
+    Get the directory of all snapshots.
+
+    Returns:
+        Path: Directory path.
+    """
+    return Path(settings.SNAPSHOTS["DIRECTORY"])
+
+
+def get_table_sizes(
+    model: type[Model],
+    columns: tuple[Column, ...],
+) -> tuple[int, dict[str, int]]:
+    """
+    Get the number of rows and the length of the longest texts.
+
+    Args:
+        model (type[Model]): Model of the table.
+        columns (tuple[Column, ...]): Stored columns.
+
+    Returns:
+        tuple[int, dict[str, int]]: Rows and lengths by the text columns.
+    """
+    text_columns: list[str] = [
+        column.name for column in columns if column.kind == "text"
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*)"
+            + "".join(
+                f", coalesce(max(char_length({name})), 1)"
+                for name in text_columns
+            )
+            + f" FROM {model._meta.db_table}"
+        )
+        count, *lengths = cursor.fetchone()
+    return count, dict(zip(text_columns, lengths, strict=True))
+
+
+def write_table(
+    model: type[Model],
+    columns: tuple[Column, ...],
+    directory: Path,
+    chunk_size: int,
+) -> dict:
+    """
+    Write the columns of the table to memory mapped '.npy' files.
+
+    Args:
+        model (type[Model]): Model of the table.
+        columns (tuple[Column, ...]): Stored columns.
+        directory (Path): Directory of the table files.
+        chunk_size (int): Number of rows fetched at once.
+
+    Returns:
+        dict: Manifest of the table.
+    """
+    count, lengths = get_table_sizes(model, columns)
+    directory.mkdir(parents=True)
+    arrays: dict[str, np.ndarray] = {
+        column.name: np.lib.format.open_memmap(
+            directory / f"{column.name}.npy",
+            mode="w+",
+            dtype=(
+                f"<U{lengths[column.name]}"
+                if column.kind == "text"
+                else column.dtype
+            ),
+            shape=(count,),
+        )
+        for column in columns
+    }
+    categories: dict[str, dict[str, int]] = {
+        column.name: {} for column in columns if column.kind == "category"
+    }
+
+    offset = 0
+    # the chunked cursor is a server-side cursor on PostgreSQL
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(
+            f"SELECT {', '.join(column.name for column in columns)} "
+            f"FROM {model._meta.db_table} ORDER BY id"
+        )
+        while rows := cursor.fetchmany(chunk_size):
+            # rows are limited by the count taken in the same snapshot
+            stop: int = offset + len(rows)
+            for column, values in zip(columns, zip(*rows), strict=True):
+                if column.kind == "category":
+                    codes: dict[str, int] = categories[column.name]
+                    values = [
+                        (
+                            NULL_CODE
+                            if value is None
+                            else codes.setdefault(value, len(codes))
+                        )
+                        for value in values
+                    ]
+                elif column.kind == "number":
+                    values = [
+                        NULL_ID if value is None else value for value in values
+                    ]
+                arrays[column.name][offset:stop] = values
+            offset = stop
+
+    manifest_columns: dict[str, dict] = {}
+    for column in columns:
+        arrays[column.name].flush()
+        manifest_columns[column.name] = {
+            "file": f"{directory.name}/{column.name}.npy",
+            "kind": column.kind,
+            "dtype": str(arrays[column.name].dtype),
+        }
+        if column.kind == "choice":
+            manifest_columns[column.name]["dictionary"] = (
+                model._meta.get_field(column.name).values
+            )
+        elif column.kind == "category":
+            manifest_columns[column.name]["dictionary"] = list(
+                categories[column.name]
+            )
+    del arrays
+    return {"rows": count, "columns": manifest_columns}
+
+
+def write_snapshot(chunk_size: int | None = None) -> dict:
+    """
+    Write a new snapshot of all tables and remove the oldest ones.
+
+    The snapshot is written to a temporary directory and renamed when
+    it is complete, so readers never see a partial snapshot.
+
+    Args:
+        chunk_size (int | None): Number of rows fetched at once, from
+            the settings by default.
+
+    Returns:
+        dict: Manifest of the snapshot.
+    """
+    chunk_size = chunk_size or settings.SNAPSHOTS["CHUNK_SIZE"]
+    created: datetime = datetime.now(UTC)
+    name: str = created.strftime(SNAPSHOT_NAME_FORMAT)
+    directory: Path = get_root() / f"{name}{TEMPORARY_SUFFIX}"
+
+    try:
+        with read_only_transaction("REPEATABLE READ"):
+            manifest: dict = {
+                "name": name,
+                "created": created.isoformat(),
+                "cursor": encode_cursor(get_head_cursor()),
+                "tables": {
+                    table: write_table(
+                        model, columns, directory / table, chunk_size
+                    )
+                    for table, (model, columns) in SNAPSHOT_TABLES.items()
+                },
+            }
+        (directory / MANIFEST_NAME).write_text(json.dumps(manifest))
+        directory.rename(get_root() / name)
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+    keep: int = settings.SNAPSHOTS["KEEP"]
+    for old_name in list_snapshots()[keep:]:
+        shutil.rmtree(get_root() / old_name, ignore_errors=True)
+    return manifest
+
+
+def list_snapshots() -> list[str]:
+    """
+    Get names of the complete snapshots from the newest one.
+
+    Returns:
+        list[str]: Snapshot names.
+    """
+    if not get_root().is_dir():
+        return []
+    return sorted(
+        (
+            path.name
+            for path in get_root().iterdir()
+            if (path / MANIFEST_NAME).is_file()
+        ),
+        reverse=True,
+    )
+
+
+def get_manifest(name: str) -> dict | None:
+    """
+    Get the manifest of the snapshot.
+
+    Args:
+        name (str): Snapshot name.
+
+    Returns:
+        dict | None: Manifest or None if there is no such snapshot.
+    """
+    if name not in list_snapshots():
+        return None
+    return json.loads((get_root() / name / MANIFEST_NAME).read_text())
+
+
+def load_snapshot(directory: Path) -> dict[str, dict[str, np.ndarray]]:
+    """
+    Load the columns of the snapshot as read-only memory maps.
+
+    Args:
+        directory (Path): Directory of the snapshot.
+
+    Returns:
+        dict[str, dict[str, np.ndarray]]: Arrays by tables and columns.
+    """
+    manifest: dict = json.loads((directory / MANIFEST_NAME).read_text())
+    return {
+        table: {
+            name: np.load(directory / column["file"], mmap_mode="r")
+            for name, column in table_manifest["columns"].items()
+        }
+        for table, table_manifest in manifest["tables"].items()
+    }
@@ -0,0 +1,199 @@
+"""Live push of the Dog and Breed changes to the subscribed clients.
+
+The change log trigger publishes every change with NOTIFY (see
+the migrations). Each worker process holds a single LISTEN connection
+and fans the notifications out to all subscribers of the process.
+A subscriber that doesn't keep up with the stream is disconnected
+instead of buffering events without a limit.
+"""
+
+import asyncio
+import json
+
+import psycopg2
+from django.conf import settings
+from django.db import connections
+
+CHANNEL = "app_dogs_changes"
+
+OVERFLOW_EVENT = "overflow"
+RESET_EVENT = "reset"
+
+
+def open_listen_connection() -> psycopg2.extensions.connection:
+    """
+    Open a new database connection listening to the change channel.
+
+    It is a blocking call, run it outside of the event loop.
+
+    Returns:
+        psycopg2.extensions.connection: Connection in autocommit mode.
+    """
+    wrapper = connections.create_connection("default")
+    connection = wrapper.get_new_connection(wrapper.get_connection_params())
+    connection.autocommit = True
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"LISTEN {CHANNEL};")
+
+    return connection
+
+
+class Subscriber:
+    """
+    Client of the change stream with a bounded queue of events.
+
+    Args:
+        breed_ids (set[int] | None): Breeds the client is subscribed
+            to. All changes are received if it is empty.
+        queue_size (int): Max number of events waiting for the client.
+    """
+
+    def __init__(self, breed_ids: set[int] | None, queue_size: int) -> None:
+        """Initialize the subscriber with an empty queue."""
+        self.breed_ids: set[int] = breed_ids or set()
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def accepts(self, event: dict) -> bool:
+        """
+        Check whether the event matches the subscription.
+
+        Args:
+            event (dict): Change event.
+
+        Returns:
+            bool: True if the event should be sent to the client.
+        """
+        return not self.breed_ids or event.get("breed_id") in self.breed_ids
+
+    def push(self, event: dict) -> None:
+        """
+        Put the event into the queue without waiting.
+
+        The subscriber is closed if its queue is full.
+
+        Args:
+            event (dict): Change event.
+        """
+        if self.closed or not self.accepts(event):
+            return
+
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.close(OVERFLOW_EVENT)
+
+    def close(self, reason: str) -> None:
+        """
+        Drop pending events and put the final event into the queue.
+
+        Args:
+            reason (str): Name of the final event.
+        """
+        if self.closed:
+            return
+
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait({"event": reason})
+
+
+class ChangeBroadcaster:
+    """
+    Shared LISTEN connection of the worker and its subscribers.
+
+    The connection is opened with the first subscriber and closed
+    after the last one has gone.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the broadcaster without a connection."""
+        self.subscribers: set[Subscriber] = set()
+        self.connection: psycopg2.extensions.connection | None = None
+        self.fileno: int | None = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.lock: asyncio.Lock | None = None
+
+    async def subscribe(self, breed_ids: set[int] | None) -> Subscriber:
+        """
+        Register a new subscriber and start listening if required.
+
+        Args:
+            breed_ids (set[int] | None): Breeds the client is subscribed
+                to. All changes are received if it is empty.
+
+        Returns:
+            Subscriber: Subscriber receiving the events.
+        """
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.stop(RESET_EVENT)
+            self.loop = loop
+            self.lock = asyncio.Lock()
+
+        subscriber = Subscriber(
+            breed_ids=breed_ids,
+            queue_size=settings.CHANGE_STREAM["QUEUE_SIZE"],
+        )
+        async with self.lock:
+            if self.connection is None:
+                self.connection = await asyncio.to_thread(
+                    open_listen_connection
+                )
+                self.fileno = self.connection.fileno()
+                loop.add_reader(self.fileno, self.on_readable)
+            self.subscribers.add(subscriber)
+
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """
+        Remove the subscriber and stop listening if it was the last one.
+
+        Args:
+            subscriber (Subscriber): Subscriber to remove.
+        """
+        self.subscribers.discard(subscriber)
+        if not self.subscribers:
+            self.stop()
+
+    def on_readable(self) -> None:
+        """Read notifications from the connection and fan them out."""
+        try:
+            self.connection.poll()
+        except psycopg2.Error:
+            self.stop(RESET_EVENT)
+            return
+
+        while self.connection.notifies:
+            notify = self.connection.notifies.pop(0)
+            event: dict = json.loads(notify.payload)
+            for subscriber in tuple(self.subscribers):
+                subscriber.push(event)
+
+    def stop(self, reason: str | None = None) -> None:
+        """
+        Close the connection.
+
+        Args:
+            reason (str | None): Name of the final event for the current
+                subscribers. They are kept if the reason isn't passed.
+        """
+        if reason is not None:
+            for subscriber in self.subscribers:
+                subscriber.close(reason)
+            self.subscribers.clear()
+
+        if self.connection is None:
+            return
+
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.remove_reader(self.fileno)
+        self.connection.close()
+        self.connection = None
+        self.fileno = None
+
+
+broadcaster = ChangeBroadcaster()
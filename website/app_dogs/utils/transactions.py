@@ -0,0 +1,89 @@
+"""Transaction policies of API actions.
+
+The connection option sets REPEATABLE READ, but it is applied only to
+explicit transactions: in the autocommit mode every statement is run
+in its own READ COMMITTED transaction. A policy chooses how the whole
+action is run: statement by statement, in one read-only transaction or
+in one read-write transaction retried after conflicts.
+"""
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from enum import StrEnum
+from typing import Any
+
+from app_dogs.utils.retry import write_retry
+from django.db import transaction
+
+
+class TransactionPolicy(StrEnum):
+    """All available transaction policies of actions."""
+
+    # every statement is committed on its own
+    AUTOCOMMIT = "autocommit"
+    # one read-only transaction, statements see the latest commits
+    READ_COMMITTED = "read_committed"
+    # one read-only transaction, all statements see the same snapshot
+    REPEATABLE_READ = "repeatable_read"
+    # one read-write transaction run again after conflicts
+    RETRIED_WRITE = "retried_write"
+
+
+READ_ONLY_ISOLATION_LEVELS: dict[TransactionPolicy, str] = {
+    TransactionPolicy.READ_COMMITTED: "READ COMMITTED",
+    TransactionPolicy.REPEATABLE_READ: "REPEATABLE READ",
+}
+
+
+@contextmanager
+def read_only_transaction(isolation_level: str) -> Iterator[None]:
+    """
+    Run the block in a read-only transaction.
+
+    Inside an outer transaction the block is run in it as is: the level
+    can be set only before the first statement of the transaction.
+
+    Args:
+        isolation_level (str): SQL name of the isolation level.
+
+    Yields:
+        None: The transaction is open.
+    """
+    if transaction.get_connection().in_atomic_block:
+        yield
+        return
+
+    with transaction.atomic():
+        with transaction.get_connection().cursor() as cursor:
+            cursor.execute(
+                f"SET TRANSACTION ISOLATION LEVEL {isolation_level} READ ONLY"
+            )
+        yield
+
+
+def run_with_policy(
+    policy: TransactionPolicy,
+    func: Callable,
+    *args,
+    **kwargs,
+) -> Any:
+    """
+    Run the function by the transaction policy.
+
+    Args:
+        policy (TransactionPolicy): Policy of the transaction.
+        func (Callable): Function doing the queries.
+        args: Positional arguments of the function.
+        kwargs: Keyword arguments of the function.
+
+    Returns:
+        Any: Result of the function.
+    """
+    if policy == TransactionPolicy.RETRIED_WRITE:
+        return write_retry.run(func, *args, **kwargs)
+
+    if policy in READ_ONLY_ISOLATION_LEVELS:
+        with read_only_transaction(READ_ONLY_ISOLATION_LEVELS[policy]):
+            return func(*args, **kwargs)
+
+    return func(*args, **kwargs)
@@ -0,0 +1,189 @@
+"""Optimistic concurrency control of the Dog and Breed writes.
+
+Every row has a version increased by the trigger on each change. The
+API returns it in the 'ETag' header, and a client sends it back in
+'If-Match' to write only the row it has read. Such an update is one
+conditional statement, 'UPDATE ... WHERE id = %s AND version = ANY(%s)
+RETURNING ...': the row is neither read nor locked in advance, so
+concurrent writers don't queue up behind a lock. If the row has been
+changed since the client read it, nothing matches and the client gets
+412 and has to read the row again. A delete is conditional the same
+way.
+"""
+
+from django.db import connection
+from django.db.models import Field, Model
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+VERSION_FIELD = "version"
+
+
+class PreconditionFailed(APIException):
+    """
+    Error of the write whose 'If-Match' version is not current.
+
+    Args:
+        APIException: DRF base API exception.
+    """
+
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = (
+        "The object has been changed by another request, read it again."
+    )
+    default_code = "precondition_failed"
+
+
+def get_etag(version: int) -> str:
+    """
+    Get the entity tag of the row version.
+
+    Args:
+        version (int): Row version.
+
+    Returns:
+        str: Strong entity tag.
+    """
+    return f'"{version}"'
+
+
+def parse_if_match(header: str | None) -> list[int] | None:
+    """
+    Get the row versions accepted by the 'If-Match' header.
+
+    Writes compare tags strongly, so weak and unknown tags match no
+    version.
+
+    Args:
+        header (str | None): Value of the header.
+
+    Returns:
+        list[int] | None: Accepted versions or None if any version is
+            accepted: the header is missing or '*'.
+    """
+    if header is None or header.strip() == "*":
+        return None
+
+    versions: list[int] = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+    return versions
+
+
+def get_db_value(field: Field, value: object) -> object:
+    """
+    Convert the validated value of the field for the query.
+
+    Args:
+        field (Field): Model field.
+        value (object): Python value, a model instance for relations.
+
+    Returns:
+        object: Value of the query parameter.
+    """
+    if isinstance(value, Model):
+        value = value.pk
+    return field.get_db_prep_save(value, connection)
+
+
+def get_python_value(field: Field, value: object) -> object:
+    """
+    Convert the value returned by the database to the field value.
+
+    Args:
+        field (Field): Model field.
+        value (object): Column value.
+
+    Returns:
+        object: Python value.
+    """
+    for converter in field.get_db_converters(connection):
+        value = converter(value, field, connection)
+    return value
+
+
+def update_version(
+    model: type[Model],
+    pk: int,
+    versions: list[int],
+    values: dict,
+) -> Model | None:
+    """
+    Update the row if its version is accepted, by one statement.
+
+    The trigger increases the version if the row is changed, and
+    the row is returned as it is after the update.
+
+    Args:
+        model (type[Model]): Model of the row.
+        pk (int): Primary key of the row.
+        versions (list[int]): Accepted versions.
+        values (dict): New values by field names.
+
+    Returns:
+        Model | None: Updated object or None if no row has the primary
+            key and an accepted version.
+    """
+    meta = model._meta
+    quote = connection.ops.quote_name
+    fields: list[Field] = [meta.get_field(name) for name in values]
+    # an update without fields still checks the version
+    assignments: str = (
+        ", ".join(f"{quote(field.column)} = %s" for field in fields)
+        or f"{quote(VERSION_FIELD)} = {quote(VERSION_FIELD)}"
+    )
+    columns: list[Field] = list(meta.concrete_fields)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {quote(meta.db_table)} SET {assignments} "
+            f"WHERE {quote(meta.pk.column)} = %s "
+            f"AND {quote(VERSION_FIELD)} = ANY(%s) "
+            f"RETURNING {', '.join(quote(field.column) for field in columns)}",
+            [
+                *(
+                    get_db_value(field, value)
+                    for field, value in zip(fields, values.values())
+                ),
+                pk,
+                versions,
+            ],
+        )
+        row: tuple | None = cursor.fetchone()
+
+    if row is None:
+        return None
+    return model.from_db(
+        connection.alias,
+        [field.attname for field in columns],
+        [
+            get_python_value(field, value)
+            for field, value in zip(columns, row, strict=True)
+        ],
+    )
+
+
+def delete_version(model: type[Model], pk: int, versions: list[int]) -> bool:
+    """
+    Delete the row if its version is accepted.
+
+    The deletion goes through the ORM, so 'on_delete' of the relations
+    is respected. A Dog has no relations to check and is deleted by one
+    statement; a Breed is read and checked first, so it has to be
+    deleted in a REPEATABLE READ transaction, which fails if the row is
+    changed in between.
+
+    Args:
+        model (type[Model]): Model of the row.
+        pk (int): Primary key of the row.
+        versions (list[int]): Accepted versions.
+
+    Returns:
+        bool: Whether the row has been deleted.
+    """
+    deleted, _ = model.objects.filter(
+        pk=pk, **{f"{VERSION_FIELD}__in": versions}
+    ).delete()
+    return deleted > 0
@@ -1,12 +1,69 @@
 """API endpoints in the app_dogs."""
 
-from app_dogs.models import Breed, Dog
+import asyncio
+import json
+from collections.abc import AsyncIterator, Callable
+from functools import cached_property, partial
+
+import numpy as np
+from app_dogs.models import Breed, ChangeLog, Dog
 from app_dogs.serializers import (
+    BREED_SNAPSHOT_CONTEXT,
+    BatchSerializer,
+    BreedAutocompleteQuerySerializer,
     BreedDetailSerializer,
+    BreedFilterQuerySerializer,
     BreedListSerializer,
+    BreedMatchQuerySerializer,
+    ChangeLogSerializer,
     DogDetailSerializer,
     DogListSerializer,
+    DogRankQuerySerializer,
+    SimilarBreedsQuerySerializer,
+)
+from app_dogs.utils import stream
+from app_dogs.utils.autocomplete import breed_name_index_cache
+from app_dogs.utils.batch import run_batch
+from app_dogs.utils.batching import WriteBatcher
+from app_dogs.utils.changelog import (
+    Cursor,
+    decode_cursor,
+    encode_cursor,
+    get_changes,
+    get_cursor,
+    get_head_cursor,
+    get_horizon,
+)
+from app_dogs.utils.coalescing import single_flight
+from app_dogs.utils.deadlines import request_deadlines
+from app_dogs.utils.filtering import (
+    breed_trait_index_cache,
+    get_allowed_values,
+)
+from app_dogs.utils.ranking import dog_columns_cache
+from app_dogs.utils.sharedbreeds import BreedSnapshot, shared_breeds
+from app_dogs.utils.similarity import (
+    TRAIT_FIELDS,
+    build_query,
+    trait_matrix_cache,
+)
+from app_dogs.utils.snapshot import (
+    get_manifest,
+    get_root,
+    list_snapshots,
+    write_snapshot,
+)
+from app_dogs.utils.transactions import TransactionPolicy, run_with_policy
+from app_dogs.utils.versioning import (
+    PreconditionFailed,
+    delete_version,
+    get_etag,
+    parse_if_match,
+    update_version,
 )
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from django.db.models import (
     Avg,
     Count,
@@ -16,11 +73,497 @@ from django.db.models import (
     Subquery,
 )
 from django.db.models.query import QuerySet
-from rest_framework import viewsets
+from django.http import (
+    FileResponse,
+    HttpRequest,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import AllowAny, BasePermission, IsAdminUser
+from rest_framework.request import Request
+from rest_framework.response import Response
 from rest_framework.serializers import ModelSerializer
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+dog_batcher = WriteBatcher(model=Dog, settings_name="DOG_WRITE_BATCHING")
+
+
+class SingleFlightMixin:
+    """
+    Share one run of the view between identical concurrent reads.
+
+    The mixin is the outermost one, so followers wait before
+    the authentication and the deadline queries of the view.
+    """
+
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> Response:
+        """
+        Run the view or wait for the identical request in flight.
+
+        Args:
+            request (HttpRequest): Django request.
+            args: Positional arguments of the action.
+            kwargs: Keyword arguments of the action.
+
+        Returns:
+            Response: Response of the action or its copy.
+        """
+        return single_flight.run(
+            request,
+            partial(super().dispatch, request, *args, **kwargs),
+        )
+
+
+class DeadlineMixin:
+    """
+    Limit the time of the view set requests by their latency budgets.
+
+    Budgets are set in the REQUEST_DEADLINES settings by the names
+    '<basename>.<action>'. The deadline starts before authentication
+    and ends after the response is made.
+    """
+
+    def get_deadline_name(self) -> str:
+        """
+        Get the name of the current action in the deadline settings.
+
+        Returns:
+            str: Name as '<basename>.<action>'.
+        """
+        return f"{self.basename}.{self.action}"
+
+    def initial(self, request: Request, *args, **kwargs) -> None:
+        """
+        Start the deadline before running the action.
+
+        Args:
+            request (Request): DRF request.
+            args: Positional arguments of the action.
+            kwargs: Keyword arguments of the action.
+        """
+        self.deadline = request_deadlines.start(self.get_deadline_name())
+        super().initial(request, *args, **kwargs)
+
+    def handle_exception(self, exc: Exception) -> Response:
+        """
+        Return 503 for the query canceled by the deadline.
+
+        Args:
+            exc (Exception): Error raised by the action.
+
+        Returns:
+            Response: Response with the error.
+        """
+        return super().handle_exception(
+            request_deadlines.convert_error(exc, self.get_deadline_name())
+        )
+
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> Response:
+        """
+        End the deadline after the response is made or the view failed.
+
+        Args:
+            request (HttpRequest): Django request.
+            args: Positional arguments of the action.
+            kwargs: Keyword arguments of the action.
+
+        Returns:
+            Response: Response of the action.
+        """
+        self.deadline = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.deadline is not None:
+                self.deadline.close()
+
 
+class TransactionPolicyMixin:
+    """
+    Run standard actions of the view set by their transaction policies.
 
-class DogViewSet(viewsets.ModelViewSet):
+    Reads are run statement by statement in the autocommit mode, which
+    is as fast as a read-only transaction here and saves its round
+    trips. Writes are run in one REPEATABLE READ transaction: a write
+    reads the object and writes it from the same snapshot, so
+    a concurrent change of the object between them is detected instead
+    of being overwritten; then the action is run again and applied to
+    the new state of the object. View sets change the policies by the
+    'transaction_policies' attribute.
+    """
+
+    transaction_policies: dict[str, TransactionPolicy] = {
+        "list": TransactionPolicy.AUTOCOMMIT,
+        "retrieve": TransactionPolicy.AUTOCOMMIT,
+        "create": TransactionPolicy.RETRIED_WRITE,
+        "update": TransactionPolicy.RETRIED_WRITE,
+        "partial_update": TransactionPolicy.RETRIED_WRITE,
+        "destroy": TransactionPolicy.RETRIED_WRITE,
+    }
+
+    def get_transaction_policy(self) -> TransactionPolicy:
+        """
+        Get the transaction policy of the current action.
+
+        Returns:
+            TransactionPolicy: Policy, autocommit for unknown actions.
+        """
+        return self.transaction_policies.get(
+            self.action,
+            TransactionPolicy.AUTOCOMMIT,
+        )
+
+    def run_action(
+        self,
+        handler: Callable[..., Response],
+        request: Request,
+        *args,
+        **kwargs,
+    ) -> Response:
+        """
+        Run the action by its transaction policy.
+
+        Args:
+            handler (Callable[..., Response]): Action of the base class.
+            request (Request): DRF request.
+            args: Positional arguments of the action.
+            kwargs: Keyword arguments of the action.
+
+        Returns:
+            Response: Response of the action.
+        """
+        return run_with_policy(
+            self.get_transaction_policy(),
+            handler,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        """
+        List objects by the transaction policy.
+
+        Args:
+            request (Request): DRF request.
+            args: Positional arguments of the action.
+            kwargs: Keyword arguments of the action.
+
+        Returns:
+            Response: Response of the action.
+        """
+        return self.run_action(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Get an object by the transaction policy.
+
+        Args:
+            request (Request): DRF request.
+            args: Positional arguments of the action.
+            kwargs: Keyword arguments of the action.
+
+        Returns:
+            Response: Response of the action.
+        """
+        return self.run_action(super().retrieve, request, *args, **kwargs)
+
+    def create(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Create an object by the transaction policy.
+
+        Args:
+            request (Request): DRF request.
+            args: Positional arguments of the action.
+            kwargs: Keyword arguments of the action.
+
+        Returns:
+            Response: Response of the action.
+        """
+        return self.run_action(super().create, request, *args, **kwargs)
+
+    def update(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Update an object by the transaction policy.
+
+        A partial update is run by this action as well.
+
+        Args:
+            request (Request): DRF request.
+            args: Positional arguments of the action.
+            kwargs: Keyword arguments of the action.
+
+        Returns:
+            Response: Response of the action.
+        """
+        return self.run_action(super().update, request, *args, **kwargs)
+
+    def destroy(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Delete an object by the transaction policy.
+
+        Args:
+            request (Request): DRF request.
+            args: Positional arguments of the action.
+            kwargs: Keyword arguments of the action.
+
+        Returns:
+            Response: Response of the action.
+        """
+        return self.run_action(super().destroy, request, *args, **kwargs)
+
+
+class VersionMixin:
+    """
+    Apply writes only to the object version sent in 'If-Match'.
+
+    Responses with an object carry its version in the 'ETag' header.
+    An update with 'If-Match' is one conditional UPDATE without reading
+    the object first, run in the autocommit mode: the statement checks
+    the version itself, and a transaction would only add conflicts to
+    retry. A delete with 'If-Match' is a conditional DELETE run by the
+    usual policy. A stale version gets 412. Requests without the header
+    are still applied to the latest version.
+    """
+
+    etag_actions: frozenset[str] = frozenset(
+        ("retrieve", "create", "update", "partial_update")
+    )
+
+    def get_if_match(self) -> list[int] | None:
+        """
+        Get the versions accepted by the write.
+
+        Returns:
+            list[int] | None: Versions or None for unconditional actions.
+        """
+        if self.action not in ("update", "partial_update", "destroy"):
+            return None
+        return parse_if_match(self.request.headers.get("If-Match"))
+
+    def get_transaction_policy(self) -> TransactionPolicy:
+        """
+        Run conditional updates in the autocommit mode.
+
+        Returns:
+            TransactionPolicy: Policy of the current action.
+        """
+        if self.action != "destroy" and self.get_if_match() is not None:
+            return TransactionPolicy.AUTOCOMMIT
+        return super().get_transaction_policy()
+
+    def get_object_pk(self) -> int:
+        """
+        Get the primary key of the requested object without a query.
+
+        Raises:
+            NotFound: The key in the URL is not valid.
+
+        Returns:
+            int: Primary key.
+        """
+        lookup: str = self.lookup_url_kwarg or self.lookup_field
+        try:
+            return self.queryset.model._meta.pk.to_python(self.kwargs[lookup])
+        except DjangoValidationError:
+            raise NotFound() from None
+
+    def raise_write_failed(self, pk: int) -> None:
+        """
+        Explain why the conditional write has matched no row.
+
+        Raises:
+            NotFound: The object doesn't exist.
+            PreconditionFailed: The object has another version.
+
+        Args:
+            pk (int): Primary key of the object.
+        """
+        if not self.queryset.model.objects.filter(pk=pk).exists():
+            raise NotFound()
+        raise PreconditionFailed()
+
+    def update_conditionally(
+        self,
+        request: Request,
+        versions: list[int],
+        partial: bool,
+    ) -> Response:
+        """
+        Update the object if it has one of the versions.
+
+        Args:
+            request (Request): DRF request.
+            versions (list[int]): Accepted versions.
+            partial (bool): Whether the update is partial.
+
+        Returns:
+            Response: Updated object.
+        """
+        serializer: ModelSerializer = self.get_serializer(
+            data=request.data, partial=partial
+        )
+        serializer.is_valid(raise_exception=True)
+        pk: int = self.get_object_pk()
+        instance = update_version(
+            self.queryset.model, pk, versions, serializer.validated_data
+        )
+        if instance is None:
+            self.raise_write_failed(pk)
+        return Response(self.get_serializer(instance).data)
+
+    def destroy_conditionally(
+        self,
+        request: Request,
+        versions: list[int],
+    ) -> Response:
+        """
+        Delete the object if it has one of the versions.
+
+        Args:
+            request (Request): DRF request.
+            versions (list[int]): Accepted versions.
+
+        Returns:
+            Response: Empty response.
+        """
+        pk: int = self.get_object_pk()
+        if not delete_version(self.queryset.model, pk, versions):
+            self.raise_write_failed(pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def update(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Update the object, conditionally with 'If-Match'.
+
+        Args:
+            request (Request): DRF request.
+            args: Positional arguments of the action.
+            kwargs: Keyword arguments of the action.
+
+        Returns:
+            Response: Response of the action.
+        """
+        versions: list[int] | None = self.get_if_match()
+        if versions is None:
+            return super().update(request, *args, **kwargs)
+        return self.run_action(
+            self.update_conditionally,
+            request,
+            versions,
+            kwargs.get("partial", False),
+        )
+
+    def destroy(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Delete the object, conditionally with 'If-Match'.
+
+        Args:
+            request (Request): DRF request.
+            args: Positional arguments of the action.
+            kwargs: Keyword arguments of the action.
+
+        Returns:
+            Response: Response of the action.
+        """
+        versions: list[int] | None = self.get_if_match()
+        if versions is None:
+            return super().destroy(request, *args, **kwargs)
+        return self.run_action(self.destroy_conditionally, request, versions)
+
+    def perform_update(self, serializer: ModelSerializer) -> None:
+        """
+        Save the object and get the version set by the trigger.
+
+        Args:
+            serializer (ModelSerializer): Validated serializer.
+        """
+        super().perform_update(serializer)
+        serializer.instance.refresh_from_db(fields=["version"])
+
+    def finalize_response(
+        self,
+        request: Request,
+        response: Response,
+        *args,
+        **kwargs,
+    ) -> Response:
+        """
+        Add the version of the returned object as 'ETag'.
+
+        Args:
+            request (Request): DRF request.
+            response (Response): Response of the action.
+            args: Positional arguments of the action.
+            kwargs: Keyword arguments of the action.
+
+        Returns:
+            Response: Response with the header.
+        """
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if (
+            getattr(self, "action", None) in self.etag_actions
+            and status.is_success(response.status_code)
+            and isinstance(response.data, dict)
+            and "version" in response.data
+        ):
+            response["ETag"] = get_etag(response.data["version"])
+        return response
+
+
+class BreedSnapshotMixin:
+    """
+    Read breeds and their dog aggregates from the shared snapshot.
+
+    Lists and single objects are read from a fresh snapshot, which is
+    passed to the serializers in the context. Without it the database
+    is read as usual.
+    """
+
+    snapshot_actions: frozenset[str] = frozenset(("list", "retrieve"))
+
+    @cached_property
+    def breed_snapshot(self) -> BreedSnapshot | None:
+        """
+        Get the snapshot read by the current action.
+
+        Returns:
+            BreedSnapshot | None: Fresh snapshot or None.
+        """
+        if self.action not in self.snapshot_actions:
+            return None
+        return shared_breeds.get()
+
+    def get_serializer_context(self) -> dict:
+        """
+        Pass the snapshot to the serializers.
+
+        Returns:
+            dict: Context of the serializers.
+        """
+        return {
+            **super().get_serializer_context(),
+            BREED_SNAPSHOT_CONTEXT: self.breed_snapshot,
+        }
+
+
+class DogViewSet(
+    SingleFlightMixin,
+    DeadlineMixin,
+    BreedSnapshotMixin,
+    VersionMixin,
+    TransactionPolicyMixin,
+    viewsets.ModelViewSet,
+):
     """
     DRF ViewSet for the Dog entity.
 
@@ -40,12 +583,17 @@ class DogViewSet(viewsets.ModelViewSet):
         For retrieve action, annotate each Dog with the count
         of dogs of the same breed.
 
+        The aggregates are not annotated if the serializers read them
+        from the shared snapshot.
+
         Returns:
             QuerySet[Dog]: Django QuerySet of Dog models after filtering
                 and other custom actions.
         """
         qs = self.queryset
 
+        if self.breed_snapshot is not None:
+            return qs
         if self.action == "list":
             avg_age_subquery = (
                 Dog.objects.filter(breed=OuterRef("breed_id"))
@@ -86,8 +634,127 @@ class DogViewSet(viewsets.ModelViewSet):
             return DogListSerializer
         return DogDetailSerializer
 
+    def get_transaction_policy(self) -> TransactionPolicy:
+        """
+        Keep batched inserts out of the request transaction.
+
+        The batcher commits the row by its own thread, and an insert
+        doesn't conflict with concurrent writes.
+
+        Returns:
+            TransactionPolicy: Policy of the current action.
+        """
+        if self.action == "create" and settings.DOG_WRITE_BATCHING["ENABLED"]:
+            return TransactionPolicy.AUTOCOMMIT
+        return super().get_transaction_policy()
+
+    def perform_create(self, serializer: DogDetailSerializer) -> None:
+        """
+        Save a new Dog, coalescing inserts if the batching is enabled.
+
+        The request waits for the batch with its row to be committed,
+        so it gets the assigned id or the database error as usual.
+        Inside an outer transaction the Dog is saved directly to keep
+        it a part of that transaction.
+
+        Args:
+            serializer (DogDetailSerializer): Validated serializer.
+        """
+        if (
+            not settings.DOG_WRITE_BATCHING["ENABLED"]
+            or transaction.get_connection().in_atomic_block
+        ):
+            super().perform_create(serializer)
+            return
+
+        serializer.instance = dog_batcher.save(
+            Dog(**serializer.validated_data)
+        )
+
+    @action(detail=False, methods=["get"])
+    def rank(self, request: Request) -> Response:
+        """
+        Get a page of dogs which fit the owner preferences best.
+
+        Preferences are passed as query parameters, e.g.
+        '?age=2&gender=female&color=black&friendliness=5&age_weight=2'.
+        Dogs are ordered by the score from 1 to 0, equal scores are
+        ordered by the dog id, so pages are stable.
+
+        Args:
+            request (Request): DRF request.
+
+        Returns:
+            Response: Page of dogs with their scores, the best first.
+        """
+        query = DogRankQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        preferences: dict = query.validated_data
+        page: int = preferences["page"]
+        page_size: int = preferences["page_size"]
 
-class BreedViewSet(viewsets.ModelViewSet):
+        columns = dog_columns_cache.get()
+        breed_target, breed_weights = build_query(preferences)
+        ids, scores = columns.rank(
+            preferences=preferences,
+            matrix=trait_matrix_cache.get(),
+            breed_target=breed_target,
+            breed_weights=breed_weights,
+            limit=page * page_size,
+            chunk_size=settings.DOG_RANKING["CHUNK_SIZE"],
+        )
+        start: int = (page - 1) * page_size
+        dogs: dict[int, Dog] = self.queryset.in_bulk(ids[start:].tolist())
+        # dogs deleted after the columns have been refreshed are skipped
+        ranked: list[tuple[Dog, float]] = [
+            (dogs[dog_id], score)
+            for dog_id, score in zip(
+                ids[start:].tolist(),
+                scores[start:].tolist(),
+            )
+            if dog_id in dogs
+        ]
+        serializer = DogListSerializer(
+            [dog for dog, _ in ranked],
+            many=True,
+            context=self.get_serializer_context(),
+        )
+
+        count: int = min(len(columns), settings.DOG_RANKING["MAX_RESULTS"])
+        url: str = request.build_absolute_uri()
+        return Response(
+            {
+                "count": count,
+                "next": (
+                    replace_query_param(url, "page", page + 1)
+                    if page * page_size < count
+                    else None
+                ),
+                "previous": (
+                    None
+                    if page == 1
+                    else (
+                        remove_query_param(url, "page")
+                        if page == 2
+                        else replace_query_param(url, "page", page - 1)
+                    )
+                ),
+                "results": [
+                    {**data, "score": score}
+                    for data, (_, score) in zip(serializer.data, ranked)
+                ],
+            }
+        )
+
+
+class BreedViewSet(
+    SingleFlightMixin,
+    DeadlineMixin,
+    BreedSnapshotMixin,
+    VersionMixin,
+    TransactionPolicyMixin,
+    viewsets.ModelViewSet,
+):
     """
     DRF ViewSet for the Breed entity.
 
@@ -104,15 +771,19 @@ class BreedViewSet(viewsets.ModelViewSet):
         Return different querysets for list and detail actions.
 
         Expend the queryset with annotated fields if you have requested
-        a list of objects from db.
+        a list of objects from db. The list is filtered by the traits
+        passed in the query parameters. From a fresh shared snapshot
+        the list is a sequence of its breeds instead.
 
         Returns:
             QuerySet[Breed]: Django QuerySet of Breed models after filtering
                 and other custom actions.
         """
+        if self.action == "list" and self.breed_snapshot is not None:
+            return self.breed_snapshot.select(self.get_allowed_traits())
         if self.action == "list":
             return (
-                Breed.objects.all()
+                self.filter_by_traits(Breed.objects.all())
                 .annotate(
                     dog_count=Count("dogs"),
                 )
@@ -121,6 +792,41 @@ class BreedViewSet(viewsets.ModelViewSet):
             )
         return self.queryset
 
+    def get_allowed_traits(self) -> dict[str, list]:
+        """
+        Get the traits filtered by the query parameters.
+
+        Returns:
+            dict[str, list]: Allowed values by the filtered traits.
+        """
+        query = BreedFilterQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        return get_allowed_values(query.validated_data)
+
+    def filter_by_traits(self, queryset: QuerySet[Breed]) -> QuerySet[Breed]:
+        """
+        Keep the breeds found by the in-memory trait index.
+
+        The index gives the ids, and the conditions are checked by
+        the query again, so breeds changed by transactions the index
+        hasn't seen yet are not returned by mistake.
+
+        Args:
+            queryset (QuerySet[Breed]): Breeds to filter.
+
+        Returns:
+            QuerySet[Breed]: Breeds with the requested traits.
+        """
+        allowed: dict[str, list] = self.get_allowed_traits()
+        if not allowed:
+            return queryset
+
+        ids: np.ndarray = breed_trait_index_cache.get().select(allowed)
+        return queryset.filter(
+            id__in=ids.tolist(),
+            **{f"{name}__in": values for name, values in allowed.items()},
+        )
+
     def get_serializer_class(self) -> ModelSerializer:
         """
         Return different serializers for list and detail actions.
@@ -131,3 +837,490 @@ class BreedViewSet(viewsets.ModelViewSet):
         if self.action == "list":
             return BreedListSerializer
         return BreedDetailSerializer
+
+    def get_object(self) -> Breed:
+        """
+        Get the requested breed, from the shared snapshot if it is fresh.
+
+        Raises:
+            NotFound: There is no such breed.
+
+        Returns:
+            Breed: Requested breed.
+        """
+        if self.breed_snapshot is None:
+            return super().get_object()
+        breed: Breed | None = self.breed_snapshot.get_breed(
+            self.get_object_pk()
+        )
+        if breed is None:
+            raise NotFound()
+        self.check_object_permissions(self.request, breed)
+        return breed
+
+    def update_conditionally(
+        self,
+        request: Request,
+        versions: list[int],
+        partial: bool,
+    ) -> Response:
+        """
+        Update the breed and make the shared snapshot stale.
+
+        The conditional update doesn't save the model, so no signal
+        does it.
+
+        Args:
+            request (Request): DRF request.
+            versions (list[int]): Accepted versions.
+            partial (bool): Whether the update is partial.
+
+        Returns:
+            Response: Updated breed.
+        """
+        response: Response = super().update_conditionally(
+            request, versions, partial
+        )
+        shared_breeds.invalidate()
+        return response
+
+    @staticmethod
+    def get_nearest_data(nearest: list[tuple[int, float]]) -> list[dict]:
+        """
+        Serialize found breeds with their distances.
+
+        Args:
+            nearest (list[tuple[int, float]]): Breed ids and distances.
+
+        Returns:
+            list[dict]: Serialized breeds, closest first.
+        """
+        breeds: dict[int, Breed] = Breed.objects.in_bulk(
+            [breed_id for breed_id, _ in nearest]
+        )
+        return [
+            {**BreedDetailSerializer(breeds[breed_id]).data, "distance": dist}
+            for breed_id, dist in nearest
+            if breed_id in breeds
+        ]
+
+    @action(detail=True, methods=["get"])
+    def similar(self, request: Request, pk: str | None = None) -> Response:
+        """
+        Get k breeds with the closest traits to the given breed.
+
+        Args:
+            request (Request): DRF request.
+            pk (str | None): Breed id.
+
+        Raises:
+            NotFound: There is no such breed.
+
+        Returns:
+            Response: Found breeds with distances, closest first.
+        """
+        query = SimilarBreedsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        matrix = trait_matrix_cache.get()
+        breed_id: int = int(pk) if pk and pk.isdigit() else 0
+        target: np.ndarray | None = matrix.get_traits(breed_id)
+        if target is None:
+            raise NotFound()
+
+        nearest = matrix.nearest(
+            target=target,
+            weights=np.ones(len(TRAIT_FIELDS), dtype=np.float32),
+            k=query.validated_data["k"],
+            exclude_id=breed_id,
+        )
+        return Response({"results": self.get_nearest_data(nearest)})
+
+    @action(detail=False, methods=["get"])
+    def match(self, request: Request) -> Response:
+        """
+        Get k breeds with the closest traits to the desired ones.
+
+        Traits are passed as query parameters, e.g.
+        '?friendliness=5&shedding_amount=1&shedding_amount_weight=2'.
+
+        Args:
+            request (Request): DRF request.
+
+        Returns:
+            Response: Found breeds with distances, closest first.
+        """
+        query = BreedMatchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        target, weights = build_query(query.validated_data)
+        nearest = trait_matrix_cache.get().nearest(
+            target=target,
+            weights=weights,
+            k=query.validated_data["k"],
+        )
+        return Response({"results": self.get_nearest_data(nearest)})
+
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request: Request) -> Response:
+        """
+        Get breeds with a word of the name starting with the typed text.
+
+        Matching ignores the case and accents, breeds with more dogs go
+        first. Breeds are found by the in-memory index of the names
+        without queries to the database.
+
+        Args:
+            request (Request): DRF request.
+
+        Returns:
+            Response: Found breeds with numbers of their dogs.
+        """
+        query = BreedAutocompleteQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        return Response(
+            {
+                "results": breed_name_index_cache.get().search(
+                    query.validated_data["q"], query.validated_data["limit"]
+                )
+            }
+        )
+
+
+class ChangeLogViewSet(viewsets.ViewSet):
+    """
+    DRF ViewSet for the feed of the Dog and Breed changes.
+
+    Clients pass the cursor of the last seen change in the 'since'
+    query parameter and get the next batch of changes with a cursor
+    to continue from.
+
+    Args:
+        viewsets.ViewSet: DRF view set without model processing.
+    """
+
+    def get_limit(self) -> int:
+        """
+        Get the batch size requested by the client.
+
+        Raises:
+            ValidationError: The 'limit' parameter is not a positive int.
+
+        Returns:
+            int: Batch size bounded by the settings.
+        """
+        feed_settings: dict = settings.CHANGE_FEED
+        value: str | None = self.request.query_params.get("limit")
+        if value is None:
+            return feed_settings["PAGE_SIZE"]
+
+        if not value.isdigit() or int(value) < 1:
+            raise ValidationError({"limit": "A positive integer expected."})
+
+        return min(int(value), feed_settings["MAX_PAGE_SIZE"])
+
+    def list(self, request: Request) -> Response:
+        """
+        Get the batch of changes after the cursor.
+
+        Args:
+            request (Request): DRF request.
+
+        Raises:
+            ValidationError: The 'since' parameter is not a valid cursor.
+
+        Returns:
+            Response: Changes and the cursor to continue from. Status 410
+                if the changes after the cursor have been already removed
+                by the retention, the client has to resync.
+        """
+        try:
+            since: Cursor = decode_cursor(request.query_params.get("since"))
+        except ValueError:
+            raise ValidationError({"since": "Invalid cursor."}) from None
+
+        limit: int = self.get_limit()
+
+        if since < get_horizon():
+            return Response(
+                {
+                    "detail": "Changes after the cursor have been removed. "
+                    "List all objects and read changes from 'head_cursor'.",
+                    "head_cursor": encode_cursor(get_head_cursor()),
+                },
+                status=status.HTTP_410_GONE,
+            )
+
+        changes: list[ChangeLog] = get_changes(since, limit + 1)
+        has_more: bool = len(changes) > limit
+        changes = changes[:limit]
+
+        return Response(
+            {
+                "next_cursor": encode_cursor(
+                    get_cursor(changes[-1]) if changes else since
+                ),
+                "has_more": has_more,
+                "results": ChangeLogSerializer(changes, many=True).data,
+            }
+        )
+
+
+class SnapshotViewSet(viewsets.ViewSet):
+    """
+    DRF ViewSet for the columnar snapshots of dogs and breeds.
+
+    Snapshots are listed and downloaded column by column as NumPy
+    '.npy' files. Writing a snapshot reads all tables, so only staff
+    users can request a new one.
+
+    Args:
+        viewsets.ViewSet: DRF view set without model processing.
+    """
+
+    lookup_field = "name"
+    lookup_value_regex = r"\d{8}T\d{12}"
+
+    def get_permissions(self) -> list[BasePermission]:
+        """
+        Get permissions of the action.
+
+        Returns:
+            list[BasePermission]: Staff only for a new snapshot.
+        """
+        if self.action == "create":
+            return [IsAdminUser()]
+        return [AllowAny()]
+
+    def get_manifest(self, name: str) -> dict:
+        """
+        Get the manifest of the requested snapshot.
+
+        Args:
+            name (str): Snapshot name.
+
+        Raises:
+            NotFound: There is no such snapshot.
+
+        Returns:
+            dict: Manifest of the snapshot.
+        """
+        manifest: dict | None = get_manifest(name)
+        if manifest is None:
+            raise NotFound("Snapshot not found.")
+        return manifest
+
+    def list(self, request: Request) -> Response:
+        """
+        Get manifests of the snapshots from the newest one.
+
+        Args:
+            request (Request): DRF request.
+
+        Returns:
+            Response: Snapshot manifests.
+        """
+        return Response([get_manifest(name) for name in list_snapshots()])
+
+    def create(self, request: Request) -> Response:
+        """
+        Write a new snapshot.
+
+        Args:
+            request (Request): DRF request.
+
+        Returns:
+            Response: Manifest of the snapshot.
+        """
+        return Response(write_snapshot(), status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request: Request, name: str) -> Response:
+        """
+        Get the manifest of the snapshot.
+
+        Args:
+            request (Request): DRF request.
+            name (str): Snapshot name.
+
+        Returns:
+            Response: Manifest of the snapshot.
+        """
+        return Response(self.get_manifest(name))
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path=r"columns/(?P<table>\w+)/(?P<column>\w+)",
+    )
+    def column(
+        self,
+        request: Request,
+        name: str,
+        table: str,
+        column: str,
+    ) -> FileResponse:
+        """
+        Download the '.npy' file of the column.
+
+        Args:
+            request (Request): DRF request.
+            name (str): Snapshot name.
+            table (str): Table name in the manifest.
+            column (str): Column name in the manifest.
+
+        Raises:
+            NotFound: There is no such table or column.
+
+        Returns:
+            FileResponse: Column file.
+        """
+        manifest: dict = self.get_manifest(name)
+        try:
+            path: str = manifest["tables"][table]["columns"][column]["file"]
+        except KeyError:
+            raise NotFound("Column not found.") from None
+        return FileResponse(
+            (get_root() / name / path).open("rb"),
+            as_attachment=True,
+            filename=f"{name}-{table}-{column}.npy",
+            content_type="application/octet-stream",
+        )
+
+
+class ChangeStreamView(View):
+    """
+    Async endpoint pushing the Dog and Breed changes as Server-Sent Events.
+
+    Clients may pass a list of breed ids in the 'breed' query parameter
+    to receive changes of these breeds and their dogs only. Each event
+    id is the change feed cursor, so a disconnected client can catch up
+    via the change feed.
+
+    Args:
+        View: Django base view class.
+    """
+
+    async def get(self, request: HttpRequest) -> HttpResponse:
+        """
+        Open the stream of changes.
+
+        Args:
+            request (HttpRequest): Django request.
+
+        Returns:
+            HttpResponse: Endless stream of events or status 400 if
+                the breed filter is invalid.
+        """
+        try:
+            breed_ids: set[int] = {
+                int(value)
+                for param in request.GET.getlist("breed")
+                for value in param.split(",")
+                if value
+            }
+        except ValueError:
+            return JsonResponse(
+                {"breed": "A list of integers expected."},
+                status=400,
+            )
+
+        response = StreamingHttpResponse(
+            self.stream_events(breed_ids),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @staticmethod
+    def format_event(event: dict) -> str:
+        """
+        Format the change event by the Server-Sent Events protocol.
+
+        Args:
+            event (dict): Change event or the final event.
+
+        Returns:
+            str: Event message.
+        """
+        if "event" in event:
+            return f"event: {event['event']}\ndata: {{}}\n\n"
+
+        return (
+            f"id: {event['cursor']}\n"
+            "event: change\n"
+            f"data: {json.dumps(event)}\n\n"
+        )
+
+    async def stream_events(self, breed_ids: set[int]) -> AsyncIterator[str]:
+        """
+        Subscribe to changes and yield them until the client disconnects.
+
+        Args:
+            breed_ids (set[int]): Breeds the client is subscribed to.
+
+        Yields:
+            str: Event messages and heartbeat comments.
+        """
+        heartbeat: float = settings.CHANGE_STREAM["HEARTBEAT_SECONDS"]
+        subscriber = await stream.broadcaster.subscribe(breed_ids)
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    event: dict = await asyncio.wait_for(
+                        subscriber.queue.get(),
+                        timeout=heartbeat,
+                    )
+                except TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+
+                yield self.format_event(event)
+                if "event" in event:
+                    return
+        finally:
+            stream.broadcaster.unsubscribe(subscriber)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class BatchView(View):
+    """
+    Async endpoint running many API requests in one round trip.
+
+    The batch itself is exempt from the CSRF check: every sub-request is
+    checked by DRF with the headers of the batch request.
+
+    Args:
+        View: Django base view class.
+    """
+
+    async def post(self, request: HttpRequest) -> HttpResponse:
+        """
+        Run the sub-requests of the batch.
+
+        Args:
+            request (HttpRequest): Django request with a JSON body:
+                {"requests": [{"method", "path", "headers", "body"}, ...],
+                "atomic": false}.
+
+        Returns:
+            HttpResponse: Responses of the sub-requests in order or
+                status 400 if the batch is invalid.
+        """
+        try:
+            data: object = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({"detail": "JSON parse error."}, status=400)
+
+        serializer = BatchSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=400)
+        return JsonResponse(
+            await run_batch(
+                request,
+                serializer.validated_data["requests"],
+                serializer.validated_data["atomic"],
+            )
+        )
@@ -0,0 +1,28 @@
+"""Python client of the dogs API.
+
+Synchronous and asyncio clients with kept alive connection pools, lazy
+reading of all pages of a list, bulk creates over the batch endpoint
+and retries of failed requests. Only the standard library is required.
+"""
+
+from dogs_client.aio import AsyncDogsClient
+from dogs_client.base import (
+    ApiError,
+    BulkItemError,
+    BulkResult,
+    ConnectError,
+    RetryPolicy,
+    StaleConnection,
+)
+from dogs_client.client import DogsClient
+
+__all__ = [
+    "ApiError",
+    "AsyncDogsClient",
+    "BulkItemError",
+    "BulkResult",
+    "ConnectError",
+    "DogsClient",
+    "RetryPolicy",
+    "StaleConnection",
+]
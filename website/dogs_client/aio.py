@@ -0,0 +1,588 @@
+"""Asyncio client of the dogs API.
+
+The standard library has no asyncio HTTP client, so a minimal HTTP/1.1
+one is built on the asyncio streams: a request with a known body length
+and a response with 'Content-Length' or chunked body, enough for the
+API. Connections are kept alive in a pool, pages of a list are
+requested ahead by tasks and bulk creates send their batches at once.
+
+A client belongs to the event loop it was first used in.
+"""
+
+import asyncio
+import http.client
+import ssl
+from collections import deque
+from collections.abc import AsyncIterator, Iterable
+from typing import Any
+
+from dogs_client.base import (
+    IDEMPOTENT_METHODS,
+    MAX_BATCH_SIZE,
+    ApiError,
+    BaseClient,
+    BulkResult,
+    ConnectError,
+    Endpoint,
+    Response,
+    StaleConnection,
+)
+
+# errors of a kept alive connection closed by the server
+STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    BrokenPipeError,
+    ConnectionResetError,
+    asyncio.IncompleteReadError,
+)
+# statuses of responses without a body
+NO_BODY_STATUSES: frozenset[int] = frozenset((204, 304))
+
+
+class AsyncConnection:
+    """
+    HTTP/1.1 connection over asyncio streams.
+
+    Args:
+        reader (asyncio.StreamReader): Stream of the responses.
+        writer (asyncio.StreamWriter): Stream of the requests.
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Initialize the connection."""
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(
+        cls, endpoint: Endpoint, timeout: float
+    ) -> "AsyncConnection":
+        """
+        Open a new connection.
+
+        Args:
+            endpoint (Endpoint): Address of the server.
+            timeout (float): Timeout of the connection in seconds.
+
+        Raises:
+            ConnectError: The server can't be reached.
+
+        Returns:
+            AsyncConnection: Connected connection.
+        """
+        context: ssl.SSLContext | None = (
+            ssl.create_default_context()
+            if endpoint.scheme == "https"
+            else None
+        )
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    endpoint.host, endpoint.port, ssl=context
+                ),
+                timeout,
+            )
+        except OSError as error:
+            raise ConnectError(str(error)) from error
+        return cls(reader, writer)
+
+    def close(self) -> None:
+        """Close the connection."""
+        self.writer.close()
+
+    async def read_chunked(self) -> bytes:
+        """
+        Read the chunked body of the response.
+
+        Returns:
+            bytes: Joined chunks.
+        """
+        chunks: list[bytes] = []
+        while True:
+            line: bytes = await self.reader.readline()
+            size = int(line.split(b";", 1)[0], 16)
+            if size == 0:
+                break
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+        # trailers end with an empty line
+        while (await self.reader.readline()).strip():
+            pass
+        return b"".join(chunks)
+
+    async def request(
+        self,
+        method: str,
+        target: str,
+        body: bytes | None,
+        headers: dict[str, str],
+    ) -> tuple[Response, bool]:
+        """
+        Send the request and read the response.
+
+        Args:
+            method (str): HTTP method.
+            target (str): Path with the query string.
+            body (bytes | None): Body of the request.
+            headers (dict[str, str]): Headers of the request.
+
+        Raises:
+            StaleConnection: The server closed the connection before
+                the status of the response.
+            http.client.BadStatusLine: The response is not HTTP.
+
+        Returns:
+            tuple[Response, bool]: Response and whether the server closes
+                the connection after it.
+        """
+        lines: list[str] = [f"{method} {target} HTTP/1.1"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        if body is not None or method in ("POST", "PUT", "PATCH"):
+            lines.append(f"Content-Length: {len(body or b'')}")
+        try:
+            self.writer.write(
+                ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+                + (body or b"")
+            )
+            await self.writer.drain()
+            status_line: bytes = await self.reader.readline()
+        except STALE_ERRORS as error:
+            raise StaleConnection(str(error)) from error
+        if not status_line:
+            raise StaleConnection(
+                "Remote end closed connection without response"
+            )
+        try:
+            version, status_code = status_line.decode("latin-1").split()[:2]
+            status = int(status_code)
+        except ValueError:
+            raise http.client.BadStatusLine(str(status_line)) from None
+
+        response_headers: dict[str, str] = {}
+        while (line := await self.reader.readline()).strip():
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            response_headers[name] = (
+                f"{response_headers[name]}, {value.strip()}"
+                if name in response_headers
+                else value.strip()
+            )
+
+        connection: str = response_headers.get("connection", "").lower()
+        will_close: bool = "close" in connection or (
+            version == "HTTP/1.0" and "keep-alive" not in connection
+        )
+        if method == "HEAD" or status in NO_BODY_STATUSES or status < 200:
+            data = b""
+        elif "chunked" in response_headers.get("transfer-encoding", ""):
+            data = await self.read_chunked()
+        elif "content-length" in response_headers:
+            data = await self.reader.readexactly(
+                int(response_headers["content-length"])
+            )
+        else:
+            data = await self.reader.read()
+            will_close = True
+        return Response(status, response_headers, data), will_close
+
+
+class AsyncConnectionPool:
+    """
+    Kept alive connections shared by the tasks of an event loop.
+
+    Args:
+        endpoint (Endpoint): Address of the server.
+        max_connections (int): Max number of connections in use.
+        timeout (float): Timeout of a request in seconds.
+    """
+
+    def __init__(
+        self,
+        endpoint: Endpoint,
+        max_connections: int,
+        timeout: float,
+    ) -> None:
+        """Initialize the pool without connections."""
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.idle: list[AsyncConnection] = []
+        self.slots = asyncio.Semaphore(max_connections)
+        # number of opened connections, for the statistics
+        self.created = 0
+
+    async def connect(self) -> AsyncConnection:
+        """
+        Open a new connection.
+
+        Returns:
+            AsyncConnection: Connected connection.
+        """
+        connection: AsyncConnection = await AsyncConnection.open(
+            self.endpoint, self.timeout
+        )
+        self.created += 1
+        return connection
+
+    async def send(
+        self,
+        connection: AsyncConnection,
+        method: str,
+        target: str,
+        body: bytes | None,
+        headers: dict[str, str],
+    ) -> Response:
+        """
+        Send the request and return the connection to the pool.
+
+        Args:
+            connection (AsyncConnection): Connection to use.
+            method (str): HTTP method.
+            target (str): Path with the query string.
+            body (bytes | None): Body of the request.
+            headers (dict[str, str]): Headers of the request.
+
+        Returns:
+            Response: Response of the server.
+        """
+        try:
+            response, will_close = await asyncio.wait_for(
+                connection.request(method, target, body, headers),
+                self.timeout,
+            )
+        except BaseException:
+            connection.close()
+            raise
+
+        if will_close:
+            connection.close()
+        else:
+            self.idle.append(connection)
+        return response
+
+    async def request(
+        self,
+        method: str,
+        target: str,
+        body: bytes | None,
+        headers: dict[str, str],
+    ) -> Response:
+        """
+        Send the request over an idle or a new connection.
+
+        An idle connection closed by the server is replaced by a new one
+        once. Any request is sent again if no status was received: the
+        server closes only connections without requests, so the request
+        hasn't been run. After the status, the server has run it, so only
+        idempotent requests are sent again, others fail as sent.
+
+        Args:
+            method (str): HTTP method.
+            target (str): Path with the query string.
+            body (bytes | None): Body of the request.
+            headers (dict[str, str]): Headers of the request.
+
+        Returns:
+            Response: Response of the server.
+        """
+        async with self.slots:
+            if self.idle:
+                try:
+                    return await self.send(
+                        self.idle.pop(), method, target, body, headers
+                    )
+                except StaleConnection:
+                    pass
+                except STALE_ERRORS:
+                    if method not in IDEMPOTENT_METHODS:
+                        raise
+            return await self.send(
+                await self.connect(), method, target, body, headers
+            )
+
+    def close(self) -> None:
+        """Close the idle connections."""
+        idle, self.idle = self.idle, []
+        for connection in idle:
+            connection.close()
+
+
+class AsyncDogsClient(BaseClient):
+    """
+    Asyncio client of the dogs API.
+
+    Args:
+        BaseClient: Requests and responses of the API.
+    """
+
+    def __init__(self, base_url: str, **options) -> None:
+        """
+        Initialize the client, connections are opened on demand.
+
+        Args:
+            base_url (str): URL of the server, e.g. 'http://localhost:8000'.
+            options: Options of BaseClient.
+        """
+        super().__init__(base_url, **options)
+        self.pool = AsyncConnectionPool(
+            self.endpoint, self.max_connections, self.timeout
+        )
+
+    async def __aenter__(self) -> "AsyncDogsClient":
+        """
+        Use the client as an async context manager.
+
+        Returns:
+            AsyncDogsClient: The client.
+        """
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Close the connections on exit."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the idle connections."""
+        self.pool.close()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: dict | None = None,
+        data: Any = None,
+        headers: dict[str, str] | None = None,
+    ) -> Any:
+        """
+        Send the request to the API and retry it if it failed.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path relative to the API, e.g. 'dogs/1/'.
+            params (dict | None): Query parameters.
+            data (Any): JSON data of the body.
+            headers (dict[str, str] | None): Headers of the request.
+
+        Raises:
+            ApiError: The response status is not 2xx.
+
+        Returns:
+            Any: Decoded JSON body of the response.
+        """
+        target: str = self.get_target(path, params)
+        body, all_headers = self.encode(data, headers)
+        attempt = 1
+        while True:
+            try:
+                response: Response = await self.pool.request(
+                    method, target, body, all_headers
+                )
+            except (OSError, EOFError, http.client.HTTPException) as error:
+                delay: float | None = self.retry.get_retry_delay(
+                    attempt,
+                    method,
+                    None,
+                    sent=not isinstance(error, ConnectError),
+                )
+                if delay is None:
+                    raise
+            else:
+                delay = self.retry.get_retry_delay(
+                    attempt,
+                    method,
+                    response.status,
+                    retry_after=response.headers.get("retry-after"),
+                )
+                if delay is None:
+                    return self.decode(response)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get_page(
+        self,
+        path: str,
+        params: dict | None,
+        number: int,
+    ) -> dict:
+        """
+        Get the page of the list.
+
+        Args:
+            path (str): Path of the list relative to the API.
+            params (dict | None): Query parameters of the list.
+            number (int): Page number from 1.
+
+        Returns:
+            dict: Page with 'count', 'next' and 'results'.
+        """
+        return await self.request(
+            "GET", path, params=self.get_page_params(params, number)
+        )
+
+    async def iter_pages(
+        self,
+        path: str,
+        params: dict | None = None,
+        prefetch: int = 2,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Read all pages of the list lazily.
+
+        The number of pages is taken from the first page, and the next
+        'prefetch' pages are requested by tasks while the caller reads
+        the current one. A page which is gone since then ends the list.
+
+        Args:
+            path (str): Path of the list relative to the API.
+            params (dict | None): Query parameters of the list.
+            prefetch (int): Number of pages requested ahead.
+
+        Yields:
+            list[dict]: Results of the pages in order.
+        """
+        first: dict = await self.get_page(path, params, 1)
+        yield first["results"]
+        page_count: int = self.get_page_count(first)
+
+        pending: deque[asyncio.Task] = deque()
+        try:
+            for number in range(2, page_count + 1):
+                pending.append(
+                    asyncio.create_task(self.get_page(path, params, number))
+                )
+                if len(pending) > prefetch:
+                    yield (await pending.popleft())["results"]
+            while pending:
+                yield (await pending.popleft())["results"]
+        except ApiError as error:
+            if error.status != 404:
+                raise
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def iter_results(
+        self,
+        path: str,
+        params: dict | None = None,
+        prefetch: int = 2,
+    ) -> AsyncIterator[dict]:
+        """
+        Read all objects of the list lazily, see 'iter_pages'.
+
+        Args:
+            path (str): Path of the list relative to the API.
+            params (dict | None): Query parameters of the list.
+            prefetch (int): Number of pages requested ahead.
+
+        Yields:
+            dict: Objects in the order of the list.
+        """
+        async for results in self.iter_pages(path, params, prefetch):
+            for result in results:
+                yield result
+
+    def iter_dogs(self, prefetch: int = 2, **params) -> AsyncIterator[dict]:
+        """
+        Read all dogs lazily.
+
+        Args:
+            prefetch (int): Number of pages requested ahead.
+            params: Query parameters of the list.
+
+        Returns:
+            AsyncIterator[dict]: Dogs in the order of the list.
+        """
+        return self.iter_results("dogs/", params, prefetch)
+
+    def iter_breeds(self, prefetch: int = 2, **params) -> AsyncIterator[dict]:
+        """
+        Read all breeds lazily.
+
+        Args:
+            prefetch (int): Number of pages requested ahead.
+            params: Query parameters of the list.
+
+        Returns:
+            AsyncIterator[dict]: Breeds in the order of the list.
+        """
+        return self.iter_results("breeds/", params, prefetch)
+
+    async def bulk_create(
+        self,
+        path: str,
+        items: Iterable[dict],
+        chunk_size: int = MAX_BATCH_SIZE,
+        concurrency: int = 4,
+    ) -> BulkResult:
+        """
+        Create the objects by batch requests sent concurrently.
+
+        Items are created independently: an invalid one is reported in
+        the errors and doesn't stop the others.
+
+        Args:
+            path (str): Path of the list relative to the API.
+            items (Iterable[dict]): Objects to create.
+            chunk_size (int): Items in a batch request.
+            concurrency (int): Max number of batches sent at once.
+
+        Returns:
+            BulkResult: Created objects and failed items.
+        """
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def send(start: int, body: dict) -> tuple[int, dict]:
+            async with semaphore:
+                return start, await self.request("POST", "batch/", data=body)
+
+        return self.collect_bulk(
+            list(
+                await asyncio.gather(
+                    *(
+                        send(start, body)
+                        for start, body in self.get_batches(
+                            path, list(items), chunk_size
+                        )
+                    )
+                )
+            )
+        )
+
+    async def bulk_create_dogs(
+        self,
+        items: Iterable[dict],
+        **options,
+    ) -> BulkResult:
+        """
+        Create the dogs, see 'bulk_create'.
+
+        Args:
+            items (Iterable[dict]): Dogs to create.
+            options: Options of 'bulk_create'.
+
+        Returns:
+            BulkResult: Created dogs and failed items.
+        """
+        return await self.bulk_create("dogs/", items, **options)
+
+    async def bulk_create_breeds(
+        self,
+        items: Iterable[dict],
+        **options,
+    ) -> BulkResult:
+        """
+        Create the breeds, see 'bulk_create'.
+
+        Args:
+            items (Iterable[dict]): Breeds to create.
+            options: Options of 'bulk_create'.
+
+        Returns:
+            BulkResult: Created breeds and failed items.
+        """
+        return await self.bulk_create("breeds/", items, **options)
@@ -0,0 +1,436 @@
+"""Parts of the API clients shared by the sync and asyncio versions.
+
+The clients only build requests and read responses here, the network
+is handled by their connection pools. Nothing here depends on Django,
+the package needs only the standard library.
+"""
+
+import base64
+import json
+import math
+import random
+import time
+from collections.abc import Iterator
+from email.utils import parsedate_to_datetime
+from typing import Any, NamedTuple
+from urllib.parse import urlencode, urlsplit
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_CONNECTIONS = 10
+# the batch endpoint accepts no more sub-requests than this
+MAX_BATCH_SIZE = 50
+
+IDEMPOTENT_METHODS: frozenset[str] = frozenset(
+    ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+)
+# the server shed the request or canceled it before the commit
+UNPROCESSED_STATUSES: frozenset[int] = frozenset((429, 503))
+RETRY_STATUSES: frozenset[int] = UNPROCESSED_STATUSES | {502, 504}
+
+
+class ApiError(Exception):
+    """
+    Error response of the API.
+
+    Args:
+        Exception: Python base exception.
+    """
+
+    def __init__(self, status: int, body: Any) -> None:
+        """
+        Initialize the error.
+
+        Args:
+            status (int): HTTP status.
+            body (Any): Decoded JSON body or the raw text.
+        """
+        super().__init__(f"API error {status}: {body}")
+        self.status = status
+        self.body = body
+
+
+class ConnectError(ConnectionError):
+    """
+    Connection to the server failed, so the request wasn't sent.
+
+    Args:
+        ConnectionError: Python connection error.
+    """
+
+
+class StaleConnection(ConnectionError):
+    """
+    Connection closed by the server before the status of the response.
+
+    Args:
+        ConnectionError: Python connection error.
+    """
+
+
+class Response(NamedTuple):
+    """Response read from a connection."""
+
+    status: int
+    # header names are lowercase
+    headers: dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        """
+        Decode the JSON body.
+
+        Returns:
+            Any: Decoded body, None if it is empty.
+        """
+        return json.loads(self.body) if self.body else None
+
+
+class Endpoint(NamedTuple):
+    """Address of the API server."""
+
+    scheme: str
+    host: str
+    port: int
+    prefix: str
+
+    @classmethod
+    def from_url(cls, base_url: str) -> "Endpoint":
+        """
+        Parse the base URL of the server.
+
+        Args:
+            base_url (str): URL like 'http://localhost:8000'.
+
+        Raises:
+            ValueError: The scheme is not HTTP or HTTPS.
+
+        Returns:
+            Endpoint: Parsed address.
+        """
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {base_url}")
+        return cls(
+            scheme=parts.scheme,
+            host=parts.hostname or "localhost",
+            port=parts.port or (443 if parts.scheme == "https" else 80),
+            prefix=parts.path.rstrip("/"),
+        )
+
+    @property
+    def host_header(self) -> str:
+        """
+        Get the value of the 'Host' header.
+
+        Returns:
+            str: Host with the port unless it is the default one.
+        """
+        default: int = 443 if self.scheme == "https" else 80
+        return (
+            self.host if self.port == default else f"{self.host}:{self.port}"
+        )
+
+
+class RetryPolicy(NamedTuple):
+    """
+    Retries of failed requests with exponential backoff.
+
+    Idempotent requests are retried after connection errors and
+    RETRY_STATUSES. Others are retried only if the server certainly
+    hasn't run them: the connection wasn't established or the status
+    is one of UNPROCESSED_STATUSES.
+    """
+
+    attempts: int = 4
+    backoff: float = 0.1
+    max_backoff: float = 5.0
+
+    def can_retry(self, method: str, status: int | None, sent: bool) -> bool:
+        """
+        Check the failed request can be sent again.
+
+        Args:
+            method (str): HTTP method.
+            status (int | None): Status of the response, None after
+                a connection error.
+            sent (bool): Whether the request may have reached the server.
+
+        Returns:
+            bool: Whether to retry.
+        """
+        idempotent: bool = method in IDEMPOTENT_METHODS
+        if status is None:
+            return idempotent or not sent
+        if idempotent:
+            return status in RETRY_STATUSES
+        return status in UNPROCESSED_STATUSES
+
+    def get_delay(self, attempt: int, retry_after: str | None) -> float:
+        """
+        Get the pause before the next attempt.
+
+        'Retry-After' of the server is respected up to 'max_backoff'.
+        Otherwise the pause is a random part of the doubled backoff, so
+        clients failed together don't come back together.
+
+        Args:
+            attempt (int): Number of the failed attempt from 1.
+            retry_after (str | None): 'Retry-After' header.
+
+        Returns:
+            float: Pause in seconds.
+        """
+        if retry_after:
+            try:
+                seconds = float(retry_after)
+            except ValueError:
+                try:
+                    seconds = (
+                        parsedate_to_datetime(retry_after).timestamp()
+                        - time.time()
+                    )
+                except (TypeError, ValueError):
+                    seconds = 0.0
+            return min(max(seconds, 0.0), self.max_backoff)
+        return random.uniform(
+            0, min(self.backoff * 2 ** (attempt - 1), self.max_backoff)
+        )
+
+    def get_retry_delay(
+        self,
+        attempt: int,
+        method: str,
+        status: int | None,
+        sent: bool = True,
+        retry_after: str | None = None,
+    ) -> float | None:
+        """
+        Get the pause before the next attempt if there is one.
+
+        Args:
+            attempt (int): Number of the failed attempt from 1.
+            method (str): HTTP method.
+            status (int | None): Status of the response, None after
+                a connection error.
+            sent (bool): Whether the request may have reached the server.
+            retry_after (str | None): 'Retry-After' header.
+
+        Returns:
+            float | None: Pause in seconds, None if the request is not
+                retried.
+        """
+        if attempt >= self.attempts or not self.can_retry(
+            method, status, sent
+        ):
+            return None
+        return self.get_delay(attempt, retry_after)
+
+
+DEFAULT_RETRY = RetryPolicy()
+
+
+class BulkItemError(NamedTuple):
+    """Failed item of a bulk create."""
+
+    index: int
+    status: int
+    body: Any
+
+
+class BulkResult(NamedTuple):
+    """Result of a bulk create."""
+
+    # created objects in the order of the items
+    created: list[dict]
+    errors: list[BulkItemError]
+
+
+class BaseClient:
+    """
+    Requests and responses of the API without the network.
+
+    Args:
+        base_url (str): URL of the server, e.g. 'http://localhost:8000'.
+        auth (tuple[str, str] | None): Username and password of the
+            basic authentication.
+        headers (dict[str, str] | None): Headers of every request.
+        timeout (float): Timeout of a request in seconds.
+        max_connections (int): Max number of open connections.
+        retry (RetryPolicy): Retries of failed requests.
+    """
+
+    api_path = "/api"
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        auth: tuple[str, str] | None = None,
+        headers: dict[str, str] | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        retry: RetryPolicy = DEFAULT_RETRY,
+    ) -> None:
+        """Initialize the client."""
+        self.endpoint = Endpoint.from_url(base_url)
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.retry = retry
+        self.headers: dict[str, str] = {
+            "Accept": "application/json",
+            **(headers or {}),
+        }
+        if auth is not None:
+            token: str = base64.b64encode(":".join(auth).encode()).decode()
+            self.headers["Authorization"] = f"Basic {token}"
+
+    def get_target(self, path: str, params: dict | None = None) -> str:
+        """
+        Get the request target of the API path.
+
+        Args:
+            path (str): Path relative to the API, e.g. 'dogs/'.
+            params (dict | None): Query parameters, lists are repeated.
+
+        Returns:
+            str: Path with the query string.
+        """
+        target: str = f"{self.endpoint.prefix}{self.api_path}/{path}"
+        if params:
+            target += "?" + urlencode(params, doseq=True)
+        return target
+
+    def encode(
+        self,
+        data: Any,
+        headers: dict[str, str] | None,
+    ) -> tuple[bytes | None, dict[str, str]]:
+        """
+        Get the body and the headers of a request.
+
+        Args:
+            data (Any): JSON data of the body, None for no body.
+            headers (dict[str, str] | None): Headers of the request.
+
+        Returns:
+            tuple[bytes | None, dict[str, str]]: Body and all headers.
+        """
+        all_headers: dict[str, str] = {
+            **self.headers,
+            "Host": self.endpoint.host_header,
+            **(headers or {}),
+        }
+        if data is None:
+            return None, all_headers
+        all_headers["Content-Type"] = "application/json"
+        return json.dumps(data).encode(), all_headers
+
+    @staticmethod
+    def decode(response: Response) -> Any:
+        """
+        Get the data of a successful response.
+
+        Args:
+            response (Response): Response of the server.
+
+        Raises:
+            ApiError: The status is not 2xx.
+
+        Returns:
+            Any: Decoded JSON body.
+        """
+        if 200 <= response.status < 300:
+            return response.json()
+        try:
+            body: Any = response.json()
+        except ValueError:
+            body = response.body.decode(errors="replace")
+        raise ApiError(response.status, body)
+
+    @staticmethod
+    def get_page_count(page: dict) -> int:
+        """
+        Get the number of pages from the first page.
+
+        Args:
+            page (dict): First page with 'count', 'next' and 'results'.
+
+        Returns:
+            int: Number of pages at the time of the first page.
+        """
+        if not page.get("next") or not page["results"]:
+            return 1
+        return math.ceil(page["count"] / len(page["results"]))
+
+    @staticmethod
+    def get_page_params(params: dict | None, number: int) -> dict:
+        """
+        Get the query parameters of the page.
+
+        Args:
+            params (dict | None): Query parameters of the list.
+            number (int): Page number from 1.
+
+        Returns:
+            dict: Query parameters with the page number.
+        """
+        return {**(params or {}), "page": number}
+
+    def get_batches(
+        self,
+        path: str,
+        items: list[dict],
+        chunk_size: int,
+    ) -> Iterator[tuple[int, dict]]:
+        """
+        Split creates of the items into batch requests.
+
+        Args:
+            path (str): Path of the list relative to the API.
+            items (list[dict]): Objects to create.
+            chunk_size (int): Items in a batch, no more than
+                MAX_BATCH_SIZE.
+
+        Yields:
+            tuple[int, dict]: Index of the first item and the body of
+                the batch request.
+        """
+        size: int = max(1, min(chunk_size, MAX_BATCH_SIZE))
+        # sub-requests are resolved by the server without the prefix
+        target: str = f"{self.api_path}/{path}"
+        for start in range(0, len(items), size):
+            stop: int = start + size
+            yield start, {
+                "requests": [
+                    {"method": "POST", "path": target, "body": item}
+                    for item in items[start:stop]
+                ]
+            }
+
+    @staticmethod
+    def collect_bulk(results: list[tuple[int, dict]]) -> BulkResult:
+        """
+        Collect the responses of the batches.
+
+        Args:
+            results (list[tuple[int, dict]]): Index of the first item
+                and the response of each batch.
+
+        Returns:
+            BulkResult: Created objects and failed items.
+        """
+        created: list[dict] = []
+        errors: list[BulkItemError] = []
+        for start, batch in sorted(results, key=lambda result: result[0]):
+            for offset, response in enumerate(batch["responses"]):
+                if response["status"] == 201:
+                    created.append(response["body"])
+                else:
+                    errors.append(
+                        BulkItemError(
+                            start + offset,
+                            response["status"],
+                            response["body"],
+                        )
+                    )
+        return BulkResult(created, errors)
@@ -0,0 +1,448 @@
+"""Synchronous client of the dogs API.
+
+Connections are kept alive in a pool shared by the threads of the
+client, so a request doesn't pay for the TCP handshake. Pages of a list
+are requested ahead by a few threads while the caller reads the current
+one, and bulk creates send their batches in parallel.
+"""
+
+import http.client
+import threading
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from dogs_client.base import (
+    IDEMPOTENT_METHODS,
+    MAX_BATCH_SIZE,
+    ApiError,
+    BaseClient,
+    BulkResult,
+    ConnectError,
+    Endpoint,
+    Response,
+    StaleConnection,
+)
+
+# errors of a kept alive connection closed by the server
+STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+class ConnectionPool:
+    """
+    Kept alive HTTP connections shared by threads.
+
+    The last returned connection is taken first: it is the least likely
+    to have been closed by the server.
+
+    Args:
+        endpoint (Endpoint): Address of the server.
+        max_connections (int): Max number of connections in use.
+        timeout (float): Timeout of socket operations in seconds.
+    """
+
+    def __init__(
+        self,
+        endpoint: Endpoint,
+        max_connections: int,
+        timeout: float,
+    ) -> None:
+        """Initialize the pool without connections."""
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.idle: list[http.client.HTTPConnection] = []
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_connections)
+        # number of opened connections, for the statistics
+        self.created = 0
+
+    def connect(self) -> http.client.HTTPConnection:
+        """
+        Open a new connection.
+
+        Raises:
+            ConnectError: The server can't be reached.
+
+        Returns:
+            http.client.HTTPConnection: Connected connection.
+        """
+        connection_class: type[http.client.HTTPConnection] = (
+            http.client.HTTPSConnection
+            if self.endpoint.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        connection = connection_class(
+            self.endpoint.host, self.endpoint.port, timeout=self.timeout
+        )
+        try:
+            connection.connect()
+        except OSError as error:
+            raise ConnectError(str(error)) from error
+        with self.lock:
+            self.created += 1
+        return connection
+
+    def send(
+        self,
+        connection: http.client.HTTPConnection,
+        method: str,
+        target: str,
+        body: bytes | None,
+        headers: dict[str, str],
+    ) -> Response:
+        """
+        Send the request and return the connection to the pool.
+
+        Args:
+            connection (http.client.HTTPConnection): Connection to use.
+            method (str): HTTP method.
+            target (str): Path with the query string.
+            body (bytes | None): Body of the request.
+            headers (dict[str, str]): Headers of the request.
+
+        Raises:
+            StaleConnection: The connection was closed before the status
+                of the response.
+
+        Returns:
+            Response: Response of the server.
+        """
+        try:
+            try:
+                connection.request(method, target, body=body, headers=headers)
+                response = connection.getresponse()
+            except STALE_ERRORS as error:
+                raise StaleConnection(str(error)) from error
+            data: bytes = response.read()
+        except BaseException:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            with self.lock:
+                self.idle.append(connection)
+        return Response(
+            response.status,
+            {name.lower(): value for name, value in response.getheaders()},
+            data,
+        )
+
+    def request(
+        self,
+        method: str,
+        target: str,
+        body: bytes | None,
+        headers: dict[str, str],
+    ) -> Response:
+        """
+        Send the request over an idle or a new connection.
+
+        An idle connection closed by the server is replaced by a new one
+        once. Any request is sent again if no status was received: the
+        server closes only connections without requests, so the request
+        hasn't been run. After the status, the server has run it, so only
+        idempotent requests are sent again, others fail as sent.
+
+        Args:
+            method (str): HTTP method.
+            target (str): Path with the query string.
+            body (bytes | None): Body of the request.
+            headers (dict[str, str]): Headers of the request.
+
+        Returns:
+            Response: Response of the server.
+        """
+        with self.slots:
+            with self.lock:
+                connection: http.client.HTTPConnection | None = (
+                    self.idle.pop() if self.idle else None
+                )
+            if connection is not None:
+                try:
+                    return self.send(connection, method, target, body, headers)
+                except StaleConnection:
+                    pass
+                except STALE_ERRORS:
+                    if method not in IDEMPOTENT_METHODS:
+                        raise
+            return self.send(self.connect(), method, target, body, headers)
+
+    def close(self) -> None:
+        """Close the idle connections."""
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for connection in idle:
+            connection.close()
+
+
+class DogsClient(BaseClient):
+    """
+    Synchronous client of the dogs API, safe to share by threads.
+
+    Args:
+        BaseClient: Requests and responses of the API.
+    """
+
+    def __init__(self, base_url: str, **options) -> None:
+        """
+        Initialize the client, connections are opened on demand.
+
+        Args:
+            base_url (str): URL of the server, e.g. 'http://localhost:8000'.
+            options: Options of BaseClient.
+        """
+        super().__init__(base_url, **options)
+        self.pool = ConnectionPool(
+            self.endpoint, self.max_connections, self.timeout
+        )
+
+    def __enter__(self) -> "DogsClient":
+        """
+        Use the client as a context manager.
+
+        Returns:
+            DogsClient: The client.
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the connections on exit."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the idle connections."""
+        self.pool.close()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: dict | None = None,
+        data: Any = None,
+        headers: dict[str, str] | None = None,
+    ) -> Any:
+        """
+        Send the request to the API and retry it if it failed.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path relative to the API, e.g. 'dogs/1/'.
+            params (dict | None): Query parameters.
+            data (Any): JSON data of the body.
+            headers (dict[str, str] | None): Headers of the request.
+
+        Raises:
+            ApiError: The response status is not 2xx.
+
+        Returns:
+            Any: Decoded JSON body of the response.
+        """
+        target: str = self.get_target(path, params)
+        body, all_headers = self.encode(data, headers)
+        attempt = 1
+        while True:
+            try:
+                response: Response = self.pool.request(
+                    method, target, body, all_headers
+                )
+            except (OSError, http.client.HTTPException) as error:
+                delay: float | None = self.retry.get_retry_delay(
+                    attempt,
+                    method,
+                    None,
+                    sent=not isinstance(error, ConnectError),
+                )
+                if delay is None:
+                    raise
+            else:
+                delay = self.retry.get_retry_delay(
+                    attempt,
+                    method,
+                    response.status,
+                    retry_after=response.headers.get("retry-after"),
+                )
+                if delay is None:
+                    return self.decode(response)
+            time.sleep(delay)
+            attempt += 1
+
+    def get_page(self, path: str, params: dict | None, number: int) -> dict:
+        """
+        Get the page of the list.
+
+        Args:
+            path (str): Path of the list relative to the API.
+            params (dict | None): Query parameters of the list.
+            number (int): Page number from 1.
+
+        Returns:
+            dict: Page with 'count', 'next' and 'results'.
+        """
+        return self.request(
+            "GET", path, params=self.get_page_params(params, number)
+        )
+
+    def iter_pages(
+        self,
+        path: str,
+        params: dict | None = None,
+        prefetch: int = 2,
+    ) -> Iterator[list[dict]]:
+        """
+        Read all pages of the list lazily.
+
+        The number of pages is taken from the first page, and the next
+        'prefetch' pages are requested by threads while the caller reads
+        the current one. A page which is gone since then ends the list.
+
+        Args:
+            path (str): Path of the list relative to the API.
+            params (dict | None): Query parameters of the list.
+            prefetch (int): Number of pages requested ahead.
+
+        Yields:
+            list[dict]: Results of the pages in order.
+        """
+        first: dict = self.get_page(path, params, 1)
+        yield first["results"]
+        page_count: int = self.get_page_count(first)
+        if page_count == 1:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=max(prefetch, 1))
+        pending: deque[Future] = deque()
+        try:
+            for number in range(2, page_count + 1):
+                pending.append(
+                    executor.submit(self.get_page, path, params, number)
+                )
+                if len(pending) > prefetch:
+                    yield pending.popleft().result()["results"]
+            while pending:
+                yield pending.popleft().result()["results"]
+        except ApiError as error:
+            if error.status != 404:
+                raise
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_results(
+        self,
+        path: str,
+        params: dict | None = None,
+        prefetch: int = 2,
+    ) -> Iterator[dict]:
+        """
+        Read all objects of the list lazily, see 'iter_pages'.
+
+        Args:
+            path (str): Path of the list relative to the API.
+            params (dict | None): Query parameters of the list.
+            prefetch (int): Number of pages requested ahead.
+
+        Yields:
+            dict: Objects in the order of the list.
+        """
+        for results in self.iter_pages(path, params, prefetch):
+            yield from results
+
+    def iter_dogs(self, prefetch: int = 2, **params) -> Iterator[dict]:
+        """
+        Read all dogs lazily.
+
+        Args:
+            prefetch (int): Number of pages requested ahead.
+            params: Query parameters of the list.
+
+        Returns:
+            Iterator[dict]: Dogs in the order of the list.
+        """
+        return self.iter_results("dogs/", params, prefetch)
+
+    def iter_breeds(self, prefetch: int = 2, **params) -> Iterator[dict]:
+        """
+        Read all breeds lazily.
+
+        Args:
+            prefetch (int): Number of pages requested ahead.
+            params: Query parameters of the list.
+
+        Returns:
+            Iterator[dict]: Breeds in the order of the list.
+        """
+        return self.iter_results("breeds/", params, prefetch)
+
+    def bulk_create(
+        self,
+        path: str,
+        items: Iterable[dict],
+        chunk_size: int = MAX_BATCH_SIZE,
+        concurrency: int = 4,
+    ) -> BulkResult:
+        """
+        Create the objects by batch requests sent in parallel.
+
+        Items are created independently: an invalid one is reported in
+        the errors and doesn't stop the others.
+
+        Args:
+            path (str): Path of the list relative to the API.
+            items (Iterable[dict]): Objects to create.
+            chunk_size (int): Items in a batch request.
+            concurrency (int): Max number of batches sent at once.
+
+        Returns:
+            BulkResult: Created objects and failed items.
+        """
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+            futures: list[tuple[int, Future]] = [
+                (
+                    start,
+                    executor.submit(self.request, "POST", "batch/", data=body),
+                )
+                for start, body in self.get_batches(
+                    path, list(items), chunk_size
+                )
+            ]
+            return self.collect_bulk(
+                [(start, future.result()) for start, future in futures]
+            )
+
+    def bulk_create_dogs(self, items: Iterable[dict], **options) -> BulkResult:
+        """
+        Create the dogs, see 'bulk_create'.
+
+        Args:
+            items (Iterable[dict]): Dogs to create.
+            options: Options of 'bulk_create'.
+
+        Returns:
+            BulkResult: Created dogs and failed items.
+        """
+        return self.bulk_create("dogs/", items, **options)
+
+    def bulk_create_breeds(
+        self,
+        items: Iterable[dict],
+        **options,
+    ) -> BulkResult:
+        """
+        Create the breeds, see 'bulk_create'.
+
+        Args:
+            items (Iterable[dict]): Breeds to create.
+            options: Options of 'bulk_create'.
+
+        Returns:
+            BulkResult: Created breeds and failed items.
+        """
+        return self.bulk_create("breeds/", items, **options)
@@ -48,6 +48,7 @@ ALLOWED_HOSTS = [
 
 # Application definition
 INSTALLED_APPS = [
+    "daphne",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -60,6 +61,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # requests of SCOPED_MIDDLEWARE paths skip the rest of the list
+    "app_dogs.middleware.PathScopedMiddleware",
+    "app_dogs.middleware.AccessLogMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -67,10 +71,28 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "app_dogs.middleware.ProfilingMiddleware",
     # 'rest_framework.middleware.AuthenticationMiddleware',
     # 'rest_framework.middleware.AuthorizationMiddleware',
 ]
 
+# Middlewares of the path prefixes, see app_dogs/middleware.py
+SCOPED_MIDDLEWARE = {
+    # JSON clients don't need the messages and the clickjacking headers,
+    # DRF views are CSRF exempt and check the CSRF token of the session
+    # users themselves; sessions are kept for the browsable API and the
+    # staff profiling, they are not read without the cookie
+    "/api/": [
+        "app_dogs.middleware.AccessLogMiddleware",
+        "app_dogs.middleware.AdmissionControlMiddleware",
+        "django.middleware.security.SecurityMiddleware",
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.middleware.common.CommonMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "app_dogs.middleware.ProfilingMiddleware",
+    ],
+}
+
 ROOT_URLCONF = "project.urls"
 
 TEMPLATES = [
@@ -90,6 +112,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "project.wsgi.application"
+ASGI_APPLICATION = "project.asgi.application"
 
 
 # Database
@@ -156,6 +179,247 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 5,
 }
 
+# Feed of the Dog and Breed changes, see app_dogs/utils/changelog.py
+CHANGE_FEED = {
+    "PAGE_SIZE": 500,
+    "MAX_PAGE_SIZE": 5000,
+    # superseded changes older than this are compacted
+    "COMPACT_AFTER_HOURS": int(getenv("CHANGE_FEED_COMPACT_AFTER_HOURS", 1)),
+    # all changes older than this are removed
+    "RETENTION_DAYS": int(getenv("CHANGE_FEED_RETENTION_DAYS", 7)),
+    "PRUNE_BATCH_SIZE": 5000,
+}
+
+# Search of similar breeds, see app_dogs/utils/similarity.py
+BREED_SIMILARITY = {
+    "DEFAULT_K": 5,
+    "MAX_K": 100,
+}
+
+# Coalescing of single dog inserts, see app_dogs/utils/batching.py
+DOG_WRITE_BATCHING = {
+    "ENABLED": getenv("DOG_WRITE_BATCHING", "0") == "1",
+    "MAX_ROWS": int(getenv("DOG_WRITE_BATCHING_MAX_ROWS", 100)),
+    "MAX_DELAY_MS": int(getenv("DOG_WRITE_BATCHING_MAX_DELAY_MS", 5)),
+    # a request gets 503 if its batch isn't flushed in time
+    "RESULT_TIMEOUT_MS": int(
+        getenv("DOG_WRITE_BATCHING_RESULT_TIMEOUT_MS", 5000)
+    ),
+    # the flushing thread closes its connection after this idle time
+    "IDLE_CLOSE_MS": int(getenv("DOG_WRITE_BATCHING_IDLE_CLOSE_MS", 1000)),
+}
+
+# Retry of conflicting writes, see app_dogs/utils/retry.py
+DB_WRITE_RETRY = {
+    # attempts of a write request including the first one
+    "MAX_ATTEMPTS": int(getenv("DB_WRITE_RETRY_MAX_ATTEMPTS", 10)),
+    "BASE_DELAY_MS": 10,
+    "MAX_DELAY_MS": 500,
+}
+
+# Coalescing of identical concurrent reads, see app_dogs/utils/coalescing.py
+SINGLE_FLIGHT = {
+    "ENABLED": getenv("SINGLE_FLIGHT", "1") == "1",
+    # followers waiting longer than this run the request themselves
+    "WAIT_MS": 10_000,
+    # coalesce requests of all workers by an advisory lock and the cache
+    "CROSS_PROCESS": getenv("SINGLE_FLIGHT_CROSS_PROCESS", "0") == "1",
+    "CACHE": "default",
+    # interval of the advisory lock polling
+    "POLL_MS": 10,
+}
+
+# Schema changes of large tables, see app_dogs/utils/schema.py
+SCHEMA_CHANGES = {
+    # ids in a batch of a backfill, each batch is a transaction
+    "BATCH_SIZE": 10_000,
+    # pause after each batch to leave the database to the requests
+    "PAUSE_MS": 50,
+    # DDL waiting longer for a lock fails instead of blocking queries
+    "LOCK_TIMEOUT_MS": 5000,
+    # share of the table pages the dry run times operations on
+    "SAMPLE_PERCENT": 1,
+    # migrateonline refuses to block writes for longer than this
+    "MAX_BLOCKING_SECONDS": 1,
+}
+
+# Latency budgets of API requests, see app_dogs/utils/deadlines.py
+REQUEST_DEADLINES = {
+    # budget in milliseconds of views not listed below, 0 for no limit
+    "DEFAULT_MS": int(getenv("REQUEST_DEADLINE_MS", 3000)),
+    # budgets of '<basename>.<action>' views
+    "VIEWS": {
+        # counts dogs of every breed
+        "breeds.list": 5000,
+        # the first request reads all dogs into memory
+        "dogs.rank": 10_000,
+        # answered from memory, the statement timeout would cost queries
+        "breeds.autocomplete": 0,
+    },
+    "RETRY_AFTER_SECONDS": 5,
+}
+
+# Admission control of API requests, see app_dogs/utils/admission.py
+ADMISSION_CONTROL = {
+    "ENABLED": getenv("ADMISSION_CONTROL", "1") == "1",
+    # requests of a worker process in flight by endpoint classes, more
+    # wait in the queue of the class and get 503 if it's full or after
+    # the queue timeout; the target latency is used by the adaptive mode
+    "CLASSES": {
+        "read": {
+            "LIMIT": 32,
+            "QUEUE_SIZE": 64,
+            "QUEUE_TIMEOUT_MS": 200,
+            "TARGET_MS": 300,
+        },
+        "aggregate": {
+            "LIMIT": 8,
+            "QUEUE_SIZE": 16,
+            "QUEUE_TIMEOUT_MS": 1000,
+            "TARGET_MS": 1500,
+        },
+        "write": {
+            "LIMIT": 16,
+            "QUEUE_SIZE": 32,
+            "QUEUE_TIMEOUT_MS": 500,
+            "TARGET_MS": 500,
+        },
+    },
+    # classes of '<basename>.<action>' views and of URL names of other
+    # views, the rest are 'read' or 'write' by the method, None for
+    # views without limits
+    "VIEWS": {
+        # count or average dogs of breeds
+        "dogs.list": "aggregate",
+        "breeds.list": "aggregate",
+        "dogs.rank": "aggregate",
+        "snapshots.create": "aggregate",
+        # the stream never ends
+        "stream": None,
+        # sub-requests of a batch are admitted by their own classes
+        "batch": None,
+    },
+    # limits follow the latency of the classes, see the module
+    "ADAPTIVE": {
+        "ENABLED": getenv("ADMISSION_CONTROL_ADAPTIVE", "0") == "1",
+        "WINDOW_SECONDS": 1,
+        "MIN_SAMPLES": 10,
+        "DECREASE": 0.75,
+        "MIN_LIMIT": 1,
+    },
+    "RETRY_AFTER_SECONDS": 1,
+}
+
+# Profiling of requests by staff users, see app_dogs/utils/profiling.py
+REQUEST_PROFILING = {
+    "DIRECTORY": getenv("REQUEST_PROFILING_DIR") or BASE_DIR / "profiles",
+    # older profiles are removed
+    "MAX_RECORDS": 200,
+    # functions shown in the cProfile stats
+    "MAX_FUNCTIONS": 60,
+}
+
+# Filtering of breeds by their traits, see app_dogs/utils/filtering.py
+BREED_FILTERING = {
+    # more changes than this are not applied, all breeds are read again
+    "MAX_APPLIED_CHANGES": 10_000,
+}
+
+# Autocomplete of breed names, see app_dogs/utils/autocomplete.py
+BREED_AUTOCOMPLETE = {
+    "DEFAULT_LIMIT": 10,
+    "MAX_LIMIT": 50,
+    # an older index is caught up with the change log in the background
+    "REFRESH_SECONDS": 5,
+    # dogs of the breeds are counted again not more often than this
+    "RECOUNT_SECONDS": 300,
+    # more changes than this are not applied, all breeds are read again
+    "MAX_APPLIED_CHANGES": 10_000,
+}
+
+# Ranking of dogs by the owner preferences, see app_dogs/utils/ranking.py
+DOG_RANKING = {
+    # dogs read from the database or scored at once
+    "CHUNK_SIZE": 100_000,
+    # more changes than this are not applied, all dogs are read again
+    "MAX_APPLIED_CHANGES": 10_000,
+    # difference of ages in years treated as a full mismatch
+    "AGE_SCALE": 10,
+    "PAGE_SIZE": 20,
+    "MAX_PAGE_SIZE": 100,
+    # only this number of the best dogs can be paged through
+    "MAX_RESULTS": 1000,
+}
+
+# Live stream of the Dog and Breed changes, see app_dogs/utils/stream.py
+CHANGE_STREAM = {
+    # events waiting for a slow client before it is disconnected
+    "QUEUE_SIZE": 1000,
+    "HEARTBEAT_SECONDS": 15,
+}
+
+# Batches of API requests, see app_dogs/utils/batch.py
+BATCH_REQUESTS = {
+    "MAX_REQUESTS": 50,
+    # threads running reads of a batch at once, each with a connection
+    "MAX_CONCURRENCY": int(getenv("BATCH_MAX_CONCURRENCY", 1)),
+}
+
+# Columnar snapshots of dogs and breeds, see app_dogs/utils/snapshot.py
+SNAPSHOTS = {
+    "DIRECTORY": getenv("SNAPSHOTS_DIR") or BASE_DIR / "snapshots",
+    # rows fetched from the server-side cursor at once
+    "CHUNK_SIZE": 20_000,
+    # older snapshots are removed after a new one is written
+    "KEEP": 3,
+}
+
+# Breeds shared by the worker processes, see app_dogs/utils/sharedbreeds.py
+SHARED_BREED_SNAPSHOT = {
+    # dog counts and average ages of breeds lag dog writes when enabled
+    "ENABLED": getenv("SHARED_BREED_SNAPSHOT", "0") == "1",
+    "DIRECTORY": getenv("SHARED_BREED_SNAPSHOT_DIR") or "/dev/shm",
+    "NAME": "app_dogs_breeds",
+    # older snapshots are written again, the database is read meanwhile
+    "MAX_AGE_SECONDS": int(getenv("SHARED_BREED_SNAPSHOT_MAX_AGE", 10)),
+}
+
+# Access log of the app requests, see app_dogs/utils/accesslog.py
+ACCESS_LOG = {
+    "ENABLED": getenv("ACCESS_LOG", "0") == "1",
+    # share of the requests logged, errors and slow requests always are
+    "SAMPLE_RATE": float(getenv("ACCESS_LOG_SAMPLE_RATE", 1)),
+    "SLOW_MS": int(getenv("ACCESS_LOG_SLOW_MS", 1000)),
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "json": {"()": "app_dogs.utils.accesslog.JsonFormatter"},
+    },
+    "handlers": {
+        # records are written by a thread of the process in batches,
+        # they are dropped when the queue is full
+        "access": {
+            "class": "app_dogs.utils.accesslog.AccessLogHandler",
+            "formatter": "json",
+            # stdout if empty
+            "filename": getenv("ACCESS_LOG_FILE", ""),
+            "queue_size": 10_000,
+            "batch_size": 200,
+            "flush_interval": 0.5,
+        },
+    },
+    "loggers": {
+        "app_dogs.access": {
+            "handlers": ["access"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
+
 if DEBUG:
     # debug toolbar settings
     INTERNAL_IPS = [
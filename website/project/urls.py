@@ -1,10 +1,12 @@
 """Main URL configuration for this django project."""
 
+from app_dogs.admin import profile_urlpatterns
 from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 
 urlpatterns = [
+    path("admin/profiles/", include(profile_urlpatterns)),
     path("admin/", admin.site.urls),
     path(
         route="api-auth/",